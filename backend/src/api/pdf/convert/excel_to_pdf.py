@@ -3,17 +3,16 @@ Excel to PDF Conversion API
 Handles converting Excel spreadsheets to PDF format
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
-import subprocess
-import tempfile
 import os
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor, OFFICE_ENGINES
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -24,6 +23,7 @@ router = APIRouter()
 @router.post("/")
 async def excel_to_pdf(
     file: UploadFile = File(...),
+    engine: str = Form("auto"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +32,7 @@ async def excel_to_pdf(
     
     Args:
         file: Excel file (.xls or .xlsx) to convert
+        engine: "auto" renders simple documents natively and the rest with LibreOffice; "native" or "libreoffice" forces one
         current_user: Authenticated user
         db: Database session
     
@@ -47,6 +48,9 @@ async def excel_to_pdf(
         if file.content_type not in allowed_types:
             raise HTTPException(status_code=400, detail="File must be an Excel file (.xls or .xlsx)")
         
+        if engine not in OFFICE_ENGINES:
+            raise HTTPException(status_code=400, detail=f"Invalid engine. Supported: {', '.join(OFFICE_ENGINES)}")
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
@@ -62,7 +66,7 @@ async def excel_to_pdf(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"input_format": "excel", "output_format": "pdf"}
+            parameters={"input_format": "excel", "output_format": "pdf", "engine": engine}
         )
         
         db.add(job)
@@ -74,12 +78,9 @@ async def excel_to_pdf(
             job.start_processing()
             db.commit()
             
-            # Convert Excel to PDF using LibreOffice
+            # Convert Excel to PDF; the result records the engine used
             output_path = f"storage/temp/excel_to_pdf_{job.id}.pdf"
-            success = await convert_excel_to_pdf(file_info["path"], output_path)
-            
-            if not success:
-                raise Exception("Excel to PDF conversion failed")
+            result = await pdf_processor.excel_to_pdf(file_info["path"], output_path, engine)
             
             # Save processed file
             processed_info = await file_storage.save_processed_file(
@@ -87,88 +88,45 @@ async def excel_to_pdf(
             )
             
             # Complete job
-            job.complete_job(processed_info["path"], {"conversion_successful": True})
+            job.complete_job(processed_info["path"], result)
             job.output_file_name = processed_info["filename"]
             job.output_file_size = processed_info["size"]
             current_user.increment_usage()
             db.commit()
             
-            logger.info(f"Excel to PDF conversion completed for user {current_user.id}, job {job.id}")
+            logger.info(f"Excel to PDF conversion completed for user {current_user.id}, job {job.id} ({result['engine']})")
             
             return {
                 "success": True,
                 "job_id": job.id,
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "engine": result["engine"],
+                "complex_reasons": result["complex_reasons"],
                 "original_size": file_info["size"],
                 "converted_size": processed_info["size"],
                 "input_format": "Excel",
                 "output_format": "PDF"
             }
-            
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"Excel to PDF conversion failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
             db.commit()
             logger.error(f"Excel to PDF conversion failed for job {job.id}: {e}")
             raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
-        
+    
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Excel to PDF conversion error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-async def convert_excel_to_pdf(input_path: str, output_path: str) -> bool:
-    """
-    Convert Excel spreadsheet to PDF using LibreOffice
-    
-    Args:
-        input_path: Path to input Excel file
-        output_path: Path for output PDF file
-    
-    Returns:
-        bool: True if conversion successful, False otherwise
-    """
-    try:
-        # Create temporary directory for LibreOffice
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Use LibreOffice to convert
-            cmd = [
-                "libreoffice",
-                "--headless",
-                "--convert-to", "pdf",
-                "--outdir", temp_dir,
-                input_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                logger.error(f"LibreOffice conversion failed: {result.stderr}")
-                return False
-            
-            # Find the generated PDF file
-            input_filename = os.path.basename(input_path)
-            pdf_filename = os.path.splitext(input_filename)[0] + ".pdf"
-            temp_pdf_path = os.path.join(temp_dir, pdf_filename)
-            
-            if not os.path.exists(temp_pdf_path):
-                logger.error("Generated PDF file not found")
-                return False
-            
-            # Copy to output path
-            import shutil
-            shutil.copy2(temp_pdf_path, output_path)
-            
-            return True
-            
-    except subprocess.TimeoutExpired:
-        logger.error("LibreOffice conversion timed out")
-        return False
-    except Exception as e:
-        logger.error(f"Excel to PDF conversion error: {e}")
-        return False
-
 @router.get("/info")
 async def get_excel_to_pdf_info():
     """Get information about Excel to PDF conversion capabilities"""
@@ -178,12 +136,33 @@ async def get_excel_to_pdf_info():
             "input": ["XLS", "XLSX"],
             "output": ["PDF"]
         },
+        "engines": {
+            "auto": "Native rendering for simple workbooks, LibreOffice for the rest (default)",
+            "native": "Always render natively; complex features are simplified or left out",
+            "libreoffice": "Always convert with LibreOffice"
+        },
+        "native_engine": {
+            "formats": ["XLSX"],
+            "supports": [
+                "Cell fonts, fills, borders, alignment and merged cells",
+                "Number, currency, percent and date formats",
+                "Column widths, row heights and hidden rows and columns",
+                "Paper size, orientation, margins and fit to width per sheet"
+            ],
+            "sent_to_libreoffice": [
+                "Charts, images and conditional formatting",
+                "Print areas, print titles and custom scaling",
+                "Sheets wider than the page or larger than 50,000 cells",
+                "Formulas without a saved value, rotated text and characters outside the standard fonts"
+            ]
+        },
         "features": [
             "Preserve table structure",
             "Maintain formatting",
-            "Auto-fit to pages",
-            "High-quality output"
+            "Each sheet on its own pages",
+            "Simple workbooks rendered natively in a worker process, without LibreOffice",
+            "Engine used and complex features recorded on the job"
         ],
         "max_file_size_mb": 100,
-        "requirements": "LibreOffice must be installed on the server"
+        "requirements": "LibreOffice must be installed on the server for complex workbooks and .xls files"
     }
@@ -3,17 +3,16 @@ HTML to PDF Conversion API
 Handles converting HTML files to PDF format
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-import subprocess
-import tempfile
 import os
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -21,9 +20,31 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]
+CSS_CONTENT_TYPES = ["text/css"]
+
+# Maximum number of documents per batch conversion request, by subscription plan
+MAX_BATCH_FILES = {
+    "free": 10,
+    "pro": 100,
+    "enterprise": 1000
+}
+DEFAULT_MAX_BATCH_FILES = 10
+
+def get_max_batch_files(user: User) -> int:
+    """Get the batch conversion file-count limit for the user's subscription plan"""
+    if not user.subscription or not user.subscription.plan:
+        return DEFAULT_MAX_BATCH_FILES
+    return MAX_BATCH_FILES.get(user.subscription.plan.name.lower(), DEFAULT_MAX_BATCH_FILES)
+
+def validate_stylesheet(stylesheet: Optional[UploadFile]):
+    if stylesheet is not None and stylesheet.content_type not in CSS_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Stylesheet must be a CSS file")
+
 @router.post("/")
 async def html_to_pdf(
     file: UploadFile = File(...),
+    stylesheet: Optional[UploadFile] = File(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +53,7 @@ async def html_to_pdf(
     
     Args:
         file: HTML file to convert
+        stylesheet: Optional CSS file applied after the document's own styles
         current_user: Authenticated user
         db: Database session
     
@@ -40,16 +62,18 @@ async def html_to_pdf(
     """
     try:
         # Validate file type
-        allowed_types = ["text/html", "application/xhtml+xml"]
-        if file.content_type not in allowed_types:
+        if file.content_type not in HTML_CONTENT_TYPES:
             raise HTTPException(status_code=400, detail="File must be an HTML file")
         
+        validate_stylesheet(stylesheet)
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
         
-        # Save uploaded file
+        # Save uploaded files
         file_info = await file_storage.save_uploaded_file(file, current_user.id)
+        stylesheet_info = await file_storage.save_uploaded_file(stylesheet, current_user.id) if stylesheet else None
         
         # Create job record
         job = Job(
@@ -59,7 +83,11 @@ async def html_to_pdf(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"input_format": "html", "output_format": "pdf"}
+            parameters={
+                "input_format": "html",
+                "output_format": "pdf",
+                "stylesheet": stylesheet.filename if stylesheet else None
+            }
         )
         
         db.add(job)
@@ -71,12 +99,11 @@ async def html_to_pdf(
             job.start_processing()
             db.commit()
             
-            # Convert HTML to PDF using wkhtmltopdf
+            # Convert HTML to PDF
             output_path = f"storage/temp/html_to_pdf_{job.id}.pdf"
-            success = await convert_html_to_pdf(file_info["path"], output_path)
-            
-            if not success:
-                raise Exception("HTML to PDF conversion failed")
+            result = await pdf_processor.html_to_pdf(
+                file_info["path"], output_path, stylesheet_info["path"] if stylesheet_info else None
+            )
             
             # Save processed file
             processed_info = await file_storage.save_processed_file(
@@ -84,7 +111,7 @@ async def html_to_pdf(
             )
             
             # Complete job
-            job.complete_job(processed_info["path"], {"conversion_successful": True})
+            job.complete_job(processed_info["path"], result)
             job.output_file_name = processed_info["filename"]
             job.output_file_size = processed_info["size"]
             current_user.increment_usage()
@@ -96,64 +123,154 @@ async def html_to_pdf(
                 "success": True,
                 "job_id": job.id,
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "page_count": result["page_count"],
                 "original_size": file_info["size"],
                 "converted_size": processed_info["size"],
                 "input_format": "HTML",
                 "output_format": "PDF"
             }
-            
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"HTML to PDF conversion failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
             db.commit()
             logger.error(f"HTML to PDF conversion failed for job {job.id}: {e}")
             raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
-        
+    
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"HTML to PDF conversion error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-async def convert_html_to_pdf(input_path: str, output_path: str) -> bool:
+@router.post("/batch")
+async def html_to_pdf_batch(
+    files: List[UploadFile] = File(...),
+    stylesheet: Optional[UploadFile] = File(None),
+    merge: bool = Form(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
-    Convert HTML file to PDF using wkhtmltopdf
+    Convert many HTML files to PDF
     
     Args:
-        input_path: Path to input HTML file
-        output_path: Path for output PDF file
+        files: HTML files to convert (up to the plan limit)
+        stylesheet: Optional CSS file applied to every document
+        merge: Join the documents, in order, into one PDF instead of a ZIP of PDFs
+        current_user: Authenticated user
+        db: Database session
     
     Returns:
-        bool: True if conversion successful, False otherwise
+        Dict with batch results and the PDF or ZIP download URL
     """
     try:
-        cmd = [
-            "wkhtmltopdf",
-            "--page-size", "A4",
-            "--margin-top", "0.75in",
-            "--margin-right", "0.75in",
-            "--margin-bottom", "0.75in",
-            "--margin-left", "0.75in",
-            "--encoding", "UTF-8",
-            "--no-stop-slow-scripts",
-            input_path,
-            output_path
-        ]
+        # Validate number of files
+        max_files = get_max_batch_files(current_user)
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} files allowed")
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        # Validate all files are HTML
+        for file in files:
+            if file.content_type not in HTML_CONTENT_TYPES:
+                raise HTTPException(status_code=400, detail="All files must be HTML files")
         
-        if result.returncode != 0:
-            logger.error(f"wkhtmltopdf conversion failed: {result.stderr}")
-            return False
+        validate_stylesheet(stylesheet)
         
-        return os.path.exists(output_path)
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
         
-    except subprocess.TimeoutExpired:
-        logger.error("HTML to PDF conversion timed out")
-        return False
+        # Save uploaded files
+        file_paths = []
+        total_size = 0
+        for file in files:
+            file_info = await file_storage.save_uploaded_file(file, current_user.id)
+            file_paths.append(file_info["path"])
+            total_size += file_info["size"]
+        stylesheet_info = await file_storage.save_uploaded_file(stylesheet, current_user.id) if stylesheet else None
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.HTML_TO_PDF,
+            status=JobStatus.PENDING,
+            input_file_path=file_paths[0],  # Use first file as primary
+            input_file_name=f"{len(files)}_files_to_convert",
+            input_file_size=total_size,
+            parameters={
+                "batch": True,
+                "file_count": len(files),
+                "file_names": [f.filename for f in files],
+                "stylesheet": stylesheet.filename if stylesheet else None,
+                "merge": merge
+            }
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Render straight into the downloads directory
+            output_name = f"converted_{len(files)}_files.pdf" if merge else f"converted_{len(files)}_files.zip"
+            output_path = file_storage.get_processed_path(current_user.id, job.id, output_name)
+            result = await pdf_processor.html_to_pdf_batch(
+                file_paths,
+                [os.path.basename(f.filename) for f in files],
+                str(output_path),
+                stylesheet_info["path"] if stylesheet_info else None,
+                merge
+            )
+            processed_info = await file_storage.get_file_info(str(output_path))
+            
+            # Complete job
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"HTML to PDF batch conversion completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "merged": merge,
+                "documents_converted": result["documents_converted"],
+                "total_pages": result["total_pages"],
+                "output_size": processed_info["size"]
+            }
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"HTML to PDF batch conversion failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"HTML to PDF batch conversion failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Batch conversion failed: {str(e)}")
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"HTML to PDF conversion error: {e}")
-        return False
+        logger.error(f"HTML to PDF batch conversion error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/info")
 async def get_html_to_pdf_info():
@@ -164,12 +281,17 @@ async def get_html_to_pdf_info():
             "input": ["HTML", "HTM", "XHTML"],
             "output": ["PDF"]
         },
+        "batch": {
+            "endpoint": "/batch",
+            "description": "Convert many documents into one ZIP, or join them into one PDF with merge",
+            "max_files": MAX_BATCH_FILES
+        },
         "features": [
-            "Preserve HTML formatting",
-            "Support for CSS styles",
-            "High-quality output",
-            "Fast processing"
+            "CSS paged media (@page size, margins, headers and page counters)",
+            "Optional shared stylesheet, parsed once and reused",
+            "Web fonts and images from http(s) and data: URLs; local files and private or internal addresses are not loaded",
+            "Batch documents rendered in parallel worker processes"
         ],
-        "max_file_size_mb": 10,
-        "requirements": "wkhtmltopdf must be installed on the server"
+        "default_page": "A4 with 0.75 inch margins unless the document sets @page",
+        "max_file_size_mb": 10
     }
@@ -0,0 +1,194 @@
+"""
+Image to PDF Conversion API
+Handles combining JPEG, PNG, TIFF and HEIC images into one PDF document
+"""
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+import logging
+import os
+
+from database import get_db
+from services.auth_service import get_current_user
+from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor, IMAGE_PDF_MAX_MARGIN
+from services.image_pdf import PAGE_SIZES, HEIF_SUPPORTED
+from models.user_model import User
+from models.job_model import Job, JobType, JobStatus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Accepted uploads by content type, with extensions as a fallback for
+# browsers that send HEIC and TIFF as application/octet-stream
+IMAGE_CONTENT_TYPES = ["image/jpeg", "image/png", "image/tiff", "image/heic", "image/heif"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".tif", ".tiff", ".heic", ".heif"]
+
+# Maximum number of images per PDF, by subscription plan. Images are
+# streamed into the PDF one at a time, so memory does not grow with count.
+MAX_IMAGE_FILES = {
+    "free": 50,
+    "pro": 500,
+    "enterprise": 5000
+}
+DEFAULT_MAX_IMAGE_FILES = 50
+
+def get_max_image_files(user: User) -> int:
+    """Get the image-count limit for the user's subscription plan"""
+    if not user.subscription or not user.subscription.plan:
+        return DEFAULT_MAX_IMAGE_FILES
+    return MAX_IMAGE_FILES.get(user.subscription.plan.name.lower(), DEFAULT_MAX_IMAGE_FILES)
+
+def is_image_upload(file: UploadFile) -> bool:
+    if file.content_type in IMAGE_CONTENT_TYPES:
+        return True
+    return os.path.splitext(file.filename or "")[1].lower() in IMAGE_EXTENSIONS
+
+@router.post("/")
+async def jpg_to_pdf(
+    files: List[UploadFile] = File(...),
+    page_size: str = Form("auto"),
+    margin: float = Form(0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert images to a PDF with one page per image
+    
+    Args:
+        files: Images in page order (JPEG, PNG, TIFF or HEIC)
+        page_size: "auto" (each image's size from its DPI), "a4" or "letter"
+        margin: Margin around each image in points
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with conversion results and download URL
+    """
+    try:
+        # Validate number of files
+        max_files = get_max_image_files(current_user)
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} images allowed")
+        
+        # Validate all files are images
+        for file in files:
+            if not is_image_upload(file):
+                raise HTTPException(status_code=400, detail="All files must be JPEG, PNG, TIFF or HEIC images")
+        
+        # Validate conversion parameters
+        if page_size not in PAGE_SIZES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid page size. Supported: {', '.join(PAGE_SIZES)}"
+            )
+        if not 0 <= margin <= IMAGE_PDF_MAX_MARGIN:
+            raise HTTPException(status_code=400, detail=f"Margin must be between 0 and {IMAGE_PDF_MAX_MARGIN} points")
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded files
+        file_paths = []
+        total_size = 0
+        for file in files:
+            file_info = await file_storage.save_uploaded_file(file, current_user.id)
+            file_paths.append(file_info["path"])
+            total_size += file_info["size"]
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.JPG_TO_PDF,
+            status=JobStatus.PENDING,
+            input_file_path=file_paths[0],  # Use first file as primary
+            input_file_name=files[0].filename if len(files) == 1 else f"{len(files)}_images",
+            input_file_size=total_size,
+            parameters={
+                "input_format": "image",
+                "output_format": "pdf",
+                "file_count": len(files),
+                "page_size": page_size,
+                "margin": margin
+            }
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # The PDF is written straight into the downloads directory
+            output_name = f"{os.path.splitext(files[0].filename)[0]}.pdf" if len(files) == 1 else f"images_{len(files)}.pdf"
+            output_path = file_storage.get_processed_path(current_user.id, job.id, output_name)
+            result = await pdf_processor.images_to_pdf(file_paths, str(output_path), page_size=page_size, margin=margin)
+            processed_info = await file_storage.get_file_info(str(output_path))
+            
+            # Complete job
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"Image to PDF conversion completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "page_count": result["page_count"],
+                "images_embedded": result["images_embedded"],
+                "images_converted": result["images_converted"],
+                "original_size": total_size,
+                "output_size": processed_info["size"]
+            }
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"Image to PDF conversion failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"Image to PDF conversion failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Image to PDF conversion error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/info")
+async def get_jpg_to_pdf_info():
+    """Get information about image to PDF conversion capabilities"""
+    return {
+        "description": "Combine images into a PDF with one page per image",
+        "supported_formats": ["JPEG", "PNG", "TIFF"] + (["HEIC"] if HEIF_SUPPORTED else []),
+        "output_format": "PDF",
+        "file_limits": {
+            "max_files": DEFAULT_MAX_IMAGE_FILES,
+            "max_files_by_plan": MAX_IMAGE_FILES
+        },
+        "options": {
+            "page_size": "auto (image size from its DPI), a4 or letter (image fitted to the page)",
+            "margin": f"Margin around each image in points (0-{IMAGE_PDF_MAX_MARGIN})"
+        },
+        "features": [
+            "JPEG images embedded without re-encoding",
+            "EXIF orientation applied without touching pixels",
+            "PNG and TIFF stored losslessly"
+        ],
+        "max_file_size_mb": 100
+    }
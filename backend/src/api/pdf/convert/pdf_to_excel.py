@@ -3,17 +3,17 @@ PDF to Excel Conversion API
 Handles converting PDF files to Excel spreadsheets
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
-import subprocess
-import tempfile
 import os
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor
+from services.table_export import TABLE_STRATEGIES
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -24,6 +24,7 @@ router = APIRouter()
 @router.post("/")
 async def pdf_to_excel(
     file: UploadFile = File(...),
+    strategy: str = Form("auto"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +33,7 @@ async def pdf_to_excel(
     
     Args:
         file: PDF file to convert
+        strategy: "auto", "lines" (ruled tables) or "text" (tables aligned without rules)
         current_user: Authenticated user
         db: Database session
     
@@ -43,6 +45,9 @@ async def pdf_to_excel(
         if not file.content_type == "application/pdf":
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
+        if strategy not in TABLE_STRATEGIES:
+            raise HTTPException(status_code=400, detail=f"Invalid table strategy. Supported: {', '.join(TABLE_STRATEGIES)}")
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
@@ -58,7 +63,7 @@ async def pdf_to_excel(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"input_format": "pdf", "output_format": "excel"}
+            parameters={"input_format": "pdf", "output_format": "excel", "strategy": strategy}
         )
         
         db.add(job)
@@ -70,12 +75,9 @@ async def pdf_to_excel(
             job.start_processing()
             db.commit()
             
-            # Convert PDF to Excel using LibreOffice
+            # Extract the tables into a workbook
             output_path = f"storage/temp/pdf_to_excel_{job.id}.xlsx"
-            success = await convert_pdf_to_excel(file_info["path"], output_path)
-            
-            if not success:
-                raise Exception("PDF to Excel conversion failed")
+            result = await pdf_processor.pdf_to_excel(file_info["path"], output_path, strategy)
             
             # Save processed file
             processed_info = await file_storage.save_processed_file(
@@ -83,7 +85,7 @@ async def pdf_to_excel(
             )
             
             # Complete job
-            job.complete_job(processed_info["path"], {"conversion_successful": True})
+            job.complete_job(processed_info["path"], result)
             job.output_file_name = processed_info["filename"]
             job.output_file_size = processed_info["size"]
             current_user.increment_usage()
@@ -95,12 +97,22 @@ async def pdf_to_excel(
                 "success": True,
                 "job_id": job.id,
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "page_count": result["page_count"],
+                "tables_found": result["tables_found"],
+                "rows_written": result["rows_written"],
+                "tables": result["tables"],
                 "original_size": file_info["size"],
                 "converted_size": processed_info["size"],
                 "input_format": "PDF",
                 "output_format": "Excel"
             }
             
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF to Excel conversion failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
@@ -114,57 +126,6 @@ async def pdf_to_excel(
         logger.error(f"PDF to Excel conversion error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-async def convert_pdf_to_excel(input_path: str, output_path: str) -> bool:
-    """
-    Convert PDF file to Excel spreadsheet using LibreOffice
-    
-    Args:
-        input_path: Path to input PDF file
-        output_path: Path for output Excel file
-    
-    Returns:
-        bool: True if conversion successful, False otherwise
-    """
-    try:
-        # Create temporary directory for LibreOffice
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Use LibreOffice to convert
-            cmd = [
-                "libreoffice",
-                "--headless",
-                "--convert-to", "xlsx",
-                "--outdir", temp_dir,
-                input_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                logger.error(f"LibreOffice conversion failed: {result.stderr}")
-                return False
-            
-            # Find the generated Excel file
-            input_filename = os.path.basename(input_path)
-            excel_filename = os.path.splitext(input_filename)[0] + ".xlsx"
-            temp_excel_path = os.path.join(temp_dir, excel_filename)
-            
-            if not os.path.exists(temp_excel_path):
-                logger.error("Generated Excel file not found")
-                return False
-            
-            # Copy to output path
-            import shutil
-            shutil.copy2(temp_excel_path, output_path)
-            
-            return True
-            
-    except subprocess.TimeoutExpired:
-        logger.error("LibreOffice conversion timed out")
-        return False
-    except Exception as e:
-        logger.error(f"PDF to Excel conversion error: {e}")
-        return False
-
 @router.get("/info")
 async def get_pdf_to_excel_info():
     """Get information about PDF to Excel conversion capabilities"""
@@ -174,13 +135,17 @@ async def get_pdf_to_excel_info():
             "input": ["PDF"],
             "output": ["XLSX"]
         },
+        "strategies": {
+            "auto": "Ruled tables, or tables aligned without rules on pages that have none (default)",
+            "lines": "Only tables drawn with rules",
+            "text": "Only tables found by word alignment"
+        },
         "features": [
-            "Extract tabular data",
-            "Preserve table structure",
-            "Editable spreadsheet",
-            "Data analysis ready"
+            "One worksheet per table",
+            "Tables continuing across pages kept on one sheet, without repeated headers",
+            "Amounts stored as numbers (thousands separators, currency symbols, negatives in parentheses)",
+            "Pages searched in parallel worker processes, with flat memory use"
         ],
         "max_file_size_mb": 100,
-        "requirements": "LibreOffice must be installed on the server",
-        "note": "Works best with PDFs containing tables and structured data"
+        "note": "Documents without tables are rejected"
     }
@@ -0,0 +1,179 @@
+"""
+PDF to Image Conversion API
+Handles exporting PDF pages as JPEG, PNG or WebP images
+"""
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Dict, Any
+import logging
+import os
+
+from database import get_db
+from services.auth_service import get_current_user
+from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor, IMAGE_EXPORT_FORMATS, IMAGE_EXPORT_MIN_DPI, IMAGE_EXPORT_MAX_DPI
+from models.user_model import User
+from models.job_model import Job, JobType, JobStatus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/")
+async def pdf_to_jpg(
+    file: UploadFile = File(...),
+    format: str = Form("jpeg"),
+    dpi: int = Form(150),
+    pages: str = Form(""),
+    grayscale: bool = Form(False),
+    quality: int = Form(85),
+    include_manifest: bool = Form(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert PDF pages to images
+    
+    Args:
+        file: PDF file to convert
+        format: Image format ("jpeg", "png" or "webp")
+        dpi: Render resolution
+        pages: Pages to export (e.g., "1,3-5"); empty for all pages
+        grayscale: Render in grayscale
+        quality: JPEG/WebP quality (1-100)
+        include_manifest: Include each image's offset and size within the ZIP
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with conversion results and the ZIP download URL
+    """
+    try:
+        # Validate file type
+        if not file.content_type == "application/pdf":
+            raise HTTPException(status_code=400, detail="File must be a PDF")
+        
+        # Validate conversion parameters
+        if format not in IMAGE_EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid image format. Supported: {', '.join(IMAGE_EXPORT_FORMATS)}"
+            )
+        if not IMAGE_EXPORT_MIN_DPI <= dpi <= IMAGE_EXPORT_MAX_DPI:
+            raise HTTPException(
+                status_code=400,
+                detail=f"DPI must be between {IMAGE_EXPORT_MIN_DPI} and {IMAGE_EXPORT_MAX_DPI}"
+            )
+        if not 1 <= quality <= 100:
+            raise HTTPException(status_code=400, detail="Quality must be between 1 and 100")
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded file
+        file_info = await file_storage.save_uploaded_file(file, current_user.id)
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.PDF_TO_JPG,
+            status=JobStatus.PENDING,
+            input_file_path=file_info["path"],
+            input_file_name=file.filename,
+            input_file_size=file_info["size"],
+            parameters={
+                "input_format": "pdf",
+                "output_format": format,
+                "dpi": dpi,
+                "pages": pages,
+                "grayscale": grayscale,
+                "quality": quality
+            }
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Images are written straight into a single ZIP in the downloads directory
+            archive_path = file_storage.get_processed_path(
+                current_user.id, job.id, f"images_{os.path.splitext(file.filename)[0]}.zip"
+            )
+            result = await pdf_processor.pdf_to_images(
+                file_info["path"], str(archive_path),
+                image_format=format, dpi=dpi, pages=pages, grayscale=grayscale, quality=quality
+            )
+            processed_info = await file_storage.get_file_info(str(archive_path))
+            
+            # Complete job
+            job.complete_job(processed_info["path"], {key: value for key, value in result.items() if key != "images"})
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"PDF to image conversion completed for user {current_user.id}, job {job.id}")
+            
+            response = {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "format": result["format"],
+                "dpi": result["dpi"],
+                "grayscale": result["grayscale"],
+                "pages_converted": result["pages_converted"],
+                "original_size": file_info["size"],
+                "output_size": processed_info["size"]
+            }
+            if include_manifest:
+                response["manifest"] = result["images"]
+            
+            return response
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF to image conversion failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"PDF to image conversion failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF to image conversion error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/info")
+async def get_pdf_to_jpg_info():
+    """Get information about PDF to image conversion capabilities"""
+    return {
+        "description": "Export PDF pages as JPEG, PNG or WebP images",
+        "supported_formats": ["PDF"],
+        "output_formats": list(IMAGE_EXPORT_FORMATS),
+        "dpi_range": {"min": IMAGE_EXPORT_MIN_DPI, "max": IMAGE_EXPORT_MAX_DPI, "default": 150},
+        "options": {
+            "pages": "Pages to export, e.g. 1,3-5 (all pages when empty)",
+            "grayscale": "Render in grayscale",
+            "quality": "JPEG/WebP quality (1-100, default 85)"
+        },
+        "output": "ZIP archive with one image per page (page_001.jpg, ...)",
+        "features": [
+            "Pages rendered in parallel worker processes",
+            "Images written into the archive as they finish, with flat memory use",
+            "Per-image offsets in the ZIP manifest"
+        ],
+        "max_file_size_mb": 100
+    }
@@ -0,0 +1,283 @@
+"""
+PDF to PDF/A Conversion API
+Handles converting PDF documents to PDF/A for long-term archiving
+"""
+
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+import logging
+import os
+
+from database import get_db
+from services.auth_service import get_current_user
+from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor
+from services.pdfa import PDFA_LEVELS, DEFAULT_PDFA_LEVEL, OUTPUT_CONDITION
+from models.user_model import User
+from models.job_model import Job, JobType, JobStatus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Maximum number of documents per batch conversion request, by subscription plan
+MAX_BATCH_FILES = {
+    "free": 10,
+    "pro": 100,
+    "enterprise": 1000
+}
+DEFAULT_MAX_BATCH_FILES = 10
+
+def get_max_batch_files(user: User) -> int:
+    """Get the batch conversion file-count limit for the user's subscription plan"""
+    if not user.subscription or not user.subscription.plan:
+        return DEFAULT_MAX_BATCH_FILES
+    return MAX_BATCH_FILES.get(user.subscription.plan.name.lower(), DEFAULT_MAX_BATCH_FILES)
+
+def validate_level(level: str):
+    if level not in PDFA_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Invalid PDF/A level. Supported: {', '.join(PDFA_LEVELS)}")
+
+@router.post("/")
+async def pdf_to_pdfa(
+    file: UploadFile = File(...),
+    level: str = Form(DEFAULT_PDFA_LEVEL),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert PDF to PDF/A
+    
+    Args:
+        file: PDF file to convert
+        level: Conformance level ("1b", "2b" or "3b")
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with conversion results, validation summary and download URL
+    """
+    try:
+        # Validate file type
+        if not file.content_type == "application/pdf":
+            raise HTTPException(status_code=400, detail="File must be a PDF")
+        
+        validate_level(level)
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded file
+        file_info = await file_storage.save_uploaded_file(file, current_user.id)
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.PDF_TO_PDFA,
+            status=JobStatus.PENDING,
+            input_file_path=file_info["path"],
+            input_file_name=file.filename,
+            input_file_size=file_info["size"],
+            parameters={"input_format": "pdf", "output_format": "pdfa", "level": level}
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Convert the PDF
+            output_path = f"storage/temp/pdfa_{job.id}.pdf"
+            result = await pdf_processor.convert_to_pdfa(file_info["path"], output_path, level)
+            
+            # Save processed file
+            processed_info = await file_storage.save_processed_file(
+                output_path, current_user.id, job.id, f"pdfa_{file.filename}"
+            )
+            
+            # Complete job; the validation summary is kept with the result
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"PDF/A conversion completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "level": level,
+                "fonts_embedded": result["fonts_embedded"],
+                "fonts_substituted": result["fonts_substituted"],
+                "validation": result["validation"],
+                "original_size": file_info["size"],
+                "output_size": processed_info["size"]
+            }
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF/A conversion failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"PDF/A conversion failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Conversion failed: {str(e)}")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF/A conversion error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/batch")
+async def pdf_to_pdfa_batch(
+    files: List[UploadFile] = File(...),
+    level: str = Form(DEFAULT_PDFA_LEVEL),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Convert many PDF documents to PDF/A
+    
+    Args:
+        files: PDF files to convert (up to the plan limit)
+        level: Conformance level ("1b", "2b" or "3b")
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with batch results and the ZIP download URL
+    """
+    try:
+        # Validate number of files
+        max_files = get_max_batch_files(current_user)
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} files allowed")
+        
+        # Validate all files are PDFs
+        for file in files:
+            if not file.content_type == "application/pdf":
+                raise HTTPException(status_code=400, detail="All files must be PDFs")
+        
+        validate_level(level)
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded files
+        file_paths = []
+        total_size = 0
+        for file in files:
+            file_info = await file_storage.save_uploaded_file(file, current_user.id)
+            file_paths.append(file_info["path"])
+            total_size += file_info["size"]
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.PDF_TO_PDFA,
+            status=JobStatus.PENDING,
+            input_file_path=file_paths[0],  # Use first file as primary
+            input_file_name=f"{len(files)}_files_to_convert",
+            input_file_size=total_size,
+            parameters={
+                "batch": True,
+                "file_count": len(files),
+                "file_names": [f.filename for f in files],
+                "level": level
+            }
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Convert straight into a single ZIP in the downloads directory
+            archive_path = file_storage.get_processed_path(current_user.id, job.id, f"pdfa_{len(files)}_files.zip")
+            result = await pdf_processor.convert_to_pdfa_batch(
+                file_paths, [os.path.basename(f.filename) for f in files], str(archive_path), level
+            )
+            processed_info = await file_storage.get_file_info(str(archive_path))
+            
+            # Complete job
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"PDF/A batch conversion completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "level": level,
+                "documents_converted": result["documents_converted"],
+                "documents_compliant": result["documents_compliant"],
+                "validation": [
+                    {"filename": document["filename"], **document["validation"]} for document in result["documents"]
+                ],
+                "output_size": processed_info["size"]
+            }
+        
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF/A batch conversion failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"PDF/A batch conversion failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Batch conversion failed: {str(e)}")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF/A batch conversion error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/info")
+async def get_pdf_to_pdfa_info():
+    """Get information about PDF/A conversion capabilities"""
+    return {
+        "description": "Convert PDF documents to PDF/A for long-term archiving",
+        "supported_formats": ["PDF"],
+        "levels": list(PDFA_LEVELS),
+        "default_level": DEFAULT_PDFA_LEVEL,
+        "output_intent": OUTPUT_CONDITION,
+        "batch": {
+            "endpoint": "/batch",
+            "description": "Convert many documents into one ZIP",
+            "max_files": MAX_BATCH_FILES
+        },
+        "features": [
+            "Missing fonts embedded (metric-compatible substitutes), cached per font",
+            "JavaScript and forbidden actions and annotations removed",
+            "Transparency removed for PDF/A-1b",
+            "XMP metadata with PDF/A identification",
+            "Validation summary of the converted file"
+        ],
+        "max_file_size_mb": 100
+    }
@@ -3,17 +3,18 @@ PDF to PowerPoint Conversion API
 Handles converting PDF files to PowerPoint presentations
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
-import subprocess
-import tempfile
 import os
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
+from services.pdf_utils import pdf_processor, SLIDE_IMAGE_DPI
+from services.page_render import MIN_RENDER_DPI, MAX_RENDER_DPI
+from services.slide_export import SLIDE_MODES
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -24,6 +25,8 @@ router = APIRouter()
 @router.post("/")
 async def pdf_to_ppt(
     file: UploadFile = File(...),
+    mode: str = Form("image"),
+    dpi: int = Form(SLIDE_IMAGE_DPI),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +35,8 @@ async def pdf_to_ppt(
     
     Args:
         file: PDF file to convert
+        mode: "image" (each slide shows its page as rendered) or "editable" (text boxes, images and tables)
+        dpi: Render resolution of slide images in image mode
         current_user: Authenticated user
         db: Database session
     
@@ -43,6 +48,12 @@ async def pdf_to_ppt(
         if not file.content_type == "application/pdf":
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
+        # Validate conversion parameters
+        if mode not in SLIDE_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid mode. Supported: {', '.join(SLIDE_MODES)}")
+        if not MIN_RENDER_DPI <= dpi <= MAX_RENDER_DPI:
+            raise HTTPException(status_code=400, detail=f"DPI must be between {MIN_RENDER_DPI} and {MAX_RENDER_DPI}")
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
@@ -58,7 +69,7 @@ async def pdf_to_ppt(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"input_format": "pdf", "output_format": "powerpoint"}
+            parameters={"input_format": "pdf", "output_format": "powerpoint", "mode": mode, "dpi": dpi}
         )
         
         db.add(job)
@@ -70,12 +81,9 @@ async def pdf_to_ppt(
             job.start_processing()
             db.commit()
             
-            # Convert PDF to PowerPoint using LibreOffice
+            # Convert PDF to PowerPoint
             output_path = f"storage/temp/pdf_to_ppt_{job.id}.pptx"
-            success = await convert_pdf_to_ppt(file_info["path"], output_path)
-            
-            if not success:
-                raise Exception("PDF to PowerPoint conversion failed")
+            result = await pdf_processor.pdf_to_ppt(file_info["path"], output_path, mode=mode, dpi=dpi)
             
             # Save processed file
             processed_info = await file_storage.save_processed_file(
@@ -83,7 +91,7 @@ async def pdf_to_ppt(
             )
             
             # Complete job
-            job.complete_job(processed_info["path"], {"conversion_successful": True})
+            job.complete_job(processed_info["path"], result)
             job.output_file_name = processed_info["filename"]
             job.output_file_size = processed_info["size"]
             current_user.increment_usage()
@@ -95,12 +103,20 @@ async def pdf_to_ppt(
                 "success": True,
                 "job_id": job.id,
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "mode": result["mode"],
+                "slide_count": result["slide_count"],
                 "original_size": file_info["size"],
                 "converted_size": processed_info["size"],
                 "input_format": "PDF",
                 "output_format": "PowerPoint"
             }
             
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF to PowerPoint conversion failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
@@ -114,57 +130,6 @@ async def pdf_to_ppt(
         logger.error(f"PDF to PowerPoint conversion error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-async def convert_pdf_to_ppt(input_path: str, output_path: str) -> bool:
-    """
-    Convert PDF file to PowerPoint presentation using LibreOffice
-    
-    Args:
-        input_path: Path to input PDF file
-        output_path: Path for output PowerPoint file
-    
-    Returns:
-        bool: True if conversion successful, False otherwise
-    """
-    try:
-        # Create temporary directory for LibreOffice
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Use LibreOffice to convert
-            cmd = [
-                "libreoffice",
-                "--headless",
-                "--convert-to", "pptx",
-                "--outdir", temp_dir,
-                input_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                logger.error(f"LibreOffice conversion failed: {result.stderr}")
-                return False
-            
-            # Find the generated PowerPoint file
-            input_filename = os.path.basename(input_path)
-            ppt_filename = os.path.splitext(input_filename)[0] + ".pptx"
-            temp_ppt_path = os.path.join(temp_dir, ppt_filename)
-            
-            if not os.path.exists(temp_ppt_path):
-                logger.error("Generated PowerPoint file not found")
-                return False
-            
-            # Copy to output path
-            import shutil
-            shutil.copy2(temp_ppt_path, output_path)
-            
-            return True
-            
-    except subprocess.TimeoutExpired:
-        logger.error("LibreOffice conversion timed out")
-        return False
-    except Exception as e:
-        logger.error(f"PDF to PowerPoint conversion error: {e}")
-        return False
-
 @router.get("/info")
 async def get_pdf_to_ppt_info():
     """Get information about PDF to PowerPoint conversion capabilities"""
@@ -174,13 +139,16 @@ async def get_pdf_to_ppt_info():
             "input": ["PDF"],
             "output": ["PPTX"]
         },
+        "modes": {
+            "image": "Each slide shows its page rendered as an image, exactly as in the PDF (default)",
+            "editable": "Each slide is rebuilt from text boxes, images and tables"
+        },
+        "dpi_range": {"min": MIN_RENDER_DPI, "max": MAX_RENDER_DPI, "default": SLIDE_IMAGE_DPI},
         "features": [
-            "Convert pages to slides",
-            "Preserve layout and formatting",
-            "Editable presentation",
-            "High-quality output"
+            "Slides sized to the page aspect ratio",
+            "Pages rendered in parallel worker processes",
+            "Page renders reused from the preview cache"
         ],
         "max_file_size_mb": 100,
-        "requirements": "LibreOffice must be installed on the server",
         "note": "Each PDF page becomes a separate slide in the presentation"
     }
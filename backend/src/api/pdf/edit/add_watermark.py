@@ -11,7 +11,7 @@ import logging
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
-from services.pdf_utils import pdf_processor
+from services.pdf_utils import pdf_processor, WATERMARK_FONTS
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -23,6 +23,10 @@ router = APIRouter()
 async def add_watermark(
     file: UploadFile = File(...),
     watermark_text: str = Form("DRAFT"),
+    font: str = Form("helv"),
+    font_size: float = Form(50),
+    opacity: float = Form(0.3),
+    angle: float = Form(45),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +36,10 @@ async def add_watermark(
     Args:
         file: PDF file to watermark
         watermark_text: Text to use as watermark
+        font: Base-14 font name (helv, hebo, tiro, tibo, cour, cobo)
+        font_size: Font size in points, reduced automatically on small pages
+        opacity: Watermark opacity between 0 and 1
+        angle: Counter-clockwise text angle in degrees
         current_user: Authenticated user
         db: Database session
     
@@ -50,6 +58,19 @@ async def add_watermark(
         if len(watermark_text) > 100:
             raise HTTPException(status_code=400, detail="Watermark text must be 100 characters or less")
         
+        # Validate watermark style
+        if font not in WATERMARK_FONTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported watermark font. Supported: {', '.join(WATERMARK_FONTS)}"
+            )
+        
+        if not 0 < opacity <= 1:
+            raise HTTPException(status_code=400, detail="Opacity must be between 0 and 1")
+        
+        if not 1 <= font_size <= 500:
+            raise HTTPException(status_code=400, detail="Font size must be between 1 and 500")
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
@@ -65,7 +86,13 @@ async def add_watermark(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"watermark_text": watermark_text}
+            parameters={
+                "watermark_text": watermark_text,
+                "font": font,
+                "font_size": font_size,
+                "opacity": opacity,
+                "angle": angle
+            }
         )
         
         db.add(job)
@@ -77,14 +104,14 @@ async def add_watermark(
             job.start_processing()
             db.commit()
             
-            # Process the PDF
-            output_path = f"storage/temp/watermarked_{job.id}.pdf"
-            result = await pdf_processor.add_watermark(file_info["path"], output_path, watermark_text)
-            
-            # Save processed file
-            processed_info = await file_storage.save_processed_file(
-                output_path, current_user.id, job.id, f"watermarked_{file.filename}"
+            # Write the update straight into the downloads directory; after the
+            # copy of the input only the changed objects are written
+            output_path = file_storage.get_processed_path(current_user.id, job.id, f"watermarked_{file.filename}")
+            result = await pdf_processor.add_watermark(
+                file_info["path"], str(output_path), watermark_text,
+                font=font, font_size=font_size, opacity=opacity, angle=angle
             )
+            processed_info = await file_storage.get_file_info(str(output_path), compute_hash=False)
             
             # Complete job
             job.complete_job(processed_info["path"], result)
@@ -126,12 +153,17 @@ async def get_watermark_info():
         "watermark_options": {
             "text": "Custom text watermark",
             "max_length": 100,
-            "position": "Centered and rotated 45 degrees",
-            "style": "Light gray, semi-transparent"
+            "position": "Centered on each page, rotated 45 degrees by default",
+            "style": "Light gray, semi-transparent",
+            "fonts": WATERMARK_FONTS,
+            "font_size": "1-500 points (default 50), shrunk to fit small pages",
+            "opacity": "0-1 (default 0.3)",
+            "angle": "Degrees counter-clockwise (default 45)"
         },
         "features": [
             "Custom text watermarks",
             "Applied to all pages",
+            "Adapts to each page's size and rotation",
             "Professional appearance",
             "Maintains document quality"
         ],
@@ -26,6 +26,7 @@ async def crop_pdf(
     y: float = Form(0),
     width: float = Form(100),
     height: float = Form(100),
+    pages: str = Form(""),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -38,6 +39,7 @@ async def crop_pdf(
         y: Y coordinate for crop start (percentage)
         width: Width of crop area (percentage)
         height: Height of crop area (percentage)
+        pages: Pages to crop (e.g., "1,3-5"); all pages when empty
         current_user: Authenticated user
         db: Database session
     
@@ -71,7 +73,7 @@ async def crop_pdf(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"x": x, "y": y, "width": width, "height": height}
+            parameters={"x": x, "y": y, "width": width, "height": height, "pages": pages}
         )
         
         db.add(job)
@@ -83,14 +85,11 @@ async def crop_pdf(
             job.start_processing()
             db.commit()
             
-            # Process the PDF
-            output_path = f"storage/temp/cropped_{job.id}.pdf"
-            result = await pdf_processor.crop_pdf(file_info["path"], output_path, x, y, width, height)
-            
-            # Save processed file
-            processed_info = await file_storage.save_processed_file(
-                output_path, current_user.id, job.id, f"cropped_{file.filename}"
-            )
+            # Write the update straight into the downloads directory; after the
+            # copy of the input only the changed objects are written
+            output_path = file_storage.get_processed_path(current_user.id, job.id, f"cropped_{file.filename}")
+            result = await pdf_processor.crop_pdf(file_info["path"], str(output_path), x, y, width, height, pages)
+            processed_info = await file_storage.get_file_info(str(output_path), compute_hash=False)
             
             # Complete job
             job.complete_job(processed_info["path"], result)
@@ -107,6 +106,7 @@ async def crop_pdf(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "crop_area": result["crop_area"],
                 "pages_cropped": result["pages_cropped"],
+                "save_mode": result["save_mode"],
                 "output_size": processed_info["size"]
             }
             
@@ -133,13 +133,15 @@ async def get_crop_info():
             "x": "X coordinate for crop start (0-100%)",
             "y": "Y coordinate for crop start (0-100%)",
             "width": "Width of crop area (1-100%)",
-            "height": "Height of crop area (1-100%)"
+            "height": "Height of crop area (1-100%)",
+            "pages": "Pages to crop, e.g. 1,3-5 (all pages when empty)"
         },
         "features": [
             "Precise cropping",
             "Percentage-based coordinates",
             "Maintains quality",
-            "All pages cropped"
+            "All pages or a page selection cropped",
+            "Lossless: only the page CropBox and TrimBox change, saved incrementally"
         ],
         "max_file_size_mb": 100,
         "examples": [
@@ -7,11 +7,14 @@ from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 import logging
+import json
+import regex
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
 from services.pdf_utils import pdf_processor
+from services.redaction import REDACTION_PATTERNS, compile_patterns
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -22,7 +25,8 @@ router = APIRouter()
 @router.post("/")
 async def redact_pdf(
     file: UploadFile = File(...),
-    redaction_areas: str = Form(...),  # JSON string of areas to redact
+    redaction_areas: str = Form(""),  # JSON string of areas to redact
+    patterns: str = Form(""),  # JSON list of pattern names or regular expressions
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,6 +36,7 @@ async def redact_pdf(
     Args:
         file: PDF file to redact
         redaction_areas: JSON string containing areas to redact
+        patterns: JSON list of text patterns to redact, either names such as "ssn" or regular expressions
         current_user: Authenticated user
         db: Database session
     
@@ -43,9 +48,23 @@ async def redact_pdf(
         if not file.content_type == "application/pdf":
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
+        # Validate text patterns
+        pattern_list = []
+        if patterns and patterns.strip():
+            try:
+                pattern_list = json.loads(patterns)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Patterns must be a JSON list of strings")
+            if not isinstance(pattern_list, list) or not all(isinstance(pattern, str) and pattern for pattern in pattern_list):
+                raise HTTPException(status_code=400, detail="Patterns must be a JSON list of strings")
+            try:
+                compile_patterns(pattern_list)
+            except regex.error as e:
+                raise HTTPException(status_code=400, detail=f"Invalid redaction pattern: {str(e)}")
+        
         # Validate redaction areas
-        if not redaction_areas or not redaction_areas.strip():
-            raise HTTPException(status_code=400, detail="Redaction areas are required")
+        if (not redaction_areas or not redaction_areas.strip()) and not pattern_list:
+            raise HTTPException(status_code=400, detail="Redaction areas or patterns are required")
         
         # Check user limits
         if not current_user.can_process_more_files():
@@ -62,7 +81,7 @@ async def redact_pdf(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"redaction_areas": redaction_areas}
+            parameters={"redaction_areas": redaction_areas, "patterns": pattern_list}
         )
         
         db.add(job)
@@ -76,7 +95,7 @@ async def redact_pdf(
             
             # Process the PDF
             output_path = f"storage/temp/redacted_{job.id}.pdf"
-            result = await pdf_processor.redact_pdf(file_info["path"], output_path, redaction_areas)
+            result = await pdf_processor.redact_pdf(file_info["path"], output_path, redaction_areas, pattern_list)
             
             # Save processed file
             processed_info = await file_storage.save_processed_file(
@@ -98,6 +117,8 @@ async def redact_pdf(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "areas_redacted": result["areas_redacted"],
                 "pages_processed": result["pages_processed"],
+                "pages_redacted": result["pages_redacted"],
+                "pattern_matches": result["pattern_matches"],
                 "output_size": processed_info["size"]
             }
             
@@ -133,10 +154,17 @@ async def get_redact_info():
                 }
             ]
         },
+        "coordinates": "Points from the top-left corner of the page as displayed",
+        "text_patterns": {
+            "format": "JSON list of pattern names or regular expressions",
+            "named_patterns": list(REDACTION_PATTERNS)
+        },
         "features": [
             "Precise area redaction",
             "Multiple areas per page",
-            "Permanent content removal",
+            "Text pattern redaction (SSNs, emails, custom regular expressions)",
+            "Permanent content removal: text, images and vector graphics under each area",
+            "Large documents are redacted in parallel page chunks",
             "Secure processing"
         ],
         "max_file_size_mb": 100,
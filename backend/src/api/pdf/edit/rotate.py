@@ -12,6 +12,7 @@ from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
 from services.pdf_utils import pdf_processor
+from services.ocr_engine import ORIENT_MIN_CONFIDENCE
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -74,14 +75,11 @@ async def rotate_pdf(
             job.start_processing()
             db.commit()
             
-            # Process the PDF
-            output_path = f"storage/temp/rotated_{job.id}.pdf"
-            result = await pdf_processor.rotate_pdf(file_info["path"], output_path, angle)
-            
-            # Save processed file
-            processed_info = await file_storage.save_processed_file(
-                output_path, current_user.id, job.id, f"rotated_{angle}deg_{file.filename}"
-            )
+            # Write the update straight into the downloads directory; after the
+            # copy of the input only the changed objects are written
+            output_path = file_storage.get_processed_path(current_user.id, job.id, f"rotated_{angle}deg_{file.filename}")
+            result = await pdf_processor.rotate_pdf(file_info["path"], str(output_path), angle)
+            processed_info = await file_storage.get_file_info(str(output_path), compute_hash=False)
             
             # Complete job
             job.complete_job(processed_info["path"], result)
@@ -98,6 +96,7 @@ async def rotate_pdf(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "rotation_angle": result["rotation_angle"],
                 "pages_rotated": result["pages_rotated"],
+                "save_mode": result["save_mode"],
                 "output_size": processed_info["size"]
             }
             
@@ -114,6 +113,100 @@ async def rotate_pdf(
         logger.error(f"PDF rotation error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/auto")
+async def auto_orient_pdf(
+    file: UploadFile = File(...),
+    min_confidence: float = Form(ORIENT_MIN_CONFIDENCE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Detect sideways and upside-down pages and turn only those upright
+    
+    Args:
+        file: PDF file to orient
+        min_confidence: Minimum detection confidence for a page to be turned
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with per-page decisions and download URL
+    """
+    try:
+        # Validate file type
+        if not file.content_type == "application/pdf":
+            raise HTTPException(status_code=400, detail="File must be a PDF")
+        
+        # Validate confidence parameter
+        if min_confidence < 0:
+            raise HTTPException(status_code=400, detail="Minimum confidence cannot be negative")
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded file
+        file_info = await file_storage.save_uploaded_file(file, current_user.id)
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.ROTATE,
+            status=JobStatus.PENDING,
+            input_file_path=file_info["path"],
+            input_file_name=file.filename,
+            input_file_size=file_info["size"],
+            parameters={"mode": "auto", "min_confidence": min_confidence}
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Write the update straight into the downloads directory; after the
+            # copy of the input only the changed objects are written
+            output_path = file_storage.get_processed_path(current_user.id, job.id, f"oriented_{file.filename}")
+            result = await pdf_processor.auto_orient_pdf(file_info["path"], str(output_path), min_confidence)
+            processed_info = await file_storage.get_file_info(str(output_path), compute_hash=False)
+            
+            # Complete job
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"PDF auto-orientation completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "pages_rotated": result["pages_rotated"],
+                "pages_checked": result["pages_checked"],
+                "pages": result["pages"],
+                "save_mode": result["save_mode"],
+                "output_size": processed_info["size"]
+            }
+            
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"PDF auto-orientation failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Auto-orientation failed: {str(e)}")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF auto-orientation error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/info")
 async def get_rotate_info():
     """Get information about PDF rotation capabilities"""
@@ -129,7 +222,19 @@ async def get_rotate_info():
             "Rotate all pages",
             "Maintain quality",
             "Fast processing",
-            "Lossless rotation"
+            "Lossless rotation",
+            "Incremental save: only the changed page entries are written",
+            "Automatic orientation: POST /auto turns only sideways or upside-down pages upright"
         ],
+        "auto_orient": {
+            "decisions": {
+                "rotated": "Page was turned upright",
+                "upright": "Page was already upright",
+                "uncertain": "Page looked turned but confidence was below min_confidence",
+                "undetected": "Not enough text to decide",
+                "empty": "Page has no content"
+            },
+            "default_min_confidence": ORIENT_MIN_CONFIDENCE
+        },
         "max_file_size_mb": 100
     }
@@ -5,8 +5,9 @@ Handles adding digital signatures to PDF documents
 
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import List, Dict, Any
 import logging
+import os
 
 from database import get_db
 from services.auth_service import get_current_user
@@ -19,6 +20,37 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Maximum number of documents per batch signing request, by subscription plan
+MAX_BATCH_FILES = {
+    "free": 10,
+    "pro": 100,
+    "enterprise": 1000
+}
+DEFAULT_MAX_BATCH_FILES = 10
+
+def get_max_batch_files(user: User) -> int:
+    """Get the batch signing file-count limit for the user's subscription plan"""
+    if not user.subscription or not user.subscription.plan:
+        return DEFAULT_MAX_BATCH_FILES
+    return MAX_BATCH_FILES.get(user.subscription.plan.name.lower(), DEFAULT_MAX_BATCH_FILES)
+
+def validate_signature_parameters(signature_text: str, width: float, height: float, page: int, reason: str):
+    """Validate the signature options shared by single and batch signing"""
+    if not signature_text or not signature_text.strip():
+        raise HTTPException(status_code=400, detail="Signature text is required")
+    
+    if len(signature_text) > 100:
+        raise HTTPException(status_code=400, detail="Signature text must be 100 characters or less")
+    
+    if width <= 0 or height <= 0:
+        raise HTTPException(status_code=400, detail="Signature width and height must be positive")
+    
+    if page < 1:
+        raise HTTPException(status_code=400, detail="Page must be at least 1")
+    
+    if len(reason) > 200:
+        raise HTTPException(status_code=400, detail="Reason must be 200 characters or less")
+
 @router.post("/")
 async def sign_pdf(
     file: UploadFile = File(...),
@@ -27,6 +59,8 @@ async def sign_pdf(
     y: float = Form(100),
     width: float = Form(200),
     height: float = Form(50),
+    page: int = Form(1),
+    reason: str = Form(""),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -40,6 +74,8 @@ async def sign_pdf(
         y: Y coordinate for signature position
         width: Width of signature area
         height: Height of signature area
+        page: Page to place the signature on (1-based)
+        reason: Reason for signing, stored in the signature
         current_user: Authenticated user
         db: Database session
     
@@ -52,11 +88,7 @@ async def sign_pdf(
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
         # Validate signature parameters
-        if not signature_text or not signature_text.strip():
-            raise HTTPException(status_code=400, detail="Signature text is required")
-        
-        if len(signature_text) > 100:
-            raise HTTPException(status_code=400, detail="Signature text must be 100 characters or less")
+        validate_signature_parameters(signature_text, width, height, page, reason)
         
         # Check user limits
         if not current_user.can_process_more_files():
@@ -75,7 +107,8 @@ async def sign_pdf(
             input_file_size=file_info["size"],
             parameters={
                 "signature_text": signature_text,
-                "x": x, "y": y, "width": width, "height": height
+                "x": x, "y": y, "width": width, "height": height,
+                "page": page, "reason": reason
             }
         )
         
@@ -91,7 +124,7 @@ async def sign_pdf(
             # Process the PDF
             output_path = f"storage/temp/signed_{job.id}.pdf"
             result = await pdf_processor.sign_pdf(
-                file_info["path"], output_path, signature_text, x, y, width, height
+                file_info["path"], output_path, signature_text, x, y, width, height, page=page, reason=reason
             )
             
             # Save processed file
@@ -114,9 +147,18 @@ async def sign_pdf(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "signature_added": result["signature_added"],
                 "signature_position": result["signature_position"],
+                "field_name": result["field_name"],
+                "signer": result["signer"],
+                "save_mode": result["save_mode"],
                 "output_size": processed_info["size"]
             }
             
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF signing failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
@@ -130,6 +172,135 @@ async def sign_pdf(
         logger.error(f"PDF signing error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/batch")
+async def sign_pdf_batch(
+    files: List[UploadFile] = File(...),
+    signature_text: str = Form("Digitally Signed"),
+    x: float = Form(100),
+    y: float = Form(100),
+    width: float = Form(200),
+    height: float = Form(50),
+    page: int = Form(1),
+    reason: str = Form(""),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Sign many PDF documents with the same signature and placement
+    
+    Args:
+        files: PDF files to sign (up to the plan limit)
+        signature_text: Text to display in every signature
+        x: X coordinate for signature position
+        y: Y coordinate for signature position
+        width: Width of signature area
+        height: Height of signature area
+        page: Page to place the signature on (1-based)
+        reason: Reason for signing, stored in every signature
+        current_user: Authenticated user
+        db: Database session
+    
+    Returns:
+        Dict with batch results and the ZIP download URL
+    """
+    try:
+        # Validate number of files
+        max_files = get_max_batch_files(current_user)
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} files allowed")
+        
+        # Validate all files are PDFs
+        for file in files:
+            if not file.content_type == "application/pdf":
+                raise HTTPException(status_code=400, detail="All files must be PDFs")
+        
+        # Validate signature parameters
+        validate_signature_parameters(signature_text, width, height, page, reason)
+        
+        # Check user limits
+        if not current_user.can_process_more_files():
+            raise HTTPException(status_code=403, detail="Monthly file limit reached")
+        
+        # Save uploaded files
+        file_paths = []
+        total_size = 0
+        for file in files:
+            file_info = await file_storage.save_uploaded_file(file, current_user.id)
+            file_paths.append(file_info["path"])
+            total_size += file_info["size"]
+        
+        # Create job record
+        job = Job(
+            user_id=current_user.id,
+            job_type=JobType.SIGN,
+            status=JobStatus.PENDING,
+            input_file_path=file_paths[0],  # Use first file as primary
+            input_file_name=f"{len(files)}_files_to_sign",
+            input_file_size=total_size,
+            parameters={
+                "batch": True,
+                "file_count": len(files),
+                "file_names": [f.filename for f in files],
+                "signature_text": signature_text,
+                "x": x, "y": y, "width": width, "height": height,
+                "page": page, "reason": reason
+            }
+        )
+        
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        try:
+            # Start processing
+            job.start_processing()
+            db.commit()
+            
+            # Sign straight into a single ZIP in the downloads directory
+            archive_path = file_storage.get_processed_path(current_user.id, job.id, f"signed_{len(files)}_files.zip")
+            result = await pdf_processor.sign_pdf_batch(
+                file_paths, [os.path.basename(f.filename) for f in files], str(archive_path),
+                signature_text, x, y, width, height, page=page, reason=reason
+            )
+            processed_info = await file_storage.get_file_info(str(archive_path))
+            
+            # Complete job
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = processed_info["filename"]
+            job.output_file_size = processed_info["size"]
+            current_user.increment_usage()
+            db.commit()
+            
+            logger.info(f"PDF batch signing completed for user {current_user.id}, job {job.id}")
+            
+            return {
+                "success": True,
+                "job_id": job.id,
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "documents_signed": result["documents_signed"],
+                "signature_position": result["signature_position"],
+                "output_size": processed_info["size"]
+            }
+            
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF batch signing failed for job {job.id}: {e.detail}")
+            raise e
+        except Exception as e:
+            # Mark job as failed
+            job.fail_job(str(e))
+            db.commit()
+            logger.error(f"PDF batch signing failed for job {job.id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Batch signing failed: {str(e)}")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF batch signing error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/info")
 async def get_sign_info():
     """Get information about PDF signing capabilities"""
@@ -138,15 +309,23 @@ async def get_sign_info():
         "supported_formats": ["PDF"],
         "signature_options": {
             "text": "Custom signature text",
-            "position": "X, Y coordinates for signature placement",
+            "position": "X, Y coordinates from the top-left of the page as displayed",
             "size": "Width and height of signature area",
-            "style": "Professional signature appearance"
+            "page": "Page to place the signature on",
+            "reason": "Reason for signing, stored in the signature"
+        },
+        "signature_format": "PKCS#7 detached (adbe.pkcs7.detached), SHA-256",
+        "batch": {
+            "endpoint": "/batch",
+            "description": "Sign many documents with the same signature and placement into one ZIP",
+            "max_files": MAX_BATCH_FILES
         },
         "features": [
-            "Custom signature text",
-            "Flexible positioning",
-            "Professional appearance",
-            "Document integrity"
+            "Visible signature field with the signer's name",
+            "Cryptographic signature verifiable in PDF readers",
+            "Incremental update keeps the original document bytes",
+            "Batch signing of many documents",
+            "Works on rotated pages"
         ],
         "max_file_size_mb": 100,
         "examples": [
@@ -19,6 +19,21 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Maximum number of input files per merge, by subscription plan. The merge
+# engine imports inputs one at a time, so memory no longer grows with count.
+MAX_MERGE_FILES = {
+    "free": 20,
+    "pro": 50,
+    "enterprise": 500
+}
+DEFAULT_MAX_MERGE_FILES = 20
+
+def get_max_merge_files(user: User) -> int:
+    """Get the merge file-count limit for the user's subscription plan"""
+    if not user.subscription or not user.subscription.plan:
+        return DEFAULT_MAX_MERGE_FILES
+    return MAX_MERGE_FILES.get(user.subscription.plan.name.lower(), DEFAULT_MAX_MERGE_FILES)
+
 @router.post("/")
 async def merge_pdfs(
     files: List[UploadFile] = File(...),
@@ -29,7 +44,7 @@ async def merge_pdfs(
     Merge multiple PDF files into a single document
     
     Args:
-        files: List of PDF files to merge (2-20 files)
+        files: List of PDF files to merge (2 up to the plan limit)
         current_user: Authenticated user
         db: Database session
     
@@ -41,8 +56,9 @@ async def merge_pdfs(
         if len(files) < 2:
             raise HTTPException(status_code=400, detail="At least 2 files required for merging")
         
-        if len(files) > 20:
-            raise HTTPException(status_code=400, detail="Maximum 20 files allowed")
+        max_files = get_max_merge_files(current_user)
+        if len(files) > max_files:
+            raise HTTPException(status_code=400, detail=f"Maximum {max_files} files allowed")
         
         # Validate all files are PDFs
         for file in files:
@@ -105,6 +121,7 @@ async def merge_pdfs(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "total_pages": result["total_pages"],
                 "files_merged": result["files_merged"],
+                "objects_deduplicated": result["objects_deduplicated"],
                 "output_size": processed_info["size"]
             }
             
@@ -129,13 +146,15 @@ async def get_merge_info():
         "supported_formats": ["PDF"],
         "file_limits": {
             "min_files": 2,
-            "max_files": 20,
+            "max_files": DEFAULT_MAX_MERGE_FILES,
+            "max_files_by_plan": MAX_MERGE_FILES,
             "max_file_size_mb": 100
         },
         "features": [
             "Combine multiple PDFs into one",
             "Maintain original quality",
             "Preserve page order",
+            "Shared images and fonts stored once",
             "Fast processing"
         ],
         "processing_order": "Files are merged in the order they are uploaded"
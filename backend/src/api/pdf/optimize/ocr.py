@@ -12,6 +12,7 @@ from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
 from services.pdf_utils import pdf_processor
+from services.ocr_engine import OCR_LANGUAGES
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -44,11 +45,10 @@ async def ocr_pdf(
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
         # Validate language parameter
-        supported_languages = ["eng", "spa", "fra", "deu", "ita", "por", "rus", "chi_sim", "chi_tra", "jpn", "kor"]
-        if language not in supported_languages:
+        if language not in OCR_LANGUAGES:
             raise HTTPException(
                 status_code=400, 
-                detail=f"Unsupported language. Supported: {', '.join(supported_languages)}"
+                detail=f"Unsupported language. Supported: {', '.join(OCR_LANGUAGES)}"
             )
         
         # Check user limits
@@ -78,14 +78,11 @@ async def ocr_pdf(
             job.start_processing()
             db.commit()
             
-            # Process the PDF
-            output_path = f"storage/temp/ocr_{job.id}.pdf"
-            result = await pdf_processor.ocr_pdf(file_info["path"], output_path, language)
-            
-            # Save processed file
-            processed_info = await file_storage.save_processed_file(
-                output_path, current_user.id, job.id, f"ocr_{file.filename}"
-            )
+            # Write the update straight into the downloads directory; after the
+            # copy of the input only the changed objects are written
+            output_path = file_storage.get_processed_path(current_user.id, job.id, f"ocr_{file.filename}")
+            result = await pdf_processor.ocr_pdf(file_info["path"], str(output_path), language)
+            processed_info = await file_storage.get_file_info(str(output_path), compute_hash=False)
             
             # Complete job
             job.complete_job(processed_info["path"], result)
@@ -102,8 +99,12 @@ async def ocr_pdf(
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "language_used": result["language_used"],
                 "pages_processed": result["pages_processed"],
+                "pages_skipped": result["pages_skipped"],
                 "text_extracted": result["text_extracted"],
                 "confidence_score": result["confidence_score"],
+                "cache_hits": result["cache_hits"],
+                "cache_misses": result["cache_misses"],
+                "timings": result["timings"],
                 "output_size": processed_info["size"]
             }
             
@@ -126,24 +127,19 @@ async def get_ocr_info():
     return {
         "description": "Perform Optical Character Recognition on PDF documents to make them searchable",
         "supported_formats": ["PDF"],
-        "supported_languages": {
-            "eng": "English",
-            "spa": "Spanish",
-            "fra": "French",
-            "deu": "German",
-            "ita": "Italian",
-            "por": "Portuguese",
-            "rus": "Russian",
-            "chi_sim": "Chinese (Simplified)",
-            "chi_tra": "Chinese (Traditional)",
-            "jpn": "Japanese",
-            "kor": "Korean"
-        },
+        "supported_languages": OCR_LANGUAGES,
         "features": [
             "Text recognition and extraction",
             "Searchable PDF creation",
             "Multi-language support",
-            "High accuracy OCR"
+            "High accuracy OCR",
+            "Pages are recognized in parallel",
+            "Pages that already have a text layer are skipped",
+            "Scan resolution detected per page",
+            "Language models stay loaded between pages and jobs",
+            "Scans are deskewed, binarized and cleaned before recognition",
+            "Blank scanned pages are detected and skipped",
+            "Pages recognized before are served from a cache"
         ],
         "max_file_size_mb": 50,
         "requirements": "Tesseract OCR must be installed on the server",
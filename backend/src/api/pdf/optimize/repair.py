@@ -91,12 +91,22 @@ async def repair_pdf(
                 "job_id": job.id,
                 "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
                 "repair_successful": result["repair_successful"],
+                "status": result["status"],
                 "issues_found": result["issues_found"],
                 "issues_fixed": result["issues_fixed"],
+                "issues": result["issues"],
                 "pages_recovered": result["pages_recovered"],
+                "objects_recovered": result.get("objects_recovered"),
+                "objects_dropped": result.get("objects_dropped", 0),
                 "output_size": processed_info["size"]
             }
             
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF repair failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
@@ -118,21 +128,21 @@ async def get_repair_info():
         "supported_formats": ["PDF"],
         "repair_capabilities": [
             "Fix corrupted file structure",
-            "Recover damaged pages",
-            "Repair broken links and bookmarks",
-            "Restore missing metadata"
+            "Rebuild the cross-reference table from the objects in the file",
+            "Recover pages and objects from truncated files",
+            "Keep metadata and bookmarks whose objects survive"
         ],
         "common_issues_fixed": [
             "File header corruption",
             "Cross-reference table errors",
-            "Missing page objects",
-            "Invalid object references",
-            "Stream corruption"
+            "Wrong object offsets after editing",
+            "Missing or wrong stream lengths",
+            "Truncated downloads"
         ],
         "features": [
-            "Automatic error detection",
-            "Safe repair process",
-            "Data recovery",
+            "Healthy files are detected and returned unchanged",
+            "Streaming repair with low memory use on large files",
+            "Unrecoverable objects are dropped and reported",
             "Quality preservation"
         ],
         "max_file_size_mb": 100,
@@ -0,0 +1,196 @@
+"""
+PDF Preview API
+Handles page previews and thumbnail sprite sheets of uploaded and processed documents
+"""
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+import logging
+
+from database import get_db
+from services.auth_service import get_current_user
+from services.file_storage import file_storage
+from services.page_render import (
+    page_renderer, RENDER_FORMATS, MIN_RENDER_DPI, MAX_RENDER_DPI, SPRITE_MAX_PAGES
+)
+from models.user_model import User
+from models.job_model import Job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Thumbnail width limits for sprite sheets, in pixels
+MIN_THUMBNAIL_WIDTH = 32
+MAX_THUMBNAIL_WIDTH = 400
+
+# Rendered images never change for a document hash, so browsers may keep them
+PREVIEW_CACHE_CONTROL = "private, max-age=3600"
+
+def _image_response(result: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        content=result["data"],
+        media_type=result["media_type"],
+        headers={
+            "Cache-Control": PREVIEW_CACHE_CONTROL,
+            "ETag": f'"{result["etag"]}"',
+            "X-Render-Cache": result["cache"],
+            **(headers or {})
+        }
+    )
+
+def _sprite_headers(result: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "X-Sprite-First-Page": str(result["first_page"]),
+        "X-Sprite-Page-Count": str(result["page_count"]),
+        "X-Sprite-Columns": str(result["columns"]),
+        "X-Sprite-Cell-Width": str(result["cell_width"]),
+        "X-Sprite-Cell-Height": str(result["cell_height"]),
+        "Access-Control-Expose-Headers": "X-Sprite-First-Page, X-Sprite-Page-Count, X-Sprite-Columns, "
+                                         "X-Sprite-Cell-Width, X-Sprite-Cell-Height, X-Render-Cache"
+    }
+
+def _job_document_path(db: Session, user: User, job_id: int, source: str) -> str:
+    """Input or output file of one of the user's jobs"""
+    if source not in ("input", "output"):
+        raise HTTPException(status_code=400, detail="Source must be 'input' or 'output'")
+    
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    path = job.output_file_path if source == "output" else job.input_file_path
+    if not path:
+        raise HTTPException(status_code=404, detail=f"Job has no {source} file")
+    return path
+
+@router.post("/")
+async def upload_preview_document(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload a PDF for previewing
+    
+    Args:
+        file: PDF file to preview
+        current_user: Authenticated user
+    
+    Returns:
+        Dict with the document id and page sizes used by the render endpoints
+    """
+    try:
+        # Validate file type
+        if not file.content_type == "application/pdf":
+            raise HTTPException(status_code=400, detail="File must be a PDF")
+        
+        file_info = await file_storage.save_preview_file(file, current_user.id)
+        info = await page_renderer.get_document_info(file_info["path"])
+        
+        return {
+            "success": True,
+            "document_id": file_info["document_id"],
+            "page_count": info["page_count"],
+            "pages": info["pages"],
+            "expires_in_hours": file_storage.max_temp_file_age_hours
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"PDF preview upload error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/info")
+async def get_preview_info():
+    """Get information about page preview capabilities"""
+    return {
+        "description": "Render page previews and thumbnail sprite sheets of PDF documents",
+        "supported_formats": ["PDF"],
+        "image_formats": list(RENDER_FORMATS),
+        "dpi_range": {"min": MIN_RENDER_DPI, "max": MAX_RENDER_DPI, "default": 72},
+        "thumbnail_width_range": {"min": MIN_THUMBNAIL_WIDTH, "max": MAX_THUMBNAIL_WIDTH, "default": 160},
+        "max_sprite_pages": SPRITE_MAX_PAGES,
+        "endpoints": {
+            "POST /": "Upload a document and get its document_id",
+            "GET /{document_id}/pages/{page}": "Render one page (dpi or width, format)",
+            "GET /{document_id}/sprite": "All page thumbnails in one image",
+            "GET /jobs/{job_id}/pages/{page}": "Render a page of a job's input or output file",
+            "GET /jobs/{job_id}/sprite": "Thumbnails of a job's input or output file"
+        },
+        "sprite_layout": "Page i of the range is centered in the cell at column i % X-Sprite-Columns, row i // X-Sprite-Columns",
+        "features": [
+            "Rendering in worker processes",
+            "In-memory and on-disk cache keyed by file hash, page, DPI and format",
+            "A whole preview grid in one request"
+        ]
+    }
+
+@router.get("/cache")
+async def get_preview_cache_stats(current_user: User = Depends(get_current_user)):
+    """Get hit counts and sizes of the render caches"""
+    return page_renderer.get_stats()
+
+@router.get("/{document_id}/pages/{page}")
+async def render_preview_page(
+    document_id: str,
+    page: int,
+    dpi: Optional[int] = Query(None),
+    width: Optional[int] = Query(None),
+    format: str = Query("png"),
+    current_user: User = Depends(get_current_user)
+):
+    """Render a page of an uploaded preview document"""
+    path = file_storage.get_preview_path(current_user.id, document_id)
+    result = await page_renderer.render_page(str(path), page, dpi, width, format)
+    return _image_response(result)
+
+@router.get("/{document_id}/sprite")
+async def render_preview_sprite(
+    document_id: str,
+    width: int = Query(160, ge=MIN_THUMBNAIL_WIDTH, le=MAX_THUMBNAIL_WIDTH),
+    columns: int = Query(10, ge=1, le=50),
+    format: str = Query("webp"),
+    first_page: int = Query(1, ge=1),
+    last_page: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_user)
+):
+    """Thumbnails of an uploaded preview document as one sprite sheet"""
+    path = file_storage.get_preview_path(current_user.id, document_id)
+    result = await page_renderer.render_sprite(str(path), width, columns, format, first_page, last_page)
+    return _image_response(result, _sprite_headers(result))
+
+@router.get("/jobs/{job_id}/pages/{page}")
+async def render_job_page(
+    job_id: int,
+    page: int,
+    source: str = Query("output"),
+    dpi: Optional[int] = Query(None),
+    width: Optional[int] = Query(None),
+    format: str = Query("png"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Render a page of a job's input or output file"""
+    path = _job_document_path(db, current_user, job_id, source)
+    result = await page_renderer.render_page(path, page, dpi, width, format)
+    return _image_response(result)
+
+@router.get("/jobs/{job_id}/sprite")
+async def render_job_sprite(
+    job_id: int,
+    source: str = Query("output"),
+    width: int = Query(160, ge=MIN_THUMBNAIL_WIDTH, le=MAX_THUMBNAIL_WIDTH),
+    columns: int = Query(10, ge=1, le=50),
+    format: str = Query("webp"),
+    first_page: int = Query(1, ge=1),
+    last_page: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Thumbnails of a job's input or output file as one sprite sheet"""
+    path = _job_document_path(db, current_user, job_id, source)
+    result = await page_renderer.render_sprite(path, width, columns, format, first_page, last_page)
+    return _image_response(result, _sprite_headers(result))
@@ -3,7 +3,7 @@ PDF Compare API
 Handles comparing two PDF documents for differences
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
@@ -19,10 +19,18 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+COMPARE_MODES = ["text", "visual"]
+
+# Render resolution range accepted for visual comparison
+MIN_VISUAL_DPI = 50
+MAX_VISUAL_DPI = 200
+
 @router.post("/")
 async def compare_pdfs(
     file1: UploadFile = File(...),
     file2: UploadFile = File(...),
+    mode: str = Form("text"),
+    dpi: int = Form(100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -32,17 +40,25 @@ async def compare_pdfs(
     Args:
         file1: First PDF file to compare
         file2: Second PDF file to compare
+        mode: "text" for a page and word-level diff, "visual" for a rendered pixel diff
+        dpi: Render resolution for visual mode
         current_user: Authenticated user
         db: Database session
     
     Returns:
-        Dict with comparison results
+        Dict with comparison results, plus a highlighted overlay download URL in visual mode
     """
     try:
         # Validate file types
         if not (file1.content_type == "application/pdf" and file2.content_type == "application/pdf"):
             raise HTTPException(status_code=400, detail="Both files must be PDFs")
         
+        # Validate comparison parameters
+        if mode not in COMPARE_MODES:
+            raise HTTPException(status_code=400, detail=f"Mode must be one of: {', '.join(COMPARE_MODES)}")
+        if mode == "visual" and not MIN_VISUAL_DPI <= dpi <= MAX_VISUAL_DPI:
+            raise HTTPException(status_code=400, detail=f"DPI must be between {MIN_VISUAL_DPI} and {MAX_VISUAL_DPI}")
+        
         # Check user limits
         if not current_user.can_process_more_files():
             raise HTTPException(status_code=403, detail="Monthly file limit reached")
@@ -59,7 +75,12 @@ async def compare_pdfs(
             input_file_path=file1_info["path"],
             input_file_name=f"{file1.filename} vs {file2.filename}",
             input_file_size=file1_info["size"] + file2_info["size"],
-            parameters={"file1_name": file1.filename, "file2_name": file2.filename}
+            parameters={
+                "file1_name": file1.filename,
+                "file2_name": file2.filename,
+                "mode": mode,
+                "dpi": dpi if mode == "visual" else None
+            }
         )
         
         db.add(job)
@@ -72,10 +93,26 @@ async def compare_pdfs(
             db.commit()
             
             # Process the PDFs
-            result = await pdf_processor.compare_pdfs(file1_info["path"], file2_info["path"])
+            if mode == "visual":
+                output_path = f"storage/temp/compared_{job.id}.pdf"
+                result = await pdf_processor.compare_pdfs_visual(
+                    file1_info["path"], file2_info["path"], output_path, dpi
+                )
+                
+                # Save the highlighted overlay
+                processed_info = await file_storage.save_processed_file(
+                    output_path, current_user.id, job.id, f"compared_{file2.filename}"
+                )
+                job.complete_job(processed_info["path"], result)
+                job.output_file_name = processed_info["filename"]
+                job.output_file_size = processed_info["size"]
+                download_url = f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}"
+            else:
+                result = await pdf_processor.compare_pdfs(file1_info["path"], file2_info["path"])
+                job.complete_job(None, result)  # No output file for text comparison
+                download_url = None
             
             # Complete job
-            job.complete_job(None, result)  # No output file for comparison
             current_user.increment_usage()
             db.commit()
             
@@ -84,14 +121,27 @@ async def compare_pdfs(
             return {
                 "success": True,
                 "job_id": job.id,
+                "mode": result["mode"],
+                "download_url": download_url,
                 "comparison_result": result["comparison_result"],
                 "differences_found": result["differences_found"],
                 "similarity_score": result["similarity_score"],
                 "file1_pages": result["file1_pages"],
                 "file2_pages": result["file2_pages"],
-                "differences": result["differences"]
+                "pages_identical": result["pages_identical"],
+                "pages_modified": result["pages_modified"],
+                "pages_inserted": result["pages_inserted"],
+                "pages_deleted": result["pages_deleted"],
+                "differences": result["differences"],
+                "pages": result["pages"]
             }
             
+        except HTTPException as e:
+            # Mark job as failed
+            job.fail_job(str(e.detail))
+            db.commit()
+            logger.error(f"PDF comparison failed for job {job.id}: {e.detail}")
+            raise e
         except Exception as e:
             # Mark job as failed
             job.fail_job(str(e))
@@ -112,15 +162,23 @@ async def get_compare_info():
         "description": "Compare two PDF documents to find differences",
         "supported_formats": ["PDF"],
         "comparison_features": [
-            "Text differences",
-            "Layout changes",
-            "Page count differences",
+            "Page alignment that detects inserted and deleted pages",
+            "Word-level text differences on changed pages",
+            "Image and layout changes",
+            "Visual mode: rendered pixel differences for scans, drawings and charts",
             "Similarity scoring"
         ],
+        "modes": {
+            "text": "Aligns pages and diffs their words; no output file",
+            "visual": "Renders changed pages and highlights the changed regions in an overlay PDF"
+        },
+        "dpi_range": {"min": MIN_VISUAL_DPI, "max": MAX_VISUAL_DPI, "default": 100},
         "output": {
-            "similarity_score": "Percentage of similarity (0-100)",
+            "similarity_score": "Percentage of similarity (0-100), averaged over aligned pages",
             "differences_found": "Boolean indicating if differences exist",
-            "differences": "Detailed list of differences found"
+            "differences": "Detailed list of differences found",
+            "pages": "Per-page report: status (identical, modified, inserted, deleted), page numbers in both files and, for modified pages, the text changes or the change percentage and region boxes",
+            "download_url": "Visual mode only: the second document with changed regions highlighted"
         },
         "max_file_size_mb": 100,
         "use_cases": [
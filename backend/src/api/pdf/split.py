@@ -7,11 +7,12 @@ from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
+import os
 
 from database import get_db
 from services.auth_service import get_current_user
 from services.file_storage import file_storage
-from services.pdf_utils import pdf_processor
+from services.pdf_utils import pdf_processor, SPLIT_MODES
 from models.user_model import User
 from models.job_model import Job, JobType, JobStatus
 
@@ -23,6 +24,10 @@ router = APIRouter()
 async def split_pdf(
     file: UploadFile = File(...),
     pages: str = Form("1"),
+    mode: str = Form("pages"),
+    every: int = Form(1),
+    max_size_mb: float = Form(10.0),
+    include_manifest: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -31,20 +36,31 @@ async def split_pdf(
     
     Args:
         file: PDF file to split
-        pages: Page specification (e.g., "1,3,5" or "1-5" or "1,3-7,10")
+        pages: Page specification (e.g., "1,3,5" or "1-5" or "1,3-7,10"), used by "pages" and "ranges" modes
+        mode: Split mode ("pages", "ranges", "every", "bookmarks" or "size")
+        every: Pages per part for "every" mode
+        max_size_mb: Maximum part size for "size" mode
+        include_manifest: Include each part's offset and size within the ZIP
         current_user: Authenticated user
         db: Database session
     
     Returns:
-        Dict with split results and download URLs
+        Dict with split results and the ZIP download URL
     """
     try:
         # Validate file type
         if not file.content_type == "application/pdf":
             raise HTTPException(status_code=400, detail="File must be a PDF")
         
+        # Validate split mode
+        if mode not in SPLIT_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid split mode. Supported: {', '.join(SPLIT_MODES)}"
+            )
+        
         # Validate pages parameter
-        if not pages or not pages.strip():
+        if mode in ("pages", "ranges") and (not pages or not pages.strip()):
             raise HTTPException(status_code=400, detail="Pages parameter is required")
         
         # Check user limits
@@ -62,7 +78,7 @@ async def split_pdf(
             input_file_path=file_info["path"],
             input_file_name=file.filename,
             input_file_size=file_info["size"],
-            parameters={"pages": pages}
+            parameters={"pages": pages, "mode": mode, "every": every, "max_size_mb": max_size_mb}
         )
         
         db.add(job)
@@ -74,41 +90,38 @@ async def split_pdf(
             job.start_processing()
             db.commit()
             
-            # Process the PDF
-            output_dir = f"storage/temp/split_{job.id}"
-            import os
-            os.makedirs(output_dir, exist_ok=True)
-            
-            result = await pdf_processor.split_pdf(file_info["path"], output_dir, pages)
-            
-            # Save processed files
-            download_urls = []
-            for i, output_file in enumerate(result["output_files"]):
-                processed_info = await file_storage.save_processed_file(
-                    output_file, current_user.id, job.id, f"page_{i+1}.pdf"
-                )
-                download_urls.append({
-                    "page_number": i + 1,
-                    "filename": processed_info["filename"],
-                    "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
-                    "size": processed_info["size"]
-                })
+            # Split straight into a single ZIP in the downloads directory
+            output_name = f"split_{os.path.splitext(file.filename)[0]}.zip"
+            archive_path = file_storage.get_processed_path(current_user.id, job.id, output_name)
+            result = await pdf_processor.split_pdf(
+                file_info["path"], None, pages,
+                mode=mode, every=every, max_size_mb=max_size_mb, archive_path=str(archive_path)
+            )
+            processed_info = await file_storage.get_file_info(str(archive_path))
             
             # Complete job
-            job.complete_job(result["output_files"][0], result)  # Use first file as main output
-            job.output_file_name = f"split_{len(result['output_files'])}_pages"
+            job.complete_job(processed_info["path"], result)
+            job.output_file_name = output_name
+            job.output_file_size = processed_info["size"]
             current_user.increment_usage()
             db.commit()
             
             logger.info(f"PDF split completed for user {current_user.id}, job {job.id}")
             
-            return {
+            response = {
                 "success": True,
                 "job_id": job.id,
+                "mode": result["mode"],
                 "pages_extracted": result["pages_extracted"],
-                "download_urls": download_urls,
-                "total_files": len(download_urls)
+                "download_url": f"/storage/downloads/{current_user.id}/{job.id}/{processed_info['filename']}",
+                "filename": output_name,
+                "total_files": len(result["parts"]),
+                "output_size": processed_info["size"]
             }
+            if include_manifest:
+                response["manifest"] = result["parts"]
+            
+            return response
             
         except Exception as e:
             # Mark job as failed
@@ -138,11 +151,20 @@ async def get_split_info():
             ],
             "format": "Comma-separated page numbers or ranges"
         },
+        "split_modes": {
+            "pages": "One file per listed page",
+            "ranges": "One file per listed range (e.g. 1-3,4-10)",
+            "every": "Consecutive parts of N pages",
+            "bookmarks": "One part per top-level bookmark",
+            "size": "Consecutive parts under a maximum file size"
+        },
         "features": [
             "Extract specific pages",
             "Split by page ranges",
+            "Split every N pages, at bookmarks or by size",
             "Maintain original quality",
-            "Multiple output files"
+            "All parts delivered as one ZIP",
+            "Optional manifest with each part's offset in the ZIP"
         ],
         "max_file_size_mb": 100
     }
@@ -5,8 +5,8 @@ Consolidates all API endpoints into a single router
 
 from fastapi import APIRouter
 from api.user import auth, profile, history
-from api.pdf import compress, merge, split
-from api.pdf.convert import word_to_pdf, excel_to_pdf, html_to_pdf, pdf_to_word, pdf_to_excel, ppt_to_pdf, pdf_to_ppt
+from api.pdf import compress, merge, split, preview
+from api.pdf.convert import word_to_pdf, excel_to_pdf, html_to_pdf, pdf_to_word, pdf_to_excel, ppt_to_pdf, pdf_to_ppt, pdf_to_jpg, jpg_to_pdf, pdf_to_pdfa
 from api.pdf.edit import rotate, add_watermark, crop, redact, sign
 from api.pdf.security import protect, unlock, compare
 from api.pdf.optimize import ocr, repair
@@ -52,6 +52,12 @@ api_router.include_router(
     tags=["PDF Split"]
 )
 
+api_router.include_router(
+    preview.router,
+    prefix="/pdf/preview",
+    tags=["PDF Preview"]
+)
+
 # PDF Conversion Operations
 api_router.include_router(
     word_to_pdf.router,
@@ -95,6 +101,24 @@ api_router.include_router(
     tags=["PDF to PowerPoint"]
 )
 
+api_router.include_router(
+    pdf_to_jpg.router,
+    prefix="/pdf/convert/pdf-to-jpg",
+    tags=["PDF to Image"]
+)
+
+api_router.include_router(
+    jpg_to_pdf.router,
+    prefix="/pdf/convert/jpg-to-pdf",
+    tags=["Image to PDF"]
+)
+
+api_router.include_router(
+    pdf_to_pdfa.router,
+    prefix="/pdf/convert/pdf-to-pdfa",
+    tags=["PDF to PDF/A"]
+)
+
 # PDF Edit Operations
 api_router.include_router(
     rotate.router,
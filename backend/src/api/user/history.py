@@ -4,11 +4,14 @@ Handles user's PDF processing history and job tracking
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 import logging
+import mimetypes
+import os
 
 from database import get_db
 from services.auth_service import get_current_user
@@ -180,6 +183,52 @@ async def get_job_details(
             detail="Failed to get job details"
         )
 
+@router.get("/job/{job_id}/download")
+async def download_job_output(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a job's output file as a single chunked download"""
+    try:
+        job = db.query(Job).filter(
+            Job.id == job_id,
+            Job.user_id == current_user.id
+        ).first()
+        
+        if not job or job.status != JobStatus.COMPLETED or not job.output_file_path:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job output not found"
+            )
+        
+        if not os.path.exists(job.output_file_path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job output file has been removed"
+            )
+        
+        from services.file_storage import file_storage
+        media_type = mimetypes.guess_type(job.output_file_path)[0] or "application/octet-stream"
+        
+        return StreamingResponse(
+            file_storage.stream_file(job.output_file_path),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{job.output_file_name}"',
+                "Content-Length": str(os.path.getsize(job.output_file_path))
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to download job output: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to download job output"
+        )
+
 @router.delete("/job/{job_id}")
 async def delete_job(
     job_id: int,
@@ -11,6 +11,10 @@ from pathlib import Path
 # Import services and configuration
 from services.database import init_db, db_manager
 from services.cleanup import scheduled_cleanup
+from services.worker_pool import worker_pool
+from services.ocr_engine import load_engines
+from services.signing import load_signer
+from services.html_render import load_renderer
 from api.router import api_router
 from config import app_settings
 
@@ -35,6 +39,15 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         raise
     
+    # Start workers with their OCR recognizers, signing key and HTML renderer loaded
+    worker_pool.add_initializer(load_engines)
+    worker_pool.add_initializer(load_signer)
+    worker_pool.add_initializer(load_renderer)
+    try:
+        await worker_pool.warm_up()
+    except Exception as e:
+        logger.error(f"Worker pool warm-up failed: {e}")
+    
     # Start background tasks
     # Note: In production, use a proper task queue like Celery
     # asyncio.create_task(periodic_cleanup())
@@ -43,6 +56,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down PDF Toolkit API...")
+    worker_pool.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
@@ -0,0 +1,93 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """Size-bounded key/value store on disk with least-recently-used eviction
+    
+    Backed by a SQLite file so that the server and all worker processes can
+    share one cache. Cache failures are logged and treated as misses; they
+    never fail the job that uses the cache.
+    """
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross process or thread boundaries
+        if getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value and mark it as recently used, or None"""
+        if not self.enabled:
+            return None
+        try:
+            connection = self._connect()
+            row = connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Cache lookup failed in {self.path}: {e}")
+            return None
+    
+    def put(self, key: str, value: bytes):
+        """Store a value, evicting the least recently used entries beyond the size limit"""
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        try:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time())
+            )
+            self._evict(connection)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache store failed in {self.path}: {e}")
+    
+    def _evict(self, connection: sqlite3.Connection):
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Keep the most recently used entries that fit within the limit
+        connection.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM entries) "
+            "WHERE running > ?)",
+            (self.max_bytes,)
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count and size of the cache"""
+        try:
+            entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache stats failed in {self.path}: {e}")
+            entries, size = 0, 0
+        return {"entries": entries, "size_bytes": size, "max_bytes": self.max_bytes}
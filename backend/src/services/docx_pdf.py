@@ -0,0 +1,615 @@
+import io
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+from docx.oxml.ns import qn
+from docx.table import Table as DocxTable
+from docx.text.hyperlink import Hyperlink
+from docx.text.paragraph import Paragraph as DocxParagraph
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import HRFlowable, Image, PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Body elements the native renderer can't reproduce, by the reason reported
+_COMPLEX_ELEMENTS = {
+    qn("wp:anchor"): "floating_objects",
+    qn("w:txbxContent"): "text_boxes",
+    qn("w:pict"): "drawing_shapes",
+    qn("w:object"): "embedded_objects",
+    qn("c:chart"): "charts",
+    qn("dgm:relIds"): "diagrams",
+    qn("m:oMath"): "equations",
+    qn("w:fldSimple"): "fields",
+    qn("w:instrText"): "fields",
+    qn("w:footnoteReference"): "footnotes",
+    qn("w:endnoteReference"): "footnotes",
+    qn("w:ins"): "tracked_changes",
+    qn("w:del"): "tracked_changes",
+    qn("w:sdt"): "content_controls",
+    qn("w:sym"): "symbols",
+    qn("w:gridSpan"): "merged_cells",
+    qn("w:vMerge"): "merged_cells",
+    qn("w:framePr"): "frames",
+    qn("w:bidi"): "right_to_left",
+    qn("w:rtl"): "right_to_left",
+    qn("w:textDirection"): "vertical_text",
+    qn("w:smallCaps"): "text_effects",
+    qn("w:outline"): "text_effects",
+    qn("w:shadow"): "text_effects",
+    qn("w:emboss"): "text_effects",
+    qn("w:imprint"): "text_effects",
+    qn("w:fitText"): "text_effects",
+    qn("w:w"): "text_effects"
+}
+
+# Table styles drawn natively: no borders, or a single grid. Other styles
+# shade and border rows and columns conditionally
+SIMPLE_TABLE_STYLES = {None, "Normal Table", "Table Grid"}
+
+# List formats the native renderer numbers itself
+LIST_FORMATS = {"bullet", "decimal", "lowerLetter", "upperLetter", "lowerRoman", "upperRoman"}
+
+# Standard fonts stand in for the document's (WinAnsi text only)
+_BASE_FONTS = {
+    "sans": {(False, False): "Helvetica", (True, False): "Helvetica-Bold", (False, True): "Helvetica-Oblique", (True, True): "Helvetica-BoldOblique"},
+    "serif": {(False, False): "Times-Roman", (True, False): "Times-Bold", (False, True): "Times-Italic", (True, True): "Times-BoldItalic"},
+    "mono": {(False, False): "Courier", (True, False): "Courier-Bold", (False, True): "Courier-Oblique", (True, True): "Courier-BoldOblique"}
+}
+_SERIF_NAMES = ("times", "serif", "roman", "georgia", "garamond", "cambria", "book", "palatino", "minion")
+_MONO_NAMES = ("courier", "mono", "consol", "typewriter")
+
+_ALIGNMENTS = {
+    WD_ALIGN_PARAGRAPH.LEFT: TA_LEFT,
+    WD_ALIGN_PARAGRAPH.CENTER: TA_CENTER,
+    WD_ALIGN_PARAGRAPH.RIGHT: TA_RIGHT,
+    WD_ALIGN_PARAGRAPH.JUSTIFY: TA_JUSTIFY
+}
+_IMAGE_ALIGNMENTS = {TA_LEFT: "LEFT", TA_CENTER: "CENTER", TA_RIGHT: "RIGHT", TA_JUSTIFY: "LEFT"}
+
+# Paragraph borders drawn as rules above or below the paragraph (a title's
+# underline); borders at the sides or between paragraphs are complex
+_RULE_BORDERS = {qn("w:top"), qn("w:bottom")}
+
+# Shading fills that leave the white page as it is; Word writes w:shd with
+# these on many tables and paragraphs that show no shading
+_BLANK_FILLS = {"AUTO", "FFFFFF"}
+
+# Word's defaults when a document doesn't set them: 10 pt text, single
+# lines about 1.2 times the font size, and 0.08 inch cell padding
+_DEFAULT_FONT_SIZE = 10
+_LINE_HEIGHT = 1.2
+_CELL_PADDING = 5.4
+_TAB = " " * 4
+_EMU_PER_POINT = 12700
+
+def classify_docx(document: Any) -> List[str]:
+    """Reasons a DOCX needs LibreOffice; empty for documents the native renderer reproduces
+    
+    Looks for floating objects, text boxes, charts, fields, tracked changes,
+    merged or nested table cells, paragraph and run formatting it doesn't
+    draw (borders, shading, text effects), table styles other than a plain
+    grid, list formats, headers and footers, multiple sections or columns,
+    and text outside the standard fonts' character set.
+    """
+    reasons: Set[str] = set()
+    lists = _list_definitions(document)
+    body = document.element.body
+    for element in body.iter():
+        reason = _COMPLEX_ELEMENTS.get(element.tag)
+        if reason:
+            reasons.add(reason)
+        elif element.tag == qn("w:tc") and element.find(f".//{qn('w:tbl')}") is not None:
+            reasons.add("nested_tables")
+        elif element.tag == qn("w:tab") and element.get(qn("w:val")) not in (None, "left", "clear"):
+            reasons.add("tab_stops")
+        elif element.tag == qn("w:drawing") and element.find(f".//{qn('a:blip')}") is None:
+            reasons.add("drawing_shapes")
+        elif element.tag == qn("w:pBdr") and any(border.tag not in _RULE_BORDERS for border in element):
+            reasons.add("borders")
+        elif element.tag == qn("w:shd") and _is_shaded(element):
+            reasons.add("shading")
+    
+    for paragraph in _iter_paragraphs(document):
+        has_text = bool(paragraph.text.strip())
+        if has_text and paragraph._p.find(f".//{qn('w:drawing')}") is not None:
+            reasons.add("images_in_text")
+        if not is_win_ansi(paragraph.text):
+            reasons.add("non_latin_text")
+        numbering = _numbering_level(lists, paragraph)
+        if numbering is not None and numbering["format"] not in LIST_FORMATS:
+            reasons.add("numbering")
+    
+    for table in _iter_tables(document):
+        style = table.style
+        if (style.name if style is not None else None) not in SIMPLE_TABLE_STYLES:
+            reasons.add("table_styles")
+    
+    # Styles in use can carry the same formatting as direct properties
+    for style_id in {element.get(qn("w:val")) for element in body.iter(qn("w:pStyle"), qn("w:rStyle"))}:
+        style = document.styles.element.get_by_id(style_id)
+        while style is not None:
+            for element in style.iter():
+                reason = _COMPLEX_ELEMENTS.get(element.tag)
+                if reason:
+                    reasons.add(reason)
+                elif element.tag == qn("w:pBdr") and any(border.tag not in _RULE_BORDERS for border in element):
+                    reasons.add("borders")
+                elif element.tag == qn("w:shd") and _is_shaded(element):
+                    reasons.add("shading")
+            based_on = style.basedOn_val
+            style = document.styles.element.get_by_id(based_on) if based_on else None
+    
+    if len(document.sections) > 1:
+        reasons.add("sections")
+    for section in document.sections:
+        columns = section._sectPr.find(qn("w:cols"))
+        if columns is not None and int(columns.get(qn("w:num"), "1")) > 1:
+            reasons.add("columns")
+        for part in (
+            section.header, section.footer, section.first_page_header, section.first_page_footer,
+            section.even_page_header, section.even_page_footer
+        ):
+            if not part.is_linked_to_previous and _has_content(part._element):
+                reasons.add("headers_footers")
+    return sorted(reasons)
+
+def _is_shaded(shading: Any) -> bool:
+    """Whether a w:shd paints the background: a colour fill, or a pattern (auto colour is black)"""
+    pattern = shading.get(qn("w:val"))
+    if pattern == "nil":
+        return False
+    if shading.get(qn("w:themeFill")) is not None:
+        return True
+    if (shading.get(qn("w:fill")) or "auto").upper() not in _BLANK_FILLS:
+        return True
+    return pattern not in (None, "clear") and (shading.get(qn("w:color")) or "auto").upper() != "FFFFFF"
+
+def render_docx(input_path: str, output_path: str, force: bool = False) -> Dict[str, Any]:
+    """Worker: render a DOCX to PDF with reportlab
+    
+    The document is classified first. Unless force is set, a document with
+    complex features is not rendered and only the reasons are returned, so
+    it can go to LibreOffice instead.
+    """
+    document = Document(input_path)
+    reasons = classify_docx(document)
+    if reasons and not force:
+        return {"rendered": False, "reasons": reasons}
+    
+    section = document.sections[0]
+    template = SimpleDocTemplate(
+        output_path,
+        pagesize=(section.page_width.pt, section.page_height.pt),
+        leftMargin=section.left_margin.pt,
+        rightMargin=section.right_margin.pt,
+        topMargin=section.top_margin.pt,
+        bottomMargin=section.bottom_margin.pt,
+        title=document.core_properties.title or "",
+        author=document.core_properties.author or ""
+    )
+    renderer = _DocxRenderer(document, template.width)
+    template.build(renderer.flowables(document))
+    return {"rendered": True, "reasons": reasons, "page_count": template.page}
+
+class _DocxRenderer:
+    """Turns the body of a python-docx Document into reportlab flowables"""
+    
+    def __init__(self, document: Any, content_width: float):
+        self.document = document
+        self.content_width = content_width
+        self.defaults = _document_defaults(document)
+        self.lists = _list_definitions(document)
+        self._counters: Dict[str, List[int]] = {}
+        self._styles = 0
+    
+    def flowables(self, container: Any) -> List[Any]:
+        flowables = []
+        previous: Optional[Dict[str, Any]] = None
+        for item in container.iter_inner_content():
+            if isinstance(item, DocxTable):
+                flowables.append(self._table(item))
+                previous = None
+                continue
+            
+            spec = self._paragraph(item)
+            # Contextual spacing drops the space between paragraphs of one style
+            if previous and previous["style"] == spec["style"] and (previous["contextual"] or spec["contextual"]):
+                previous["paragraph_style"].spaceAfter = 0
+                spec["paragraph_style"].spaceBefore = 0
+            if spec["page_break_before"] and flowables:
+                flowables.append(PageBreak())
+            flowables.extend(spec["flowables"])
+            if spec["page_break_after"]:
+                flowables.append(PageBreak())
+            previous = spec
+        return flowables
+    
+    def _paragraph(self, paragraph: DocxParagraph) -> Dict[str, Any]:
+        chain = _style_chain(paragraph.style)
+        formats = [paragraph.paragraph_format] + [style.paragraph_format for style in chain]
+        
+        def inherited(name: str) -> Any:
+            for paragraph_format in formats:
+                value = getattr(paragraph_format, name)
+                if value is not None:
+                    return value
+            return None
+        
+        numbering = _numbering_level(self.lists, paragraph)
+        runs, images, page_break_after = self._runs(paragraph, chain)
+        font_size = max((run["size"] for run in runs), default=self._font(chain, None)["size"])
+        base_font = self._font(chain, None)
+        
+        line_spacing = inherited("line_spacing")
+        if line_spacing is None:
+            leading = font_size * _LINE_HEIGHT * self.defaults["line_spacing"]
+        elif isinstance(line_spacing, float):
+            leading = font_size * _LINE_HEIGHT * line_spacing
+        else:
+            at_least = inherited("line_spacing_rule") == WD_LINE_SPACING.AT_LEAST
+            leading = max(line_spacing.pt, font_size * _LINE_HEIGHT if at_least else 0)
+        
+        left_indent = _points(inherited("left_indent"))
+        first_line_indent = _points(inherited("first_line_indent"))
+        if numbering is not None and inherited("left_indent") is None:
+            left_indent, first_line_indent = numbering["left"], -numbering["hanging"]
+        space_before = inherited("space_before")
+        space_after = inherited("space_after")
+        alignment = _ALIGNMENTS.get(inherited("alignment"), TA_LEFT)
+        
+        self._styles += 1
+        paragraph_style = ParagraphStyle(
+            f"p{self._styles}",
+            fontName=base_font["face"],
+            fontSize=base_font["size"],
+            leading=leading,
+            alignment=alignment,
+            leftIndent=left_indent,
+            rightIndent=_points(inherited("right_indent")),
+            firstLineIndent=first_line_indent if numbering is None else 0,
+            bulletIndent=left_indent + first_line_indent,
+            bulletFontName=base_font["face"],
+            bulletFontSize=base_font["size"],
+            spaceBefore=space_before.pt if space_before is not None else 0,
+            spaceAfter=space_after.pt if space_after is not None else self.defaults["space_after"],
+            keepWithNext=bool(inherited("keep_with_next"))
+        )
+        
+        rules = self._rules(paragraph, chain)
+        flowables = [rules[qn("w:top")]] if qn("w:top") in rules else []
+        if images:
+            for image in images:
+                image.hAlign = _IMAGE_ALIGNMENTS[alignment]
+                image.spaceAfter = paragraph_style.spaceAfter
+            flowables.extend(images)
+        else:
+            markup = "".join(_run_markup(run) for run in runs) or " "
+            bullet = self._bullet(numbering) if numbering is not None else None
+            flowables.append(Paragraph(markup, paragraph_style, bulletText=bullet))
+        if qn("w:bottom") in rules:
+            flowables.append(rules[qn("w:bottom")])
+        
+        contextual = paragraph._p.find(f"./{qn('w:pPr')}/{qn('w:contextualSpacing')}") is not None or any(
+            style.element.find(f"./{qn('w:pPr')}/{qn('w:contextualSpacing')}") is not None for style in chain
+        )
+        return {
+            "style": paragraph.style.name if paragraph.style is not None else None,
+            "paragraph_style": paragraph_style,
+            "contextual": contextual,
+            "page_break_before": bool(inherited("page_break_before")),
+            "page_break_after": page_break_after,
+            "flowables": flowables
+        }
+    
+    def _runs(self, paragraph: DocxParagraph, chain: List[Any]) -> Tuple[List[Dict[str, Any]], List[Any], bool]:
+        runs, images = [], []
+        page_break = False
+        for item in paragraph.iter_inner_content():
+            link = item.url if isinstance(item, Hyperlink) else None
+            for run in item.runs if isinstance(item, Hyperlink) else [item]:
+                font = self._font(chain, run)
+                if font["hidden"]:
+                    continue
+                parts = []
+                for child in run._r:
+                    if child.tag == qn("w:t"):
+                        text = child.text or ""
+                        parts.append(escape(text.upper() if font["caps"] else text))
+                    elif child.tag in (qn("w:tab"), qn("w:ptab")):
+                        parts.append(_TAB)
+                    elif child.tag == qn("w:br"):
+                        if child.get(qn("w:type")) == "page":
+                            page_break = True
+                        else:
+                            parts.append("<br/>")
+                    elif child.tag == qn("w:cr"):
+                        parts.append("<br/>")
+                    elif child.tag == qn("w:noBreakHyphen"):
+                        parts.append("-")
+                    elif child.tag == qn("w:drawing"):
+                        image = self._image(run, child)
+                        if image is not None:
+                            images.append(image)
+                text = "".join(parts)
+                if text:
+                    runs.append({**font, "text": text, "link": link})
+        return runs, images, page_break
+    
+    def _font(self, chain: List[Any], run: Optional[Any]) -> Dict[str, Any]:
+        fonts = []
+        if run is not None:
+            fonts.append(run.font)
+            if run.style is not None and run.style.name != "Default Paragraph Font":
+                fonts.extend(style.font for style in _style_chain(run.style))
+        fonts.extend(style.font for style in chain)
+        
+        def inherited(name: str) -> Any:
+            for font in fonts:
+                value = getattr(font, name)
+                if value is not None:
+                    return value
+            return None
+        
+        size = inherited("size")
+        name = inherited("name") or self.defaults["font_name"]
+        bold, italic = bool(inherited("bold")), bool(inherited("italic"))
+        color = None
+        for font in fonts:
+            if font.color is not None and font.color.type is not None:
+                color = font.color.rgb
+                break
+        return {
+            "face": base_font(name, bold, italic),
+            "size": size.pt if size is not None else self.defaults["font_size"],
+            "underline": bool(inherited("underline")),
+            "strike": bool(inherited("strike")),
+            "superscript": bool(inherited("superscript")),
+            "subscript": bool(inherited("subscript")),
+            "caps": bool(inherited("all_caps")),
+            "hidden": bool(inherited("hidden")),
+            "color": str(color) if color is not None else None
+        }
+    
+    def _rules(self, paragraph: DocxParagraph, chain: List[Any]) -> Dict[str, HRFlowable]:
+        """Top and bottom paragraph borders, from the paragraph or its style"""
+        borders = paragraph._p.find(f"./{qn('w:pPr')}/{qn('w:pBdr')}")
+        for style in chain:
+            if borders is not None:
+                break
+            borders = style.element.find(f"./{qn('w:pPr')}/{qn('w:pBdr')}")
+        rules = {}
+        for border in borders if borders is not None else []:
+            if border.tag in _RULE_BORDERS and border.get(qn("w:val")) not in ("nil", "none"):
+                color = border.get(qn("w:color"), "auto")
+                rules[border.tag] = HRFlowable(
+                    width="100%",
+                    thickness=int(border.get(qn("w:sz"), "4")) / 8,
+                    color=colors.HexColor(f"#{color}") if color != "auto" else colors.black,
+                    spaceBefore=int(border.get(qn("w:space"), "0")) if border.tag == qn("w:bottom") else 0,
+                    spaceAfter=int(border.get(qn("w:space"), "0")) if border.tag == qn("w:top") else 0
+                )
+        return rules
+    
+    def _image(self, run: Any, drawing: Any) -> Optional[Image]:
+        blip = drawing.find(f".//{qn('a:blip')}")
+        extent = drawing.find(f".//{qn('wp:extent')}")
+        relationship_id = blip.get(qn("r:embed")) if blip is not None else None
+        if relationship_id is None or extent is None:
+            return None
+        blob = run.part.related_parts[relationship_id].blob
+        width = int(extent.get("cx")) / _EMU_PER_POINT
+        height = int(extent.get("cy")) / _EMU_PER_POINT
+        # Pictures wider than the text column shrink to fit, as in Word
+        scale = min(1, self.content_width / width) if width else 1
+        return Image(io.BytesIO(blob), width=width * scale, height=height * scale)
+    
+    def _bullet(self, numbering: Dict[str, Any]) -> str:
+        if numbering["format"] == "bullet":
+            return "•"
+        counters = self._counters.setdefault(numbering["num_id"], [0] * 9)
+        level = numbering["level"]
+        if counters[level] == 0:
+            counters[level] = numbering["start"]
+        else:
+            counters[level] += 1
+        for deeper in range(level + 1, len(counters)):
+            counters[deeper] = 0
+        
+        text = numbering["text"]
+        for index in range(level + 1):
+            text = text.replace(f"%{index + 1}", _number_text(counters[index] or 1, numbering["formats"][index]))
+        return text
+    
+    def _table(self, table: DocxTable) -> Table:
+        rows = []
+        style_commands = [
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), _CELL_PADDING),
+            ("RIGHTPADDING", (0, 0), (-1, -1), _CELL_PADDING),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0)
+        ]
+        header_rows = 0
+        for row_index, row in enumerate(table.rows):
+            if row._tr.find(f"./{qn('w:trPr')}/{qn('w:tblHeader')}") is not None and header_rows == row_index:
+                header_rows += 1
+            rows.append([self.flowables(cell) for cell in row.cells])
+        
+        widths = [column.width.pt if column.width else None for column in table.columns]
+        if None in widths:
+            widths = [self.content_width / len(widths)] * len(widths)
+        if _has_borders(table):
+            style_commands.append(("GRID", (0, 0), (-1, -1), 0.5, colors.black))
+        
+        flowable = Table(rows, colWidths=widths, repeatRows=header_rows, hAlign="LEFT")
+        flowable.setStyle(TableStyle(style_commands))
+        return flowable
+
+def _run_markup(run: Dict[str, Any]) -> str:
+    color = f' color="#{run["color"]}"' if run["color"] else ""
+    markup = f'<font face="{run["face"]}" size="{run["size"]:g}"{color}>{run["text"]}</font>'
+    if run["underline"]:
+        markup = f"<u>{markup}</u>"
+    if run["strike"]:
+        markup = f"<strike>{markup}</strike>"
+    if run["superscript"]:
+        markup = f"<super>{markup}</super>"
+    elif run["subscript"]:
+        markup = f"<sub>{markup}</sub>"
+    if run["link"]:
+        markup = f'<a href="{escape(run["link"], {chr(34): "&quot;"})}">{markup}</a>'
+    return markup
+
+def _iter_paragraphs(document: Any):
+    for paragraph in document.paragraphs:
+        yield paragraph
+    for table in _iter_tables(document):
+        for row in table.rows:
+            for cell in row.cells:
+                yield from cell.paragraphs
+
+def _iter_tables(document: Any):
+    tables = list(document.tables)
+    while tables:
+        table = tables.pop()
+        yield table
+        for row in table.rows:
+            for cell in row.cells:
+                tables.extend(cell.tables)
+
+def _style_chain(style: Any) -> List[Any]:
+    chain = []
+    while style is not None and style not in chain:
+        chain.append(style)
+        style = style.base_style
+    return chain
+
+def _document_defaults(document: Any) -> Dict[str, Any]:
+    """Font and spacing from the document defaults (w:docDefaults)"""
+    defaults = {"font_name": None, "font_size": _DEFAULT_FONT_SIZE, "space_after": 0, "line_spacing": 1.0}
+    doc_defaults = document.styles.element.find(qn("w:docDefaults"))
+    if doc_defaults is None:
+        return defaults
+    fonts = doc_defaults.find(f"./{qn('w:rPrDefault')}/{qn('w:rPr')}/{qn('w:rFonts')}")
+    if fonts is not None:
+        defaults["font_name"] = fonts.get(qn("w:ascii"))
+    size = doc_defaults.find(f"./{qn('w:rPrDefault')}/{qn('w:rPr')}/{qn('w:sz')}")
+    if size is not None:
+        defaults["font_size"] = int(size.get(qn("w:val"))) / 2
+    spacing = doc_defaults.find(f"./{qn('w:pPrDefault')}/{qn('w:pPr')}/{qn('w:spacing')}")
+    if spacing is not None:
+        if spacing.get(qn("w:after")):
+            defaults["space_after"] = int(spacing.get(qn("w:after"))) / 20
+        if spacing.get(qn("w:line")) and spacing.get(qn("w:lineRule"), "auto") == "auto":
+            defaults["line_spacing"] = int(spacing.get(qn("w:line"))) / 240
+    return defaults
+
+def _list_definitions(document: Any) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """List levels by numbering instance and level, from the numbering part"""
+    try:
+        numbering = document.part.numbering_part.element
+    except (KeyError, NotImplementedError):
+        return {}
+    
+    def value(element: Any, tag: str, default: Any) -> Any:
+        found = element.find(qn(tag)) if element is not None else None
+        return found.get(qn("w:val"), default) if found is not None else default
+    
+    abstracts = {}
+    for abstract in numbering.iter(qn("w:abstractNum")):
+        levels = {}
+        for level in abstract.iter(qn("w:lvl")):
+            indent = level.find(f"./{qn('w:pPr')}/{qn('w:ind')}")
+            levels[int(level.get(qn("w:ilvl")))] = {
+                "format": value(level, "w:numFmt", "decimal"),
+                "text": value(level, "w:lvlText", ""),
+                "start": int(value(level, "w:start", "1")),
+                "left": int(indent.get(qn("w:left"), indent.get(qn("w:start"), "0"))) / 20 if indent is not None else 0,
+                "hanging": int(indent.get(qn("w:hanging"), "0")) / 20 if indent is not None else 0
+            }
+        abstracts[abstract.get(qn("w:abstractNumId"))] = levels
+    
+    definitions = {}
+    for num in numbering.iter(qn("w:num")):
+        levels = abstracts.get(value(num, "w:abstractNumId", None))
+        if levels:
+            definitions[num.get(qn("w:numId"))] = levels
+    return definitions
+
+def _numbering_level(lists: Dict[str, Dict[int, Dict[str, Any]]], paragraph: DocxParagraph) -> Optional[Dict[str, Any]]:
+    """List level of a numbered or bulleted paragraph, from its own or its style's numbering"""
+    num_pr = paragraph._p.find(f"./{qn('w:pPr')}/{qn('w:numPr')}")
+    for style in _style_chain(paragraph.style):
+        if num_pr is not None:
+            break
+        num_pr = style.element.find(f"./{qn('w:pPr')}/{qn('w:numPr')}")
+    num_id = num_pr.find(qn("w:numId")) if num_pr is not None else None
+    levels = lists.get(num_id.get(qn("w:val"))) if num_id is not None else None
+    if not levels:
+        return None
+    
+    level_element = num_pr.find(qn("w:ilvl"))
+    level = int(level_element.get(qn("w:val"))) if level_element is not None else 0
+    if level not in levels:
+        return None
+    return {
+        **levels[level],
+        "num_id": num_id.get(qn("w:val")),
+        "level": level,
+        "formats": [levels[index]["format"] if index in levels else "decimal" for index in range(9)]
+    }
+
+def _number_text(number: int, number_format: str) -> str:
+    if number_format in ("lowerLetter", "upperLetter"):
+        text = ""
+        while number > 0:
+            number, remainder = divmod(number - 1, 26)
+            text = chr(ord("a") + remainder) + text
+        return text.upper() if number_format == "upperLetter" else text
+    if number_format in ("lowerRoman", "upperRoman"):
+        text = ""
+        for value, numeral in ((1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+                               (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")):
+            count, number = divmod(number, value)
+            text += numeral * count
+        return text.upper() if number_format == "upperRoman" else text
+    return str(number)
+
+def _has_borders(table: DocxTable) -> bool:
+    if table.style is not None and table.style.name == "Table Grid":
+        return True
+    borders = table._tbl.tblPr.find(qn("w:tblBorders"))
+    return borders is not None and any(border.get(qn("w:val")) not in ("nil", "none") for border in borders)
+
+def _has_content(element: Any) -> bool:
+    return any(text.text and text.text.strip() for text in element.iter(qn("w:t"))) or (
+        element.find(f".//{qn('w:drawing')}") is not None
+    )
+
+def is_win_ansi(text: str) -> bool:
+    """Whether the standard fonts can draw the text"""
+    try:
+        text.encode("cp1252")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+def base_font(name: Optional[str], bold: bool, italic: bool) -> str:
+    """Standard font standing in for a document font: Times for serif faces, Courier for monospaced, else Helvetica"""
+    name = (name or "").lower()
+    if any(part in name for part in _MONO_NAMES):
+        family = "mono"
+    elif any(part in name for part in _SERIF_NAMES):
+        family = "serif"
+    else:
+        family = "sans"
+    return _BASE_FONTS[family][(bold, italic)]
+
+def _points(length: Any) -> float:
+    return length.pt if length is not None else 0
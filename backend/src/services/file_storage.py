@@ -1,9 +1,11 @@
 import os
+import re
 import shutil
 import uuid
+import zipfile
 import aiofiles
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from pathlib import Path
 import logging
 from fastapi import UploadFile, HTTPException
@@ -13,6 +15,60 @@ import hashlib
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Chunk size used when hashing and streaming stored files
+FILE_CHUNK_SIZE = 1024 * 1024
+
+class PartArchive:
+    """ZIP archive that the parts of a multi-output job are written into directly
+
+    Parts are stored uncompressed (PDFs and images are already compressed),
+    so each part's offset in the manifest points at its raw bytes and can be
+    served with a range request without unpacking the archive.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest: List[Dict[str, Any]] = []
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+    
+    def add(self, filename: str, data: bytes, **metadata: Any) -> Dict[str, Any]:
+        """Append one part and return its manifest entry"""
+        info = zipfile.ZipInfo(filename, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+        
+        # The part's bytes end where the writer stopped. The headers' extra
+        # fields can't be used to find the start: the local header's differs
+        # from the central directory's (info.extra) once ZIP64 is in use
+        entry = {
+            "filename": filename,
+            "offset": self._zip.fp.tell() - len(data),
+            "size": len(data),
+            **metadata
+        }
+        self.manifest.append(entry)
+        return entry
+    
+    def close(self):
+        self._zip.close()
+    
+    def discard(self):
+        """Close and delete a partly written archive"""
+        try:
+            self._zip.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+    
+    def __enter__(self) -> "PartArchive":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
 class FileStorageService:
     """Service for managing file storage operations"""
     
@@ -21,6 +77,7 @@ class FileStorageService:
         self.uploads_dir = self.base_path / "uploads"
         self.downloads_dir = self.base_path / "downloads"
         self.temp_dir = self.base_path / "temp"
+        self.previews_dir = self.temp_dir / "previews"
         
         # Create directories if they don't exist
         self._ensure_directories()
@@ -31,7 +88,7 @@ class FileStorageService:
     
     def _ensure_directories(self):
         """Ensure all required directories exist"""
-        for directory in [self.uploads_dir, self.downloads_dir, self.temp_dir]:
+        for directory in [self.uploads_dir, self.downloads_dir, self.temp_dir, self.previews_dir]:
             directory.mkdir(parents=True, exist_ok=True)
     
     def _validate_path(self, file_path: str, allowed_base: Path) -> Path:
@@ -140,6 +197,36 @@ class FileStorageService:
             logger.error(f"Error saving temp file: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to save temporary file: {str(e)}")
     
+    async def save_preview_file(self, file: UploadFile, user_id: int) -> Dict[str, Any]:
+        """Save a document for previewing under its content hash
+        
+        Preview files live in the temp directory and expire with it; saving
+        the same content again refreshes the existing copy.
+        """
+        file_info = await self.save_temp_file(file)
+        try:
+            # Temp cleanup removes empty directories, previews_dir included
+            user_dir = self.previews_dir / str(user_id)
+            user_dir.mkdir(parents=True, exist_ok=True)
+            preview_path = self._validate_path(str(user_dir / f"{file_info['hash']}.pdf"), self.previews_dir)
+            os.replace(file_info["path"], preview_path)
+            return {**file_info, "path": str(preview_path), "document_id": file_info["hash"]}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error saving preview file: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to save preview file: {str(e)}")
+    
+    def get_preview_path(self, user_id: int, document_id: str) -> Path:
+        """Path of a document saved by save_preview_file"""
+        if not re.fullmatch(r"[0-9a-f]{64}", document_id):
+            raise HTTPException(status_code=400, detail="Invalid document id")
+        path = self._validate_path(str(self.previews_dir / str(user_id) / f"{document_id}.pdf"), self.previews_dir)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="Preview document not found or expired")
+        return path
+    
     async def save_processed_file(self, file_path: str, user_id: int, job_id: int, original_filename: str) -> Dict[str, Any]:
         """Save processed file to downloads directory"""
         try:
@@ -179,8 +266,31 @@ class FileStorageService:
             logger.error(f"Error saving processed file: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to save processed file: {str(e)}")
     
-    async def get_file_info(self, file_path: str) -> Dict[str, Any]:
-        """Get file information"""
+    def get_processed_path(self, user_id: int, job_id: int, original_filename: str) -> Path:
+        """Reserve a path in the downloads directory for output written in place"""
+        clean_filename = self._validate_filename(original_filename)
+        
+        job_dir = self.downloads_dir / str(user_id) / str(job_id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        
+        file_extension = self._get_file_extension(clean_filename)
+        output_path = job_dir / f"processed_{uuid.uuid4()}{file_extension}"
+        
+        return self._validate_path(str(output_path), self.downloads_dir)
+    
+    async def stream_file(self, file_path: str, chunk_size: int = FILE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yield a stored file in chunks for a streaming download"""
+        path = self._validate_path(file_path, self.base_path)
+        
+        async with aiofiles.open(path, 'rb') as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    async def get_file_info(self, file_path: str, compute_hash: bool = True) -> Dict[str, Any]:
+        """Get file information; without compute_hash the file's contents aren't read"""
         try:
             # Validate path is within allowed directories
             path = self._validate_path(file_path, self.base_path)
@@ -188,7 +298,7 @@ class FileStorageService:
             if not path.exists():
                 raise HTTPException(status_code=404, detail="File not found")
             
-            return await self._get_file_info(path, path.name, None)
+            return await self._get_file_info(path, path.name, None, compute_hash)
             
         except HTTPException:
             raise
@@ -196,7 +306,9 @@ class FileStorageService:
             logger.error(f"Error getting file info: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to get file information: {str(e)}")
     
-    async def _get_file_info(self, file_path: Path, original_filename: str, content: Optional[bytes]) -> Dict[str, Any]:
+    async def _get_file_info(
+        self, file_path: Path, original_filename: str, content: Optional[bytes], compute_hash: bool = True
+    ) -> Dict[str, Any]:
         """Get comprehensive file information"""
         try:
             # Get file size
@@ -211,10 +323,14 @@ class FileStorageService:
             # Calculate file hash
             if content:
                 file_hash = hashlib.sha256(content).hexdigest()
+            elif not compute_hash:
+                file_hash = None
             else:
+                digest = hashlib.sha256()
                 async with aiofiles.open(file_path, 'rb') as f:
-                    content = await f.read()
-                    file_hash = hashlib.sha256(content).hexdigest()
+                    while chunk := await f.read(FILE_CHUNK_SIZE):
+                        digest.update(chunk)
+                file_hash = digest.hexdigest()
             
             return {
                 "path": str(file_path),
@@ -0,0 +1,247 @@
+import os
+import gzip
+import zlib
+import time
+import socket
+import hashlib
+import logging
+import ipaddress
+import http.client
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Page setup applied before the document's own styles (the margins the
+# wkhtmltopdf converter used); an @page rule in the document overrides it
+HTML_BASE_STYLESHEET = "@page { size: A4; margin: 0.75in }"
+
+# Resources may only come from these schemes; file: would expose the
+# server's own files to any uploaded document. Remote resources must also
+# resolve to public addresses, see _connect_public
+ALLOWED_URL_SCHEMES = {"http", "https", "data"}
+
+# Parsed shared stylesheets (an invoice template's CSS) kept per worker
+STYLESHEET_CACHE_SIZE = 32
+
+# Fetched stylesheets, fonts and images kept per worker between documents
+RESOURCE_CACHE_MAX_BYTES = int(float(os.getenv("HTML_RESOURCE_CACHE_MB", "64")) * 1024 * 1024)
+RESOURCE_CACHE_TTL = int(os.getenv("HTML_RESOURCE_CACHE_TTL", "300"))
+RESOURCE_FETCH_TIMEOUT = 10
+
+# The font configuration keeps every @font-face font a document loads, and
+# later documents naming the same family get the same font. It is replaced
+# after this many documents so per-document fonts don't pile up
+FONT_CONFIG_MAX_DOCUMENTS = 500
+
+# WeasyPrint, imported on first use so that only the worker processes
+# load Pango and parse the user-agent stylesheets, not the API process
+_weasyprint = None
+_import_error: Optional[str] = None
+
+# Renderer state owned by this process: font configuration, parsed
+# stylesheets, decoded images and the number of documents rendered with them
+_renderer: Optional[Dict[str, Any]] = None
+# Fetched resources by URL: (time fetched, fetcher result)
+_resources: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_resource_bytes = 0
+
+class HTMLRendererUnavailable(RuntimeError):
+    """Raised in a worker when WeasyPrint cannot be loaded"""
+
+def _load_weasyprint():
+    global _weasyprint, _import_error
+    if _weasyprint is None:
+        if _import_error is not None:
+            raise HTMLRendererUnavailable(_import_error)
+        try:
+            import weasyprint
+            import weasyprint.text.fonts
+            import weasyprint.urls
+        except (ImportError, OSError) as e:  # WeasyPrint or the Pango libraries it loads are missing
+            _import_error = str(e)
+            raise HTMLRendererUnavailable(_import_error)
+        _weasyprint = weasyprint
+    return _weasyprint
+
+def load_renderer():
+    """Worker initializer: set up fonts and stylesheets once per process
+    
+    Building the font configuration scans every installed font, and the
+    first layout loads Pango's font map and shaping tables; both are paid
+    once per worker instead of once per request. The user-agent stylesheets
+    are parsed when WeasyPrint is imported.
+    """
+    try:
+        renderer = _get_renderer()
+    except HTMLRendererUnavailable as e:
+        logger.warning(f"WeasyPrint is not available; HTML to PDF is disabled ({e})")
+        return
+    
+    _weasyprint.HTML(string="<p>Warm-up</p>").render(
+        font_config=renderer["font_config"], stylesheets=[renderer["base"]]
+    )
+    logger.info("HTML renderer ready")
+
+def _get_renderer() -> Dict[str, Any]:
+    """Renderer state of this process, created on first use and replaced once it is worn out"""
+    global _renderer
+    weasyprint = _load_weasyprint()
+    if _renderer is None or _renderer["documents"] >= FONT_CONFIG_MAX_DOCUMENTS:
+        font_config = weasyprint.text.fonts.FontConfiguration()
+        _renderer = {
+            "font_config": font_config,
+            "base": weasyprint.CSS(string=HTML_BASE_STYLESHEET, font_config=font_config),
+            "stylesheets": OrderedDict(),
+            "images": {},
+            "documents": 0
+        }
+    return _renderer
+
+def render_html(input_path: str, output_path: str, stylesheet_path: Optional[str] = None) -> Dict[str, Any]:
+    """Worker: render an HTML document to PDF
+    
+    A shared stylesheet is applied after the document's own styles. It is
+    parsed once per worker and reused by every document rendered with it,
+    as are fetched resources and decoded images.
+    """
+    renderer = _get_renderer()
+    stylesheets = [renderer["base"]]
+    if stylesheet_path:
+        stylesheets.append(_get_stylesheet(renderer, stylesheet_path))
+    
+    document = _weasyprint.HTML(filename=input_path, url_fetcher=fetch_resource).render(
+        font_config=renderer["font_config"], stylesheets=stylesheets, cache=renderer["images"]
+    )
+    document.write_pdf(output_path)
+    renderer["documents"] += 1
+    return {"page_count": len(document.pages)}
+
+def _get_stylesheet(renderer: Dict[str, Any], path: str) -> "weasyprint.CSS":
+    with open(path, "rb") as stylesheet_file:
+        content = stylesheet_file.read()
+    key = hashlib.sha1(content).hexdigest()
+    
+    stylesheets = renderer["stylesheets"]
+    stylesheet = stylesheets.get(key)
+    if stylesheet is not None:
+        stylesheets.move_to_end(key)
+        return stylesheet
+    
+    stylesheet = _weasyprint.CSS(
+        string=content.decode("utf-8", errors="replace"),
+        font_config=renderer["font_config"],
+        url_fetcher=fetch_resource
+    )
+    stylesheets[key] = stylesheet
+    if len(stylesheets) > STYLESHEET_CACHE_SIZE:
+        stylesheets.popitem(last=False)
+    return stylesheet
+
+def fetch_resource(url: str, timeout: int = RESOURCE_FETCH_TIMEOUT, ssl_context: Any = None) -> Dict[str, Any]:
+    """URL fetcher for WeasyPrint: remote resources are cached, local files and addresses refused"""
+    global _resource_bytes
+    scheme = urlsplit(url).scheme.lower()
+    if scheme not in ALLOWED_URL_SCHEMES:
+        raise ValueError(f"Loading {scheme}: URLs is not allowed")
+    if scheme == "data":
+        return _load_weasyprint().default_url_fetcher(url)
+    
+    cached = _resources.get(url)
+    if cached is not None:
+        fetched_at, result = cached
+        if time.monotonic() - fetched_at < RESOURCE_CACHE_TTL:
+            _resources.move_to_end(url)
+            return dict(result)
+        del _resources[url]
+        _resource_bytes -= len(result["string"])
+    
+    result = _fetch_remote(url, timeout, ssl_context)
+    size = len(result["string"])
+    if size <= RESOURCE_CACHE_MAX_BYTES // 4:
+        _resources[url] = (time.monotonic(), result)
+        _resource_bytes += size
+        while _resource_bytes > RESOURCE_CACHE_MAX_BYTES:
+            _, (_, evicted) = _resources.popitem(last=False)
+            _resource_bytes -= len(evicted["string"])
+    return dict(result)
+
+def _fetch_remote(url: str, timeout: int, ssl_context: Any) -> Dict[str, Any]:
+    """WeasyPrint's default fetch over connections that only reach public addresses
+    
+    Every redirect is a new request through the same handlers, so its
+    target is checked too. Proxies and other URL schemes are not used.
+    """
+    urls = _load_weasyprint().urls
+    opener = urllib.request.OpenerDirector()
+    for handler in (
+        _PublicHTTPHandler(),
+        _PublicHTTPSHandler(context=ssl_context),
+        urllib.request.HTTPRedirectHandler(),
+        urllib.request.HTTPDefaultErrorHandler(),
+        urllib.request.HTTPErrorProcessor()
+    ):
+        opener.add_handler(handler)
+    
+    with opener.open(urllib.request.Request(urls.iri_to_uri(url), headers=urls.HTTP_HEADERS), timeout=timeout) as response:
+        info = response.info()
+        data = response.read()
+        redirected_url = response.geturl()
+    content_encoding = info.get("Content-Encoding")
+    if content_encoding == "gzip":
+        data = gzip.decompress(data)
+    elif content_encoding == "deflate":
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            # Without zlib header or checksum
+            data = zlib.decompress(data, -15)
+    return {
+        "string": data,
+        "redirected_url": redirected_url,
+        "mime_type": info.get_content_type(),
+        "encoding": info.get_param("charset"),
+        "filename": info.get_filename()
+    }
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global excludes private, loopback, link-local (cloud metadata),
+    # shared, reserved and unspecified addresses
+    return ip.is_global and not ip.is_multicast
+
+def _connect_public(address, timeout, source_address=None):
+    """socket.create_connection that refuses hosts with non-public addresses
+    
+    The connection goes to the address that was checked, so the host's DNS
+    answer cannot change between the check and the connect.
+    """
+    host, port = address
+    addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    refused = [ip for ip in addresses if not _is_public(ip)]
+    if refused:
+        raise ValueError(f"Loading resources from {host} ({refused[0]}) is not allowed")
+    return socket.create_connection((addresses[0], port), timeout, source_address)
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
@@ -0,0 +1,350 @@
+import os
+import zlib
+import logging
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from PIL import Image
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+except ImportError:  # HEIC/HEIF uploads are rejected
+    HEIF_SUPPORTED = False
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pillow formats accepted as input. JPEG (and the first frame of MPO, the
+# multi-picture JPEG some cameras write) is embedded byte for byte; the rest
+# are decoded once and converted
+PASSTHROUGH_FORMATS = {"JPEG", "MPO"}
+CONVERTED_FORMATS = {"PNG", "TIFF", "HEIF"}
+
+# HEIC photos are lossy already; they are re-encoded as JPEG rather than
+# stored losslessly, which would make them several times larger
+HEIF_JPEG_QUALITY = 92
+
+# Resolution assumed for images that don't record one
+DEFAULT_IMAGE_DPI = 96
+
+# PDF pages may be 3 to 14400 points along each side
+MIN_PAGE_POINTS = 3
+MAX_PAGE_POINTS = 14400
+
+# Fixed page sizes in points (portrait); the page turns with the image
+PAGE_SIZES = {
+    "auto": None,
+    "a4": (595.28, 841.89),
+    "letter": (612.0, 792.0)
+}
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+_EXIF_ORIENTATION = 0x0112
+_MP_ENTRY = 0xB002
+
+# Where EXIF orientations 1-8 put the stored image's unit square on the
+# displayed one, as (X, T) of the stored points (u, t), both measured from the
+# top-left corner: each entry maps (u, t) -> (X, T) as ((x_u, x_t, x_1), (t_u, t_t, t_1))
+_ORIENTATIONS = {
+    1: ((1, 0, 0), (0, 1, 0)),
+    2: ((-1, 0, 1), (0, 1, 0)),
+    3: ((-1, 0, 1), (0, -1, 1)),
+    4: ((1, 0, 0), (0, -1, 1)),
+    5: ((0, 1, 0), (1, 0, 0)),
+    6: ((0, -1, 1), (1, 0, 0)),
+    7: ((0, -1, 1), (-1, 0, 1)),
+    8: ((0, 1, 0), (-1, 0, 1))
+}
+
+_COLOR_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}
+
+class UnsupportedImage(ValueError):
+    """Raised for files that are not images this module can place in a PDF"""
+
+def probe_image(path: str) -> Dict[str, Any]:
+    """Read an image's size, resolution and orientation without decoding pixels
+    
+    For JPEGs this also returns everything the image dictionary needs
+    (components, inverted Adobe CMYK, byte length), so the file can be
+    copied into the PDF as is.
+    """
+    try:
+        image = Image.open(path)
+    except Exception:
+        raise UnsupportedImage("not a readable image")
+    
+    with image:
+        if image.format == "HEIF" and not HEIF_SUPPORTED:
+            raise UnsupportedImage("HEIC images are not supported on this server")
+        if image.format not in PASSTHROUGH_FORMATS | CONVERTED_FORMATS:
+            raise UnsupportedImage(f"{image.format} images are not supported")
+        
+        dpi = image.info.get("dpi")
+        info = {
+            "path": path,
+            "format": image.format,
+            "width": image.width,
+            "height": image.height,
+            "dpi": _valid_dpi(dpi),
+            "orientation": image.getexif().get(_EXIF_ORIENTATION, 1) if image.format != "PNG" else 1,
+            "passthrough": image.format in PASSTHROUGH_FORMATS
+        }
+        if info["orientation"] not in _ORIENTATIONS:
+            info["orientation"] = 1
+        
+        if info["passthrough"]:
+            if image.mode not in ("L", "RGB", "CMYK"):
+                raise UnsupportedImage(f"unsupported JPEG color mode {image.mode}")
+            info.update(
+                filter="/DCTDecode",
+                components=len(image.getbands()),
+                bits=8,
+                # Photoshop writes CMYK JPEGs with inverted values
+                decode_inverted=image.mode == "CMYK" and "adobe" in image.info,
+                data_path=path,
+                data_length=_jpeg_length(image, path)
+            )
+    return info
+
+def _valid_dpi(dpi: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+    if dpi and len(dpi) == 2 and all(isinstance(value, (int, float)) and value > 1 for value in dpi):
+        return float(dpi[0]), float(dpi[1])
+    return float(DEFAULT_IMAGE_DPI), float(DEFAULT_IMAGE_DPI)
+
+def _jpeg_length(image: Image.Image, path: str) -> int:
+    """Bytes of the first picture; an MPO's later pictures are not part of the JPEG stream"""
+    file_size = os.path.getsize(path)
+    if image.format == "MPO":
+        try:
+            first_size = image.mpinfo[_MP_ENTRY][0]["Size"]
+            if 0 < first_size <= file_size:
+                return first_size
+        except (AttributeError, KeyError, IndexError, TypeError):
+            pass
+    return file_size
+
+def convert_image(path: str, output_path: str) -> Dict[str, Any]:
+    """Worker function: decode a PNG, TIFF or HEIC image into an embeddable stream
+    
+    PNG and TIFF are stored losslessly with Flate (bilevel images at one bit
+    per pixel); HEIC is re-encoded as JPEG. Transparency is flattened onto
+    white. Returns the image dictionary fields for the stream written to
+    output_path.
+    """
+    with Image.open(path) as image:
+        image.load()
+        if image.format == "HEIF":
+            # The decoder has already turned the picture upright
+            converted = _flatten(image, "RGB")
+            converted.save(output_path, "JPEG", quality=HEIF_JPEG_QUALITY)
+            fields = {"filter": "/DCTDecode", "components": 3, "bits": 8, "orientation": 1}
+        else:
+            if image.mode == "1":
+                converted, bits = image, 1
+            elif image.mode == "CMYK":
+                converted, bits = image, 8
+            elif image.mode in ("L", "LA", "I", "I;16") or (
+                image.mode == "P" and _is_grayscale_palette(image)
+            ):
+                converted, bits = _flatten(image, "L"), 8
+            else:
+                converted, bits = _flatten(image, "RGB"), 8
+            with open(output_path, "wb") as output:
+                output.write(zlib.compress(converted.tobytes(), 6))
+            fields = {"filter": "/FlateDecode", "components": len(converted.getbands()), "bits": bits}
+    
+    return {
+        **fields,
+        "width": converted.width,
+        "height": converted.height,
+        "decode_inverted": False,
+        "data_path": output_path,
+        "data_length": os.path.getsize(output_path)
+    }
+
+def _is_grayscale_palette(image: Image.Image) -> bool:
+    palette = image.getpalette() or []
+    return all(palette[i] == palette[i + 1] == palette[i + 2] for i in range(0, len(palette) - 2, 3))
+
+def _flatten(image: Image.Image, mode: str) -> Image.Image:
+    """Convert to L or RGB, compositing any transparency onto white"""
+    if image.mode in ("I", "I;16"):
+        # 16-bit grayscale: keep the high byte
+        return image.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        return Image.alpha_composite(background, rgba).convert(mode)
+    return image.convert(mode)
+
+def page_layout(
+    info: Dict[str, Any],
+    page_size: str = "auto",
+    margin: float = 0
+) -> Tuple[Tuple[float, float], Tuple[float, ...]]:
+    """Page size and image placement matrix (a b c d e f) for one image
+    
+    With page_size "auto" the page is the image's physical size from its
+    DPI, scaled down if it exceeds the PDF page limit. Otherwise the image
+    is fitted inside a fixed page, turned to match the image, less margin
+    points on each side. The EXIF orientation is applied by the matrix,
+    so the image data never has to be rotated.
+    """
+    width, height = info["width"], info["height"]
+    horizontal_dpi, vertical_dpi = info["dpi"]
+    turned = info["orientation"] in (5, 6, 7, 8)
+    if turned:
+        width, height = height, width
+        horizontal_dpi, vertical_dpi = vertical_dpi, horizontal_dpi
+    
+    # Displayed size in points
+    shown_width = width * 72 / horizontal_dpi
+    shown_height = height * 72 / vertical_dpi
+    
+    if PAGE_SIZES[page_size] is None:
+        scale = min(1.0, MAX_PAGE_POINTS / max(shown_width + 2 * margin, shown_height + 2 * margin))
+        shown_width, shown_height = shown_width * scale, shown_height * scale
+        page_width = max(MIN_PAGE_POINTS, shown_width + 2 * margin)
+        page_height = max(MIN_PAGE_POINTS, shown_height + 2 * margin)
+    else:
+        page_width, page_height = PAGE_SIZES[page_size]
+        if shown_width > shown_height:
+            page_width, page_height = page_height, page_width
+        scale = min(
+            (page_width - 2 * margin) / shown_width,
+            (page_height - 2 * margin) / shown_height
+        )
+        shown_width, shown_height = shown_width * scale, shown_height * scale
+    
+    left = (page_width - shown_width) / 2
+    bottom = (page_height - shown_height) / 2
+    
+    # Image space runs from (0, 0) at the stored image's bottom-left to (1, 1);
+    # the matrix is read off where its corners land on the page
+    (x_u, x_t, x_1), (t_u, t_t, t_1) = _ORIENTATIONS[info["orientation"]]
+    
+    def place(u: float, v: float) -> Tuple[float, float]:
+        t = 1 - v
+        displayed_x = x_u * u + x_t * t + x_1
+        displayed_t = t_u * u + t_t * t + t_1
+        return left + displayed_x * shown_width, bottom + (1 - displayed_t) * shown_height
+    
+    e, f = place(0, 0)
+    right_x, right_y = place(1, 0)
+    top_x, top_y = place(0, 1)
+    matrix = (right_x - e, right_y - f, top_x - e, top_y - f, e, f)
+    return (page_width, page_height), matrix
+
+def _number(value: float) -> str:
+    return f"{value:.4f}".rstrip("0").rstrip(".") or "0"
+
+class ImagePdfWriter:
+    """Writes one image per page straight to a PDF file
+    
+    Every image is written as soon as it is added, with its stream data
+    copied from disk in chunks, so memory use doesn't depend on the number
+    or size of the images. The page tree, catalog and cross-reference table
+    are written by close().
+    """
+    
+    # Objects 1 and 2 are the catalog and page tree, written last
+    CATALOG = 1
+    PAGES = 2
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "wb")
+        self._offsets: Dict[int, int] = {}
+        self._pages: List[int] = []
+        self._next_object = 3
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    
+    def _begin(self, number: int):
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode())
+    
+    def _write_object(self, number: int, body: str):
+        self._begin(number)
+        self._file.write(body.encode())
+        self._file.write(b"\nendobj\n")
+    
+    def add_image(self, info: Dict[str, Any], page_size: str = "auto", margin: float = 0) -> Dict[str, Any]:
+        """Append a page showing the image described by info (from probe_image or convert_image)"""
+        (page_width, page_height), matrix = page_layout(info, page_size, margin)
+        image_number, content_number, page_number = range(self._next_object, self._next_object + 3)
+        self._next_object += 3
+        
+        dictionary = [
+            "/Type /XObject /Subtype /Image",
+            f"/Width {info['width']} /Height {info['height']}",
+            f"/ColorSpace {_COLOR_SPACES[info['components']]} /BitsPerComponent {info['bits']}",
+            f"/Filter {info['filter']} /Length {info['data_length']}"
+        ]
+        if info["decode_inverted"]:
+            dictionary.append("/Decode [1 0 1 0 1 0 1 0]")
+        
+        self._begin(image_number)
+        self._file.write(f"<< {' '.join(dictionary)} >>\nstream\n".encode())
+        with open(info["data_path"], "rb") as data:
+            remaining = info["data_length"]
+            while remaining > 0:
+                chunk = data.read(min(COPY_CHUNK_BYTES, remaining))
+                if not chunk:
+                    raise UnsupportedImage("image changed while it was being read")
+                self._file.write(chunk)
+                remaining -= len(chunk)
+        self._file.write(b"\nendstream\nendobj\n")
+        
+        content = f"q {' '.join(_number(value) for value in matrix)} cm /Im0 Do Q".encode()
+        self._begin(content_number)
+        self._file.write(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream\nendobj\n")
+        
+        self._write_object(
+            page_number,
+            f"<< /Type /Page /Parent {self.PAGES} 0 R "
+            f"/MediaBox [0 0 {_number(page_width)} {_number(page_height)}] "
+            f"/Resources << /XObject << /Im0 {image_number} 0 R >> >> "
+            f"/Contents {content_number} 0 R >>"
+        )
+        self._pages.append(page_number)
+        return {"width": round(page_width, 2), "height": round(page_height, 2)}
+    
+    def close(self) -> int:
+        """Write the page tree, catalog and xref table; returns the file size"""
+        kids = " ".join(f"{number} 0 R" for number in self._pages)
+        self._write_object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>")
+        self._write_object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+        
+        xref_offset = self._file.tell()
+        lines = [f"xref\n0 {self._next_object}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self._offsets[number]:010d} 00000 n \n" for number in range(1, self._next_object))
+        lines.append(
+            f"trailer\n<< /Size {self._next_object} /Root {self.CATALOG} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        )
+        self._file.write("".join(lines).encode())
+        size = self._file.tell()
+        self._file.close()
+        return size
+    
+    def abort(self):
+        """Close and delete a partially written file"""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def write_image_pdf(
+    images: List[Dict[str, Any]],
+    output_path: str,
+    page_size: str = "auto",
+    margin: float = 0
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Write one page per image; returns the page sizes and the file size"""
+    writer = ImagePdfWriter(output_path)
+    try:
+        pages = [writer.add_image(info, page_size, margin) for info in images]
+        return pages, writer.close()
+    except BaseException:
+        writer.abort()
+        raise
@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+import pytesseract
+
+from services.scan_preprocess import preprocess_scan, map_boxes
+from services.disk_cache import DiskCache
+
+# Parallelism comes from the worker pool; tesseract's own threads would only
+# compete with the other workers for the same cores
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+try:
+    import tesserocr
+except ImportError:  # Fall back to one tesseract process per page
+    tesserocr = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Languages offered by the OCR endpoint
+OCR_LANGUAGES = {
+    "eng": "English",
+    "spa": "Spanish",
+    "fra": "French",
+    "deu": "German",
+    "ita": "Italian",
+    "por": "Portuguese",
+    "rus": "Russian",
+    "chi_sim": "Chinese (Simplified)",
+    "chi_tra": "Chinese (Traditional)",
+    "jpn": "Japanese",
+    "kor": "Korean"
+}
+
+# Recognizers loaded when a worker starts; other languages are loaded on
+# their first page. Each language model takes tens of megabytes in every
+# worker, so a worker keeps at most OCR_MAX_LOADED_LANGUAGES of them and
+# closes the least recently used one beyond that
+OCR_PRELOAD_LANGUAGES = [
+    language.strip() for language in os.getenv("OCR_PRELOAD_LANGUAGES", "eng").split(",") if language.strip()
+]
+OCR_MAX_LOADED_LANGUAGES = max(1, int(os.getenv("OCR_MAX_LOADED_LANGUAGES", "3")))
+
+# A page needs at least this many letters/digits to count as having a text layer
+MIN_TEXT_LAYER_CHARS = 32
+
+# Rasterization resolution bounds for OCR
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 400
+OCR_DEFAULT_DPI = 300
+
+# Bump whenever preprocessing or recognition settings change the output,
+# so that results cached by an older pipeline are not reused
+OCR_PIPELINE_VERSION = 1
+
+# Orientation detection works from a render at this resolution and only
+# trusts results above this confidence (tesseract's OSD scale)
+ORIENT_DPI = 150
+ORIENT_MIN_CONFIDENCE = 8.0
+
+# Recognizers owned by this process, keyed by language, least recently used
+# first; the orientation detector is kept apart and never closed
+_engines: "OrderedDict[str, tesserocr.PyTessBaseAPI]" = OrderedDict()
+_osd_engine: Optional["tesserocr.PyTessBaseAPI"] = None
+_engine_version: Optional[str] = None
+
+# Recognized pages, keyed by page image hash, language and engine version
+ocr_cache = DiskCache(
+    os.getenv("OCR_CACHE_PATH", "storage/cache/ocr.db"),
+    int(float(os.getenv("OCR_CACHE_MAX_MB", "512")) * 1024 * 1024)
+)
+
+class OCREngineUnavailable(RuntimeError):
+    """Raised in a worker when the OCR engine cannot be started"""
+
+def load_engines():
+    """Worker initializer: load and warm the recognizers in OCR_PRELOAD_LANGUAGES
+    
+    Model loading is the bulk of tesseract's start-up cost, so it is paid
+    once per worker process instead of once per page. Languages that are
+    not preloaded are loaded by the first page that needs them.
+    """
+    if tesserocr is None:
+        logger.warning("tesserocr is not installed; OCR will start a tesseract process per page")
+        return
+    
+    tessdata_path, installed = tesserocr.get_languages()
+    if "osd" in installed:
+        _get_engine("osd")
+    for language in OCR_PRELOAD_LANGUAGES[:OCR_MAX_LOADED_LANGUAGES]:
+        if language not in OCR_LANGUAGES:
+            logger.warning(f"OCR_PRELOAD_LANGUAGES names unsupported language {language}")
+            continue
+        if language not in installed:
+            logger.warning(f"OCR language {language} is not installed in {tessdata_path}")
+            continue
+        engine = _get_engine(language)
+        # A first recognition initializes the remaining lazily loaded state
+        engine.SetImage(Image.new("L", (64, 64), 255))
+        engine.Recognize()
+        engine.Clear()
+    logger.info(f"OCR worker ready with languages: {', '.join(sorted(_engines))}")
+
+def _get_engine(language: str) -> Optional["tesserocr.PyTessBaseAPI"]:
+    """Recognizer for a language, created on first use and kept while it is among the recently used"""
+    global _osd_engine
+    if tesserocr is None:
+        return None
+    if language == "osd":
+        if _osd_engine is None:
+            try:
+                _osd_engine = tesserocr.PyTessBaseAPI(lang=language, psm=tesserocr.PSM.OSD_ONLY)
+            except RuntimeError as e:
+                raise OCREngineUnavailable(f"Cannot load OCR language {language}: {e}")
+        return _osd_engine
+    
+    engine = _engines.get(language)
+    if engine is not None:
+        _engines.move_to_end(language)
+        return engine
+    
+    try:
+        engine = tesserocr.PyTessBaseAPI(lang=language)
+    except RuntimeError as e:
+        raise OCREngineUnavailable(f"Cannot load OCR language {language}: {e}")
+    _engines[language] = engine
+    while len(_engines) > OCR_MAX_LOADED_LANGUAGES:
+        evicted_language, evicted = _engines.popitem(last=False)
+        evicted.End()
+        logger.info(f"Closed OCR language {evicted_language} to stay within {OCR_MAX_LOADED_LANGUAGES} loaded languages")
+    return engine
+
+def engine_version() -> str:
+    """Identifies the recognizer and pipeline that produce OCR results"""
+    global _engine_version
+    if _engine_version is None:
+        if tesserocr is not None:
+            tesseract = tesserocr.tesseract_version().splitlines()[0]
+        else:
+            try:
+                tesseract = f"tesseract {pytesseract.get_tesseract_version()}"
+            except pytesseract.TesseractNotFoundError as e:
+                raise OCREngineUnavailable(str(e))
+        _engine_version = f"{tesseract} pipeline {OCR_PIPELINE_VERSION}"
+    return _engine_version
+
+def classify_page(page: "fitz.Page") -> Tuple[str, int]:
+    """Decide whether a page needs OCR and at which resolution
+    
+    Returns ("text", 0) for pages with a usable text layer, ("empty", 0) for
+    pages with nothing to recognize and ("scan", dpi) otherwise. The DPI
+    follows the resolution of the page's largest image so that low-resolution
+    scans are not upsampled and high-resolution ones are not wasted.
+    """
+    text = page.get_text("text")
+    readable_chars = sum(1 for char in text if char.isalnum())
+    replacement_chars = text.count("\ufffd")
+    if readable_chars >= MIN_TEXT_LAYER_CHARS and replacement_chars * 10 < readable_chars:
+        return "text", 0
+    
+    images = [info for info in page.get_image_info() if info["bbox"][2] > info["bbox"][0]]
+    if not images:
+        if not page.get_contents() or not page.read_contents().strip():
+            return "empty", 0
+        # Vector-only page, e.g. text converted to outlines
+        return "scan", OCR_DEFAULT_DPI
+    
+    largest = max(images, key=lambda info: fitz.Rect(info["bbox"]).get_area())
+    image_dpi = largest["width"] / (fitz.Rect(largest["bbox"]).width / 72)
+    return "scan", int(min(max(image_dpi, OCR_MIN_DPI), OCR_MAX_DPI))
+
+def recognize_page(input_path: str, page_number: int, dpi: int, language: str) -> Dict[str, Any]:
+    """Rasterize, clean up and recognize one page (runs in a worker process)
+    
+    Results are cached by the hash of the rendered page, so a page seen
+    before (cover sheets, standard forms) skips preprocessing and
+    recognition entirely.
+    """
+    started = time.perf_counter()
+    with fitz.open(input_path) as doc:
+        page = doc[page_number]
+        pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        # Size of the page as displayed, i.e. after /Rotate is applied
+        page_width, page_height = page.rect.width, page.rect.height
+    timings = {"render_ms": _elapsed_ms(started)}
+    
+    page_hash = hashlib.sha256(pixmap.samples_mv)
+    page_hash.update(f"{pixmap.width}x{pixmap.height}".encode())
+    cache_key = f"{page_hash.hexdigest()}:{language}:{engine_version()}"
+    
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        recognition = json.loads(cached)
+        recognition["words"] = [tuple(word) for word in recognition["words"]]
+        cache_status = "hit"
+    else:
+        gray = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+        recognition = _recognize_scan(gray, dpi, language, timings)
+        ocr_cache.put(cache_key, json.dumps(recognition).encode("utf-8"))
+        cache_status = "miss"
+    
+    words = recognition["words"]
+    return {
+        "page": page_number,
+        "dpi": dpi,
+        "blank": recognition["blank"],
+        "skew": recognition["skew"],
+        "words": len(words),
+        "characters": sum(len(word[0]) for word in words),
+        "confidence": recognition["confidence"],
+        "text_layer": build_text_layer(page_width, page_height, words) if words else None,
+        "cache": cache_status,
+        # Recognition time the cache saved, or spent on filling it
+        "recognize_ms": recognition["recognize_ms"],
+        "timings": timings
+    }
+
+def detect_orientation(input_path: str, page_number: int, dpi: int = ORIENT_DPI) -> Dict[str, Any]:
+    """Detect which way up a page's text is (runs in a worker process)
+    
+    The page is rendered as currently displayed, so "rotation" is the
+    clockwise turn to add to its /Rotate to make the text upright, or None
+    when there is not enough text to tell.
+    """
+    with fitz.open(input_path) as doc:
+        pixmap = doc[page_number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    
+    engine = _get_engine("osd")
+    if engine is not None:
+        engine.SetImageBytes(pixmap.samples, pixmap.width, pixmap.height, 1, pixmap.stride)
+        engine.SetSourceResolution(dpi)
+        try:
+            osd = engine.DetectOrientationScript()
+        finally:
+            engine.Clear()
+        if not osd:
+            return {"page": page_number, "rotation": None, "confidence": 0.0}
+        orientation, confidence = osd["orient_deg"], osd["orient_conf"]
+    else:
+        image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        try:
+            osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractNotFoundError as e:
+            raise OCREngineUnavailable(str(e))
+        except pytesseract.TesseractError:
+            # Too few characters to decide
+            return {"page": page_number, "rotation": None, "confidence": 0.0}
+        orientation, confidence = osd["orientation"], osd["orientation_conf"]
+    
+    return {
+        "page": page_number,
+        "rotation": (360 - orientation) % 360,
+        "confidence": round(float(confidence), 2)
+    }
+
+def _recognize_scan(gray: np.ndarray, dpi: int, language: str, timings: Dict[str, Any]) -> Dict[str, Any]:
+    """Preprocess and recognize a rendered page; words are returned in page coordinates"""
+    started = time.perf_counter()
+    image, preprocessing = preprocess_scan(gray, dpi)
+    timings["preprocess_ms"] = _elapsed_ms(started)
+    timings["preprocess_steps"] = preprocessing["timings"]
+    
+    recognition = {
+        "blank": preprocessing["blank"],
+        "skew": preprocessing["skew"],
+        "words": [],
+        "confidence": 0.0,
+        "recognize_ms": 0.0
+    }
+    if preprocessing["blank"]:
+        return recognition
+    
+    started = time.perf_counter()
+    engine = _get_engine(language)
+    if engine is not None:
+        recognized = _recognize_in_process(engine, image, dpi)
+    else:
+        recognized = _recognize_with_command(image, language)
+    timings["recognize_ms"] = recognition["recognize_ms"] = _elapsed_ms(started)
+    
+    recognized = [word for word in recognized if word[1] >= 0 and word[0].strip()]
+    if not recognized:
+        return recognition
+    
+    boxes = np.array([word[2:] for word in recognized], dtype=np.float64)
+    if preprocessing["inverse_transform"] is not None:
+        boxes = map_boxes(boxes, preprocessing["inverse_transform"])
+    boxes *= 72 / dpi
+    confidences = [word[1] for word in recognized]
+    
+    recognition["words"] = [(word[0], *box) for word, box in zip(recognized, boxes.tolist())]
+    recognition["confidence"] = round(sum(confidences) / len(confidences), 2)
+    return recognition
+
+def _recognize_in_process(engine: "tesserocr.PyTessBaseAPI", image: np.ndarray, dpi: int) -> List[Tuple[str, float, int, int, int, int]]:
+    """Recognize words with a loaded recognizer, straight from the image buffer"""
+    engine.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], 1, image.shape[1])
+    engine.SetSourceResolution(dpi)
+    try:
+        engine.Recognize()
+        level = tesserocr.RIL.WORD
+        words = []
+        for word in tesserocr.iterate_level(engine.GetIterator(), level):
+            text = word.GetUTF8Text(level)
+            if not text:
+                continue
+            words.append((text, word.Confidence(level), *word.BoundingBox(level)))
+        return words
+    finally:
+        # Drop the page image and results but keep the language model loaded
+        engine.Clear()
+
+def _recognize_with_command(image: np.ndarray, language: str) -> List[Tuple[str, float, int, int, int, int]]:
+    """Recognize words by running the tesseract command line"""
+    try:
+        data = pytesseract.image_to_data(Image.fromarray(image), lang=language, output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractNotFoundError as e:
+        raise OCREngineUnavailable(str(e))
+    
+    return [
+        (text, float(confidence), left, top, left + width, top + height)
+        for text, confidence, left, top, width, height in zip(
+            data["text"], data["conf"], data["left"], data["top"], data["width"], data["height"]
+        )
+    ]
+
+def build_text_layer(width: float, height: float, words: List[Tuple[str, float, float, float, float]]) -> bytes:
+    """One-page PDF containing the recognized words as invisible text
+    
+    Each word is sized to span its bounding box so that selection and
+    search highlights line up with the scanned glyphs.
+    """
+    font = fitz.Font("helv")
+    with fitz.open() as layer:
+        page = layer.new_page(width=width, height=height)
+        writer = fitz.TextWriter(page.rect)
+        for text, x0, y0, x1, y1 in words:
+            unit_length = font.text_length(text, fontsize=1)
+            box_height = y1 - y0
+            font_size = min((x1 - x0) / unit_length, box_height) if unit_length else box_height
+            # Baseline sits roughly a fifth of the box height above the bottom
+            writer.append(fitz.Point(x0, y1 - box_height * 0.2), text, font=font, fontsize=font_size)
+        writer.write_text(page, render_mode=3)
+        return layer.tobytes(garbage=1, deflate=True)
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
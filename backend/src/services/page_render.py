@@ -0,0 +1,414 @@
+import io
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import fitz  # PyMuPDF
+from PIL import Image
+from fastapi import HTTPException
+
+from services.disk_cache import DiskCache
+from services.worker_pool import worker_pool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RENDER_FORMATS = {"png": "image/png", "webp": "image/webp"}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+# Encoder effort: 2 is about 3x faster than the default 4 for ~5% larger files
+WEBP_METHOD = 2
+
+# Accepted render resolutions, and the largest image a single render may produce
+MIN_RENDER_DPI = 10
+MAX_RENDER_DPI = 300
+MAX_RENDER_PIXELS = 40_000_000
+
+# Sprite sheets: pages per sheet, page thumbnails rendered per worker task,
+# and the tallest cell relative to its width
+SPRITE_MAX_PAGES = 500
+SPRITE_CHUNK_PAGES = 25
+SPRITE_MAX_CELL_ASPECT = 2.0
+
+# Pages rendered per worker task when rendering many pages
+RENDER_CHUNK_PAGES = 4
+
+# Documents whose hash and page sizes are remembered, keyed by path, size and mtime
+DOCUMENT_INFO_CACHE_SIZE = 256
+
+# Rendered images shared by the server and the workers, keyed by
+# (file hash, page, dpi, format); hot entries are also kept in memory
+render_cache = DiskCache(
+    os.getenv("RENDER_CACHE_PATH", "storage/cache/render.db"),
+    int(float(os.getenv("RENDER_CACHE_MAX_MB", "256")) * 1024 * 1024)
+)
+
+def render_page_image(input_path: str, page_number: int, dpi: int, image_format: str) -> bytes:
+    """Render one page as PNG or WebP (runs in a worker process)"""
+    with fitz.open(input_path) as doc:
+        pixmap = doc[page_number].get_pixmap(dpi=dpi, alpha=False)
+    if image_format == "png":
+        return pixmap.tobytes("png")
+    return encode_image(Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples), image_format)
+
+def render_page_images(input_path: str, page_numbers: List[int], dpi: int, image_format: str) -> List[bytes]:
+    """Render several pages as PNG or WebP (runs in a worker process)"""
+    images = []
+    with fitz.open(input_path) as doc:
+        for page_number in page_numbers:
+            pixmap = doc[page_number].get_pixmap(dpi=dpi, alpha=False)
+            if image_format == "png":
+                images.append(pixmap.tobytes("png"))
+            else:
+                images.append(encode_image(Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples), image_format))
+    return images
+
+def render_thumbnails(
+    input_path: str,
+    page_numbers: List[int],
+    cell_width: int,
+    cell_height: int
+) -> List[Tuple[int, int, bytes]]:
+    """Render pages scaled to fit a sprite cell, as raw RGB (runs in a worker process)"""
+    thumbnails = []
+    with fitz.open(input_path) as doc:
+        for page_number in page_numbers:
+            page = doc[page_number]
+            scale = min(cell_width / page.rect.width, cell_height / page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            thumbnails.append((pixmap.width, pixmap.height, pixmap.samples))
+    return thumbnails
+
+def rasterize_pages(
+    input_path: str,
+    page_numbers: List[int],
+    dpi: int,
+    image_format: str,
+    grayscale: bool,
+    quality: int
+) -> List[Dict[str, Any]]:
+    """Render and encode pages for image export (runs in a worker process)"""
+    images = []
+    with fitz.open(input_path) as doc:
+        for page_number in page_numbers:
+            pixmap = doc[page_number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY if grayscale else fitz.csRGB, alpha=False)
+            if image_format == "png":
+                data = pixmap.tobytes("png")
+            else:
+                # Pillow's libjpeg-turbo is several times faster than MuPDF's JPEG writer
+                image = Image.frombytes("L" if grayscale else "RGB", (pixmap.width, pixmap.height), pixmap.samples)
+                data = encode_image(image, image_format, quality)
+            images.append({"page": page_number + 1, "data": data, "width": pixmap.width, "height": pixmap.height})
+    return images
+
+def encode_image(image: "Image.Image", image_format: str, quality: Optional[int] = None) -> bytes:
+    buffer = io.BytesIO()
+    if image_format == "jpeg":
+        image.save(buffer, format="JPEG", quality=quality or JPEG_QUALITY)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=quality or WEBP_QUALITY, method=WEBP_METHOD)
+    else:
+        image.save(buffer, format="PNG", compress_level=6)
+    return buffer.getvalue()
+
+class PageRenderService:
+    """Page previews and thumbnail sprite sheets with a two-tier cache
+    
+    Renders run in the worker pool. Results are cached in an in-memory LRU
+    in front of render_cache on disk, keyed by file content hash, so the
+    same document uploaded twice or reached through a job reuses renders.
+    """
+    
+    def __init__(self, memory_max_bytes: int):
+        self.memory_max_bytes = memory_max_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._documents: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0}
+    
+    async def get_document_info(self, path: str) -> Dict[str, Any]:
+        """Content hash, page count and displayed page sizes of a PDF"""
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            info = self._documents.get(key)
+            if info is not None:
+                self._documents.move_to_end(key)
+                return info
+        
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, self._read_document_info, path)
+        with self._lock:
+            self._documents[key] = info
+            while len(self._documents) > DOCUMENT_INFO_CACHE_SIZE:
+                self._documents.popitem(last=False)
+        return info
+    
+    def _read_document_info(self, path: str) -> Dict[str, Any]:
+        digest = hashlib.sha256()
+        with open(path, "rb") as document_file:
+            while chunk := document_file.read(1024 * 1024):
+                digest.update(chunk)
+        
+        try:
+            with fitz.open(path) as doc:
+                if not doc.is_pdf:
+                    raise HTTPException(status_code=400, detail="Only PDF documents can be previewed")
+                if doc.needs_pass:
+                    raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+                pages = [{"width": round(page.rect.width, 2), "height": round(page.rect.height, 2)} for page in doc]
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        return {"hash": digest.hexdigest(), "page_count": len(pages), "pages": pages}
+    
+    async def render_page(
+        self,
+        path: str,
+        page: int,
+        dpi: Optional[int] = None,
+        width: Optional[int] = None,
+        image_format: str = "png"
+    ) -> Dict[str, Any]:
+        """Render a page (1-based) at a DPI, or at the DPI that gives the requested pixel width"""
+        try:
+            if image_format not in RENDER_FORMATS:
+                raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(RENDER_FORMATS)}")
+            
+            info = await self.get_document_info(path)
+            if not 1 <= page <= info["page_count"]:
+                raise HTTPException(status_code=400, detail=f"Page must be between 1 and {info['page_count']}")
+            page_size = info["pages"][page - 1]
+            
+            # Widths map to whole DPI values so that they share cache entries
+            if width is not None:
+                dpi = max(MIN_RENDER_DPI, round(width * 72 / page_size["width"]))
+            dpi = dpi or 72
+            if not MIN_RENDER_DPI <= dpi <= MAX_RENDER_DPI:
+                raise HTTPException(status_code=400, detail=f"DPI must be between {MIN_RENDER_DPI} and {MAX_RENDER_DPI}")
+            if page_size["width"] * page_size["height"] * (dpi / 72) ** 2 > MAX_RENDER_PIXELS:
+                raise HTTPException(status_code=400, detail="Requested size is too large for this page")
+            
+            key = f"page:{info['hash']}:{page}:{dpi}:{image_format}"
+            data, cache_status = await self._cache_get(key)
+            if data is None:
+                data = await worker_pool.run(render_page_image, path, page - 1, dpi, image_format)
+                await self._cache_put(key, data)
+            
+            return {
+                "data": data,
+                "media_type": RENDER_FORMATS[image_format],
+                "etag": hashlib.sha256(key.encode()).hexdigest()[:32],
+                "cache": cache_status,
+                "dpi": dpi
+            }
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in render_page: {e}")
+            raise HTTPException(status_code=500, detail="Page render failed due to unexpected error")
+    
+    async def render_pages(
+        self,
+        path: str,
+        page_numbers: List[int],
+        dpi: int,
+        image_format: str,
+        output_dir: str
+    ) -> Dict[str, Any]:
+        """Render many pages (0-based) into files, reusing cached renders
+        
+        Pages already rendered at this DPI and format, by the preview
+        endpoint or an earlier conversion of the same content, are read from
+        the cache; the rest are rendered in chunks across the worker pool
+        and added to the disk cache. Batch renders are not promoted into the
+        memory tier, so a long document doesn't push out hot previews.
+        Returns the file path of each page in order and the cache hit count.
+        """
+        if image_format not in RENDER_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(RENDER_FORMATS)}")
+        if not MIN_RENDER_DPI <= dpi <= MAX_RENDER_DPI:
+            raise HTTPException(status_code=400, detail=f"DPI must be between {MIN_RENDER_DPI} and {MAX_RENDER_DPI}")
+        
+        info = await self.get_document_info(path)
+        for page_number in page_numbers:
+            page_size = info["pages"][page_number]
+            if page_size["width"] * page_size["height"] * (dpi / 72) ** 2 > MAX_RENDER_PIXELS:
+                raise HTTPException(status_code=400, detail=f"Page {page_number + 1} is too large to render at {dpi} DPI")
+        
+        loop = asyncio.get_running_loop()
+        keys = {page_number: f"page:{info['hash']}:{page_number + 1}:{dpi}:{image_format}" for page_number in page_numbers}
+        paths = {page_number: os.path.join(output_dir, f"page_{page_number + 1}.{image_format}") for page_number in page_numbers}
+        
+        def write(page_number: int, data: bytes):
+            with open(paths[page_number], "wb") as image_file:
+                image_file.write(data)
+        
+        missing = []
+        hits = {"memory_hits": 0, "disk_hits": 0}
+        for page_number in page_numbers:
+            with self._lock:
+                data = self._memory.get(keys[page_number])
+            tier = "memory_hits"
+            if data is None:
+                data = await loop.run_in_executor(None, render_cache.get, keys[page_number])
+                tier = "disk_hits"
+            if data is None:
+                missing.append(page_number)
+            else:
+                hits[tier] += 1
+                await loop.run_in_executor(None, write, page_number, data)
+        
+        chunks = [missing[start:start + RENDER_CHUNK_PAGES] for start in range(0, len(missing), RENDER_CHUNK_PAGES)]
+        async for position, images in worker_pool.as_completed(
+            render_page_images, [(path, chunk, dpi, image_format) for chunk in chunks]
+        ):
+            for page_number, data in zip(chunks[position], images):
+                await loop.run_in_executor(None, write, page_number, data)
+                await loop.run_in_executor(None, render_cache.put, keys[page_number], data)
+        
+        with self._lock:
+            for tier, count in hits.items():
+                self._stats[tier] += count
+            self._stats["renders"] += len(missing)
+        return {"paths": [paths[page_number] for page_number in page_numbers], "cache_hits": len(page_numbers) - len(missing)}
+    
+    async def render_sprite(
+        self,
+        path: str,
+        width: int,
+        columns: int,
+        image_format: str = "webp",
+        first_page: int = 1,
+        last_page: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Thumbnails of a page range in one image, laid out in a grid of equal cells
+        
+        Page i of the range sits in the cell at column i % columns, row
+        i // columns, scaled to fit and centered; cell_width and cell_height
+        give the grid.
+        """
+        try:
+            if image_format not in RENDER_FORMATS:
+                raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(RENDER_FORMATS)}")
+            
+            info = await self.get_document_info(path)
+            last_page = min(last_page or info["page_count"], info["page_count"])
+            if not 1 <= first_page <= last_page:
+                raise HTTPException(status_code=400, detail=f"Pages must be between 1 and {info['page_count']}")
+            if last_page - first_page + 1 > SPRITE_MAX_PAGES:
+                raise HTTPException(status_code=400, detail=f"A sprite sheet holds at most {SPRITE_MAX_PAGES} pages")
+            
+            page_numbers = list(range(first_page - 1, last_page))
+            aspect = max(info["pages"][index]["height"] / info["pages"][index]["width"] for index in page_numbers)
+            cell_height = round(width * min(aspect, SPRITE_MAX_CELL_ASPECT))
+            columns = min(columns, len(page_numbers))
+            rows = -(-len(page_numbers) // columns)
+            if width * columns * cell_height * rows > MAX_RENDER_PIXELS:
+                raise HTTPException(status_code=400, detail="Requested sprite sheet is too large")
+            
+            key = f"sprite:{info['hash']}:{first_page}-{last_page}:{width}x{cell_height}:{columns}:{image_format}"
+            data, cache_status = await self._cache_get(key)
+            if data is None:
+                chunks = [page_numbers[start:start + SPRITE_CHUNK_PAGES] for start in range(0, len(page_numbers), SPRITE_CHUNK_PAGES)]
+                thumbnails = await worker_pool.map(render_thumbnails, [(path, chunk, width, cell_height) for chunk in chunks])
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(
+                    None, self._assemble_sprite,
+                    [thumbnail for chunk in thumbnails for thumbnail in chunk], width, cell_height, columns, image_format
+                )
+                await self._cache_put(key, data)
+            
+            return {
+                "data": data,
+                "media_type": RENDER_FORMATS[image_format],
+                "etag": hashlib.sha256(key.encode()).hexdigest()[:32],
+                "cache": cache_status,
+                "first_page": first_page,
+                "page_count": len(page_numbers),
+                "columns": columns,
+                "cell_width": width,
+                "cell_height": cell_height
+            }
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in render_sprite: {e}")
+            raise HTTPException(status_code=500, detail="Sprite sheet render failed due to unexpected error")
+    
+    def _assemble_sprite(
+        self,
+        thumbnails: List[Tuple[int, int, bytes]],
+        cell_width: int,
+        cell_height: int,
+        columns: int,
+        image_format: str
+    ) -> bytes:
+        rows = -(-len(thumbnails) // columns)
+        sheet = np.full((rows * cell_height, columns * cell_width, 3), 255, dtype=np.uint8)
+        for index, (thumb_width, thumb_height, samples) in enumerate(thumbnails):
+            top = (index // columns) * cell_height + (cell_height - thumb_height) // 2
+            left = (index % columns) * cell_width + (cell_width - thumb_width) // 2
+            sheet[top:top + thumb_height, left:left + thumb_width] = np.frombuffer(
+                samples, dtype=np.uint8
+            ).reshape(thumb_height, thumb_width, 3)
+        return encode_image(Image.fromarray(sheet), image_format)
+    
+    async def _cache_get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """Look up memory, then disk; disk hits are promoted to memory"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return data, "memory"
+        
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, render_cache.get, key)
+        if data is not None:
+            self._memory_put(key, data)
+            with self._lock:
+                self._stats["disk_hits"] += 1
+            return data, "disk"
+        
+        with self._lock:
+            self._stats["renders"] += 1
+        return None, "miss"
+    
+    async def _cache_put(self, key: str, data: bytes):
+        self._memory_put(key, data)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, render_cache.put, key, data)
+    
+    def _memory_put(self, key: str, data: bytes):
+        if len(data) > self.memory_max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit counts and sizes of both cache tiers"""
+        with self._lock:
+            memory = {"entries": len(self._memory), "size_bytes": self._memory_bytes, "max_bytes": self.memory_max_bytes}
+            stats = dict(self._stats)
+        return {**stats, "memory": memory, "disk": render_cache.get_stats()}
+
+# Global page render service instance
+page_renderer = PageRenderService(int(float(os.getenv("RENDER_MEMORY_CACHE_MB", "64")) * 1024 * 1024))
@@ -0,0 +1,435 @@
+import zlib
+import hashlib
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import cv2
+import fitz  # PyMuPDF
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Text signature: MinHash over word 3-grams, enough to tell whether two
+# changed pages are versions of each other without diffing every pair
+SIGNATURE_SIZE = 32
+SHINGLE_WORDS = 3
+_HASH_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)
+_SIGNATURE_A = _rng.integers(1, _HASH_PRIME, SIGNATURE_SIZE, dtype=np.uint64)
+_SIGNATURE_B = _rng.integers(0, _HASH_PRIME, SIGNATURE_SIZE, dtype=np.uint64)
+
+# Changed pages are paired as "modified" only when their text is at least
+# this similar; otherwise they count as one deleted and one inserted page
+MODIFIED_PAGE_MIN_SIMILARITY = 0.2
+
+# Larger blocks of changed pages are paired in order instead of aligned
+MAX_ALIGNMENT_CELLS = 250000
+
+# Weight of text, images and page content in the similarity of a modified page
+SIMILARITY_WEIGHTS = {"text": 0.7, "images": 0.2, "content": 0.1}
+
+# Per-page limits of the change report
+MAX_CHANGES_PER_PAGE = 50
+MAX_CHANGE_CHARS = 200
+
+# Visual diff: gray levels two renderings must differ by to count as changed
+# (below this is antialiasing noise), the distance in points within which
+# changed pixels merge into one region, and the smallest region reported
+DIFF_PIXEL_THRESHOLD = 48
+DIFF_MERGE_POINTS = 6
+DIFF_MIN_REGION_POINTS = 2
+MAX_REGIONS_PER_PAGE = 100
+
+# Overlay colors (RGB) and fill opacity of highlighted regions
+HIGHLIGHT_CHANGED = (0.9, 0.1, 0.1)
+HIGHLIGHT_INSERTED = (0.1, 0.65, 0.2)
+HIGHLIGHT_DELETED = (0.9, 0.1, 0.1)
+HIGHLIGHT_OPACITY = 0.25
+
+def fingerprint_pages(input_path: str, first_page: int, last_page: int) -> List[Dict[str, Any]]:
+    """Structural fingerprints of a range of pages (runs in a worker process)
+    
+    The fingerprint covers the page geometry, its content streams and the
+    raw data of the fonts, form XObjects and images it uses. Pages with
+    equal fingerprints render and extract identically, so no text needs to
+    be extracted to recognize them.
+    """
+    fingerprints = []
+    resource_hashes: Dict[int, str] = {}
+    with fitz.open(input_path) as doc:
+        for page_number in range(first_page, last_page + 1):
+            page = doc[page_number]
+            content = hashlib.sha256(f"{tuple(page.rect)} {page.rotation}".encode())
+            content.update(page.read_contents())
+            for font in sorted(page.get_fonts(full=True), key=lambda font: font[4]):
+                content.update(f"{font[3]} {font[4]} {font[5]}".encode())
+                content.update(_resource_hash(doc, font[0], resource_hashes, font=True).encode())
+            for xobject in sorted(page.get_xobjects(), key=lambda xobject: xobject[1]):
+                content.update(_resource_hash(doc, xobject[0], resource_hashes).encode())
+            
+            images = sorted(_resource_hash(doc, image[0], resource_hashes) for image in page.get_images(full=True))
+            
+            fingerprints.append({
+                "page": page_number,
+                "fingerprint": hashlib.sha256("|".join([content.hexdigest(), *images]).encode()).hexdigest(),
+                "content_hash": content.hexdigest(),
+                "image_hashes": images
+            })
+    return fingerprints
+
+def _resource_hash(doc: "fitz.Document", xref: int, cache: Dict[int, str], font: bool = False) -> str:
+    """Hash of a font, image or form XObject's data, computed once per document"""
+    if xref not in cache:
+        if xref <= 0:
+            cache[xref] = ""
+        elif font:
+            # Embedded font program plus the ToUnicode map that text extraction uses
+            digest = hashlib.sha256(doc.extract_font(xref)[3] or b"")
+            value_type, value = doc.xref_get_key(xref, "ToUnicode")
+            if value_type == "xref":
+                digest.update(doc.xref_stream_raw(int(value.split()[0])) or b"")
+            cache[xref] = digest.hexdigest()
+        else:
+            cache[xref] = hashlib.sha256(doc.xref_stream_raw(xref) or b"").hexdigest()
+    return cache[xref]
+
+def extract_page_text(input_path: str, page_numbers: List[int]) -> List[Dict[str, Any]]:
+    """Words, text hash and text signature of some pages (runs in a worker process)"""
+    texts = []
+    with fitz.open(input_path) as doc:
+        for page_number in page_numbers:
+            words = [word[4] for word in doc[page_number].get_text("words", sort=True)]
+            texts.append({
+                "words": words,
+                "text_hash": hashlib.sha256(" ".join(words).encode("utf-8", "surrogatepass")).hexdigest(),
+                "signature": text_signature(words)
+            })
+    return texts
+
+def text_signature(words: List[str]) -> List[int]:
+    """MinHash signature of a page's word 3-grams; equal fractions estimate text similarity"""
+    if not words:
+        return [_HASH_PRIME] * SIGNATURE_SIZE
+    shingles = {
+        " ".join(words[index:index + SHINGLE_WORDS])
+        for index in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    # crc32 is the same in every worker process, unlike hash()
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8", "surrogatepass")) for shingle in shingles), dtype=np.uint64)
+    permuted = (np.outer(_SIGNATURE_A, hashes) + _SIGNATURE_B[:, None]) % np.uint64(_HASH_PRIME)
+    return permuted.min(axis=1).tolist()
+
+def match_identical_pages(
+    pages1: List[Dict[str, Any]],
+    pages2: List[Dict[str, Any]]
+) -> List[Tuple[str, int, int, int, int]]:
+    """Runs of identical pages as difflib opcodes, matched by fingerprint"""
+    matcher = SequenceMatcher(
+        None,
+        [page["fingerprint"] for page in pages1],
+        [page["fingerprint"] for page in pages2],
+        autojunk=False
+    )
+    return matcher.get_opcodes()
+
+def align_pages(
+    pages1: List[Dict[str, Any]],
+    pages2: List[Dict[str, Any]],
+    opcodes: List[Tuple[str, int, int, int, int]]
+) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Pair up the pages of two documents, leaving None for inserted and deleted pages
+    
+    Runs of identical pages come from match_identical_pages. Inside the
+    blocks in between, changed pages are paired by text similarity so that
+    an inserted page does not shift every following page out of line; those
+    pages need "text_hash" and "signature" from extract_page_text.
+    """
+    alignment: List[Tuple[Optional[int], Optional[int]]] = []
+    for tag, first1, last1, first2, last2 in opcodes:
+        if tag == "equal":
+            alignment.extend(zip(range(first1, last1), range(first2, last2)))
+        else:
+            alignment.extend(_align_block(pages1, pages2, first1, last1, first2, last2))
+    return alignment
+
+def _align_block(
+    pages1: List[Dict[str, Any]],
+    pages2: List[Dict[str, Any]],
+    first1: int,
+    last1: int,
+    first2: int,
+    last2: int
+) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Best pairing of two runs of changed pages that keeps their order"""
+    count1, count2 = last1 - first1, last2 - first2
+    if count1 == 0 or count2 == 0 or count1 * count2 > MAX_ALIGNMENT_CELLS:
+        paired = min(count1, count2)
+        return (
+            [(first1 + index, first2 + index) for index in range(paired)]
+            + [(index, None) for index in range(first1 + paired, last1)]
+            + [(None, index) for index in range(first2 + paired, last2)]
+        )
+    
+    # Text similarity of every pair at once; equal signature entries estimate it
+    signatures1 = np.array([page["signature"] for page in pages1[first1:last1]])
+    signatures2 = np.array([page["signature"] for page in pages2[first2:last2]])
+    similarity = (signatures1[:, None, :] == signatures2[None, :, :]).mean(axis=2)
+    text_hashes2 = [page["text_hash"] for page in pages2[first2:last2]]
+    for i, page in enumerate(pages1[first1:last1]):
+        similarity[i, [j for j, text_hash in enumerate(text_hashes2) if text_hash == page["text_hash"]]] = 1.0
+    similarity = similarity.tolist()
+    
+    # Maximize the summed similarity of paired pages (sequence alignment
+    # with free gaps); scores[i][j] covers the first i and j pages
+    scores = [[0.0] * (count2 + 1) for _ in range(count1 + 1)]
+    for i in range(1, count1 + 1):
+        row, previous = scores[i], scores[i - 1]
+        for j in range(1, count2 + 1):
+            best = max(previous[j], row[j - 1])
+            pair = similarity[i - 1][j - 1]
+            if pair >= MODIFIED_PAGE_MIN_SIMILARITY:
+                best = max(best, previous[j - 1] + pair)
+            row[j] = best
+    
+    block: List[Tuple[Optional[int], Optional[int]]] = []
+    i, j = count1, count2
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and scores[i][j] != scores[i - 1][j] and scores[i][j] != scores[i][j - 1]:
+            block.append((first1 + i - 1, first2 + j - 1))
+            i, j = i - 1, j - 1
+        elif j > 0 and (i == 0 or scores[i][j] == scores[i][j - 1]):
+            # Walking backwards, so a replaced page lists as deleted, then inserted
+            block.append((None, first2 + j - 1))
+            j -= 1
+        else:
+            block.append((first1 + i - 1, None))
+            i -= 1
+    block.reverse()
+    return block
+
+def diff_words(pairs: List[Tuple[List[str], List[str]]]) -> List[Dict[str, Any]]:
+    """Word-level diff of the text of changed page pairs (runs in a worker process)"""
+    results = []
+    for words1, words2 in pairs:
+        matcher = SequenceMatcher(None, words1, words2, autojunk=False)
+        
+        changes = []
+        added = removed = 0
+        for tag, first1, last1, first2, last2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            removed += last1 - first1
+            added += last2 - first2
+            if len(changes) < MAX_CHANGES_PER_PAGE:
+                changes.append({
+                    "type": tag,
+                    "old": " ".join(words1[first1:last1])[:MAX_CHANGE_CHARS],
+                    "new": " ".join(words2[first2:last2])[:MAX_CHANGE_CHARS]
+                })
+        results.append({
+            "text_similarity": matcher.ratio() if words1 or words2 else 1.0,
+            "words_added": added,
+            "words_removed": removed,
+            "changes": changes
+        })
+    return results
+
+def summarize_comparison(
+    pages1: List[Dict[str, Any]],
+    pages2: List[Dict[str, Any]],
+    alignment: List[Tuple[Optional[int], Optional[int]]],
+    diffs: Dict[Tuple[int, int], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Per-page change report and overall similarity of an alignment
+    
+    Identical pages score 1 and inserted or deleted pages 0. Modified pages
+    score the weighted text, image and content similarity, so the overall
+    score is the average over all aligned positions.
+    """
+    report = []
+    differences = []
+    counts = {"identical": 0, "modified": 0, "inserted": 0, "deleted": 0}
+    total = 0.0
+    for index1, index2 in alignment:
+        if index2 is None:
+            status = "deleted"
+            entry = {"status": status, "file1_page": index1 + 1, "file2_page": None, "similarity": 0.0}
+            differences.append(f"Page {index1 + 1} of the first document was removed")
+        elif index1 is None:
+            status = "inserted"
+            entry = {"status": status, "file1_page": None, "file2_page": index2 + 1, "similarity": 0.0}
+            differences.append(f"Page {index2 + 1} of the second document was added")
+        elif pages1[index1]["fingerprint"] == pages2[index2]["fingerprint"]:
+            status = "identical"
+            entry = {"status": status, "file1_page": index1 + 1, "file2_page": index2 + 1, "similarity": 1.0}
+        else:
+            status = "modified"
+            page1, page2 = pages1[index1], pages2[index2]
+            diff = diffs.get((index1, index2), {"text_similarity": 1.0, "words_added": 0, "words_removed": 0, "changes": []})
+            images1, images2 = set(page1["image_hashes"]), set(page2["image_hashes"])
+            image_similarity = len(images1 & images2) / len(images1 | images2) if images1 | images2 else 1.0
+            similarity = (
+                SIMILARITY_WEIGHTS["text"] * diff["text_similarity"]
+                + SIMILARITY_WEIGHTS["images"] * image_similarity
+                + SIMILARITY_WEIGHTS["content"] * (page1["content_hash"] == page2["content_hash"])
+            )
+            entry = {
+                "status": status,
+                "file1_page": index1 + 1,
+                "file2_page": index2 + 1,
+                "similarity": round(similarity, 4),
+                "text_changed": page1["text_hash"] != page2["text_hash"],
+                "images_changed": images1 != images2,
+                "layout_changed": page1["content_hash"] != page2["content_hash"],
+                **diff
+            }
+            entry["text_similarity"] = round(entry["text_similarity"], 4)
+            changed = [
+                name for name, flag in (
+                    ("text", entry["text_changed"]), ("images", entry["images_changed"]), ("layout", entry["layout_changed"])
+                ) if flag
+            ]
+            differences.append(f"Page {index1 + 1} (page {index2 + 1} in the second document): {', '.join(changed)} changed")
+        counts[status] += 1
+        total += entry["similarity"]
+        report.append(entry)
+    
+    return {
+        "similarity_score": round(100 * total / len(alignment), 2) if alignment else 100.0,
+        "pages_identical": counts["identical"],
+        "pages_modified": counts["modified"],
+        "pages_inserted": counts["inserted"],
+        "pages_deleted": counts["deleted"],
+        "differences": differences,
+        "pages": report
+    }
+
+def diff_page_images(path1: str, path2: str, pairs: List[Tuple[int, int]], dpi: int) -> List[Dict[str, Any]]:
+    """Pixel difference of changed page pairs (runs in a worker process)
+    
+    Both pages are rendered in gray at the same DPI and compared as arrays.
+    Changed pixels are merged into regions by dilation and connected
+    components; region boxes are in points of the pages as displayed.
+    """
+    scale = dpi / 72
+    merge_size = max(1, round(DIFF_MERGE_POINTS * scale)) | 1
+    kernel = np.ones((merge_size, merge_size), dtype=np.uint8)
+    min_region_pixels = (DIFF_MIN_REGION_POINTS * scale) ** 2
+    
+    results = []
+    with fitz.open(path1) as doc1, fitz.open(path2) as doc2:
+        for page1, page2 in pairs:
+            gray1 = _render_gray(doc1[page1], dpi)
+            gray2 = _render_gray(doc2[page2], dpi)
+            # Pages of different sizes are compared on a common white canvas
+            height, width = max(gray1.shape[0], gray2.shape[0]), max(gray1.shape[1], gray2.shape[1])
+            if gray1.shape != (height, width):
+                gray1 = np.pad(gray1, ((0, height - gray1.shape[0]), (0, width - gray1.shape[1])), constant_values=255)
+            if gray2.shape != (height, width):
+                gray2 = np.pad(gray2, ((0, height - gray2.shape[0]), (0, width - gray2.shape[1])), constant_values=255)
+            
+            changed = cv2.absdiff(gray1, gray2) > DIFF_PIXEL_THRESHOLD
+            changed_pixels = int(np.count_nonzero(changed))
+            regions = []
+            if changed_pixels:
+                merged = cv2.dilate(changed.view(np.uint8), kernel)
+                _, _, stats, _ = cv2.connectedComponentsWithStats(merged, connectivity=8)
+                # Row 0 is the background; largest regions first
+                stats = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= min_region_pixels]
+                stats = stats[np.argsort(-stats[:, cv2.CC_STAT_AREA])][:MAX_REGIONS_PER_PAGE]
+                regions = [
+                    [
+                        round(left / scale, 2), round(top / scale, 2),
+                        round((left + box_width) / scale, 2), round((top + box_height) / scale, 2)
+                    ]
+                    for left, top, box_width, box_height in stats[:, :4].tolist()
+                ]
+            results.append({
+                "change_percent": round(100 * changed_pixels / changed.size, 3),
+                "regions": regions
+            })
+    return results
+
+def _render_gray(page: "fitz.Page", dpi: int) -> np.ndarray:
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+
+def summarize_visual_comparison(
+    pages1: List[Dict[str, Any]],
+    pages2: List[Dict[str, Any]],
+    alignment: List[Tuple[Optional[int], Optional[int]]],
+    diffs: Dict[Tuple[int, int], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Per-page change percentages and overall similarity of a visual comparison
+    
+    Pages with equal fingerprints were not rendered and count as unchanged;
+    inserted and deleted pages count as fully changed.
+    """
+    report = []
+    differences = []
+    counts = {"identical": 0, "modified": 0, "inserted": 0, "deleted": 0}
+    total = 0.0
+    for index1, index2 in alignment:
+        if index2 is None:
+            entry = {"status": "deleted", "file1_page": index1 + 1, "file2_page": None, "change_percent": 100.0, "regions": []}
+            differences.append(f"Page {index1 + 1} of the first document was removed")
+        elif index1 is None:
+            entry = {"status": "inserted", "file1_page": None, "file2_page": index2 + 1, "change_percent": 100.0, "regions": []}
+            differences.append(f"Page {index2 + 1} of the second document was added")
+        else:
+            diff = diffs.get((index1, index2), {"change_percent": 0.0, "regions": []})
+            status = "modified" if diff["regions"] else "identical"
+            entry = {"status": status, "file1_page": index1 + 1, "file2_page": index2 + 1, **diff}
+            if status == "modified":
+                differences.append(
+                    f"Page {index1 + 1} (page {index2 + 1} in the second document): "
+                    f"{len(diff['regions'])} changed region(s), {diff['change_percent']}% of the page"
+                )
+        counts[entry["status"]] += 1
+        total += 1 - entry["change_percent"] / 100
+        report.append(entry)
+    
+    return {
+        "similarity_score": round(100 * total / len(alignment), 2) if alignment else 100.0,
+        "pages_identical": counts["identical"],
+        "pages_modified": counts["modified"],
+        "pages_inserted": counts["inserted"],
+        "pages_deleted": counts["deleted"],
+        "differences": differences,
+        "pages": report
+    }
+
+def build_overlay(path1: str, path2: str, output_path: str, report: List[Dict[str, Any]]):
+    """Write the second document with changed regions highlighted
+    
+    Pages follow the alignment: deleted pages are taken from the first
+    document and framed in red, inserted pages are framed in green.
+    """
+    with fitz.open(path1) as doc1, fitz.open(path2) as doc2, fitz.open() as overlay:
+        # Copy runs of consecutive pages from the same document at once
+        runs: List[Tuple["fitz.Document", int, int]] = []
+        for entry in report:
+            source, page = (doc1, entry["file1_page"] - 1) if entry["file2_page"] is None else (doc2, entry["file2_page"] - 1)
+            if runs and runs[-1][0] is source and runs[-1][2] == page - 1:
+                runs[-1] = (source, runs[-1][1], page)
+            else:
+                runs.append((source, page, page))
+        for source, first, last in runs:
+            overlay.insert_pdf(source, from_page=first, to_page=last)
+        
+        for page, entry in zip(overlay, report):
+            if entry["status"] == "identical":
+                continue
+            shape = page.new_shape()
+            if entry["status"] == "modified":
+                for region in entry["regions"]:
+                    # Regions are in displayed coordinates; drawing uses the unrotated page
+                    shape.draw_rect(fitz.Rect(region) * page.derotation_matrix)
+                shape.finish(color=HIGHLIGHT_CHANGED, fill=HIGHLIGHT_CHANGED, fill_opacity=HIGHLIGHT_OPACITY, width=0.5)
+            else:
+                color = HIGHLIGHT_INSERTED if entry["status"] == "inserted" else HIGHLIGHT_DELETED
+                shape.draw_rect((page.rect + (2, 2, -2, -2)) * page.derotation_matrix)
+                shape.finish(color=color, width=4)
+            shape.commit()
+        overlay.save(output_path, garbage=1, deflate=True)
@@ -0,0 +1,560 @@
+import os
+import re
+import zlib
+import logging
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bytes read per step when scanning a file; tokens that straddle two reads
+# are found again in the overlap
+SCAN_CHUNK_BYTES = 4 * 1024 * 1024
+SCAN_OVERLAP_BYTES = 256
+
+# Object bodies and object streams larger than this are not parsed
+MAX_OBJECT_BODY_BYTES = 8 * 1024 * 1024
+MAX_OBJECT_STREAM_BYTES = 64 * 1024 * 1024
+
+# Bytes examined after a "trailer" keyword and at the end of the file
+TRAILER_READ_BYTES = 4096
+TAIL_READ_BYTES = 2048
+
+# Object numbers listed individually in the repair report
+MAX_REPORTED_OBJECTS = 100
+
+_OBJECT_HEADER = rb"(?<![0-9])(\d{1,10})\s+(\d{1,5})\s+obj(?![A-Za-z])"
+_TOP_LEVEL = re.compile(_OBJECT_HEADER + rb"|(?<![A-Za-z])trailer(?![A-Za-z])")
+_OBJECT_TERMINATOR = re.compile(
+    rb"endobj|(?<![A-Za-z])stream(?=\r|\n)|" + _OBJECT_HEADER + rb"|(?<![A-Za-z])(?:xref|trailer)(?![A-Za-z])|startxref"
+)
+_ENDSTREAM = re.compile(rb"endstream")
+_NEXT_OBJECT = re.compile(rb"[\r\n]" + _OBJECT_HEADER)
+_STREAM_END = re.compile(rb"\s*endstream(\s*endobj)?")
+_HEADER_AT = re.compile(rb"\s*" + _OBJECT_HEADER)
+_VERSION = re.compile(rb"%PDF-(\d\.\d)")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_XREF_SUBSECTION = re.compile(rb"\s*(\d+)[ \t]+(\d+)[ \t]*(?:\r\n|\r|\n)")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])(?:\r\n| \r| \n)")
+_TRAILER_KEYWORD = re.compile(rb"\s*trailer")
+_TYPE = re.compile(rb"/Type\s*/([A-Za-z]+)")
+_CATALOG = re.compile(rb"/Type\s*/Catalog(?![A-Za-z])")
+_LENGTH = re.compile(rb"/Length(?![A-Za-z0-9])\s*(?:\d+\s+\d+\s+R|\d+)?")
+_DIRECT_LENGTH = re.compile(rb"/Length(?![A-Za-z0-9])\s*(\d+)(?!\d)(?!\s+\d+\s+R)")
+_FLATE = re.compile(rb"/Filter\s*\[?\s*/FlateDecode\s*\]?")
+_FILTER = re.compile(rb"/Filter(?![A-Za-z])")
+_ID = re.compile(rb"/ID\s*\[\s*(<[0-9A-Fa-f\s]*>)\s*(<[0-9A-Fa-f\s]*>)\s*\]")
+_W = re.compile(rb"/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]")
+_INDEX = re.compile(rb"/Index\s*\[([\d\s]*)\]")
+
+class UnrecoverablePDF(ValueError):
+    """Raised when not even a document catalog can be recovered from a file"""
+
+class _FileWindow:
+    """Forward regex search over a file that keeps only one chunk in memory"""
+    
+    def __init__(self, file: BinaryIO, size: int):
+        self.file = file
+        self.size = size
+        self.start = 0
+        self.data = b""
+    
+    def _load(self, position: int):
+        # A little context before the position keeps lookbehinds working
+        self.start = max(0, position - 16)
+        self.file.seek(self.start)
+        self.data = self.file.read(SCAN_CHUNK_BYTES)
+    
+    def search(self, pattern: "re.Pattern", position: int) -> Optional[Tuple[int, "re.Match"]]:
+        """Absolute offset and match of the first occurrence at or after position"""
+        while position < self.size:
+            end = self.start + len(self.data)
+            context = 16 if self.start else 0
+            if position < self.start + context or position >= end or (position + SCAN_OVERLAP_BYTES >= end and end < self.size):
+                self._load(position)
+                end = self.start + len(self.data)
+            
+            match = pattern.search(self.data, position - self.start)
+            if end >= self.size:
+                return (self.start + match.start(), match) if match else None
+            # Tokens are shorter than the overlap, so a match starting before it is complete
+            safe_end = end - SCAN_OVERLAP_BYTES
+            if match and self.start + match.start() < safe_end:
+                return self.start + match.start(), match
+            position = safe_end
+        return None
+
+def check_structure(path: str) -> List[str]:
+    """Cheap structural check of header, trailer, startxref and every xref entry
+    
+    Only the file's head, tail, cross-reference sections and a few bytes at
+    each object offset are read. Returns the problems found; an empty list
+    means the file can be used as it is.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as source:
+        head = source.read(1024)
+        if not head.startswith(b"%PDF-"):
+            return ["Missing or misplaced %PDF header"]
+        
+        source.seek(max(0, size - TAIL_READ_BYTES))
+        tail = source.read()
+        startxref = list(_STARTXREF.finditer(tail))
+        if not startxref:
+            return ["Missing startxref"]
+        # Anything but %%EOF after the last startxref means the file was cut
+        # short or an update was appended without one
+        if not re.fullmatch(rb"\s*%%EOF\s*", tail[startxref[-1].end():]):
+            return ["File does not end with startxref and %%EOF"]
+        
+        issues = []
+        entries: Dict[int, Tuple[int, int, int]] = {}
+        root = None
+        pending = [int(startxref[-1].group(1))]
+        visited: Set[int] = set()
+        while pending:
+            offset = pending.pop(0)
+            if offset in visited or offset >= size:
+                return issues + [f"Cross-reference offset {offset} is invalid"]
+            visited.add(offset)
+            try:
+                section, trailer = _read_xref_section(source, offset)
+            except (ValueError, zlib.error) as e:
+                return issues + [f"Cross-reference section at {offset} is damaged: {e}"]
+            
+            # Newer sections take precedence over the ones they update
+            for number, entry in section.items():
+                entries.setdefault(number, entry)
+            if root is None:
+                root = _reference(trailer, b"Root")
+            for key in (b"XRefStm", b"Prev"):
+                match = re.search(rb"/" + key + rb"\s+(\d+)", trailer)
+                if match:
+                    pending.append(int(match.group(1)))
+        
+        if root is None:
+            return issues + ["Trailer has no /Root"]
+        if entries.get(root[0], (0,))[0] == 0:
+            issues.append(f"Document catalog {root[0]} is missing from the cross-reference table")
+        
+        for number, (kind, first, _) in entries.items():
+            if kind == 1:
+                source.seek(first)
+                match = _HEADER_AT.match(source.read(32))
+                if not match or int(match.group(1)) != number:
+                    issues.append(f"Object {number} is not at its recorded offset {first}")
+            elif kind == 2 and entries.get(first, (0,))[0] != 1:
+                issues.append(f"Object {number} is in missing object stream {first}")
+            if len(issues) >= MAX_REPORTED_OBJECTS:
+                break
+        return issues
+
+def rebuild_pdf(input_path: str, output_path: str) -> Dict[str, Any]:
+    """Rebuild a damaged file's object table from a streaming scan of its bytes
+    
+    Every object found in the file is validated; stream lengths are
+    corrected, missing endobj keywords added and objects that cannot be
+    recovered dropped. Surviving objects are copied to the output in their
+    original order with a fresh cross-reference table. Memory use is bounded
+    by the scan window and the object table, not by the file size.
+    """
+    size = os.path.getsize(input_path)
+    with open(input_path, "rb") as source:
+        version_match = _VERSION.search(source.read(1024))
+        scan = _scan_objects(source, size)
+        objects = scan["objects"]
+        
+        # Compressed objects need their object stream to have survived
+        for number, entry in list(objects.items()):
+            if "container" in entry and objects.get(entry["container"], {}).get("type") != b"ObjStm":
+                del objects[number]
+                scan["dropped"].add(number)
+        
+        trailer = scan["trailer"]
+        root = trailer.get("Root")
+        trailer_root = root is not None and root[0] in objects
+        if not trailer_root:
+            catalogs = [number for number in scan["catalogs"] if number in objects]
+            if not catalogs:
+                raise UnrecoverablePDF("No document catalog could be recovered")
+            root = (catalogs[-1], objects[catalogs[-1]].get("generation", 0))
+        
+        version = version_match.group(1) if version_match else b"1.7"
+        if any("container" in entry for entry in objects.values()) and version < b"1.5":
+            version = b"1.5"
+        with open(output_path, "wb") as output:
+            _write_document(source, output, objects, root, trailer, version)
+    
+    dropped = sorted(scan["dropped"] - set(objects))
+    return {
+        "objects_recovered": len(objects),
+        "objects_dropped": len(dropped),
+        "dropped_objects": dropped[:MAX_REPORTED_OBJECTS],
+        "stream_lengths_fixed": scan["stream_lengths_fixed"],
+        "endobj_added": scan["endobj_added"],
+        "streams_truncated": scan["streams_truncated"],
+        "object_streams_unreadable": scan["object_streams_unreadable"],
+        "catalog_recovered_from": "trailer" if trailer_root else "scan"
+    }
+
+def _scan_objects(source: BinaryIO, size: int) -> Dict[str, Any]:
+    window = _FileWindow(source, size)
+    scan: Dict[str, Any] = {
+        "objects": {},
+        "dropped": set(),
+        "catalogs": [],
+        "trailer": {},
+        "stream_lengths_fixed": 0,
+        "endobj_added": 0,
+        "streams_truncated": 0,
+        "object_streams_unreadable": 0
+    }
+    objects = scan["objects"]
+    
+    position = 0
+    while True:
+        found = window.search(_TOP_LEVEL, position)
+        if found is None:
+            break
+        start, match = found
+        if match.group(1) is None:
+            _update_trailer(scan["trailer"], _read(source, start, TRAILER_READ_BYTES).split(b"startxref")[0])
+            position = start + len(match.group())
+            continue
+        
+        number, generation = int(match.group(1)), int(match.group(2))
+        entry, position = _scan_object(source, window, start, start + len(match.group()), scan)
+        if entry is None:
+            scan["dropped"].add(number)
+            continue
+        
+        entry["type"] = _object_type(entry["body"])
+        if entry["type"] == b"XRef":
+            # Old cross-reference streams are replaced, but carry the trailer keys
+            _update_trailer(scan["trailer"], entry["body"])
+            continue
+        entry["generation"] = generation
+        objects[number] = entry
+        
+        if entry["body"] is not None and _CATALOG.search(entry["body"]):
+            scan["catalogs"].append(number)
+        if entry["type"] == b"ObjStm":
+            if "Encrypt" in scan["trailer"]:
+                scan["object_streams_unreadable"] += 1
+                continue
+            members = _read_object_stream(source, entry)
+            if members is None:
+                scan["object_streams_unreadable"] += 1
+                continue
+            for index, (member, is_catalog) in enumerate(members):
+                objects[member] = {"offset": entry["offset"], "container": number, "index": index}
+                if is_catalog:
+                    scan["catalogs"].append(member)
+    return scan
+
+def _scan_object(
+    source: BinaryIO,
+    window: _FileWindow,
+    start: int,
+    header_end: int,
+    scan: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], int]:
+    """Validate the object whose header spans start..header_end; return its entry and where to resume"""
+    found = window.search(_OBJECT_TERMINATOR, header_end)
+    if found is None:
+        # File ends inside the object
+        return None, window.size
+    end, match = found
+    token = match.group()
+    
+    if token == b"endobj":
+        body = _read(source, header_end, end - header_end) if end - header_end <= MAX_OBJECT_BODY_BYTES else None
+        return {"offset": start, "span": (start, end + len(token)), "body": body, "data": None, "rewrite": False}, end + len(token)
+    
+    if token == b"stream":
+        if end - header_end > MAX_OBJECT_BODY_BYTES:
+            return None, end + len(token)
+        dictionary = _read(source, header_end, end - header_end)
+        data_start = end + len(token) + (2 if _read(source, end + len(token), 2) == b"\r\n" else 1)
+        
+        length = _DIRECT_LENGTH.search(dictionary)
+        if length and data_start + int(length.group(1)) <= window.size:
+            data_end = data_start + int(length.group(1))
+            stream_end = _STREAM_END.match(_read(source, data_end, 64))
+            if stream_end:
+                entry = {"offset": start, "body": dictionary, "data": (data_start, data_end - data_start)}
+                if stream_end.group(1):
+                    entry.update(span=(start, data_end + stream_end.end()), rewrite=False)
+                else:
+                    entry.update(span=None, rewrite=True)
+                    scan["endobj_added"] += 1
+                return entry, data_end + stream_end.end()
+        
+        # Length is missing, indirect or wrong: the stream runs to endstream
+        found = window.search(_ENDSTREAM, data_start)
+        if found is None:
+            # Cut short: keep what is there up to the next object or the end of the file
+            following = window.search(_NEXT_OBJECT, data_start)
+            data_end = following[0] if following else window.size
+            scan["streams_truncated"] += 1
+            return {
+                "offset": start,
+                "span": None,
+                "body": _set_length(dictionary, data_end - data_start),
+                "data": (data_start, data_end - data_start),
+                "rewrite": True
+            }, data_end
+        data_end = found[0]
+        if _read(source, data_end - 2, 2) == b"\r\n":
+            data_end -= 2
+        elif _read(source, data_end - 1, 1) in (b"\r", b"\n"):
+            data_end -= 1
+        data_end = max(data_end, data_start)
+        if length:
+            scan["stream_lengths_fixed"] += 1
+        
+        stream_end = _STREAM_END.match(_read(source, found[0], 64))
+        if not stream_end.group(1):
+            scan["endobj_added"] += 1
+        return {
+            "offset": start,
+            "span": None,
+            "body": _set_length(dictionary, data_end - data_start),
+            "data": (data_start, data_end - data_start),
+            "rewrite": True
+        }, found[0] + stream_end.end()
+    
+    # Another object, the xref table or the trailer follows before endobj
+    if end - header_end > MAX_OBJECT_BODY_BYTES:
+        return None, end
+    body = _read(source, header_end, end - header_end).strip()
+    if not body or not _balanced(body):
+        return None, end
+    scan["endobj_added"] += 1
+    return {"offset": start, "span": None, "body": body, "data": None, "rewrite": True}, end
+
+def _read_object_stream(source: BinaryIO, entry: Dict[str, Any]) -> Optional[List[Tuple[int, bool]]]:
+    """Numbers of the objects in an object stream and whether each is the catalog, or None if unreadable"""
+    dictionary = entry["body"]
+    data_start, length = entry["data"]
+    count = re.search(rb"/N\s+(\d+)", dictionary)
+    first = re.search(rb"/First\s+(\d+)", dictionary)
+    if not count or not first or length > MAX_OBJECT_STREAM_BYTES:
+        return None
+    
+    data = _read(source, data_start, length)
+    if _FLATE.search(dictionary):
+        try:
+            # Tolerates truncated data by returning what could be inflated
+            data = zlib.decompressobj().decompress(data)
+        except zlib.error:
+            return None
+    elif _FILTER.search(dictionary):
+        return None
+    
+    first = int(first.group(1))
+    header = data[:first].split()
+    if len(header) < 2 * int(count.group(1)) or not all(value.isdigit() for value in header):
+        return None
+    numbers = [int(value) for value in header[0::2]][:int(count.group(1))]
+    offsets = [first + int(value) for value in header[1::2]][:len(numbers)] + [len(data)]
+    return [
+        (number, bool(_CATALOG.search(data[offsets[index]:offsets[index + 1]])))
+        for index, number in enumerate(numbers)
+    ]
+
+def _write_document(
+    source: BinaryIO,
+    output: BinaryIO,
+    objects: Dict[int, Dict[str, Any]],
+    root: Tuple[int, int],
+    trailer: Dict[str, Any],
+    version: bytes
+):
+    output.write(b"%PDF-" + version + b"\n%\xe2\xe3\xcf\xd3\n")
+    
+    # Copy in original file order so the input is read sequentially
+    offsets: Dict[int, int] = {}
+    for number, entry in sorted(objects.items(), key=lambda item: item[1]["offset"]):
+        if "container" in entry:
+            continue
+        offsets[number] = output.tell()
+        if not entry["rewrite"]:
+            _copy_range(source, output, entry["span"][0], entry["span"][1] - entry["span"][0])
+            output.write(b"\n")
+            continue
+        output.write(b"%d %d obj\n" % (number, entry["generation"]))
+        output.write(entry["body"])
+        if entry["data"]:
+            output.write(b"\nstream\n")
+            _copy_range(source, output, *entry["data"])
+            output.write(b"\nendstream")
+        output.write(b"\nendobj\n")
+    
+    trailer_keys = b"/Root %d %d R" % root
+    info = trailer.get("Info")
+    if info and info[0] in objects:
+        trailer_keys += b" /Info %d %d R" % info
+    encrypt = trailer.get("Encrypt")
+    if encrypt and encrypt[0] in objects:
+        trailer_keys += b" /Encrypt %d %d R" % encrypt
+    if "ID" in trailer:
+        trailer_keys += b" /ID [" + trailer["ID"] + b"]"
+    
+    size = max(objects) + 1
+    xref_offset = output.tell()
+    if all("container" not in entry for entry in objects.values()):
+        output.write(b"xref\n0 %d\n0000000000 65535 f\r\n" % size)
+        for number in range(1, size):
+            if number in offsets:
+                output.write(b"%010d %05d n\r\n" % (offsets[number], objects[number]["generation"]))
+            else:
+                output.write(b"0000000000 65535 f\r\n")
+        output.write(b"trailer\n<< /Size %d %s >>\n" % (size, trailer_keys))
+    else:
+        # Compressed objects can only be addressed from a cross-reference stream
+        offsets[size] = xref_offset
+        size += 1
+        width = max(4, (max(xref_offset, max(objects)).bit_length() + 7) // 8)
+        rows = bytearray()
+        for number in range(size):
+            entry = objects.get(number)
+            if number in offsets:
+                kind, first, second = 1, offsets[number], entry["generation"] if entry else 0
+            elif entry:
+                kind, first, second = 2, entry["container"], entry["index"]
+            else:
+                kind, first, second = 0, 0, 65535 if number == 0 else 0
+            rows += bytes([kind]) + first.to_bytes(width, "big") + second.to_bytes(2, "big")
+        data = zlib.compress(bytes(rows))
+        output.write(
+            b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 %d 2] %s /Filter /FlateDecode /Length %d >>\nstream\n"
+            % (size - 1, size, width, trailer_keys, len(data))
+        )
+        output.write(data)
+        output.write(b"\nendstream\nendobj\n")
+    output.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+
+def _read_xref_section(source: BinaryIO, offset: int) -> Tuple[Dict[int, Tuple[int, int, int]], bytes]:
+    """Entries (type, field 2, field 3) and trailer dictionary of the section at offset; raises ValueError"""
+    source.seek(offset)
+    head = source.read(64)
+    if head.startswith(b"xref"):
+        entries = {}
+        position = offset + 4
+        while True:
+            source.seek(position)
+            chunk = source.read(64)
+            if _TRAILER_KEYWORD.match(chunk):
+                return entries, _read(source, position, TRAILER_READ_BYTES).split(b"startxref")[0]
+            subsection = _XREF_SUBSECTION.match(chunk)
+            if not subsection:
+                raise ValueError("malformed subsection header")
+            first, count = int(subsection.group(1)), int(subsection.group(2))
+            position += subsection.end()
+            source.seek(position)
+            rows = _XREF_ENTRY.findall(source.read(20 * count))
+            if len(rows) != count:
+                raise ValueError(f"expected {count} entries from object {first}")
+            for index, (value, generation, kind) in enumerate(rows):
+                entries[first + index] = (1 if kind == b"n" else 0, int(value), int(generation))
+            position += 20 * count
+    
+    header = _HEADER_AT.match(head)
+    if not header:
+        raise ValueError("no xref table or stream at offset")
+    source.seek(offset + header.end())
+    dictionary = source.read(TRAILER_READ_BYTES).split(b"stream")[0]
+    length = _DIRECT_LENGTH.search(dictionary)
+    widths = _W.search(dictionary)
+    if _object_type(dictionary) != b"XRef" or not length or not widths:
+        raise ValueError("not a cross-reference stream")
+    
+    data_start = offset + header.end() + len(dictionary) + len(b"stream")
+    data_start += 2 if _read(source, data_start, 2) == b"\r\n" else 1
+    data = _read(source, data_start, int(length.group(1)))
+    if _FLATE.search(dictionary):
+        data = zlib.decompress(data)
+    elif _FILTER.search(dictionary):
+        raise ValueError("unsupported filter")
+    predictor = re.search(rb"/Predictor\s+(\d+)", dictionary)
+    widths = [int(width) for width in widths.groups()]
+    if predictor and int(predictor.group(1)) >= 10:
+        data = _undo_png_predictor(data, sum(widths))
+    
+    size = re.search(rb"/Size\s+(\d+)", dictionary)
+    index = _INDEX.search(dictionary)
+    bounds = [int(value) for value in index.group(1).split()] if index else [0, int(size.group(1)) if size else 0]
+    rows = np.frombuffer(data, dtype=np.uint8)[:len(data) // sum(widths) * sum(widths)].reshape(-1, sum(widths))
+    fields = []
+    column = 0
+    for width in widths:
+        value = np.zeros(len(rows), dtype=np.int64)
+        for byte in range(width):
+            value = (value << 8) | rows[:, column + byte]
+        fields.append(value)
+        column += width
+    if widths[0] == 0:
+        fields[0] = np.ones(len(rows), dtype=np.int64)
+    
+    entries = {}
+    row = 0
+    for first, count in zip(bounds[0::2], bounds[1::2]):
+        if row + count > len(rows):
+            raise ValueError("stream has fewer entries than its /Index")
+        for number in range(first, first + count):
+            entries[number] = (int(fields[0][row]), int(fields[1][row]), int(fields[2][row]))
+            row += 1
+    return entries, dictionary
+
+def _undo_png_predictor(data: bytes, columns: int) -> bytes:
+    rows = np.frombuffer(data, dtype=np.uint8)[:len(data) // (columns + 1) * (columns + 1)].reshape(-1, columns + 1)
+    filters = set(rows[:, 0].tolist())
+    if filters <= {0}:
+        return rows[:, 1:].tobytes()
+    if filters <= {2}:
+        # "Up" on every row is a running sum down each column
+        return np.cumsum(rows[:, 1:], axis=0, dtype=np.uint8).tobytes()
+    raise ValueError(f"unsupported PNG predictor rows {sorted(filters)}")
+
+def _update_trailer(trailer: Dict[str, Any], dictionary: Optional[bytes]):
+    if not dictionary:
+        return
+    for key in ("Root", "Info", "Encrypt"):
+        reference = _reference(dictionary, key.encode())
+        if reference:
+            trailer[key] = reference
+    identifier = _ID.search(dictionary)
+    if identifier:
+        trailer["ID"] = identifier.group(1) + identifier.group(2)
+
+def _reference(dictionary: bytes, key: bytes) -> Optional[Tuple[int, int]]:
+    match = re.search(rb"/" + key + rb"\s+(\d+)\s+(\d+)\s+R", dictionary)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def _object_type(body: Optional[bytes]) -> Optional[bytes]:
+    match = _TYPE.search(body) if body else None
+    return match.group(1) if match else None
+
+def _set_length(dictionary: bytes, length: int) -> bytes:
+    if _LENGTH.search(dictionary):
+        return _LENGTH.sub(b"/Length %d" % length, dictionary, count=1)
+    return dictionary.replace(b"<<", b"<< /Length %d" % length, 1)
+
+def _balanced(body: bytes) -> bool:
+    """Whether dictionary and array delimiters pair up, as a sanity check for objects cut short"""
+    return body.count(b"<<") == body.count(b">>") and body.count(b"[") == body.count(b"]")
+
+def _read(source: BinaryIO, position: int, length: int) -> bytes:
+    source.seek(max(position, 0))
+    return source.read(max(length, 0))
+
+def _copy_range(source: BinaryIO, output: BinaryIO, position: int, length: int):
+    source.seek(position)
+    while length > 0:
+        chunk = source.read(min(length, SCAN_CHUNK_BYTES))
+        if not chunk:
+            break
+        output.write(chunk)
+        length -= len(chunk)
@@ -1,31 +1,124 @@
 import os
 import uuid
 import asyncio
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable
 from pathlib import Path
 import logging
 from fastapi import HTTPException, UploadFile
 import PyPDF2
-from PyPDF2.errors import PdfReadError, PdfWriteError, PdfStreamError
+from PyPDF2.errors import PdfReadError, PdfStreamError, PyPdfError
 import fitz  # PyMuPDF
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.utils import ImageReader
+import numpy as np
 from PIL import Image
 import io
+import re
+import regex
+import json
+import math
+import hashlib
+import functools
+import threading
+from collections import Counter, OrderedDict
 import tempfile
 import subprocess
 import shutil
+import zipfile
+
+from services.file_storage import PartArchive
+from services.page_render import rasterize_pages, page_renderer, MAX_RENDER_PIXELS, MIN_RENDER_DPI, MAX_RENDER_DPI
+from services.image_pdf import probe_image, convert_image, write_image_pdf, UnsupportedImage, PAGE_SIZES
+from services.pdfa import convert_document_to_pdfa, PDFA_LEVELS
+from services.word_export import extract_page_layouts, write_docx
+from services.table_export import extract_page_tables, TableWorkbookWriter, TABLE_STRATEGIES
+from services.slide_export import write_pptx, slide_size, SLIDE_MODES
+from services.html_render import render_html, HTMLRendererUnavailable
+from services.docx_pdf import render_docx
+from services.xlsx_pdf import render_xlsx
+from services.worker_pool import worker_pool
+from services.redaction import redact_document, search_pages, compile_patterns, PatternTimeout
+from services.signing import sign_document, SigningUnavailable
+from services.pdf_repair import check_structure, rebuild_pdf, UnrecoverablePDF
+from services.pdf_compare import (
+    fingerprint_pages, extract_page_text, match_identical_pages, align_pages, diff_words, summarize_comparison,
+    diff_page_images, summarize_visual_comparison, build_overlay
+)
+from services.ocr_engine import (
+    classify_page, recognize_page, detect_orientation, OCREngineUnavailable, ORIENT_MIN_CONFIDENCE
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Indirect object reference, e.g. "12 0 R"
+_REFERENCE_PATTERN = re.compile(r"\b(\d+) 0 R\b")
+
+SPLIT_MODES = ["pages", "ranges", "every", "bookmarks", "size"]
+
+# Approximate per-page cost of page dictionaries and xref entries
+PAGE_OVERHEAD_BYTES = 512
+
+# Base-14 fonts available for text watermarks (PyMuPDF font names)
+WATERMARK_FONTS = ["helv", "hebo", "tiro", "tibo", "cour", "cobo"]
+# Watermark forms are registered as <prefix><xref>, so forms for different
+# page sizes and earlier watermarks keep their own resource names
+WATERMARK_XOBJECT_PREFIX = "PdfTkWatermark"
+WATERMARK_CACHE_SIZE = 64
+
+# Documents with at least this many pages have their pattern search spread
+# over page chunks on the worker pool (redactions are still applied to the
+# one document); chunks are never smaller than REDACT_MIN_CHUNK_PAGES
+REDACT_PARALLEL_MIN_PAGES = 100
+REDACT_MIN_CHUNK_PAGES = 25
+
+# Pages fingerprinted per worker task when comparing (at least), and changed
+# page pairs diffed per task
+COMPARE_MIN_CHUNK_PAGES = 25
+COMPARE_DIFF_CHUNK_PAGES = 10
+
+# Visual comparison: default render resolution and changed page pairs
+# rendered per worker task
+COMPARE_DEFAULT_DPI = 100
+COMPARE_RENDER_CHUNK_PAGES = 4
+
+# Image export: formats (with their file extensions), resolution range and
+# pages rendered per worker task
+IMAGE_EXPORT_FORMATS = {"jpeg": "jpg", "png": "png", "webp": "webp"}
+IMAGE_EXPORT_MIN_DPI = 36
+IMAGE_EXPORT_MAX_DPI = 600
+IMAGE_EXPORT_CHUNK_PAGES = 4
+
+# Images to PDF: largest margin in points
+IMAGE_PDF_MAX_MARGIN = 144
+
+# PDF to Word: pages laid out per worker task, and the share of complex pages
+# (columns, rotated text, dense drawings) above which "auto" hands the
+# document to LibreOffice instead of the native engine
+WORD_ENGINES = ["auto", "native", "libreoffice"]
+WORD_EXPORT_CHUNK_PAGES = 8
+WORD_COMPLEX_PAGE_SHARE = 0.2
+
+# Word and Excel to PDF: "auto" renders documents without complex features
+# (floating objects, charts, fields, conditional formatting...) natively
+# with reportlab and sends the rest to LibreOffice
+OFFICE_ENGINES = ["auto", "native", "libreoffice"]
+
+# PDF to Excel: pages searched for tables per worker task
+EXCEL_EXPORT_CHUNK_PAGES = 10
+
+# PDF to PowerPoint: default render resolution of slide images
+SLIDE_IMAGE_DPI = 150
+
+# LibreOffice conversions are killed after this many seconds
+LIBREOFFICE_TIMEOUT = 60
+
 class PDFProcessor:
     """Main PDF processing class with all PDF operations"""
     
     def __init__(self):
         self.temp_dir = Path(tempfile.gettempdir()) / "pdf_processor"
         self.temp_dir.mkdir(exist_ok=True)
+        self._watermark_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._watermark_lock = threading.Lock()
     
     async def compress_pdf(self, input_path: str, output_path: str, quality: int = 50) -> Dict[str, Any]:
         """Compress PDF file with specific error handling"""
@@ -59,7 +152,7 @@ class PDFProcessor:
                 try:
                     with open(output_path, 'wb') as output_file:
                         pdf_writer.write(output_file)
-                except PdfWriteError as e:
+                except PyPdfError as e:
                     raise HTTPException(status_code=500, detail=f"Error writing compressed PDF: {str(e)}")
                 except IOError as e:
                     raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
@@ -83,44 +176,29 @@ class PDFProcessor:
             raise HTTPException(status_code=500, detail="PDF compression failed due to unexpected error")
     
     async def merge_pdfs(self, input_paths: List[str], output_path: str) -> Dict[str, Any]:
-        """Merge multiple PDF files with specific error handling"""
+        """Merge multiple PDF files with specific error handling
+
+        Inputs are imported one at a time and appended to the output with
+        incremental saves, so peak memory stays close to the largest single
+        input rather than the sum of all of them. Identical images and fonts
+        shared between inputs are written only once.
+        """
         try:
             # Validate input files
             for path in input_paths:
                 if not os.path.exists(path):
                     raise HTTPException(status_code=404, detail=f"Input file not found: {path}")
             
-            pdf_writer = PyPDF2.PdfWriter()
-            total_pages = 0
-            
-            for input_path in input_paths:
-                try:
-                    with open(input_path, 'rb') as input_file:
-                        pdf_reader = PyPDF2.PdfReader(input_file)
-                        
-                        for page in pdf_reader.pages:
-                            pdf_writer.add_page(page)
-                            total_pages += 1
-                            
-                except PdfReadError as e:
-                    raise HTTPException(status_code=400, detail=f"Invalid PDF file {input_path}: {str(e)}")
-                except PdfStreamError as e:
-                    raise HTTPException(status_code=400, detail=f"Corrupted PDF file {input_path}: {str(e)}")
-                except IOError as e:
-                    raise HTTPException(status_code=500, detail=f"File system error reading {input_path}: {str(e)}")
-            
-            try:
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            except PdfWriteError as e:
-                raise HTTPException(status_code=500, detail=f"Error writing merged PDF: {str(e)}")
-            except IOError as e:
-                raise HTTPException(status_code=500, detail=f"File system error writing output: {str(e)}")
+            loop = asyncio.get_running_loop()
+            total_pages, objects_deduplicated = await loop.run_in_executor(
+                None, self._merge_incremental, input_paths, output_path
+            )
             
             return {
                 "success": True,
                 "total_pages": total_pages,
-                "files_merged": len(input_paths)
+                "files_merged": len(input_paths),
+                "objects_deduplicated": objects_deduplicated
             }
             
         except HTTPException:
@@ -129,61 +207,176 @@ class PDFProcessor:
             logger.error(f"Unexpected error in merge_pdfs: {e}")
             raise HTTPException(status_code=500, detail="PDF merge failed due to unexpected error")
     
-    async def split_pdf(self, input_path: str, output_dir: str, pages: str) -> Dict[str, Any]:
-        """Split PDF by pages with specific error handling"""
+    def _merge_incremental(self, input_paths: List[str], output_path: str) -> Tuple[int, int]:
+        """Append each input to the output file, saving incrementally after each one"""
+        seen_objects: Dict[str, int] = {}
+        total_pages = 0
+        objects_deduplicated = 0
+        
+        for index, input_path in enumerate(input_paths):
+            try:
+                source = fitz.open(input_path)
+            except fitz.FileDataError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid PDF file {input_path}: {str(e)}")
+            except IOError as e:
+                raise HTTPException(status_code=500, detail=f"File system error reading {input_path}: {str(e)}")
+            
+            with source:
+                if source.needs_pass:
+                    raise HTTPException(status_code=400, detail=f"Encrypted PDF file {input_path} cannot be merged")
+                
+                try:
+                    # Reopening the partial output only loads its xref table;
+                    # objects written by earlier iterations stay on disk
+                    output = fitz.open() if index == 0 else fitz.open(output_path)
+                    with output:
+                        first_new_xref = output.xref_length()
+                        output.insert_pdf(source)
+                        objects_deduplicated += self._deduplicate_objects(output, first_new_xref, seen_objects)
+                        
+                        if index == 0:
+                            output.save(output_path)
+                        else:
+                            output.saveIncr()
+                except RuntimeError as e:
+                    raise HTTPException(status_code=400, detail=f"Corrupted PDF file {input_path}: {str(e)}")
+                except IOError as e:
+                    raise HTTPException(status_code=500, detail=f"File system error writing output: {str(e)}")
+                
+                total_pages += source.page_count
+        
+        return total_pages, objects_deduplicated
+    
+    def _deduplicate_objects(self, doc: "fitz.Document", first_xref: int, seen_objects: Dict[str, int]) -> int:
+        """Replace newly imported images and fonts with identical objects already in the output"""
+        font_programs = set()
+        candidates = {"stream": [], "descriptor": [], "font": []}
+        
+        for xref in range(first_xref, doc.xref_length()):
+            object_type = doc.xref_get_key(xref, "Type")[1]
+            if object_type == "/FontDescriptor":
+                candidates["descriptor"].append(xref)
+                for key in ("FontFile", "FontFile2", "FontFile3"):
+                    value_type, value = doc.xref_get_key(xref, key)
+                    if value_type == "xref":
+                        font_programs.add(int(value.split()[0]))
+            elif object_type == "/Font":
+                candidates["font"].append(xref)
+            elif doc.xref_is_image(xref):
+                candidates["stream"].append(xref)
+        candidates["stream"].extend(sorted(font_programs))
+        
+        # Streams first, so descriptors and fonts pointing at them compare
+        # equal once their references have been remapped
+        remap: Dict[int, int] = {}
+        for group in ("stream", "descriptor", "font"):
+            for xref in candidates[group]:
+                source = self._remap_references(doc.xref_object(xref, compressed=True), remap)
+                digest = hashlib.sha256(source.encode("latin-1", "replace"))
+                if group == "stream":
+                    digest.update(doc.xref_stream_raw(xref) or b"")
+                key = digest.hexdigest()
+                
+                if key in seen_objects:
+                    remap[xref] = seen_objects[key]
+                else:
+                    seen_objects[key] = xref
+        
+        if not remap:
+            return 0
+        
+        for xref in range(first_xref, doc.xref_length()):
+            if xref in remap:
+                continue
+            source = doc.xref_object(xref, compressed=True)
+            updated = self._remap_references(source, remap)
+            if updated != source:
+                doc.update_object(xref, updated)
+        
+        # The duplicates are left unreferenced; writing them as null drops
+        # their streams from the saved file
+        for xref in remap:
+            doc.update_object(xref, "null")
+        
+        return len(remap)
+    
+    @staticmethod
+    def _remap_references(source: str, remap: Dict[int, int]) -> str:
+        """Rewrite indirect references in a PDF object source using the given xref mapping"""
+        if not remap:
+            return source
+        return _REFERENCE_PATTERN.sub(
+            lambda match: f"{remap.get(int(match.group(1)), int(match.group(1)))} 0 R",
+            source
+        )
+    
+    async def split_pdf(
+        self,
+        input_path: str,
+        output_dir: Optional[str],
+        pages: str = "",
+        mode: str = "pages",
+        every: int = 1,
+        max_size_mb: float = 10.0,
+        archive_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Split PDF into parts with specific error handling
+
+        Modes:
+            pages: one file per listed page ("1,3-5")
+            ranges: one multi-page file per listed range ("1-3,4-10")
+            every: consecutive parts of `every` pages
+            bookmarks: one part per top-level outline entry
+            size: consecutive parts of at most `max_size_mb` (best effort)
+
+        The input is parsed once and every part is grafted from the same
+        document, so each part receives only the objects its pages use.
+        When `archive_path` is given, parts are written straight into a
+        single ZIP instead of separate files in `output_dir`.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # Parse pages parameter
-            try:
-                page_numbers = self._parse_page_numbers(pages)
-            except ValueError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid page specification: {str(e)}")
-            
-            # Read PDF
-            try:
-                with open(input_path, 'rb') as input_file:
-                    pdf_reader = PyPDF2.PdfReader(input_file)
-                    total_pages = len(pdf_reader.pages)
-            except PdfReadError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except PdfStreamError as e:
-                raise HTTPException(status_code=400, detail=f"Corrupted PDF file: {str(e)}")
+            if mode not in SPLIT_MODES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid split mode. Supported: {', '.join(SPLIT_MODES)}"
+                )
+            if mode == "every" and every < 1:
+                raise HTTPException(status_code=400, detail="Pages per part must be at least 1")
+            if mode == "size" and max_size_mb <= 0:
+                raise HTTPException(status_code=400, detail="Maximum part size must be positive")
             
-            # Validate page numbers
-            for page_num in page_numbers:
-                if page_num < 1 or page_num > total_pages:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Page {page_num} is out of range (1-{total_pages})"
-                    )
+            # Parse pages parameter
+            page_ranges: List[Tuple[int, int]] = []
+            if mode in ("pages", "ranges"):
+                try:
+                    if mode == "pages":
+                        page_ranges = [(page, page) for page in self._parse_page_numbers(pages)]
+                    else:
+                        page_ranges = self._parse_page_ranges(pages)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid page specification: {str(e)}")
             
             # Create output directory
-            os.makedirs(output_dir, exist_ok=True)
+            if archive_path is None:
+                os.makedirs(output_dir, exist_ok=True)
             
-            output_files = []
-            for i, page_num in enumerate(page_numbers):
-                try:
-                    pdf_writer = PyPDF2.PdfWriter()
-                    pdf_writer.add_page(pdf_reader.pages[page_num - 1])  # Convert to 0-based index
-                    
-                    output_file = os.path.join(output_dir, f"page_{page_num}.pdf")
-                    with open(output_file, 'wb') as f:
-                        pdf_writer.write(f)
-                    
-                    output_files.append(output_file)
-                    
-                except PdfWriteError as e:
-                    raise HTTPException(status_code=500, detail=f"Error writing page {page_num}: {str(e)}")
-                except IOError as e:
-                    raise HTTPException(status_code=500, detail=f"File system error writing page {page_num}: {str(e)}")
+            loop = asyncio.get_running_loop()
+            parts = await loop.run_in_executor(
+                None, self._split_single_pass,
+                input_path, output_dir, mode, page_ranges, every, int(max_size_mb * 1024 * 1024), archive_path
+            )
             
             return {
                 "success": True,
-                "pages_extracted": len(page_numbers),
-                "output_files": output_files
+                "mode": mode,
+                "pages_extracted": sum(part["page_count"] for part in parts),
+                "output_files": [archive_path] if archive_path else [part["path"] for part in parts],
+                "archive_path": archive_path,
+                "parts": parts
             }
             
         except HTTPException:
@@ -192,6 +385,184 @@ class PDFProcessor:
             logger.error(f"Unexpected error in split_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF split failed due to unexpected error")
     
+    def _split_single_pass(
+        self,
+        input_path: str,
+        output_dir: str,
+        mode: str,
+        page_ranges: List[Tuple[int, int]],
+        every: int,
+        max_size_bytes: int,
+        archive_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Open the input once and write every part of the split from it"""
+        try:
+            source = fitz.open(input_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with source:
+            if source.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files cannot be split")
+            
+            total_pages = source.page_count
+            
+            # Validate page numbers
+            for first_page, last_page in page_ranges:
+                for page_num in (first_page, last_page):
+                    if page_num < 1 or page_num > total_pages:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Page {page_num} is out of range (1-{total_pages})"
+                        )
+            
+            if mode == "every":
+                page_ranges = [
+                    (first_page, min(first_page + every - 1, total_pages))
+                    for first_page in range(1, total_pages + 1, every)
+                ]
+            elif mode == "bookmarks":
+                page_ranges = self._bookmark_ranges(source)
+            elif mode == "size":
+                page_ranges = self._size_ranges(source, max_size_bytes)
+            
+            archive = PartArchive(archive_path) if archive_path else None
+            parts = []
+            try:
+                for index, (first_page, last_page) in enumerate(page_ranges, start=1):
+                    if mode == "pages":
+                        filename = f"page_{first_page}.pdf"
+                    else:
+                        filename = f"part_{index:03d}_pages_{first_page}-{last_page}.pdf"
+                    part_info = {
+                        "first_page": first_page,
+                        "last_page": last_page,
+                        "page_count": last_page - first_page + 1
+                    }
+                    
+                    try:
+                        with fitz.open() as part:
+                            part.insert_pdf(source, from_page=first_page - 1, to_page=last_page - 1)
+                            if archive:
+                                entry = archive.add(filename, part.tobytes(garbage=3, deflate=True), **part_info)
+                            else:
+                                output_file = os.path.join(output_dir, filename)
+                                part.save(output_file, garbage=3, deflate=True)
+                                entry = {
+                                    "path": output_file,
+                                    "filename": filename,
+                                    "size": os.path.getsize(output_file),
+                                    **part_info
+                                }
+                    except RuntimeError as e:
+                        raise HTTPException(status_code=500, detail=f"Error writing pages {first_page}-{last_page}: {str(e)}")
+                    except IOError as e:
+                        raise HTTPException(status_code=500, detail=f"File system error writing pages {first_page}-{last_page}: {str(e)}")
+                    
+                    parts.append(entry)
+            except BaseException:
+                # Don't leave a partial ZIP behind in the downloads directory
+                if archive:
+                    archive.discard()
+                raise
+            
+            if archive:
+                archive.close()
+            return parts
+    
+    def _bookmark_ranges(self, doc: "fitz.Document") -> List[Tuple[int, int]]:
+        """Page ranges starting at each top-level outline entry"""
+        starts = sorted({
+            page for level, _title, page in doc.get_toc(simple=True)
+            if level == 1 and 1 <= page <= doc.page_count
+        })
+        if not starts:
+            raise HTTPException(status_code=400, detail="PDF has no bookmarks to split at")
+        
+        # Pages before the first bookmark form their own part
+        if starts[0] != 1:
+            starts.insert(0, 1)
+        
+        ends = [start - 1 for start in starts[1:]] + [doc.page_count]
+        return list(zip(starts, ends))
+    
+    def _size_ranges(self, doc: "fitz.Document", max_size_bytes: int) -> List[Tuple[int, int]]:
+        """Page ranges whose estimated output size stays under the limit
+
+        A page's cost is the raw size of its content streams, images and
+        font programs that are not already part of the current range, so
+        resources shared by consecutive pages are only counted once.
+        """
+        stream_sizes: Dict[int, int] = {}
+        
+        def stream_size(xref: int) -> int:
+            if xref not in stream_sizes:
+                stream_sizes[xref] = len(doc.xref_stream_raw(xref) or b"") if doc.xref_is_stream(xref) else 0
+            return stream_sizes[xref]
+        
+        ranges = []
+        first_page = 1
+        current_size = 0
+        current_xrefs = set()
+        
+        for page in doc:
+            xrefs = set(page.get_contents())
+            xrefs.update(image[0] for image in page.get_images(full=True))
+            for font in page.get_fonts(full=True):
+                if font[0]:
+                    xrefs.update(self._font_program_xrefs(doc, font[0]))
+            
+            page_cost = PAGE_OVERHEAD_BYTES + sum(stream_size(xref) for xref in xrefs - current_xrefs)
+            page_num = page.number + 1
+            
+            if page_num > first_page and current_size + page_cost > max_size_bytes:
+                ranges.append((first_page, page_num - 1))
+                first_page = page_num
+                current_size = 0
+                current_xrefs = set()
+                page_cost = PAGE_OVERHEAD_BYTES + sum(stream_size(xref) for xref in xrefs)
+            
+            current_size += page_cost
+            current_xrefs.update(xrefs)
+        
+        ranges.append((first_page, doc.page_count))
+        return ranges
+    
+    def _font_program_xrefs(self, doc: "fitz.Document", font_xref: int) -> List[int]:
+        """Xrefs of the embedded font program streams used by a font"""
+        font_xrefs = [font_xref]
+        value_type, value = doc.xref_get_key(font_xref, "DescendantFonts")
+        if value_type == "array":
+            font_xrefs.extend(int(match.group(1)) for match in _REFERENCE_PATTERN.finditer(value))
+        
+        program_xrefs = []
+        for xref in font_xrefs:
+            for key in ("FontFile", "FontFile2", "FontFile3"):
+                value_type, value = doc.xref_get_key(xref, f"FontDescriptor/{key}")
+                if value_type == "xref":
+                    program_xrefs.append(int(value.split()[0]))
+        return program_xrefs
+    
+    def _parse_page_ranges(self, pages: str) -> List[Tuple[int, int]]:
+        """Parse page specification string into a list of (first, last) page ranges"""
+        page_ranges = []
+        
+        for part in pages.split(','):
+            part = part.strip()
+            try:
+                if '-' in part:
+                    first_page, last_page = map(int, part.split('-'))
+                else:
+                    first_page = last_page = int(part)
+            except ValueError:
+                raise ValueError(f"Invalid range format: {part}")
+            
+            if first_page > last_page:
+                raise ValueError(f"Range start is after range end: {part}")
+            page_ranges.append((first_page, last_page))
+        
+        return page_ranges
+    
     def _parse_page_numbers(self, pages: str) -> List[int]:
         """Parse page specification string into list of page numbers"""
         page_numbers = []
@@ -202,9 +573,11 @@ class PDFProcessor:
                 # Range specification (e.g., "1-5")
                 try:
                     start, end = map(int, part.split('-'))
-                    page_numbers.extend(range(start, end + 1))
                 except ValueError:
                     raise ValueError(f"Invalid range format: {part}")
+                if start > end:
+                    raise ValueError(f"Invalid page range {part}: range start is after range end")
+                page_numbers.extend(range(start, end + 1))
             else:
                 # Single page number
                 try:
@@ -214,8 +587,207 @@ class PDFProcessor:
         
         return sorted(list(set(page_numbers)))  # Remove duplicates and sort
     
+    async def pdf_to_images(
+        self,
+        input_path: str,
+        archive_path: str,
+        image_format: str = "jpeg",
+        dpi: int = 150,
+        pages: str = "",
+        grayscale: bool = False,
+        quality: int = 85
+    ) -> Dict[str, Any]:
+        """Export pages as images into a ZIP with specific error handling
+        
+        Pages are rendered and encoded in small chunks across the worker pool.
+        Each chunk's images are written into the archive as soon as it
+        finishes, and only a few chunks are in flight at a time, so memory use
+        does not grow with the page count. `pages` selects pages ("1,3-5");
+        empty means all pages.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if image_format not in IMAGE_EXPORT_FORMATS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid image format. Supported: {', '.join(IMAGE_EXPORT_FORMATS)}"
+                )
+            if not IMAGE_EXPORT_MIN_DPI <= dpi <= IMAGE_EXPORT_MAX_DPI:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"DPI must be between {IMAGE_EXPORT_MIN_DPI} and {IMAGE_EXPORT_MAX_DPI}"
+                )
+            if not 1 <= quality <= 100:
+                raise HTTPException(status_code=400, detail="Quality must be between 1 and 100")
+            
+            loop = asyncio.get_running_loop()
+            page_numbers = await loop.run_in_executor(None, self._plan_image_export, input_path, pages, dpi)
+            
+            chunks = [
+                page_numbers[start:start + IMAGE_EXPORT_CHUNK_PAGES]
+                for start in range(0, len(page_numbers), IMAGE_EXPORT_CHUNK_PAGES)
+            ]
+            digits = len(str(page_numbers[-1] + 1))
+            extension = IMAGE_EXPORT_FORMATS[image_format]
+            
+            images = []
+            archive = PartArchive(archive_path)
+            try:
+                async for _, chunk_images in worker_pool.as_completed(
+                    rasterize_pages,
+                    [(input_path, chunk, dpi, image_format, grayscale, quality) for chunk in chunks]
+                ):
+                    for image in chunk_images:
+                        entry = await loop.run_in_executor(
+                            None, functools.partial(
+                                archive.add, f"page_{image['page']:0{digits}d}.{extension}", image["data"],
+                                page=image["page"], width=image["width"], height=image["height"]
+                            )
+                        )
+                        images.append(entry)
+            except BaseException:
+                await loop.run_in_executor(None, archive.discard)
+                raise
+            await loop.run_in_executor(None, archive.close)
+            
+            images.sort(key=lambda entry: entry["page"])
+            return {
+                "success": True,
+                "format": image_format,
+                "dpi": dpi,
+                "grayscale": grayscale,
+                "pages_converted": len(images),
+                "total_size": sum(entry["size"] for entry in images),
+                "archive_path": archive_path,
+                "images": images
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in pdf_to_images: {e}")
+            raise HTTPException(status_code=500, detail="PDF to image conversion failed due to unexpected error")
+    
+    def _plan_image_export(self, input_path: str, pages: str, dpi: int) -> List[int]:
+        """Zero-based pages to export, rejecting out-of-range pages and oversized renders"""
+        try:
+            doc = fitz.open(input_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with doc:
+            if doc.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+            
+            if pages.strip():
+                try:
+                    page_numbers = self._parse_page_numbers(pages)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid page specification: {str(e)}")
+                for page_num in page_numbers:
+                    if page_num < 1 or page_num > doc.page_count:
+                        raise HTTPException(status_code=400, detail=f"Page {page_num} is out of range (1-{doc.page_count})")
+                page_numbers = [page_num - 1 for page_num in page_numbers]
+            else:
+                page_numbers = list(range(doc.page_count))
+            if not page_numbers:
+                raise HTTPException(status_code=400, detail="The document has no pages")
+            
+            scale = dpi / 72
+            for page_number in page_numbers:
+                rect = doc[page_number].rect
+                if rect.width * rect.height * scale * scale > MAX_RENDER_PIXELS:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Page {page_number + 1} is too large to render at {dpi} DPI"
+                    )
+        return page_numbers
+    
+    async def images_to_pdf(
+        self,
+        input_paths: List[str],
+        output_path: str,
+        page_size: str = "auto",
+        margin: float = 0
+    ) -> Dict[str, Any]:
+        """Build a PDF with one page per image with specific error handling
+        
+        JPEGs are never decoded: their bytes are copied into the PDF as
+        DCTDecode streams, with the EXIF orientation applied by the page's
+        placement matrix. Only PNG, TIFF and HEIC images are decoded, on the
+        worker pool. The PDF is written image by image, so memory use stays
+        flat for thousands of photos. With page_size "auto" each page has
+        the image's physical size from its DPI; "a4" and "letter" fit the
+        image inside that page.
+        """
+        try:
+            # Validate input files
+            if not input_paths:
+                raise HTTPException(status_code=400, detail="At least one image is required")
+            for path in input_paths:
+                if not os.path.exists(path):
+                    raise HTTPException(status_code=404, detail="Input image file not found")
+            
+            if page_size not in PAGE_SIZES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid page size. Supported: {', '.join(PAGE_SIZES)}"
+                )
+            if not 0 <= margin <= IMAGE_PDF_MAX_MARGIN:
+                raise HTTPException(status_code=400, detail=f"Margin must be between 0 and {IMAGE_PDF_MAX_MARGIN} points")
+            
+            loop = asyncio.get_running_loop()
+            images = await loop.run_in_executor(None, self._probe_images, input_paths)
+            
+            converted = [index for index, info in enumerate(images) if not info["passthrough"]]
+            scratch_dir = tempfile.mkdtemp(prefix="images_to_pdf_")
+            try:
+                async for position, fields in worker_pool.as_completed(
+                    convert_image,
+                    [(images[index]["path"], os.path.join(scratch_dir, f"{index}.bin")) for index in converted]
+                ):
+                    images[converted[position]].update(fields)
+                
+                pages, output_size = await loop.run_in_executor(
+                    None, write_image_pdf, images, output_path, page_size, margin
+                )
+            finally:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+            
+            return {
+                "success": True,
+                "page_count": len(pages),
+                "images_embedded": len(images) - len(converted),
+                "images_converted": len(converted),
+                "page_size": page_size,
+                "output_size": output_size
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in images_to_pdf: {e}")
+            raise HTTPException(status_code=500, detail="Image to PDF conversion failed due to unexpected error")
+    
+    def _probe_images(self, input_paths: List[str]) -> List[Dict[str, Any]]:
+        """Header information of every image, rejecting unsupported files by position"""
+        images = []
+        for number, path in enumerate(input_paths, 1):
+            try:
+                images.append(probe_image(path))
+            except UnsupportedImage as e:
+                raise HTTPException(status_code=400, detail=f"Image {number}: {str(e)}")
+        return images
+    
     async def rotate_pdf(self, input_path: str, output_path: str, angle: int) -> Dict[str, Any]:
-        """Rotate PDF pages with specific error handling"""
+        """Rotate PDF pages with specific error handling
+
+        Only the page /Rotate entries change, so the result is written as an
+        incremental update appended to a copy of the original bytes.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
@@ -225,29 +797,21 @@ class PDFProcessor:
             if angle not in [90, 180, 270]:
                 raise HTTPException(status_code=400, detail="Angle must be 90, 180, or 270 degrees")
             
-            try:
-                with open(input_path, 'rb') as input_file:
-                    pdf_reader = PyPDF2.PdfReader(input_file)
-                    pdf_writer = PyPDF2.PdfWriter()
-                    
-                    for page in pdf_reader.pages:
-                        page.rotate(angle)
-                        pdf_writer.add_page(page)
-                    
-                    with open(output_path, 'wb') as output_file:
-                        pdf_writer.write(output_file)
-                        
-            except PdfReadError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except PdfWriteError as e:
-                raise HTTPException(status_code=500, detail=f"Error writing rotated PDF: {str(e)}")
-            except IOError as e:
-                raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
+            def rotate_pages(doc: "fitz.Document") -> int:
+                for page in doc:
+                    page.set_rotation((page.rotation + angle) % 360)
+                return doc.page_count
+            
+            loop = asyncio.get_running_loop()
+            pages_rotated, save_info = await loop.run_in_executor(
+                None, self._incremental_update, input_path, output_path, rotate_pages
+            )
             
             return {
                 "success": True,
                 "rotation_angle": angle,
-                "pages_rotated": len(pdf_reader.pages)
+                "pages_rotated": pages_rotated,
+                **save_info
             }
             
         except HTTPException:
@@ -256,53 +820,199 @@ class PDFProcessor:
             logger.error(f"Unexpected error in rotate_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF rotation failed due to unexpected error")
     
-    async def add_watermark(self, input_path: str, output_path: str, watermark_text: str) -> Dict[str, Any]:
-        """Add watermark to PDF with specific error handling"""
+    async def auto_orient_pdf(
+        self,
+        input_path: str,
+        output_path: str,
+        min_confidence: float = ORIENT_MIN_CONFIDENCE
+    ) -> Dict[str, Any]:
+        """Turn sideways and upside-down pages upright with specific error handling
+
+        Each page is rendered at low resolution and its text orientation is
+        detected in parallel on the worker pool. Only the /Rotate entries of
+        the pages that need turning change, saved as an incremental update.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # Validate watermark text
-            if not watermark_text or len(watermark_text.strip()) == 0:
-                raise HTTPException(status_code=400, detail="Watermark text is required")
+            loop = asyncio.get_running_loop()
+            page_plan = await loop.run_in_executor(None, self._plan_ocr, input_path)
             
             try:
-                with open(input_path, 'rb') as input_file:
-                    pdf_reader = PyPDF2.PdfReader(input_file)
-                    pdf_writer = PyPDF2.PdfWriter()
-                    
-                    # Create watermark PDF
-                    watermark_path = self._create_watermark_pdf(watermark_text)
-                    
-                    try:
-                        with open(watermark_path, 'rb') as watermark_file:
-                            watermark_reader = PyPDF2.PdfReader(watermark_file)
-                            watermark_page = watermark_reader.pages[0]
-                            
-                            for page in pdf_reader.pages:
-                                page.merge_page(watermark_page)
-                                pdf_writer.add_page(page)
-                            
-                            with open(output_path, 'wb') as output_file:
-                                pdf_writer.write(output_file)
-                                
-                    finally:
-                        # Clean up watermark file
-                        if os.path.exists(watermark_path):
-                            os.unlink(watermark_path)
-                            
-            except PdfReadError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except PdfWriteError as e:
-                raise HTTPException(status_code=500, detail=f"Error writing watermarked PDF: {str(e)}")
+                detected = await worker_pool.map(
+                    detect_orientation,
+                    [(input_path, page["page"]) for page in page_plan if page["status"] != "empty"]
+                )
+            except OCREngineUnavailable as e:
+                logger.error(f"OCR engine unavailable: {e}")
+                raise HTTPException(status_code=503, detail="Orientation detection is not available on this server")
+            
+            corrections = {
+                result["page"]: result["rotation"]
+                for result in detected
+                if result["rotation"] and result["confidence"] >= min_confidence
+            }
+            
+            def orient_pages(doc: "fitz.Document") -> None:
+                for page_number, rotation in corrections.items():
+                    page = doc[page_number]
+                    page.set_rotation((page.rotation + rotation) % 360)
+            
+            _, save_info = await loop.run_in_executor(
+                None, self._incremental_update, input_path, output_path, orient_pages
+            )
+            
+            results_by_page = {result["page"]: result for result in detected}
+            pages = []
+            for page in page_plan:
+                result = results_by_page.get(page["page"])
+                if result is None:
+                    decision = "empty"
+                elif result["rotation"] is None:
+                    decision = "undetected"
+                elif page["page"] in corrections:
+                    decision = "rotated"
+                elif result["rotation"]:
+                    decision = "uncertain"
+                else:
+                    decision = "upright"
+                pages.append({
+                    "page": page["page"] + 1,
+                    "decision": decision,
+                    "rotation": corrections.get(page["page"], 0),
+                    "detected_rotation": result["rotation"] if result else None,
+                    "confidence": result["confidence"] if result else None
+                })
+            
+            return {
+                "success": True,
+                "pages_rotated": len(corrections),
+                "pages_checked": len(detected),
+                "min_confidence": min_confidence,
+                "pages": pages,
+                **save_info
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in auto_orient_pdf: {e}")
+            raise HTTPException(status_code=500, detail="PDF auto-orientation failed due to unexpected error")
+    
+    def _incremental_update(
+        self,
+        input_path: str,
+        output_path: str,
+        edit: Callable[["fitz.Document"], Any]
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Apply a small edit and append only the changed objects to a copy of the input
+
+        The original bytes are copied with the kernel's file-copy fast path,
+        then `edit` runs against the copy and the changed objects plus a new
+        xref section are appended with an incremental save. Files MuPDF had
+        to repair on open cannot be updated incrementally and are rewritten
+        in full instead. The copy is deleted if the edit fails.
+        """
+        try:
+            shutil.copyfile(input_path, output_path)
+        except IOError as e:
+            raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
+        
+        try:
+            return self._apply_incremental_edit(output_path, edit)
+        except BaseException:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+    
+    def _apply_incremental_edit(self, output_path: str, edit: Callable[["fitz.Document"], Any]) -> Tuple[Any, Dict[str, Any]]:
+        """Run `edit` on the copy at output_path and save it incrementally when possible"""
+        original_size = os.path.getsize(output_path)
+        
+        try:
+            doc = fitz.open(output_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with doc:
+            if doc.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+            
+            result = edit(doc)
+            
+            try:
+                if doc.can_save_incrementally():
+                    doc.saveIncr()
+                    save_mode = "incremental"
+                else:
+                    rewritten_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+                    doc.save(rewritten_path, garbage=1)
+                    save_mode = "full"
+            except RuntimeError as e:
+                raise HTTPException(status_code=500, detail=f"Error writing updated PDF: {str(e)}")
             except IOError as e:
                 raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
+        
+        if save_mode == "full":
+            os.replace(rewritten_path, output_path)
+            bytes_written = os.path.getsize(output_path)
+        else:
+            bytes_written = os.path.getsize(output_path) - original_size
+        
+        return result, {"save_mode": save_mode, "bytes_written": bytes_written}
+    
+    async def add_watermark(
+        self,
+        input_path: str,
+        output_path: str,
+        watermark_text: str,
+        font: str = "helv",
+        font_size: float = 50,
+        opacity: float = 0.3,
+        angle: float = 45
+    ) -> Dict[str, Any]:
+        """Add watermark to PDF with specific error handling
+
+        The watermark is imported once per distinct page size as a form
+        XObject. Each page only gets a resource entry pointing at it plus a
+        shared content stream that draws it, so existing page content is
+        never parsed or rewritten.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            # Validate watermark text
+            if not watermark_text or len(watermark_text.strip()) == 0:
+                raise HTTPException(status_code=400, detail="Watermark text is required")
+            
+            # Validate watermark style
+            if font not in WATERMARK_FONTS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported watermark font. Supported: {', '.join(WATERMARK_FONTS)}"
+                )
+            if not 0 < opacity <= 1:
+                raise HTTPException(status_code=400, detail="Opacity must be between 0 and 1")
+            if font_size <= 0:
+                raise HTTPException(status_code=400, detail="Font size must be positive")
+            
+            def stamp_pages(doc: "fitz.Document") -> int:
+                return self._apply_watermark(doc, watermark_text, font, font_size, opacity, angle)
+            
+            loop = asyncio.get_running_loop()
+            pages_watermarked, save_info = await loop.run_in_executor(
+                None, self._incremental_update, input_path, output_path, stamp_pages
+            )
             
             return {
                 "success": True,
                 "watermark_text": watermark_text,
-                "pages_watermarked": len(pdf_reader.pages)
+                "pages_watermarked": pages_watermarked,
+                **save_info
             }
             
         except HTTPException:
@@ -311,28 +1021,175 @@ class PDFProcessor:
             logger.error(f"Unexpected error in add_watermark: {e}")
             raise HTTPException(status_code=500, detail="PDF watermarking failed due to unexpected error")
     
-    def _create_watermark_pdf(self, text: str) -> str:
-        """Create a watermark PDF with the given text"""
-        watermark_path = os.path.join(self.temp_dir, f"watermark_{uuid.uuid4()}.pdf")
+    def _apply_watermark(
+        self,
+        doc: "fitz.Document",
+        text: str,
+        font: str,
+        font_size: float,
+        opacity: float,
+        angle: float
+    ) -> int:
+        """Draw a shared watermark form XObject on every page of the document"""
+        # Collect page geometry first; importing the forms adds and removes
+        # a temporary page, which would disturb iteration over the document
+        placements = []
+        used_names = set()
+        for page in doc:
+            page_size = (round(page.rect.width, 2), round(page.rect.height, 2))
+            # Form space is the page as viewed, with the y axis pointing up
+            matrix = fitz.Matrix(1, 0, 0, -1, 0, page.rect.height) * ~(page.transformation_matrix * page.rotation_matrix)
+            placements.append((page.xref, page_size, matrix))
+            used_names.update(xobject[1] for xobject in page.get_xobjects())
+            used_names.update(image[7] for image in page.get_images())
         
-        try:
-            c = canvas.Canvas(watermark_path, pagesize=A4)
-            width, height = A4
-            
-            # Set font and color
-            c.setFont("Helvetica", 50)
-            c.setFillColorRGB(0.7, 0.7, 0.7, alpha=0.3)
-            
-            # Rotate text and position
-            c.rotate(45)
-            c.drawString(200, -100, text)
+        forms: Dict[Tuple[float, float], Tuple[int, str]] = {}
+        for _page_xref, page_size, _matrix in placements:
+            if page_size not in forms:
+                watermark_pdf = self._get_watermark_pdf(text, font, font_size, opacity, angle, *page_size)
+                form_xref = self._import_form_xobject(doc, watermark_pdf, *page_size)
+                name = f"{WATERMARK_XOBJECT_PREFIX}{form_xref}"
+                suffix = 1
+                while name in used_names:
+                    name = f"{WATERMARK_XOBJECT_PREFIX}{form_xref}_{suffix}"
+                    suffix += 1
+                used_names.add(name)
+                forms[page_size] = (form_xref, name)
+        
+        # Pages with the same size and orientation share one drawing stream;
+        # the leading "q" stream keeps existing content from leaking its
+        # graphics state into the watermark
+        save_state_xref = self._new_stream_object(doc, b"q\n")
+        draw_streams: Dict[Tuple[int, Tuple[float, ...]], int] = {}
+        stamped_resources = set()
+        
+        for page_xref, page_size, matrix in placements:
+            form_xref, name = forms[page_size]
+            key = (form_xref, tuple(round(value, 4) for value in matrix))
+            if key not in draw_streams:
+                operators = f"\nQ q {' '.join(f'{value:g}' for value in key[1])} cm /{name} Do Q\n"
+                draw_streams[key] = self._new_stream_object(doc, operators.encode("ascii"))
             
-            c.save()
-            return watermark_path
+            self._add_page_xobject(doc, page_xref, name, form_xref, stamped_resources)
             
-        except Exception as e:
-            logger.error(f"Error creating watermark PDF: {e}")
-            raise HTTPException(status_code=500, detail="Failed to create watermark")
+            value_type, value = doc.xref_get_key(page_xref, "Contents")
+            content_refs = [int(xref) for xref in _REFERENCE_PATTERN.findall(value)] if value_type in ("xref", "array") else []
+            contents = [save_state_xref] + content_refs + [draw_streams[key]]
+            doc.xref_set_key(page_xref, "Contents", "[" + " ".join(f"{xref} 0 R" for xref in contents) + "]")
+        
+        return len(placements)
+    
+    def _get_watermark_pdf(
+        self,
+        text: str,
+        font: str,
+        font_size: float,
+        opacity: float,
+        angle: float,
+        width: float,
+        height: float
+    ) -> bytes:
+        """One-page PDF holding the watermark for a page size, cached in memory"""
+        key = (text, font, font_size, opacity, angle, width, height)
+        with self._watermark_lock:
+            cached = self._watermark_cache.get(key)
+            if cached is not None:
+                self._watermark_cache.move_to_end(key)
+                return cached
+        
+        text_length = fitz.get_text_length(text, fontname=font, fontsize=font_size)
+        
+        # Shrink the text if it would run off the page at this angle
+        radians = math.radians(angle)
+        limits = [
+            extent / abs(component)
+            for extent, component in ((width, math.cos(radians)), (height, math.sin(radians)))
+            if abs(component) > 1e-6
+        ]
+        available_length = 0.9 * min(limits)
+        if text_length > available_length:
+            font_size *= available_length / text_length
+            text_length = available_length
+        
+        with fitz.open() as watermark:
+            page = watermark.new_page(width=width, height=height)
+            center = fitz.Point(width / 2, height / 2)
+            page.insert_text(
+                fitz.Point(center.x - text_length / 2, center.y + font_size * 0.35),
+                text,
+                fontname=font,
+                fontsize=font_size,
+                color=(0.7, 0.7, 0.7),
+                fill_opacity=opacity,
+                morph=(center, fitz.Matrix(angle))
+            )
+            data = watermark.tobytes(garbage=1, deflate=True)
+        
+        with self._watermark_lock:
+            self._watermark_cache[key] = data
+            while len(self._watermark_cache) > WATERMARK_CACHE_SIZE:
+                self._watermark_cache.popitem(last=False)
+        
+        return data
+    
+    def _import_form_xobject(self, doc: "fitz.Document", page_pdf: bytes, width: float, height: float) -> int:
+        """Copy the first page of a one-page PDF into the document as a form XObject"""
+        with fitz.open("pdf", page_pdf) as source:
+            # Grafting via a temporary page copies the page's resources too
+            doc.insert_pdf(source, from_page=0, to_page=0)
+            temporary_page = doc[doc.page_count - 1]
+            resources = doc.xref_get_key(temporary_page.xref, "Resources")[1]
+            content = temporary_page.read_contents()
+            doc.delete_page(doc.page_count - 1)
+        
+        form_xref = doc.get_new_xref()
+        doc.update_object(
+            form_xref,
+            f"<</Type/XObject/Subtype/Form/BBox[0 0 {width:g} {height:g}]/Resources {resources}>>"
+        )
+        doc.update_stream(form_xref, content)
+        return form_xref
+    
+    def _new_stream_object(self, doc: "fitz.Document", data: bytes) -> int:
+        """Create a new stream object and return its xref"""
+        xref = doc.get_new_xref()
+        doc.update_object(xref, "<<>>")
+        doc.update_stream(xref, data)
+        return xref
+    
+    def _add_page_xobject(self, doc: "fitz.Document", page_xref: int, name: str, xobject_xref: int, done: set):
+        """Register an XObject under a name in a page's resources without touching its content"""
+        reference = f"{xobject_xref} 0 R"
+        value_type, value = doc.xref_get_key(page_xref, "Resources")
+        
+        if value_type == "null":
+            # Inherited resources are copied onto the page before adding to them
+            parent_type, parent = doc.xref_get_key(page_xref, "Parent")
+            while parent_type == "xref" and value_type == "null":
+                parent_xref = int(parent.split()[0])
+                value_type, value = doc.xref_get_key(parent_xref, "Resources")
+                parent_type, parent = doc.xref_get_key(parent_xref, "Parent")
+            doc.xref_set_key(page_xref, "Resources", value if value_type != "null" else "<<>>")
+            value_type = "xref" if value_type == "xref" else "dict"
+        
+        if value_type == "xref":
+            owner_xref, path = int(value.split()[0]), "XObject"
+        else:
+            owner_xref, path = page_xref, "Resources/XObject"
+        
+        if (owner_xref, xobject_xref) in done:
+            return
+        
+        # Setting a key through an indirect object is not allowed, so write
+        # into the XObject dictionary itself when it is a separate object
+        xobjects_type, xobjects = doc.xref_get_key(owner_xref, path)
+        if xobjects_type == "xref":
+            doc.xref_set_key(int(xobjects.split()[0]), name, reference)
+        else:
+            doc.xref_set_key(owner_xref, f"{path}/{name}", reference)
+        
+        if value_type == "xref":
+            done.add((owner_xref, xobject_xref))
     
     async def protect_pdf(self, input_path: str, output_path: str, password: str) -> Dict[str, Any]:
         """Password protect PDF with specific error handling"""
@@ -362,7 +1219,7 @@ class PDFProcessor:
                         
             except PdfReadError as e:
                 raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except PdfWriteError as e:
+            except PyPdfError as e:
                 raise HTTPException(status_code=500, detail=f"Error writing protected PDF: {str(e)}")
             except IOError as e:
                 raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
@@ -413,7 +1270,7 @@ class PDFProcessor:
                         
             except PdfReadError as e:
                 raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except PdfWriteError as e:
+            except PyPdfError as e:
                 raise HTTPException(status_code=500, detail=f"Error writing unlocked PDF: {str(e)}")
             except IOError as e:
                 raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
@@ -430,40 +1287,47 @@ class PDFProcessor:
             raise HTTPException(status_code=500, detail="PDF unlock failed due to unexpected error")
     
     async def compare_pdfs(self, file1_path: str, file2_path: str) -> Dict[str, Any]:
-        """Compare two PDF files with specific error handling"""
+        """Compare two PDF files page by page with specific error handling
+        
+        Pages of both documents are fingerprinted in parallel and runs of
+        identical pages matched without extracting any text. The remaining
+        pages are aligned by text similarity, so inserted and deleted pages
+        do not shift the rest of the comparison, and paired pages get a
+        word-level diff.
+        """
         try:
-            # Validate input files
-            if not os.path.exists(file1_path):
-                raise HTTPException(status_code=404, detail="First PDF file not found")
-            if not os.path.exists(file2_path):
-                raise HTTPException(status_code=404, detail="Second PDF file not found")
+            pages1, pages2, fingerprints1, fingerprints2, alignment = await self._align_documents(file1_path, file2_path)
             
-            try:
-                with open(file1_path, 'rb') as file1:
-                    pdf1_reader = PyPDF2.PdfReader(file1)
-                    pages1 = len(pdf1_reader.pages)
-                
-                with open(file2_path, 'rb') as file2:
-                    pdf2_reader = PyPDF2.PdfReader(file2)
-                    pages2 = len(pdf2_reader.pages)
-                    
-            except PdfReadError as e:
-                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            except IOError as e:
-                raise HTTPException(status_code=500, detail=f"File system error: {str(e)}")
+            changed = [
+                (index1, index2) for index1, index2 in alignment
+                if index1 is not None and index2 is not None
+                and fingerprints1[index1]["fingerprint"] != fingerprints2[index2]["fingerprint"]
+            ]
+            pair_chunks = [changed[start:start + COMPARE_DIFF_CHUNK_PAGES] for start in range(0, len(changed), COMPARE_DIFF_CHUNK_PAGES)]
+            diffs = await worker_pool.map(
+                diff_words,
+                [
+                    ([(fingerprints1[index1]["words"], fingerprints2[index2]["words"]) for index1, index2 in pairs],)
+                    for pairs in pair_chunks
+                ]
+            )
+            diffs_by_pair = {
+                pair: diff
+                for pairs, chunk_diffs in zip(pair_chunks, diffs)
+                for pair, diff in zip(pairs, chunk_diffs)
+            }
             
-            # Simple comparison (can be enhanced)
-            differences_found = pages1 != pages2
-            similarity_score = 100 if pages1 == pages2 else 0
+            summary = summarize_comparison(fingerprints1, fingerprints2, alignment, diffs_by_pair)
+            differences_found = bool(summary["differences"])
             
             return {
                 "success": True,
+                "mode": "text",
                 "comparison_result": "different" if differences_found else "identical",
                 "differences_found": differences_found,
-                "similarity_score": similarity_score,
                 "file1_pages": pages1,
                 "file2_pages": pages2,
-                "differences": ["Page count differs"] if differences_found else []
+                **summary
             }
             
         except HTTPException:
@@ -472,16 +1336,198 @@ class PDFProcessor:
             logger.error(f"Unexpected error in compare_pdfs: {e}")
             raise HTTPException(status_code=500, detail="PDF comparison failed due to unexpected error")
     
+    async def compare_pdfs_visual(
+        self,
+        file1_path: str,
+        file2_path: str,
+        output_path: str,
+        dpi: int = COMPARE_DEFAULT_DPI
+    ) -> Dict[str, Any]:
+        """Compare the rendered pages of two PDF files with specific error handling
+        
+        Pages are aligned as in compare_pdfs. Aligned pages whose fingerprints
+        differ are rendered in worker processes and differenced pixel by
+        pixel, which also catches changes in scans and drawings. The output is
+        the second document with the changed regions highlighted.
+        """
+        try:
+            pages1, pages2, fingerprints1, fingerprints2, alignment = await self._align_documents(file1_path, file2_path)
+            
+            # Pages with matching fingerprints are not rendered at all
+            changed = [
+                (index1, index2) for index1, index2 in alignment
+                if index1 is not None and index2 is not None
+                and fingerprints1[index1]["fingerprint"] != fingerprints2[index2]["fingerprint"]
+            ]
+            pair_chunks = [changed[start:start + COMPARE_RENDER_CHUNK_PAGES] for start in range(0, len(changed), COMPARE_RENDER_CHUNK_PAGES)]
+            diffs = await worker_pool.map(diff_page_images, [(file1_path, file2_path, pairs, dpi) for pairs in pair_chunks])
+            diffs_by_pair = {
+                pair: diff
+                for pairs, chunk_diffs in zip(pair_chunks, diffs)
+                for pair, diff in zip(pairs, chunk_diffs)
+            }
+            
+            summary = summarize_visual_comparison(fingerprints1, fingerprints2, alignment, diffs_by_pair)
+            differences_found = bool(summary["differences"])
+            
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, build_overlay, file1_path, file2_path, output_path, summary["pages"])
+            
+            return {
+                "success": True,
+                "mode": "visual",
+                "comparison_result": "different" if differences_found else "identical",
+                "differences_found": differences_found,
+                "file1_pages": pages1,
+                "file2_pages": pages2,
+                "dpi": dpi,
+                "pages_rendered": len(changed),
+                **summary
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in compare_pdfs_visual: {e}")
+            raise HTTPException(status_code=500, detail="Visual PDF comparison failed due to unexpected error")
+    
+    async def _align_documents(
+        self,
+        file1_path: str,
+        file2_path: str
+    ) -> Tuple[int, int, List[Dict[str, Any]], List[Dict[str, Any]], List[Tuple[Optional[int], Optional[int]]]]:
+        """Fingerprint both documents on the worker pool and align their pages
+        
+        Returns both page counts, both fingerprint lists and the alignment.
+        Only pages outside runs of identical pages have their text extracted;
+        their fingerprint entries get the words, text hash and signature.
+        """
+        # Validate input files
+        if not os.path.exists(file1_path):
+            raise HTTPException(status_code=404, detail="First PDF file not found")
+        if not os.path.exists(file2_path):
+            raise HTTPException(status_code=404, detail="Second PDF file not found")
+        
+        page_counts = []
+        for path in (file1_path, file2_path):
+            try:
+                with fitz.open(path) as doc:
+                    if doc.needs_pass:
+                        raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+                    page_counts.append(doc.page_count)
+            except fitz.FileDataError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        pages1, pages2 = page_counts
+        
+        chunk_size = max(COMPARE_MIN_CHUNK_PAGES, math.ceil((pages1 + pages2) / (worker_pool.max_workers * 4)))
+        chunks = [
+            (path, start, min(start + chunk_size, page_count) - 1)
+            for path, page_count in ((file1_path, pages1), (file2_path, pages2))
+            for start in range(0, page_count, chunk_size)
+        ]
+        fingerprints = await worker_pool.map(fingerprint_pages, chunks)
+        chunks1 = math.ceil(pages1 / chunk_size)
+        fingerprints1 = [page for chunk in fingerprints[:chunks1] for page in chunk]
+        fingerprints2 = [page for chunk in fingerprints[chunks1:] for page in chunk]
+        
+        opcodes = match_identical_pages(fingerprints1, fingerprints2)
+        changed1 = [index for tag, first, last, _, _ in opcodes if tag != "equal" for index in range(first, last)]
+        changed2 = [index for tag, _, _, first, last in opcodes if tag != "equal" for index in range(first, last)]
+        text_chunks = [
+            (path, pages, indexes[start:start + chunk_size])
+            for path, pages, indexes in ((file1_path, fingerprints1, changed1), (file2_path, fingerprints2, changed2))
+            for start in range(0, len(indexes), chunk_size)
+        ]
+        texts = await worker_pool.map(extract_page_text, [(path, indexes) for path, _, indexes in text_chunks])
+        for (_, pages, indexes), chunk_texts in zip(text_chunks, texts):
+            for index, text in zip(indexes, chunk_texts):
+                pages[index].update(text)
+        
+        loop = asyncio.get_running_loop()
+        alignment = await loop.run_in_executor(None, align_pages, fingerprints1, fingerprints2, opcodes)
+        return pages1, pages2, fingerprints1, fingerprints2, alignment
+    
     async def ocr_pdf(self, input_path: str, output_path: str, language: str = "eng") -> Dict[str, Any]:
-        """Perform OCR on PDF with specific error handling"""
+        """Perform OCR on PDF with specific error handling
+
+        Pages that already have a usable text layer are skipped. The rest are
+        rasterized at a DPI matched to their scan resolution, cleaned up
+        (deskew, binarize, denoise; blank scans are dropped) and recognized
+        in parallel, one page per worker task, reusing cached results for
+        pages recognized before. The recognized words are laid
+        over the original page as invisible text, so page images are kept
+        as they are.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # This is a placeholder implementation
-            # In a real implementation, you would use Tesseract or similar OCR engine
-            raise HTTPException(status_code=501, detail="OCR functionality not yet implemented")
+            loop = asyncio.get_running_loop()
+            page_plan = await loop.run_in_executor(None, self._plan_ocr, input_path)
+            
+            try:
+                recognized = await worker_pool.map(
+                    recognize_page,
+                    [(input_path, page["page"], page["dpi"], language) for page in page_plan if page["status"] == "scan"]
+                )
+            except OCREngineUnavailable as e:
+                logger.error(f"OCR engine unavailable: {e}")
+                raise HTTPException(status_code=503, detail="OCR engine is not available on this server")
+            
+            def add_text_layers(doc: "fitz.Document") -> int:
+                for result in recognized:
+                    if not result["text_layer"]:
+                        continue
+                    page = doc[result["page"]]
+                    with fitz.open("pdf", result["text_layer"]) as layer:
+                        page.show_pdf_page(page.rect * page.derotation_matrix, layer, 0, rotate=page.rotation)
+                return sum(1 for result in recognized if not result["blank"])
+            
+            pages_processed, save_info = await loop.run_in_executor(
+                None, self._incremental_update, input_path, output_path, add_text_layers
+            )
+            
+            results_by_page = {result["page"]: result for result in recognized}
+            pages = []
+            for page in page_plan:
+                result = results_by_page.get(page["page"])
+                if result:
+                    status = "blank" if result["blank"] else "ocr"
+                else:
+                    status = page["status"]
+                pages.append({
+                    "page": page["page"] + 1,
+                    "status": status,
+                    "dpi": page["dpi"] or None,
+                    "skew": result["skew"] if result else None,
+                    "words": result["words"] if result else None,
+                    "confidence": result["confidence"] if result else None,
+                    "cache": result["cache"] if result else None,
+                    "timings": result["timings"] if result else None
+                })
+            
+            confidences = [result["confidence"] for result in recognized if result["words"]]
+            timings = {
+                stage: round(sum(result["timings"].get(stage, 0) for result in recognized), 1)
+                for stage in ("render_ms", "preprocess_ms", "recognize_ms")
+            }
+            cache_hits = [result for result in recognized if result["cache"] == "hit"]
+            timings["recognize_ms_saved"] = round(sum(result["recognize_ms"] for result in cache_hits), 1)
+            
+            return {
+                "success": True,
+                "language_used": language,
+                "pages_processed": pages_processed,
+                "pages_skipped": len(page_plan) - pages_processed,
+                "text_extracted": sum(result["characters"] for result in recognized),
+                "confidence_score": round(sum(confidences) / len(confidences), 2) if confidences else 0.0,
+                "cache_hits": len(cache_hits),
+                "cache_misses": len(recognized) - len(cache_hits),
+                "timings": timings,
+                "pages": pages,
+                **save_info
+            }
             
         except HTTPException:
             raise
@@ -489,16 +1535,545 @@ class PDFProcessor:
             logger.error(f"Unexpected error in ocr_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF OCR failed due to unexpected error")
     
+    def _plan_ocr(self, input_path: str) -> List[Dict[str, Any]]:
+        """Classify every page as having text, being empty or needing OCR
+        
+        Also used by auto-orientation to skip empty pages.
+        """
+        try:
+            doc = fitz.open(input_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with doc:
+            if doc.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+            
+            page_plan = []
+            for page in doc:
+                status, dpi = classify_page(page)
+                page_plan.append({"page": page.number, "status": status, "dpi": dpi})
+            return page_plan
+    
+    async def convert_to_pdfa(self, input_path: str, output_path: str, level: str = "2b") -> Dict[str, Any]:
+        """Convert PDF to PDF/A with specific error handling
+        
+        Runs on the worker pool. Missing fonts are embedded from cached
+        per-font plans, so documents that share fonts don't repeat the work.
+        The result carries the conversion counts and a validation summary
+        of the output.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if level not in PDFA_LEVELS:
+                raise HTTPException(status_code=400, detail=f"Invalid PDF/A level. Supported: {', '.join(PDFA_LEVELS)}")
+            
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._check_source_pdf, input_path)
+            
+            result = await worker_pool.run(convert_document_to_pdfa, input_path, output_path, level)
+            return {"success": True, **result}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in convert_to_pdfa: {e}")
+            raise HTTPException(status_code=500, detail="PDF/A conversion failed due to unexpected error")
+    
+    async def convert_to_pdfa_batch(
+        self,
+        input_paths: List[str],
+        filenames: List[str],
+        archive_path: str,
+        level: str = "2b"
+    ) -> Dict[str, Any]:
+        """Convert many PDFs to PDF/A into one ZIP
+        
+        Documents are converted in parallel across the worker pool; fonts
+        the documents share are planned once and then read from the cache.
+        """
+        try:
+            for input_path in input_paths:
+                if not os.path.exists(input_path):
+                    raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if level not in PDFA_LEVELS:
+                raise HTTPException(status_code=400, detail=f"Invalid PDF/A level. Supported: {', '.join(PDFA_LEVELS)}")
+            
+            loop = asyncio.get_running_loop()
+            for input_path, filename in zip(input_paths, filenames):
+                try:
+                    await loop.run_in_executor(None, self._check_source_pdf, input_path)
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail=f"{filename}: {e.detail}")
+            
+            with tempfile.TemporaryDirectory(dir=self.temp_dir) as temp_dir:
+                output_paths = [os.path.join(temp_dir, f"{index}.pdf") for index in range(len(input_paths))]
+                results = await worker_pool.map(
+                    convert_document_to_pdfa,
+                    [(input_path, output_path, level) for input_path, output_path in zip(input_paths, output_paths)]
+                )
+                documents = await loop.run_in_executor(
+                    None, self._archive_documents, archive_path, output_paths, filenames, results, "pdfa"
+                )
+            
+            return {
+                "success": True,
+                "level": level,
+                "documents_converted": len(documents),
+                "documents_compliant": sum(1 for document in documents if document["validation"]["compliant"]),
+                "fonts_embedded": sum(document["fonts_embedded"] for document in documents),
+                "font_plans_cached": sum(document["font_plans_cached"] for document in documents),
+                "archive_path": archive_path,
+                "documents": documents
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in convert_to_pdfa_batch: {e}")
+            raise HTTPException(status_code=500, detail="PDF/A batch conversion failed due to unexpected error")
+    
+    def _check_source_pdf(self, input_path: str) -> int:
+        """Page count of a source document, rejecting unreadable and password-protected files"""
+        try:
+            doc = fitz.open(input_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with doc:
+            if doc.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+            if doc.page_count == 0:
+                raise HTTPException(status_code=400, detail="The document has no pages")
+            return doc.page_count
+    
+    async def pdf_to_word(self, input_path: str, output_path: str, engine: str = "auto") -> Dict[str, Any]:
+        """Convert PDF to DOCX with specific error handling
+        
+        The native engine lays pages out in parallel across the worker pool:
+        text runs with their fonts, paragraphs, ruled tables and images, which
+        are then assembled into a DOCX with python-docx. Pages it can't
+        reproduce in a flowing document (multi-column text, rotated text,
+        dense vector drawings) are reported as complex; with engine "auto" a
+        document with many of them, or one the native engine fails on, is
+        converted by LibreOffice instead when it is installed. "native" and
+        "libreoffice" force one engine.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if engine not in WORD_ENGINES:
+                raise HTTPException(status_code=400, detail=f"Invalid engine. Supported: {', '.join(WORD_ENGINES)}")
+            
+            loop = asyncio.get_running_loop()
+            page_count = await loop.run_in_executor(None, self._check_source_pdf, input_path)
+            
+            result = {"success": True, "page_count": page_count, "complex_pages": []}
+            if engine == "libreoffice":
+                await loop.run_in_executor(None, self._run_libreoffice, input_path, output_path, "docx")
+                return {**result, "engine": "libreoffice"}
+            
+            page_numbers = list(range(page_count))
+            chunks = [
+                page_numbers[start:start + WORD_EXPORT_CHUNK_PAGES]
+                for start in range(0, page_count, WORD_EXPORT_CHUNK_PAGES)
+            ]
+            fallback = engine == "auto" and shutil.which("libreoffice") is not None
+            
+            with tempfile.TemporaryDirectory(dir=self.temp_dir) as image_dir:
+                try:
+                    chunk_layouts = [None] * len(chunks)
+                    async for position, layouts in worker_pool.as_completed(
+                        extract_page_layouts, [(input_path, chunk, image_dir) for chunk in chunks]
+                    ):
+                        chunk_layouts[position] = layouts
+                    layouts = [layout for chunk in chunk_layouts for layout in chunk]
+                    
+                    result["complex_pages"] = [layout["page"] for layout in layouts if layout["complex"]]
+                    if fallback and len(result["complex_pages"]) > page_count * WORD_COMPLEX_PAGE_SHARE:
+                        logger.info(
+                            f"Converting {input_path} with LibreOffice: "
+                            f"{len(result['complex_pages'])} of {page_count} pages have complex layouts"
+                        )
+                    else:
+                        counts = await worker_pool.run(write_docx, layouts, output_path)
+                        return {**result, "engine": "native", **counts}
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    if not fallback:
+                        raise
+                    logger.warning(f"Native PDF to Word conversion failed, falling back to LibreOffice: {e}")
+            
+            await loop.run_in_executor(None, self._run_libreoffice, input_path, output_path, "docx")
+            return {**result, "engine": "libreoffice"}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in pdf_to_word: {e}")
+            raise HTTPException(status_code=500, detail="PDF to Word conversion failed due to unexpected error")
+    
+    async def pdf_to_excel(self, input_path: str, output_path: str, strategy: str = "auto") -> Dict[str, Any]:
+        """Extract the tables of a PDF into an XLSX workbook with specific error handling
+        
+        Tables are found with pdfplumber on page chunks across the worker pool
+        (ruled tables, or word alignment for tables without rules) and
+        streamed into a write-only workbook in page order. Chunks are
+        dispatched a window at a time, so only a few chunks' tables are in
+        memory however long the document is.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if strategy not in TABLE_STRATEGIES:
+                raise HTTPException(status_code=400, detail=f"Invalid table strategy. Supported: {', '.join(TABLE_STRATEGIES)}")
+            
+            loop = asyncio.get_running_loop()
+            page_count = await loop.run_in_executor(None, self._check_source_pdf, input_path)
+            
+            page_numbers = list(range(page_count))
+            chunks = [
+                page_numbers[start:start + EXCEL_EXPORT_CHUNK_PAGES]
+                for start in range(0, page_count, EXCEL_EXPORT_CHUNK_PAGES)
+            ]
+            window = worker_pool.max_workers * 2
+            
+            writer = TableWorkbookWriter(output_path)
+            for start in range(0, len(chunks), window):
+                results = await worker_pool.map(
+                    extract_page_tables, [(input_path, chunk, strategy) for chunk in chunks[start:start + window]]
+                )
+                for pages in results:
+                    await loop.run_in_executor(None, writer.add_pages, pages)
+            
+            if not writer.tables:
+                raise HTTPException(status_code=422, detail="No tables found in the document")
+            
+            summary = await loop.run_in_executor(None, writer.close)
+            return {"success": True, "strategy": strategy, "page_count": page_count, **summary}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in pdf_to_excel: {e}")
+            raise HTTPException(status_code=500, detail="PDF to Excel conversion failed due to unexpected error")
+    
+    async def pdf_to_ppt(
+        self,
+        input_path: str,
+        output_path: str,
+        mode: str = "image",
+        dpi: int = SLIDE_IMAGE_DPI
+    ) -> Dict[str, Any]:
+        """Convert PDF to a PPTX with one slide per page with specific error handling
+        
+        The slide size follows the most common page size. In "image" mode
+        each slide shows a PNG render of its page; renders come from the
+        page render cache when the document was previewed or converted at
+        the same DPI before, and the rest are rendered in parallel. In
+        "editable" mode pages are laid out as in PDF to Word and rebuilt
+        from text boxes, images and tables. The presentation is assembled
+        on the worker pool.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            if mode not in SLIDE_MODES:
+                raise HTTPException(status_code=400, detail=f"Invalid mode. Supported: {', '.join(SLIDE_MODES)}")
+            if not MIN_RENDER_DPI <= dpi <= MAX_RENDER_DPI:
+                raise HTTPException(status_code=400, detail=f"DPI must be between {MIN_RENDER_DPI} and {MAX_RENDER_DPI}")
+            
+            loop = asyncio.get_running_loop()
+            page_count = await loop.run_in_executor(None, self._check_source_pdf, input_path)
+            info = await page_renderer.get_document_info(input_path)
+            page_sizes = Counter((page["width"], page["height"]) for page in info["pages"])
+            size = slide_size(*page_sizes.most_common(1)[0][0])
+            page_numbers = list(range(page_count))
+            
+            result = {"success": True, "mode": mode, "slide_count": page_count}
+            with tempfile.TemporaryDirectory(dir=self.temp_dir) as scratch_dir:
+                if mode == "image":
+                    rendered = await page_renderer.render_pages(input_path, page_numbers, dpi, "png", scratch_dir)
+                    slides = [
+                        {"width": page["width"], "height": page["height"], "image": path}
+                        for page, path in zip(info["pages"], rendered["paths"])
+                    ]
+                    result.update(dpi=dpi, cache_hits=rendered["cache_hits"])
+                else:
+                    chunks = [
+                        page_numbers[start:start + WORD_EXPORT_CHUNK_PAGES]
+                        for start in range(0, page_count, WORD_EXPORT_CHUNK_PAGES)
+                    ]
+                    chunk_layouts = [None] * len(chunks)
+                    async for position, layouts in worker_pool.as_completed(
+                        extract_page_layouts, [(input_path, chunk, scratch_dir) for chunk in chunks]
+                    ):
+                        chunk_layouts[position] = layouts
+                    slides = [
+                        {"width": layout["width"], "height": layout["height"], "elements": layout["elements"]}
+                        for chunk in chunk_layouts for layout in chunk
+                    ]
+                
+                counts = await worker_pool.run(write_pptx, slides, output_path, size)
+            
+            return {**result, **counts}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in pdf_to_ppt: {e}")
+            raise HTTPException(status_code=500, detail="PDF to PowerPoint conversion failed due to unexpected error")
+    
+    async def html_to_pdf(self, input_path: str, output_path: str, stylesheet_path: Optional[str] = None) -> Dict[str, Any]:
+        """Convert an HTML document to PDF with specific error handling
+        
+        WeasyPrint renders in a worker process, where the font configuration,
+        parsed stylesheets and fetched resources stay loaded between requests.
+        An optional stylesheet is applied after the document's own styles.
+        """
+        try:
+            # Validate input files
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail="Input HTML file not found")
+            if stylesheet_path and not os.path.exists(stylesheet_path):
+                raise HTTPException(status_code=404, detail="Stylesheet file not found")
+            
+            try:
+                result = await worker_pool.run(render_html, input_path, output_path, stylesheet_path)
+            except HTMLRendererUnavailable as e:
+                logger.error(f"HTML renderer unavailable: {e}")
+                raise HTTPException(status_code=503, detail="HTML rendering is not available on this server")
+            
+            return {"success": True, **result}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in html_to_pdf: {e}")
+            raise HTTPException(status_code=500, detail="HTML to PDF conversion failed due to unexpected error")
+    
+    async def html_to_pdf_batch(
+        self,
+        input_paths: List[str],
+        filenames: List[str],
+        output_path: str,
+        stylesheet_path: Optional[str] = None,
+        merge: bool = False
+    ) -> Dict[str, Any]:
+        """Convert many HTML documents to PDF in parallel across the worker pool
+        
+        Without merge each document becomes its own PDF in one ZIP, as for
+        invoices generated from one template and stylesheet. With merge the
+        documents are the parts of a single PDF, in order, so a long document
+        split into chapters lays its parts out concurrently; page counters
+        start again in each part.
+        """
+        try:
+            # Validate input files
+            for input_path in input_paths:
+                if not os.path.exists(input_path):
+                    raise HTTPException(status_code=404, detail="Input HTML file not found")
+            if stylesheet_path and not os.path.exists(stylesheet_path):
+                raise HTTPException(status_code=404, detail="Stylesheet file not found")
+            
+            loop = asyncio.get_running_loop()
+            with tempfile.TemporaryDirectory(dir=self.temp_dir) as temp_dir:
+                output_paths = [os.path.join(temp_dir, f"{index}.pdf") for index in range(len(input_paths))]
+                try:
+                    results = await worker_pool.map(
+                        render_html,
+                        [(input_path, path, stylesheet_path) for input_path, path in zip(input_paths, output_paths)]
+                    )
+                except HTMLRendererUnavailable as e:
+                    logger.error(f"HTML renderer unavailable: {e}")
+                    raise HTTPException(status_code=503, detail="HTML rendering is not available on this server")
+                
+                pdf_names = [f"{os.path.splitext(filename)[0]}.pdf" for filename in filenames]
+                if merge:
+                    await loop.run_in_executor(None, self._merge_incremental, output_paths, output_path)
+                    documents = [{"filename": name, **result} for name, result in zip(pdf_names, results)]
+                else:
+                    documents = await loop.run_in_executor(
+                        None, self._archive_documents, output_path, output_paths, pdf_names, results, "converted"
+                    )
+            
+            return {
+                "success": True,
+                "merged": merge,
+                "documents_converted": len(documents),
+                "total_pages": sum(document["page_count"] for document in documents),
+                "documents": documents
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in html_to_pdf_batch: {e}")
+            raise HTTPException(status_code=500, detail="HTML to PDF batch conversion failed due to unexpected error")
+    
+    async def word_to_pdf(self, input_path: str, output_path: str, engine: str = "auto") -> Dict[str, Any]:
+        """Convert a Word document to PDF with specific error handling
+        
+        See _office_to_pdf for how the engine is chosen.
+        """
+        return await self._office_to_pdf(input_path, output_path, engine, render_docx, "Word")
+    
+    async def excel_to_pdf(self, input_path: str, output_path: str, engine: str = "auto") -> Dict[str, Any]:
+        """Convert an Excel workbook to PDF with specific error handling
+        
+        See _office_to_pdf for how the engine is chosen.
+        """
+        return await self._office_to_pdf(input_path, output_path, engine, render_xlsx, "Excel")
+    
+    async def _office_to_pdf(
+        self, input_path: str, output_path: str, engine: str, renderer: Callable, label: str
+    ) -> Dict[str, Any]:
+        """Convert an Office document to PDF natively or with LibreOffice
+        
+        With engine "auto" the document is classified and, when it has no
+        complex features, rendered with reportlab in a worker process, in the
+        same task so it is only parsed once. Complex documents, legacy
+        binary formats (.doc, .xls) and documents the native renderer fails
+        on go to LibreOffice; where it isn't installed, complex documents
+        are rendered natively as closely as they can be. "native" renders
+        every document natively, complex or not; "libreoffice" skips the
+        native renderer. The result names the engine used and the features that
+        made the document complex.
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(input_path):
+                raise HTTPException(status_code=404, detail=f"Input {label} file not found")
+            
+            if engine not in OFFICE_ENGINES:
+                raise HTTPException(status_code=400, detail=f"Invalid engine. Supported: {', '.join(OFFICE_ENGINES)}")
+            
+            loop = asyncio.get_running_loop()
+            result = {"success": True, "complex_reasons": []}
+            if not zipfile.is_zipfile(input_path):
+                if engine == "native":
+                    raise HTTPException(status_code=400, detail="The native engine only reads .docx and .xlsx files")
+                result["complex_reasons"] = ["legacy_format"]
+            elif engine != "libreoffice":
+                fallback = engine == "auto" and shutil.which("libreoffice") is not None
+                try:
+                    rendered = await worker_pool.run(renderer, input_path, output_path, not fallback)
+                    result["complex_reasons"] = rendered.pop("reasons")
+                    if rendered.pop("rendered"):
+                        return {**result, "engine": "native", **rendered}
+                    logger.info(
+                        f"Converting {input_path} with LibreOffice: {', '.join(result['complex_reasons'])}"
+                    )
+                except Exception as e:
+                    if not fallback:
+                        raise
+                    logger.warning(f"Native {label} to PDF conversion failed, falling back to LibreOffice: {e}")
+            
+            await loop.run_in_executor(None, self._run_libreoffice, input_path, output_path, "pdf")
+            return {**result, "engine": "libreoffice"}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in {label.lower()}_to_pdf: {e}")
+            raise HTTPException(status_code=500, detail=f"{label} to PDF conversion failed due to unexpected error")
+    
+    def _run_libreoffice(self, input_path: str, output_path: str, target_format: str):
+        """Convert a file with headless LibreOffice
+        
+        Each run gets its own profile directory, so conversions can run side
+        by side instead of failing on the shared profile's lock.
+        """
+        if shutil.which("libreoffice") is None:
+            raise HTTPException(status_code=503, detail="LibreOffice is not available on this server")
+        
+        with tempfile.TemporaryDirectory(dir=self.temp_dir) as temp_dir:
+            cmd = [
+                "libreoffice",
+                f"-env:UserInstallation={Path(temp_dir, 'profile').as_uri()}",
+                "--headless",
+                "--convert-to", target_format,
+                "--outdir", temp_dir,
+                input_path
+            ]
+            try:
+                process = subprocess.run(cmd, capture_output=True, text=True, timeout=LIBREOFFICE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                raise HTTPException(status_code=500, detail="LibreOffice conversion timed out")
+            
+            converted_path = os.path.join(temp_dir, f"{Path(input_path).stem}.{target_format}")
+            if process.returncode != 0 or not os.path.exists(converted_path):
+                logger.error(f"LibreOffice conversion failed: {process.stderr}")
+                raise HTTPException(status_code=500, detail="LibreOffice conversion failed")
+            
+            shutil.copyfile(converted_path, output_path)
+    
     async def repair_pdf(self, input_path: str, output_path: str) -> Dict[str, Any]:
-        """Repair corrupted PDF with specific error handling"""
+        """Repair corrupted PDF with specific error handling
+
+        A cheap structural check of the header, trailer, startxref and every
+        cross-reference entry comes first; files that pass are copied through
+        untouched. Damaged files get their object table rebuilt from a
+        streaming scan of the raw bytes, dropping objects that cannot be
+        recovered, so memory use does not grow with the file size.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # This is a placeholder implementation
-            # In a real implementation, you would use specialized PDF repair tools
-            raise HTTPException(status_code=501, detail="PDF repair functionality not yet implemented")
+            loop = asyncio.get_running_loop()
+            issues = await loop.run_in_executor(None, check_structure, input_path)
+            if not issues:
+                await loop.run_in_executor(None, shutil.copyfile, input_path, output_path)
+                stats = {}
+            else:
+                try:
+                    stats = await loop.run_in_executor(None, rebuild_pdf, input_path, output_path)
+                except UnrecoverablePDF as e:
+                    raise HTTPException(status_code=422, detail=f"PDF could not be repaired: {str(e)}")
+            
+            pages_recovered = await loop.run_in_executor(None, self._count_pages, output_path)
+            if pages_recovered == 0 and issues:
+                raise HTTPException(status_code=422, detail="PDF could not be repaired: no pages could be recovered")
+            
+            if stats:
+                for count, description in (
+                    (stats["stream_lengths_fixed"], "wrong stream lengths corrected"),
+                    (stats["endobj_added"], "missing endobj keywords added"),
+                    (stats["streams_truncated"], "truncated streams kept up to where their data ends")
+                ):
+                    if count:
+                        issues.append(f"{count} {description}")
+            
+            # Dropped objects and unreadable object streams are reported, not fixed
+            issues_fixed = len(issues)
+            if stats.get("objects_dropped"):
+                issues.append(f"{stats['objects_dropped']} unrecoverable objects dropped")
+            if stats.get("object_streams_unreadable"):
+                issues.append(f"{stats['object_streams_unreadable']} object streams could not be read")
+            
+            return {
+                "success": True,
+                "repair_successful": True,
+                "status": "repaired" if stats else "healthy",
+                "issues_found": len(issues),
+                "issues_fixed": issues_fixed,
+                "issues": issues,
+                "pages_recovered": pages_recovered,
+                **stats
+            }
             
         except HTTPException:
             raise
@@ -506,16 +2081,74 @@ class PDFProcessor:
             logger.error(f"Unexpected error in repair_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF repair failed due to unexpected error")
     
-    async def crop_pdf(self, input_path: str, output_path: str, x: float, y: float, width: float, height: float) -> Dict[str, Any]:
-        """Crop PDF pages with specific error handling"""
+    def _count_pages(self, path: str) -> Optional[int]:
+        """Page count of a file, None when it is encrypted and 0 when it cannot be opened"""
+        try:
+            with fitz.open(path) as doc:
+                return None if doc.needs_pass else doc.page_count
+        except (fitz.FileDataError, RuntimeError):
+            return 0
+    
+    async def crop_pdf(
+        self,
+        input_path: str,
+        output_path: str,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        pages: str = ""
+    ) -> Dict[str, Any]:
+        """Crop PDF pages with specific error handling
+
+        x, y, width and height are percentages of each page's MediaBox as
+        displayed (top-left origin, after /Rotate). Only the CropBox and
+        TrimBox entries change, so content streams are untouched and the
+        result is saved as an incremental update.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # This is a placeholder implementation
-            # In a real implementation, you would use PyMuPDF or similar
-            raise HTTPException(status_code=501, detail="PDF crop functionality not yet implemented")
+            page_numbers: Optional[List[int]] = None
+            if pages and pages.strip():
+                try:
+                    page_numbers = self._parse_page_numbers(pages)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid page specification: {str(e)}")
+            
+            fractions = np.array([x, y, width, height], dtype=np.float64) / 100
+            
+            def crop_pages(doc: "fitz.Document") -> int:
+                if page_numbers is None:
+                    indexes = list(range(doc.page_count))
+                else:
+                    if page_numbers[0] < 1 or page_numbers[-1] > doc.page_count:
+                        raise HTTPException(status_code=400, detail=f"Pages must be between 1 and {doc.page_count}")
+                    indexes = [page - 1 for page in page_numbers]
+                
+                xrefs = [doc.page_xref(index) for index in indexes]
+                media_boxes = np.array([self._page_box(doc, xref, "MediaBox") for xref in xrefs], dtype=np.float64)
+                rotations = np.array([self._page_rotation(doc, xref) for xref in xrefs], dtype=np.int64)
+                
+                for xref, box in zip(xrefs, self._crop_boxes(media_boxes, rotations, fractions)):
+                    value = "[" + " ".join(f"{coordinate:.3f}".rstrip("0").rstrip(".") for coordinate in box) + "]"
+                    doc.xref_set_key(xref, "CropBox", value)
+                    doc.xref_set_key(xref, "TrimBox", value)
+                return len(xrefs)
+            
+            loop = asyncio.get_running_loop()
+            pages_cropped, save_info = await loop.run_in_executor(
+                None, self._incremental_update, input_path, output_path, crop_pages
+            )
+            
+            return {
+                "success": True,
+                "crop_area": {"x": x, "y": y, "width": width, "height": height},
+                "pages_cropped": pages_cropped,
+                **save_info
+            }
             
         except HTTPException:
             raise
@@ -523,16 +2156,128 @@ class PDFProcessor:
             logger.error(f"Unexpected error in crop_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF crop failed due to unexpected error")
     
-    async def redact_pdf(self, input_path: str, output_path: str, redaction_areas: str) -> Dict[str, Any]:
-        """Redact PDF content with specific error handling"""
+    @staticmethod
+    def _crop_boxes(media_boxes: np.ndarray, rotations: np.ndarray, fractions: np.ndarray) -> np.ndarray:
+        """Crop boxes in PDF user space for all pages at once
+        
+        media_boxes is (n, 4) of [x0 y0 x1 y1], rotations holds each page's
+        /Rotate and fractions is (x, y, width, height) of the displayed page.
+        """
+        fx, fy, fw, fh = fractions
+        # Crop area as fractions of the unrotated MediaBox, bottom-left origin,
+        # as (u0, v0, u1, v1) for /Rotate 0, 90, 180 and 270
+        unrotated = np.array([
+            [fx, 1 - fy - fh, fx + fw, 1 - fy],
+            [fy, fx, fy + fh, fx + fw],
+            [1 - fx - fw, fy, 1 - fx, fy + fh],
+            [1 - fy - fh, 1 - fx - fw, 1 - fy, 1 - fx]
+        ])[(rotations % 360) // 90]
+        
+        origin = np.minimum(media_boxes[:, :2], media_boxes[:, 2:])
+        size = np.abs(media_boxes[:, 2:] - media_boxes[:, :2])
+        return np.hstack([origin + unrotated[:, :2] * size, origin + unrotated[:, 2:] * size])
+    
+    @staticmethod
+    def _inherited_key(doc: "fitz.Document", xref: int, key: str) -> Optional[str]:
+        """Value of a page attribute, following /Parent for inheritable ones"""
+        while True:
+            value_type, value = doc.xref_get_key(xref, key)
+            if value_type != "null":
+                if value_type == "xref":
+                    return doc.xref_object(int(value.split()[0]), compressed=True)
+                return value
+            parent_type, parent = doc.xref_get_key(xref, "Parent")
+            if parent_type != "xref":
+                return None
+            xref = int(parent.split()[0])
+    
+    def _page_box(self, doc: "fitz.Document", xref: int, key: str) -> List[float]:
+        value = self._inherited_key(doc, xref, key) or "[0 0 612 792]"
+        return [float(number) for number in value.strip("[] ").split()]
+    
+    def _page_rotation(self, doc: "fitz.Document", xref: int) -> int:
+        value = self._inherited_key(doc, xref, "Rotate")
+        return int(float(value)) if value else 0
+    
+    async def redact_pdf(
+        self,
+        input_path: str,
+        output_path: str,
+        redaction_areas: str = "",
+        patterns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Redact PDF content with specific error handling
+
+        All areas and pattern matches of a page are applied in one pass, which
+        removes the text, image pixels and line art beneath them. In large
+        documents the pattern search, the costly part, runs in page chunks on
+        the worker pool; the redactions are then applied to the document as a
+        whole, so links, form fields and the outline survive unchanged. The
+        output is always fully rewritten so no trace of the removed content
+        remains. A pattern that runs past REDACT_PATTERN_TIMEOUT on a page
+        fails the request with HTTP 400.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # This is a placeholder implementation
-            # In a real implementation, you would use PyMuPDF or similar
-            raise HTTPException(status_code=501, detail="PDF redaction functionality not yet implemented")
+            areas = self._parse_redaction_areas(redaction_areas)
+            patterns = patterns or []
+            try:
+                compile_patterns(patterns)
+            except regex.error as e:
+                raise HTTPException(status_code=400, detail=f"Invalid redaction pattern: {str(e)}")
+            
+            if not areas and not patterns:
+                raise HTTPException(status_code=400, detail="At least one redaction area or pattern is required")
+            
+            try:
+                with fitz.open(input_path) as doc:
+                    if doc.needs_pass:
+                        raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+                    page_count = doc.page_count
+            except fitz.FileDataError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+            
+            areas_by_page: Dict[int, List[Tuple[float, float, float, float]]] = {}
+            for area in areas:
+                if area["page"] > page_count:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Redaction area on page {area['page']} but the document has {page_count} pages"
+                    )
+                areas_by_page.setdefault(area["page"] - 1, []).append(
+                    (area["x"], area["y"], area["x"] + area["width"], area["y"] + area["height"])
+                )
+            
+            loop = asyncio.get_running_loop()
+            try:
+                found = None
+                if patterns and page_count >= REDACT_PARALLEL_MIN_PAGES and worker_pool.max_workers >= 2:
+                    chunk_size = max(REDACT_MIN_CHUNK_PAGES, math.ceil(page_count / (worker_pool.max_workers * 4)))
+                    found = {}
+                    for chunk_found in await worker_pool.map(
+                        search_pages,
+                        [
+                            (input_path, list(range(start, min(start + chunk_size, page_count))), patterns)
+                            for start in range(0, page_count, chunk_size)
+                        ]
+                    ):
+                        found.update(chunk_found)
+                
+                stats = await loop.run_in_executor(
+                    None, self._redact_in_process, input_path, output_path, areas_by_page, patterns, found
+                )
+            except PatternTimeout as e:
+                raise HTTPException(status_code=400, detail=f"{e}; simplify the pattern")
+            
+            return {
+                "success": True,
+                "pages_processed": page_count,
+                "patterns": patterns,
+                **stats
+            }
             
         except HTTPException:
             raise
@@ -540,22 +2285,200 @@ class PDFProcessor:
             logger.error(f"Unexpected error in redact_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF redaction failed due to unexpected error")
     
-    async def sign_pdf(self, input_path: str, output_path: str, signature_text: str, x: float, y: float, width: float, height: float) -> Dict[str, Any]:
-        """Add digital signature to PDF with specific error handling"""
+    @staticmethod
+    def _parse_redaction_areas(redaction_areas: str) -> List[Dict[str, Any]]:
+        """Parse and validate the JSON list of areas (page is 1-based; x, y, width, height in points)"""
+        if not redaction_areas or not redaction_areas.strip():
+            return []
+        try:
+            areas = json.loads(redaction_areas)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Redaction areas must be valid JSON: {str(e)}")
+        if not isinstance(areas, list):
+            raise HTTPException(status_code=400, detail="Redaction areas must be a JSON array")
+        
+        for index, area in enumerate(areas):
+            if not isinstance(area, dict):
+                raise HTTPException(status_code=400, detail=f"Redaction area {index + 1} must be an object")
+            for key in ("page", "x", "y", "width", "height"):
+                if not isinstance(area.get(key), (int, float)) or isinstance(area.get(key), bool):
+                    raise HTTPException(status_code=400, detail=f"Redaction area {index + 1} needs a numeric {key}")
+            if area["page"] < 1 or area["width"] <= 0 or area["height"] <= 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Redaction area {index + 1} needs a page of at least 1 and a positive size"
+                )
+            area["page"] = int(area["page"])
+        return areas
+    
+    def _redact_in_process(
+        self,
+        input_path: str,
+        output_path: str,
+        areas_by_page: Dict[int, List[Tuple[float, float, float, float]]],
+        patterns: List[str],
+        found: Optional[Dict[int, Tuple[List[Tuple[float, float, float, float]], Dict[str, int]]]] = None
+    ) -> Dict[str, Any]:
+        with fitz.open(input_path) as doc:
+            stats = redact_document(doc, list(range(doc.page_count)), areas_by_page, patterns, found)
+            # Garbage collection drops the original content the redactions replaced
+            doc.save(output_path, garbage=3, deflate=True)
+        return stats
+    
+    async def sign_pdf(
+        self,
+        input_path: str,
+        output_path: str,
+        signature_text: str,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        page: int = 1,
+        reason: str = ""
+    ) -> Dict[str, Any]:
+        """Digitally sign PDF with specific error handling
+
+        Adds a visible signature field at (x, y, width, height) on the given
+        page, measured in points from the top-left of the page as displayed,
+        and signs the file (PKCS#7 detached, SHA-256) as an incremental update
+        so the original bytes stay intact. Signing runs on the worker pool,
+        where the key is loaded once per process and the appearance stream is
+        built once per text and size.
+        """
         try:
             # Validate input file
             if not os.path.exists(input_path):
                 raise HTTPException(status_code=404, detail="Input PDF file not found")
             
-            # This is a placeholder implementation
-            # In a real implementation, you would use digital signature libraries
-            raise HTTPException(status_code=501, detail="PDF signing functionality not yet implemented")
+            rect = (x, y, width, height)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._check_signature_target, input_path, page, rect)
+            
+            try:
+                result = await worker_pool.run(
+                    sign_document, input_path, output_path, signature_text, page - 1, rect, reason
+                )
+            except SigningUnavailable as e:
+                logger.error(f"Signing unavailable: {e}")
+                raise HTTPException(status_code=503, detail="Digital signing is not configured on this server")
+            
+            return {
+                "success": True,
+                "signature_added": True,
+                "signature_position": {"page": page, "x": x, "y": y, "width": width, "height": height},
+                **result
+            }
             
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Unexpected error in sign_pdf: {e}")
             raise HTTPException(status_code=500, detail="PDF signing failed due to unexpected error")
+    
+    async def sign_pdf_batch(
+        self,
+        input_paths: List[str],
+        filenames: List[str],
+        archive_path: str,
+        signature_text: str,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        page: int = 1,
+        reason: str = ""
+    ) -> Dict[str, Any]:
+        """Sign many PDFs with the same key, text and placement into one ZIP
+
+        Documents are signed in parallel across the worker pool; every worker
+        reuses its loaded key and cached appearance, so the cost per document
+        is little more than copying it and hashing it once.
+        """
+        try:
+            for input_path in input_paths:
+                if not os.path.exists(input_path):
+                    raise HTTPException(status_code=404, detail="Input PDF file not found")
+            
+            rect = (x, y, width, height)
+            loop = asyncio.get_running_loop()
+            for input_path, filename in zip(input_paths, filenames):
+                try:
+                    await loop.run_in_executor(None, self._check_signature_target, input_path, page, rect)
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail=f"{filename}: {e.detail}")
+            
+            with tempfile.TemporaryDirectory(dir=self.temp_dir) as temp_dir:
+                output_paths = [os.path.join(temp_dir, f"{index}.pdf") for index in range(len(input_paths))]
+                try:
+                    results = await worker_pool.map(
+                        sign_document,
+                        [
+                            (input_path, output_path, signature_text, page - 1, rect, reason)
+                            for input_path, output_path in zip(input_paths, output_paths)
+                        ]
+                    )
+                except SigningUnavailable as e:
+                    logger.error(f"Signing unavailable: {e}")
+                    raise HTTPException(status_code=503, detail="Digital signing is not configured on this server")
+                
+                documents = await loop.run_in_executor(
+                    None, self._archive_documents, archive_path, output_paths, filenames, results, "signed"
+                )
+            
+            return {
+                "success": True,
+                "documents_signed": len(documents),
+                "signature_position": {"page": page, "x": x, "y": y, "width": width, "height": height},
+                "archive_path": archive_path,
+                "documents": documents
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in sign_pdf_batch: {e}")
+            raise HTTPException(status_code=500, detail="PDF batch signing failed due to unexpected error")
+    
+    def _check_signature_target(self, input_path: str, page: int, rect: Tuple[float, float, float, float]):
+        """Reject unreadable or encrypted files and signature areas outside the page"""
+        try:
+            doc = fitz.open(input_path)
+        except fitz.FileDataError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
+        
+        with doc:
+            if doc.needs_pass:
+                raise HTTPException(status_code=400, detail="Encrypted PDF files must be unlocked first")
+            if page < 1 or page > doc.page_count:
+                raise HTTPException(status_code=400, detail=f"Page must be between 1 and {doc.page_count}")
+            
+            x, y, width, height = rect
+            if width <= 0 or height <= 0:
+                raise HTTPException(status_code=400, detail="Signature width and height must be positive")
+            if fitz.Rect(x, y, x + width, y + height) not in doc[page - 1].rect:
+                raise HTTPException(status_code=400, detail="Signature area must lie within the page")
+    
+    def _archive_documents(
+        self,
+        archive_path: str,
+        output_paths: List[str],
+        filenames: List[str],
+        results: List[Dict[str, Any]],
+        prefix: str
+    ) -> List[Dict[str, Any]]:
+        """Store batch outputs in one ZIP as <prefix>_<filename>, numbering duplicate names"""
+        documents = []
+        used_names = set()
+        with PartArchive(archive_path) as archive:
+            for index, (output_path, filename, result) in enumerate(zip(output_paths, filenames, results), start=1):
+                name = f"{prefix}_{filename}"
+                if name in used_names:
+                    name = f"{prefix}_{index:03d}_{filename}"
+                used_names.add(name)
+                with open(output_path, "rb") as signed_file:
+                    documents.append(archive.add(name, signed_file.read(), **result))
+        return documents
 
 # Global PDF processor instance
 pdf_processor = PDFProcessor()
\ No newline at end of file
@@ -0,0 +1,729 @@
+import os
+import re
+import json
+import codecs
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import fitz  # PyMuPDF
+from PIL import ImageCms
+
+from services.disk_cache import DiskCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Supported conformance levels: (PDF/A part, conformance letter)
+PDFA_LEVELS = {
+    "1b": (1, "B"),
+    "2b": (2, "B"),
+    "3b": (3, "B")
+}
+DEFAULT_PDFA_LEVEL = "2b"
+
+# Output intent written when a document has none
+OUTPUT_CONDITION = "sRGB IEC61966-2.1"
+
+PDFA_PRODUCER = "PDF Toolkit"
+
+# Embedding plans for non-embedded fonts (substitute, widths and descriptor
+# metrics), shared by all workers and keyed by a hash of the font dictionary
+font_cache = DiskCache(
+    os.getenv("PDFA_FONT_CACHE_PATH", "storage/cache/pdfa_fonts.db"),
+    int(float(os.getenv("PDFA_FONT_CACHE_MAX_MB", "16")) * 1024 * 1024)
+)
+# Bump when the plan format or substitution rules change
+FONT_PLAN_VERSION = 1
+
+# Actions PDF/A forbids, and the named actions it allows
+FORBIDDEN_ACTIONS = {
+    "Launch", "Sound", "Movie", "ResetForm", "ImportData", "Hide", "SetOCGState",
+    "Rendition", "Trans", "GoTo3DView", "JavaScript"
+}
+ALLOWED_NAMED_ACTIONS = {"NextPage", "PrevPage", "FirstPage", "LastPage"}
+
+# Annotation types PDF/A forbids; file attachments are allowed from PDF/A-3 on
+FORBIDDEN_ANNOTATIONS = {"Sound", "Movie", "Screen", "3D", "RichMedia", "TrapNet"}
+
+# Annotation flags: invisible, hidden, print, no-view, toggle-no-view
+_INVISIBLE, _HIDDEN, _PRINT, _NO_VIEW, _TOGGLE_NO_VIEW = 1, 2, 4, 32, 256
+
+# Built-in substitutes, by family and (bold, italic)
+_SUBSTITUTES = {
+    "sans": {(False, False): "helv", (True, False): "hebo", (False, True): "heit", (True, True): "hebi"},
+    "serif": {(False, False): "tiro", (True, False): "tibo", (False, True): "tiit", (True, True): "tibi"},
+    "mono": {(False, False): "cour", (True, False): "cobo", (False, True): "coit", (True, True): "cobi"}
+}
+_SERIF_NAMES = ("times", "serif", "roman", "georgia", "garamond", "cambria", "book", "palatino", "minion")
+_MONO_NAMES = ("courier", "mono", "consol", "typewriter")
+_BOLD_NAMES = ("bold", "black", "heavy", "semibold", "demi")
+_ITALIC_NAMES = ("italic", "oblique")
+
+# Font descriptor flags
+_FIXED_PITCH, _SERIF, _SYMBOLIC, _NONSYMBOLIC, _ITALIC, _FORCE_BOLD = 1, 2, 4, 32, 64, 262144
+
+# The upper half of StandardEncoding, the built-in encoding of the Latin base fonts
+_STANDARD_UPPER = {
+    161: 0xA1, 162: 0xA2, 163: 0xA3, 164: 0x2044, 165: 0xA5, 166: 0x192, 167: 0xA7, 168: 0xA4,
+    169: 0x27, 170: 0x201C, 171: 0xAB, 172: 0x2039, 173: 0x203A, 174: 0xFB01, 175: 0xFB02,
+    177: 0x2013, 178: 0x2020, 179: 0x2021, 180: 0xB7, 182: 0xB6, 183: 0x2022, 184: 0x201A,
+    185: 0x201E, 186: 0x201D, 187: 0xBB, 188: 0x2026, 189: 0x2030, 191: 0xBF, 193: 0x60,
+    194: 0xB4, 195: 0x2C6, 196: 0x2DC, 197: 0xAF, 198: 0x2D8, 199: 0x2D9, 200: 0xA8, 202: 0x2DA,
+    203: 0xB8, 205: 0x2DD, 206: 0x2DB, 207: 0x2C7, 208: 0x2014, 225: 0xC6, 227: 0xAA, 232: 0x141,
+    233: 0xD8, 234: 0x152, 235: 0xBA, 241: 0xE6, 245: 0x131, 248: 0x142, 249: 0xF8, 250: 0x153,
+    251: 0xDF
+}
+
+_SUBSET_PREFIX = re.compile(r"^[A-Z]{6}\+")
+_CMYK_OPERATOR = re.compile(rb"(?:[-+]?[\d.]+\s+){4}[kK](?![A-Za-z0-9_])")
+_PDF_VERSION = re.compile(rb"^%PDF-(\d)\.(\d)")
+_DIFFERENCES_TOKEN = re.compile(r"/[^\s/\[\]]+|[-+]?\d+")
+
+def convert_document_to_pdfa(input_path: str, output_path: str, level: str = DEFAULT_PDFA_LEVEL) -> Dict[str, Any]:
+    """Worker function: rewrite a PDF to conform to PDF/A at the given level
+    
+    Embeds missing fonts (metric-compatible built-in substitutes), adds an
+    sRGB output intent, removes JavaScript and other forbidden actions and
+    annotations, makes annotations printable with appearances, removes
+    transparency for PDF/A-1, converts LZW streams and writes matching XMP
+    and document info metadata. The output is then checked again and the
+    summary is returned under "validation".
+    """
+    part, conformance = PDFA_LEVELS[level]
+    stats = {
+        "level": level,
+        "fonts_embedded": 0,
+        "font_plans_cached": 0,
+        "fonts_substituted": [],
+        "actions_removed": 0,
+        "javascript_removed": 0,
+        "annotations_fixed": 0,
+        "annotations_removed": 0,
+        "transparency_removed": 0,
+        "embedded_files_removed": 0,
+        "lzw_streams_converted": 0,
+        "output_intent_added": False
+    }
+    
+    with fitz.open(input_path) as doc:
+        _remove_actions(doc, stats)
+        _fix_annotations(doc, part, stats)
+        _fix_embedded_files(doc, part, stats)
+        _fix_objects(doc, part, stats)
+        _embed_fonts(doc, stats)
+        _add_output_intent(doc, stats)
+        _write_metadata(doc, part, conformance)
+        doc.save(output_path, garbage=3, deflate=True)
+    
+    if part == 1:
+        _set_header_version(output_path, (1, 4))
+    
+    stats["validation"] = validate_pdfa(output_path, level)
+    return stats
+
+def _objects(doc: "fitz.Document"):
+    """(xref, keys) of every dictionary object in the document"""
+    for xref in range(1, doc.xref_length()):
+        try:
+            keys = doc.xref_get_keys(xref)
+        except Exception:
+            continue
+        if keys:
+            yield xref, keys
+
+def _name(doc: "fitz.Document", xref: int, key: str) -> Optional[str]:
+    kind, value = doc.xref_get_key(xref, key)
+    return value.lstrip("/") if kind == "name" else None
+
+def _resolve(doc: "fitz.Document", xref: int, path: str) -> Tuple[int, str]:
+    """Object and remaining key path for a path that may pass through indirect objects
+
+    xref_set_key only accepts paths through direct dictionaries.
+    """
+    parts = path.split("/")
+    for index in range(len(parts) - 1):
+        kind, reference = doc.xref_get_key(xref, "/".join(parts[:index + 1]))
+        if kind == "xref":
+            return _resolve(doc, int(reference.split()[0]), "/".join(parts[index + 1:]))
+    return xref, path
+
+def _delete_key(doc: "fitz.Document", xref: int, path: str):
+    """Remove a key; xref_set_key with null would leave a null entry behind"""
+    xref, path = _resolve(doc, xref, path)
+    *parents, key = path.split("/")
+    dictionary = fitz.mupdf.pdf_load_object(fitz._as_pdf_document(doc), xref)
+    for parent in parents:
+        dictionary = fitz.mupdf.pdf_dict_gets(dictionary, parent)
+    fitz.mupdf.pdf_dict_dels(dictionary, key)
+
+def _dict_keys(doc: "fitz.Document", xref: int, path: str) -> List[str]:
+    """Keys of the dictionary at a path, following indirect objects; empty when there is none"""
+    dictionary = fitz.mupdf.pdf_load_object(fitz._as_pdf_document(doc), xref)
+    for part in path.split("/"):
+        dictionary = fitz.mupdf.pdf_dict_gets(dictionary, part)
+    if not fitz.mupdf.pdf_is_dict(dictionary):
+        return []
+    return [
+        fitz.mupdf.pdf_to_name(fitz.mupdf.pdf_dict_get_key(dictionary, index))
+        for index in range(fitz.mupdf.pdf_dict_len(dictionary))
+    ]
+
+def _resource_entries(doc: "fitz.Document", category: str):
+    """(xref, key prefix) of every entry of a /Resources/<category> dictionary
+    
+    Covers the resources of pages, form XObjects and everything else that
+    has them. Entries are objects of their own (prefix "") or dictionaries
+    written inline, as PyMuPDF writes opacity states, with the prefix
+    leading to them; neither needs a /Type. Each entry is yielded once.
+    """
+    seen = set()
+    for xref, keys in _objects(doc):
+        if "Resources" not in keys:
+            continue
+        for name in _dict_keys(doc, xref, f"Resources/{category}"):
+            path = f"Resources/{category}/{name}"
+            kind, value = doc.xref_get_key(xref, path)
+            if kind == "xref":
+                entry = (int(value.split()[0]), "")
+            elif kind == "dict":
+                owner, path = _resolve(doc, xref, path)
+                entry = (owner, f"{path}/")
+            else:
+                continue
+            if entry not in seen:
+                seen.add(entry)
+                yield entry
+
+def _fonts(doc: "fitz.Document", subtypes: Tuple[str, ...]) -> List[Tuple[int, str]]:
+    """(xref, key prefix) of every font dictionary of the given subtypes, with or without /Type"""
+    fonts = [(xref, "") for xref, _ in _objects(doc) if _name(doc, xref, "Subtype") in subtypes]
+    fonts += [
+        (xref, prefix) for xref, prefix in _resource_entries(doc, "Font")
+        if prefix and _name(doc, xref, f"{prefix}Subtype") in subtypes
+    ]
+    return fonts
+
+def _has_font_program(doc: "fitz.Document", xref: int, prefix: str) -> bool:
+    return any(
+        doc.xref_get_key(xref, f"{prefix}FontDescriptor/{key}")[0] != "null"
+        for key in ("FontFile", "FontFile2", "FontFile3")
+    )
+
+def _transparency_fixes(doc: "fitz.Document", xref: int, prefix: str) -> Dict[str, str]:
+    """Opaque replacements for the entries that make a graphics state transparent"""
+    fixes = {}
+    for key in ("CA", "ca"):
+        kind, value = doc.xref_get_key(xref, f"{prefix}{key}")
+        if kind in ("int", "float") and float(value) != 1:
+            fixes[key] = "1"
+    if doc.xref_get_key(xref, f"{prefix}SMask")[0] != "null" and _name(doc, xref, f"{prefix}SMask") != "None":
+        fixes["SMask"] = "/None"
+    if doc.xref_get_key(xref, f"{prefix}BM")[0] != "null" and _name(doc, xref, f"{prefix}BM") not in ("Normal", "Compatible"):
+        fixes["BM"] = "/Normal"
+    return fixes
+
+def _is_forbidden_action(doc: "fitz.Document", xref: int, key: str) -> Tuple[bool, bool]:
+    """(forbidden, is JavaScript) for the action stored under key"""
+    action = _name(doc, xref, f"{key}/S")
+    if action == "Named":
+        return _name(doc, xref, f"{key}/N") not in ALLOWED_NAMED_ACTIONS, False
+    return action in FORBIDDEN_ACTIONS, action == "JavaScript"
+
+def _remove_actions(doc: "fitz.Document", stats: Dict[str, Any]):
+    """Drop JavaScript, additional actions (AA) and forbidden action types"""
+    catalog = doc.pdf_catalog()
+    if doc.xref_get_key(catalog, "Names/JavaScript")[0] != "null":
+        _delete_key(doc, catalog, "Names/JavaScript")
+        stats["javascript_removed"] += 1
+    
+    for xref, keys in _objects(doc):
+        if "AA" in keys:
+            _delete_key(doc, xref, "AA")
+            stats["actions_removed"] += 1
+        for key in ("A", "OpenAction"):
+            if key not in keys:
+                continue
+            forbidden, javascript = _is_forbidden_action(doc, xref, key)
+            if forbidden:
+                _delete_key(doc, xref, key)
+                stats["javascript_removed" if javascript else "actions_removed"] += 1
+
+def _fix_annotations(doc: "fitz.Document", part: int, stats: Dict[str, Any]):
+    """Make every annotation printable and visible with an appearance; drop forbidden types"""
+    forbidden = FORBIDDEN_ANNOTATIONS | ({"FileAttachment"} if part < 3 else set())
+    for page in doc:
+        for xref, _, _ in page.annot_xrefs():
+            subtype = _name(doc, xref, "Subtype")
+            if subtype in forbidden:
+                annot = page.load_annot(xref)
+                if annot is not None:
+                    page.delete_annot(annot)
+                    stats["annotations_removed"] += 1
+                continue
+            
+            kind, value = doc.xref_get_key(xref, "F")
+            flags = int(value) if kind == "int" else 0
+            fixed_flags = (flags | _PRINT) & ~(_INVISIBLE | _HIDDEN | _NO_VIEW | _TOGGLE_NO_VIEW)
+            changed = fixed_flags != flags
+            if changed:
+                doc.xref_set_key(xref, "F", str(fixed_flags))
+            
+            if subtype not in ("Popup", "Link") and doc.xref_get_key(xref, "AP/N")[0] == "null":
+                annot = page.load_annot(xref)
+                if annot is not None:
+                    try:
+                        annot.update()
+                        changed = True
+                    except Exception as e:
+                        logger.warning(f"Could not build appearance for {subtype} annotation {xref}: {e}")
+            if changed:
+                stats["annotations_fixed"] += 1
+    
+    # Viewers must not regenerate form field appearances
+    catalog = doc.pdf_catalog()
+    if doc.xref_get_key(catalog, "AcroForm/NeedAppearances")[0] != "null":
+        _delete_key(doc, catalog, "AcroForm/NeedAppearances")
+
+def _fix_embedded_files(doc: "fitz.Document", part: int, stats: Dict[str, Any]):
+    """PDF/A-1 and -2 (here) carry no embedded files; PDF/A-3 needs them declared as associated files"""
+    if part < 3:
+        for name in doc.embfile_names():
+            doc.embfile_del(name)
+            stats["embedded_files_removed"] += 1
+        return
+    
+    filespecs = [xref for xref, keys in _objects(doc) if "EF" in keys and _name(doc, xref, "Type") == "Filespec"]
+    for xref in filespecs:
+        if doc.xref_get_key(xref, "AFRelationship")[0] == "null":
+            doc.xref_set_key(xref, "AFRelationship", "/Unspecified")
+    if filespecs:
+        doc.xref_set_key(doc.pdf_catalog(), "AF", "[" + " ".join(f"{xref} 0 R" for xref in filespecs) + "]")
+
+def _fix_objects(doc: "fitz.Document", part: int, stats: Dict[str, Any]):
+    """Per-object fixes: image interpolation, transfer functions, LZW and, for PDF/A-1, transparency"""
+    for xref, prefix in _resource_entries(doc, "ExtGState"):
+        if doc.xref_get_key(xref, f"{prefix}TR")[0] != "null":
+            _delete_key(doc, xref, f"{prefix}TR")
+        if doc.xref_get_key(xref, f"{prefix}TR2")[0] != "null" and _name(doc, xref, f"{prefix}TR2") != "Default":
+            doc.xref_set_key(xref, f"{prefix}TR2", "/Default")
+        
+        if part > 1:
+            continue
+        # PDF/A-1 predates transparency
+        fixes = _transparency_fixes(doc, xref, prefix)
+        for key, value in fixes.items():
+            doc.xref_set_key(xref, f"{prefix}{key}", value)
+        if fixes:
+            stats["transparency_removed"] += 1
+    
+    for xref, keys in _objects(doc):
+        subtype = _name(doc, xref, "Subtype")
+        
+        if "Interpolate" in keys:
+            doc.xref_set_key(xref, "Interpolate", "false")
+        
+        if doc.xref_is_stream(xref) and "Filter" in keys and "LZWDecode" in doc.xref_get_key(xref, "Filter")[1]:
+            data = doc.xref_stream(xref)
+            _delete_key(doc, xref, "DecodeParms")
+            doc.update_stream(xref, data, compress=True)
+            stats["lzw_streams_converted"] += 1
+        
+        if part > 1:
+            continue
+        removed = False
+        if subtype == "Image" and "SMask" in keys:
+            _delete_key(doc, xref, "SMask")
+            removed = True
+        if "Group" in keys and _name(doc, xref, "Group/S") == "Transparency":
+            _delete_key(doc, xref, "Group")
+            removed = True
+        if removed:
+            stats["transparency_removed"] += 1
+
+def _embed_fonts(doc: "fitz.Document", stats: Dict[str, Any]):
+    """Embed a built-in substitute for every simple font without a font program
+    
+    Fonts with the same dictionary share one embedded program and
+    descriptor within a document, and their embedding plans are cached
+    across documents by font hash.
+    """
+    embedded: Dict[str, int] = {}
+    substituted = {}
+    for xref, prefix in _fonts(doc, ("Type1", "TrueType", "MMType1")):
+        if _has_font_program(doc, xref, prefix):
+            continue
+        
+        key, font = _font_key(doc, xref, prefix)
+        plan = _font_plan(key, font, stats)
+        descriptor = embedded.get(key)
+        if descriptor is None:
+            descriptor = _add_font_program(doc, font["base_font"], plan)
+            embedded[key] = descriptor
+        
+        # The whole program is embedded, so the name loses any subset tag
+        doc.xref_set_key(xref, f"{prefix}Subtype", "/Type1")
+        doc.xref_set_key(xref, f"{prefix}BaseFont", f"/{font['base_font']}")
+        doc.xref_set_key(xref, f"{prefix}FirstChar", "0")
+        doc.xref_set_key(xref, f"{prefix}LastChar", "255")
+        doc.xref_set_key(xref, f"{prefix}Widths", "[" + " ".join(str(width) for width in plan["widths"]) + "]")
+        doc.xref_set_key(xref, f"{prefix}FontDescriptor", f"{descriptor} 0 R")
+        stats["fonts_embedded"] += 1
+        substituted[font["base_font"]] = fitz.Font(plan["substitute"]).name
+    
+    stats["fonts_substituted"] = [{"font": name, "substitute": substitute} for name, substitute in substituted.items()]
+
+def _font_key(doc: "fitz.Document", xref: int, prefix: str) -> Tuple[str, Dict[str, Any]]:
+    """Hash of everything that decides a font's embedding plan, and those fields"""
+    kind, flags = doc.xref_get_key(xref, f"{prefix}FontDescriptor/Flags")
+    _, italic_angle = doc.xref_get_key(xref, f"{prefix}FontDescriptor/ItalicAngle")
+    _, weight = doc.xref_get_key(xref, f"{prefix}FontDescriptor/FontWeight")
+    encoding_kind, encoding = doc.xref_get_key(xref, f"{prefix}Encoding")
+    differences = ""
+    if encoding_kind in ("dict", "xref"):
+        encoding = doc.xref_get_key(xref, f"{prefix}Encoding/BaseEncoding")[1]
+        differences = " ".join(doc.xref_get_key(xref, f"{prefix}Encoding/Differences")[1].split())
+    
+    font = {
+        "base_font": _SUBSET_PREFIX.sub("", _name(doc, xref, f"{prefix}BaseFont") or "Unnamed"),
+        "flags": int(flags) if kind == "int" else 0,
+        "italic_angle": float(italic_angle) if italic_angle not in ("null", "") else 0.0,
+        "weight": float(weight) if weight not in ("null", "") else 0.0,
+        "encoding": encoding.lstrip("/") if encoding not in ("null", "") else "",
+        "differences": differences
+    }
+    digest = hashlib.sha256(json.dumps([FONT_PLAN_VERSION, font], sort_keys=True).encode("utf-8")).hexdigest()
+    return digest, font
+
+def _font_plan(key: str, font: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Substitute, widths and descriptor metrics for a font, from the cache when possible"""
+    cached = font_cache.get(key)
+    if cached is not None:
+        stats["font_plans_cached"] += 1
+        return json.loads(cached)
+    
+    substitute = _choose_substitute(font)
+    substitute_font = fitz.Font(substitute)
+    symbolic = substitute in ("symb", "zadb")
+    
+    widths = [round(advance * 1000) for advance in _advances(substitute_font, substitute, font)]
+    flags = (_SYMBOLIC if symbolic else _NONSYMBOLIC) | (font["flags"] & (_FIXED_PITCH | _SERIF | _ITALIC | _FORCE_BOLD))
+    if substitute.startswith("co"):
+        flags |= _FIXED_PITCH
+    if substitute.startswith("ti"):
+        flags |= _SERIF
+    if substitute.endswith(("it", "bi")):
+        flags |= _ITALIC
+    
+    bbox = substitute_font.bbox
+    plan = {
+        "substitute": substitute,
+        "widths": widths,
+        "flags": flags,
+        "italic_angle": -12 if flags & _ITALIC else 0,
+        "ascent": round(substitute_font.ascender * 1000),
+        "descent": round(substitute_font.descender * 1000),
+        "cap_height": round(substitute_font.glyph_bbox(ord("H")).y1 * 1000) if not symbolic else round(bbox.y1 * 1000),
+        "bbox": [round(value * 1000) for value in (bbox.x0, bbox.y0, bbox.x1, bbox.y1)],
+        "stem_v": 120 if substitute in ("hebo", "hebi", "tibo", "tibi", "cobo", "cobi") else 80
+    }
+    font_cache.put(key, json.dumps(plan).encode("utf-8"))
+    return plan
+
+def _choose_substitute(font: Dict[str, Any]) -> str:
+    name = font["base_font"].lower()
+    if "symbol" in name:
+        return "symb"
+    if "dingbat" in name:
+        return "zadb"
+    
+    if any(part in name for part in _MONO_NAMES) or font["flags"] & _FIXED_PITCH:
+        family = "mono"
+    elif any(part in name for part in _SERIF_NAMES) or font["flags"] & _SERIF:
+        family = "serif"
+    else:
+        family = "sans"
+    bold = any(part in name for part in _BOLD_NAMES) or bool(font["flags"] & _FORCE_BOLD) or font["weight"] >= 600
+    italic = any(part in name for part in _ITALIC_NAMES) or bool(font["flags"] & _ITALIC) or font["italic_angle"] != 0
+    return _SUBSTITUTES[family][(bold, italic)]
+
+def _advances(substitute_font: "fitz.Font", substitute: str, font: Dict[str, Any]) -> List[float]:
+    """Advance of the glyph each code 0-255 selects, following the font's encoding"""
+    if substitute == "symb" and not font["differences"]:
+        return [width for _, width in fitz.symbol_glyphs]
+    if substitute == "zadb" and not font["differences"]:
+        return [width for _, width in fitz.zapf_glyphs]
+    
+    advances = []
+    for code in range(256):
+        unicode = _encoded_unicode(font["encoding"], code)
+        advances.append(substitute_font.glyph_advance(unicode) if unicode and substitute_font.has_glyph(unicode) else 0.0)
+    
+    # Differences name glyphs directly: [code /name /name ... code /name ...]
+    code = 0
+    for token in _DIFFERENCES_TOKEN.findall(font["differences"]):
+        if not token.startswith("/"):
+            code = int(float(token))
+            continue
+        if 0 <= code < 256:
+            glyph = fitz.mupdf.fz_encode_character_by_glyph_name(substitute_font.this, token[1:])
+            advances[code] = fitz.mupdf.fz_advance_glyph(substitute_font.this, glyph, 0) if glyph else 0.0
+        code += 1
+    return advances
+
+def _encoded_unicode(encoding: str, code: int) -> Optional[int]:
+    if code < 32:
+        return None
+    if encoding == "WinAnsiEncoding":
+        return ord(codecs.decode(bytes([code]), "cp1252", errors="replace"))
+    if encoding == "MacRomanEncoding":
+        return ord(bytes([code]).decode("mac_roman"))
+    # StandardEncoding, the default for the Latin base fonts
+    if code < 127:
+        return {0x27: 0x2019, 0x60: 0x2018}.get(code, code)
+    return _STANDARD_UPPER.get(code)
+
+@lru_cache(maxsize=16)
+def _font_program(substitute: str) -> bytes:
+    return fitz.Font(substitute).buffer
+
+def _add_font_program(doc: "fitz.Document", base_font: str, plan: Dict[str, Any]) -> int:
+    """Add the substitute's CFF program and a font descriptor for it; returns the descriptor xref"""
+    program = doc.get_new_xref()
+    doc.update_object(program, "<< /Subtype /Type1C >>")
+    doc.update_stream(program, _font_program(plan["substitute"]), compress=True)
+    
+    descriptor = doc.get_new_xref()
+    doc.update_object(
+        descriptor,
+        f"<< /Type /FontDescriptor /FontName /{base_font} /Flags {plan['flags']} "
+        f"/FontBBox [{' '.join(str(value) for value in plan['bbox'])}] /ItalicAngle {plan['italic_angle']} "
+        f"/Ascent {plan['ascent']} /Descent {plan['descent']} /CapHeight {plan['cap_height']} "
+        f"/StemV {plan['stem_v']} /FontFile3 {program} 0 R >>"
+    )
+    return descriptor
+
+@lru_cache(maxsize=1)
+def _srgb_profile() -> bytes:
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+def _add_output_intent(doc: "fitz.Document", stats: Dict[str, Any]):
+    """Add an sRGB PDF/A output intent unless the document already has one"""
+    catalog = doc.pdf_catalog()
+    if _has_pdfa_intent(doc, catalog):
+        return
+    
+    profile = doc.get_new_xref()
+    doc.update_object(profile, "<< /N 3 >>")
+    doc.update_stream(profile, _srgb_profile(), compress=True)
+    
+    intent = doc.get_new_xref()
+    doc.update_object(
+        intent,
+        f"<< /Type /OutputIntent /S /GTS_PDFA1 /OutputConditionIdentifier ({OUTPUT_CONDITION}) "
+        f"/Info ({OUTPUT_CONDITION}) /DestOutputProfile {profile} 0 R >>"
+    )
+    doc.xref_set_key(catalog, "OutputIntents", f"[{intent} 0 R]")
+    stats["output_intent_added"] = True
+
+def _has_pdfa_intent(doc: "fitz.Document", catalog: int) -> bool:
+    kind, value = doc.xref_get_key(catalog, "OutputIntents")
+    if kind not in ("array", "xref"):
+        return False
+    for reference in re.findall(r"(\d+) 0 R", value):
+        if _name(doc, int(reference), "S") == "GTS_PDFA1" and doc.xref_get_key(int(reference), "DestOutputProfile")[0] != "null":
+            return True
+    return False
+
+def _pdf_date(moment: datetime) -> str:
+    return moment.strftime("D:%Y%m%d%H%M%S+00'00'")
+
+def _xmp_date(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+def _parse_pdf_date(value: str) -> Optional[datetime]:
+    match = re.match(r"D:(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?", value or "")
+    if not match:
+        return None
+    parts = [int(part) if part else default for part, default in zip(match.groups(), (0, 1, 1, 0, 0, 0))]
+    try:
+        return datetime(*parts, tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def _write_metadata(doc: "fitz.Document", part: int, conformance: str):
+    """Write XMP metadata with the PDF/A identification and an info dictionary that matches it"""
+    metadata = doc.metadata or {}
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    created = _parse_pdf_date(metadata.get("creationDate", "")) or now
+    
+    info = {
+        "title": metadata.get("title") or "",
+        "author": metadata.get("author") or "",
+        "subject": metadata.get("subject") or "",
+        "keywords": metadata.get("keywords") or "",
+        "creator": metadata.get("creator") or "",
+        "producer": metadata.get("producer") or PDFA_PRODUCER,
+        "creationDate": _pdf_date(created),
+        "modDate": _pdf_date(now)
+    }
+    doc.set_metadata(info)
+    
+    properties = [
+        f"<pdfaid:part>{part}</pdfaid:part>",
+        f"<pdfaid:conformance>{conformance}</pdfaid:conformance>",
+        f"<xmp:CreateDate>{_xmp_date(created)}</xmp:CreateDate>",
+        f"<xmp:ModifyDate>{_xmp_date(now)}</xmp:ModifyDate>",
+        f"<xmp:MetadataDate>{_xmp_date(now)}</xmp:MetadataDate>",
+        f"<pdf:Producer>{escape(info['producer'])}</pdf:Producer>"
+    ]
+    if info["title"]:
+        properties.append(f'<dc:title><rdf:Alt><rdf:li xml:lang="x-default">{escape(info["title"])}</rdf:li></rdf:Alt></dc:title>')
+    if info["author"]:
+        properties.append(f"<dc:creator><rdf:Seq><rdf:li>{escape(info['author'])}</rdf:li></rdf:Seq></dc:creator>")
+    if info["subject"]:
+        properties.append(f'<dc:description><rdf:Alt><rdf:li xml:lang="x-default">{escape(info["subject"])}</rdf:li></rdf:Alt></dc:description>')
+    if info["keywords"]:
+        properties.append(f"<pdf:Keywords>{escape(info['keywords'])}</pdf:Keywords>")
+    if info["creator"]:
+        properties.append(f"<xmp:CreatorTool>{escape(info['creator'])}</xmp:CreatorTool>")
+    
+    doc.set_xml_metadata(
+        '<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>\n'
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/">\n'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">\n'
+        '<rdf:Description rdf:about=""'
+        ' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+        ' xmlns:xmp="http://ns.adobe.com/xap/1.0/"'
+        ' xmlns:pdf="http://ns.adobe.com/pdf/1.3/"'
+        ' xmlns:pdfaid="http://www.aiim.org/pdfa/ns/id/">\n'
+        + "\n".join(properties) +
+        '\n</rdf:Description>\n</rdf:RDF>\n</x:xmpmeta>\n<?xpacket end="w"?>'
+    )
+
+def _set_header_version(path: str, version: Tuple[int, int]):
+    """Lower the %PDF-x.y header in place; same length, so offsets are unchanged"""
+    with open(path, "r+b") as output:
+        header = output.read(8)
+        match = _PDF_VERSION.match(header)
+        if match and (int(match.group(1)), int(match.group(2))) > version:
+            output.seek(0)
+            output.write(f"%PDF-{version[0]}.{version[1]}".encode())
+
+def validate_pdfa(path: str, level: str) -> Dict[str, Any]:
+    """Check a converted file against the PDF/A requirements this module handles
+    
+    Returns {level, compliant, checks: {name: passed}, issues: [...]}. This
+    is a structural self-check of the converted file, not a full
+    conformance validator.
+    """
+    part, conformance = PDFA_LEVELS[level]
+    issues: List[str] = []
+    checks: Dict[str, bool] = {}
+    
+    def check(name: str, passed: bool, issue: str):
+        checks[name] = passed
+        if not passed:
+            issues.append(issue)
+    
+    with open(path, "rb") as source:
+        header = _PDF_VERSION.match(source.read(8))
+    maximum = (1, 4) if part == 1 else (1, 7)
+    check(
+        "header_version",
+        bool(header) and (int(header.group(1)), int(header.group(2))) <= maximum,
+        f"PDF/A-{part} allows PDF versions up to {maximum[0]}.{maximum[1]}"
+    )
+    
+    with fitz.open(path) as doc:
+        check("not_encrypted", not doc.is_encrypted, "The document is encrypted")
+        check("trailer_id", doc.xref_get_key(-1, "ID")[0] == "array", "The trailer has no file identifier")
+        
+        catalog = doc.pdf_catalog()
+        check("output_intent", _has_pdfa_intent(doc, catalog), "No PDF/A output intent with an ICC profile")
+        
+        xmp = doc.get_xml_metadata() or ""
+        check(
+            "xmp_identification",
+            f"<pdfaid:part>{part}</pdfaid:part>" in xmp and f"<pdfaid:conformance>{conformance}</pdfaid:conformance>" in xmp,
+            "XMP metadata lacks the PDF/A identification"
+        )
+        
+        unembedded = set()
+        javascript = forbidden_actions = transparency = lzw = jpx = cmyk = 0
+        filespecs = undeclared_files = 0
+        for xref, prefix in _fonts(doc, ("Type1", "TrueType", "MMType1", "CIDFontType0", "CIDFontType2")):
+            if not _has_font_program(doc, xref, prefix):
+                unembedded.add(_name(doc, xref, f"{prefix}BaseFont") or f"font {xref}")
+        if part == 1:
+            transparency += sum(
+                1 for xref, prefix in _resource_entries(doc, "ExtGState") if _transparency_fixes(doc, xref, prefix)
+            )
+        for xref, keys in _objects(doc):
+            object_type = _name(doc, xref, "Type")
+            subtype = _name(doc, xref, "Subtype")
+            if "AA" in keys:
+                forbidden_actions += 1
+            for key in ("A", "OpenAction"):
+                if key in keys:
+                    forbidden, is_javascript = _is_forbidden_action(doc, xref, key)
+                    javascript += is_javascript
+                    forbidden_actions += forbidden and not is_javascript
+            if object_type == "Filespec" and "EF" in keys:
+                filespecs += 1
+                undeclared_files += doc.xref_get_key(xref, "AFRelationship")[0] == "null"
+            if doc.xref_is_stream(xref) and "Filter" in keys:
+                filters = doc.xref_get_key(xref, "Filter")[1]
+                lzw += "LZWDecode" in filters
+                jpx += "JPXDecode" in filters
+            if _name(doc, xref, "ColorSpace") == "DeviceCMYK":
+                cmyk += 1
+            if part == 1 and ((subtype == "Image" and "SMask" in keys) or _name(doc, xref, "Group/S") == "Transparency"):
+                transparency += 1
+        javascript += doc.xref_get_key(catalog, "Names/JavaScript")[0] != "null"
+        
+        annotation_issues = 0
+        for page in doc:
+            for xref, _, _ in page.annot_xrefs():
+                subtype = _name(doc, xref, "Subtype")
+                kind, value = doc.xref_get_key(xref, "F")
+                flags = int(value) if kind == "int" else 0
+                if (
+                    subtype in FORBIDDEN_ANNOTATIONS
+                    or not flags & _PRINT
+                    or flags & (_INVISIBLE | _HIDDEN | _NO_VIEW)
+                    or (subtype not in ("Popup", "Link") and doc.xref_get_key(xref, "AP/N")[0] == "null")
+                ):
+                    annotation_issues += 1
+            if not cmyk:
+                for content in page.get_contents():
+                    if _CMYK_OPERATOR.search(doc.xref_stream(content) or b""):
+                        cmyk += 1
+                        break
+    
+    check("fonts_embedded", not unembedded, f"Fonts not embedded: {', '.join(sorted(unembedded))}")
+    check("no_javascript", not javascript, "JavaScript remains in the document")
+    check("no_forbidden_actions", not forbidden_actions, "Forbidden actions remain in the document")
+    check("annotations", not annotation_issues, f"{annotation_issues} annotations are hidden, not printable or lack an appearance")
+    check("no_lzw", not lzw, "LZW-compressed streams remain")
+    check(
+        "device_colors",
+        not cmyk,
+        "DeviceCMYK is used but the output intent is RGB; convert the colors or use a CMYK output intent"
+    )
+    if part == 1:
+        check("no_transparency", not transparency, "Transparency remains, which PDF/A-1 forbids")
+        check("no_jpeg2000", not jpx, "JPEG 2000 images are not allowed in PDF/A-1")
+    if part < 3:
+        check("no_embedded_files", not filespecs, f"PDF/A-{part} does not allow these embedded files")
+    else:
+        check("embedded_files_declared", not undeclared_files, "Embedded files lack an AFRelationship")
+    
+    return {
+        "level": level,
+        "compliant": not issues,
+        "checks": checks,
+        "issues": issues
+    }
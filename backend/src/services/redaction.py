@@ -0,0 +1,153 @@
+import os
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+import fitz  # PyMuPDF
+import regex
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Named patterns accepted in place of a regular expression
+REDACTION_PATTERNS = {
+    "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
+    "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
+    "phone": r"(?<!\d)(?:\+?1[ .-]?)?\(?\d{3}\)?[ .-]?\d{3}[ .-]?\d{4}(?!\d)",
+    "credit_card": r"\b(?:\d[ -]?){12,18}\d\b",
+    "ip_address": r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
+}
+
+# Seconds one pattern may spend matching one page; patterns are user
+# supplied, and one that backtracks catastrophically would otherwise hold a
+# worker indefinitely
+REDACT_PATTERN_TIMEOUT = float(os.getenv("REDACT_PATTERN_TIMEOUT", "2"))
+
+class PatternTimeout(ValueError):
+    """Raised when a pattern takes longer than REDACT_PATTERN_TIMEOUT on a page"""
+
+def compile_patterns(patterns: List[str]) -> List[Tuple[str, "regex.Pattern"]]:
+    """Resolve pattern names and compile the rest as regular expressions
+    
+    Expressions are compiled with the regex module, whose matching can be
+    given a timeout. Raises regex.error for an invalid expression.
+    """
+    return [(pattern, regex.compile(REDACTION_PATTERNS.get(pattern, pattern))) for pattern in patterns]
+
+def build_text_index(page: "fitz.Page") -> Tuple[str, List[Tuple[float, float, float, float]]]:
+    """Page text as one string plus the bounding box of every character in it
+    
+    Built from a single extraction so that any number of patterns can be
+    matched against the page without searching it again. Lines are joined
+    with newlines, which get an empty box.
+    """
+    characters = []
+    boxes = []
+    for block in page.get_text("rawdict", flags=fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_PRESERVE_LIGATURES)["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    characters.append(char["c"])
+                    boxes.append(char["bbox"])
+            characters.append("\n")
+            boxes.append(None)
+    return "".join(characters), boxes
+
+def find_pattern_rects(
+    text: str,
+    boxes: List[Tuple[float, float, float, float]],
+    patterns: List[Tuple[str, "regex.Pattern"]]
+) -> Tuple[List["fitz.Rect"], Dict[str, int]]:
+    """Rectangles covering every pattern match, one per matched line segment
+    
+    Raises PatternTimeout when a pattern runs past REDACT_PATTERN_TIMEOUT.
+    """
+    rects = []
+    matches = {}
+    for name, pattern in patterns:
+        count = 0
+        try:
+            found = list(pattern.finditer(text, timeout=REDACT_PATTERN_TIMEOUT))
+        except TimeoutError:
+            raise PatternTimeout(f"Redaction pattern {name!r} took longer than {REDACT_PATTERN_TIMEOUT:g}s")
+        for match in found:
+            if match.end() == match.start():
+                continue
+            count += 1
+            segment = fitz.Rect()
+            for box in boxes[match.start():match.end()]:
+                if box is None:
+                    # Match continues on the next line
+                    if not segment.is_empty:
+                        rects.append(segment)
+                    segment = fitz.Rect()
+                    continue
+                segment |= box
+            if not segment.is_empty:
+                rects.append(segment)
+        matches[name] = count
+    return rects, matches
+
+def search_pages(
+    input_path: str,
+    page_numbers: List[int],
+    patterns: List[str]
+) -> Dict[int, Tuple[List[Tuple[float, float, float, float]], Dict[str, int]]]:
+    """Pattern match rectangles and counts for a range of pages (runs in a worker process)"""
+    compiled = compile_patterns(patterns)
+    with fitz.open(input_path) as doc:
+        found = {}
+        for page_number in page_numbers:
+            rects, matches = _search_page(doc[page_number], compiled)
+            found[page_number] = ([tuple(rect) for rect in rects], matches)
+        return found
+
+def _search_page(page: "fitz.Page", compiled: List[Tuple[str, "regex.Pattern"]]) -> Tuple[List["fitz.Rect"], Dict[str, int]]:
+    text, boxes = build_text_index(page)
+    try:
+        return find_pattern_rects(text, boxes, compiled)
+    except PatternTimeout as e:
+        raise PatternTimeout(f"{e} on page {page.number + 1}")
+
+def redact_document(
+    doc: "fitz.Document",
+    page_numbers: List[int],
+    areas_by_page: Dict[int, List[Tuple[float, float, float, float]]],
+    patterns: List[str],
+    found: Optional[Dict[int, Tuple[List[Tuple[float, float, float, float]], Dict[str, int]]]] = None
+) -> Dict[str, Any]:
+    """Mark all areas and pattern matches of each page, then apply them in one pass per page
+    
+    Areas are given in the page's displayed (rotated) coordinates. Pattern
+    matches come from `found` (see search_pages) when the pages were
+    searched elsewhere, and are searched here otherwise. Text under a
+    redaction is removed, image pixels are blanked and line art touching it
+    is removed.
+    """
+    compiled = compile_patterns(patterns) if found is None else []
+    stats = {"areas_redacted": 0, "pages_redacted": 0, "pattern_matches": {name: 0 for name in patterns}}
+    
+    for page_number in page_numbers:
+        page = doc[page_number]
+        rects = [fitz.Rect(area) * page.derotation_matrix for area in areas_by_page.get(page_number, [])]
+        # Only the requested areas count as areas; matches are counted per pattern
+        stats["areas_redacted"] += len(rects)
+        
+        if patterns:
+            if found is None:
+                pattern_rects, matches = _search_page(page, compiled)
+            else:
+                pattern_rects, matches = found[page_number]
+            rects.extend(fitz.Rect(rect) for rect in pattern_rects)
+            for name, count in matches.items():
+                stats["pattern_matches"][name] += count
+        
+        if not rects:
+            continue
+        for rect in rects:
+            page.add_redact_annot(rect, fill=(0, 0, 0))
+        page.apply_redactions(
+            images=fitz.PDF_REDACT_IMAGE_PIXELS,
+            graphics=fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED
+        )
+        stats["pages_redacted"] += 1
+    
+    return stats
@@ -0,0 +1,371 @@
+import os
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import fitz  # PyMuPDF
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Space reserved in the signature dictionary for the DER-encoded PKCS#7 blob
+SIGNATURE_CONTENTS_BYTES = 16384
+
+# Fixed-width placeholder patched with the real byte range after saving
+BYTE_RANGE_PLACEHOLDER = "[0 1000000000 1000000000 1000000000]"
+
+# Block size for searching the saved file for the placeholders and hashing it
+SIGNING_READ_BLOCK = 1024 * 1024
+
+# Object identifiers used in the CMS SignedData
+_OID_DATA = "1.2.840.113549.1.7.1"
+_OID_SIGNED_DATA = "1.2.840.113549.1.7.2"
+_OID_CONTENT_TYPE = "1.2.840.113549.1.9.3"
+_OID_MESSAGE_DIGEST = "1.2.840.113549.1.9.4"
+_OID_SIGNING_TIME = "1.2.840.113549.1.9.5"
+_OID_SHA256 = "2.16.840.1.101.3.4.2.1"
+_OID_RSA = "1.2.840.113549.1.1.1"
+_OID_ECDSA_SHA256 = "1.2.840.10045.4.3.2"
+
+# Appearance streams kept per worker, keyed by (text, width, height)
+APPEARANCE_CACHE_SIZE = 256
+
+# Widget /Matrix that keeps the appearance upright for each page /Rotate
+APPEARANCE_MATRICES = {
+    0: "[1 0 0 1 0 0]",
+    90: "[0 1 -1 0 0 0]",
+    180: "[-1 0 0 -1 0 0]",
+    270: "[0 -1 1 0 0 0]"
+}
+
+# Signing key and certificate chain loaded by this process
+_signer: Optional[Dict[str, Any]] = None
+
+class SigningUnavailable(RuntimeError):
+    """Raised when no signing key and certificate are configured or they cannot be loaded"""
+
+def load_signer():
+    """Worker initializer: load the signing key and certificate chain once per process
+    
+    Reads SIGNING_KEY_PATH (PEM private key, optionally protected by
+    SIGNING_KEY_PASSWORD) and SIGNING_CERT_PATH (PEM certificate followed
+    by any intermediates).
+    """
+    global _signer
+    key_path = os.getenv("SIGNING_KEY_PATH")
+    certificate_path = os.getenv("SIGNING_CERT_PATH")
+    if not key_path or not certificate_path:
+        logger.warning("SIGNING_KEY_PATH and SIGNING_CERT_PATH are not set; PDF signing is disabled")
+        return
+    
+    password = os.getenv("SIGNING_KEY_PASSWORD")
+    with open(key_path, "rb") as key_file:
+        key = serialization.load_pem_private_key(key_file.read(), password.encode() if password else None)
+    with open(certificate_path, "rb") as certificate_file:
+        certificates = x509.load_pem_x509_certificates(certificate_file.read())
+    
+    if not isinstance(key, (rsa.RSAPrivateKey, ec.EllipticCurvePrivateKey)):
+        raise ValueError("The signing key must be an RSA or EC key")
+    
+    common_names = certificates[0].subject.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
+    _signer = {
+        "key": key,
+        "certificate": certificates[0],
+        "chain": certificates[1:],
+        "name": common_names[0].value if common_names else ""
+    }
+    logger.info(f"Signing key loaded for {_signer['name'] or 'unnamed certificate'}")
+
+def _get_signer() -> Dict[str, Any]:
+    if _signer is None:
+        try:
+            load_signer()
+        except (OSError, ValueError, TypeError) as e:
+            raise SigningUnavailable(f"Signing key could not be loaded: {e}")
+    if _signer is None:
+        raise SigningUnavailable("Signing key and certificate are not configured")
+    return _signer
+
+@lru_cache(maxsize=APPEARANCE_CACHE_SIZE)
+def build_appearance(text: str, signer_name: str, width: float, height: float) -> bytes:
+    """Content stream of the visible signature box, built once per text and size"""
+    subtitle = f"Digitally signed by {signer_name}" if signer_name else "Digitally signed"
+    padding = min(6.0, width / 10, height / 10)
+    
+    title_size = min(
+        height * 0.45,
+        (width - 2 * padding) / max(fitz.get_text_length(text, fontname="helv", fontsize=1), 1)
+    )
+    subtitle_size = min(
+        height * 0.2,
+        (width - 2 * padding) / max(fitz.get_text_length(subtitle, fontname="helv", fontsize=1), 1)
+    )
+    
+    lines = [
+        "q 0.15 0.25 0.55 RG 1 w",
+        f"0.5 0.5 {width - 1:.2f} {height - 1:.2f} re S Q",
+        "BT 0.1 0.15 0.4 rg",
+        f"/Helv {title_size:.2f} Tf {padding:.2f} {height - padding - title_size * 0.8:.2f} Td",
+        f"({_escape_text(text)}) Tj ET",
+        "BT 0.35 g",
+        f"/Helv {subtitle_size:.2f} Tf {padding:.2f} {padding + subtitle_size * 0.25:.2f} Td",
+        f"({_escape_text(subtitle)}) Tj ET"
+    ]
+    return "\n".join(lines).encode("latin-1")
+
+def sign_document(
+    input_path: str,
+    output_path: str,
+    signature_text: str,
+    page_number: int,
+    rect: Tuple[float, float, float, float],
+    reason: str = ""
+) -> Dict[str, Any]:
+    """Add a visible signature field and a PKCS#7 signature as an incremental update (runs in a worker process)
+    
+    rect is (x, y, width, height) in points from the top-left of the page as
+    displayed. The signature covers the whole file except its own contents.
+    """
+    signer = _get_signer()
+    
+    shutil.copyfile(input_path, output_path)
+    with fitz.open(output_path) as doc:
+        field_name = _add_signature_field(doc, page_number, rect, signature_text, reason, signer["name"])
+        if doc.can_save_incrementally():
+            doc.saveIncr()
+            save_mode = "incremental"
+        else:
+            # Files that needed repair are rewritten once, then signed
+            temp_path = f"{output_path}.tmp"
+            doc.save(temp_path)
+            save_mode = "full"
+    if save_mode == "full":
+        os.replace(temp_path, output_path)
+    
+    _embed_signature(output_path, signer)
+    
+    return {
+        "field_name": field_name,
+        "page": page_number + 1,
+        "signer": signer["name"],
+        "save_mode": save_mode,
+        "output_size": os.path.getsize(output_path)
+    }
+
+def _add_signature_field(
+    doc: "fitz.Document",
+    page_number: int,
+    rect: Tuple[float, float, float, float],
+    signature_text: str,
+    reason: str,
+    signer_name: str
+) -> str:
+    """Create the signature dictionary, widget and appearance; return the field name"""
+    page = doc[page_number]
+    x, y, width, height = rect
+    # Displayed rectangle -> unrotated page -> PDF user space
+    pdf_rect = fitz.Rect(x, y, x + width, y + height) * page.derotation_matrix * ~page.transformation_matrix
+    pdf_rect.normalize()
+    
+    acroform_xref = _get_acroform(doc)
+    fields_type, fields = doc.xref_get_key(acroform_xref, "Fields")
+    if fields_type == "xref":
+        fields = doc.xref_object(int(fields.split()[0]), compressed=True)
+    field_name = f"Signature{fields.count(' R') + 1 if fields_type != 'null' else 1}"
+    
+    appearance_xref = doc.get_new_xref()
+    doc.update_object(
+        appearance_xref,
+        f"<< /Type /XObject /Subtype /Form /BBox [0 0 {width:.2f} {height:.2f}] "
+        f"/Matrix {APPEARANCE_MATRICES.get(page.rotation, APPEARANCE_MATRICES[0])} "
+        "/Resources << /Font << /Helv << /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        "/Encoding /WinAnsiEncoding >> >> >> >>"
+    )
+    doc.update_stream(appearance_xref, build_appearance(signature_text, signer_name, round(width, 2), round(height, 2)))
+    
+    signature_xref = doc.get_new_xref()
+    signed_at = datetime.now(timezone.utc).strftime("D:%Y%m%d%H%M%S+00'00'")
+    doc.update_object(
+        signature_xref,
+        "<< /Type /Sig /Filter /Adobe.PPKLite /SubFilter /adbe.pkcs7.detached "
+        f"/ByteRange {BYTE_RANGE_PLACEHOLDER} /Contents <{'0' * SIGNATURE_CONTENTS_BYTES * 2}> "
+        f"/M ({signed_at}) /Name {_text_string(signer_name)} /Reason {_text_string(reason)} >>"
+    )
+    
+    widget_xref = doc.get_new_xref()
+    doc.update_object(
+        widget_xref,
+        f"<< /Type /Annot /Subtype /Widget /FT /Sig /T {_text_string(field_name)} /V {signature_xref} 0 R "
+        f"/F 132 /Rect [{pdf_rect.x0:.2f} {pdf_rect.y0:.2f} {pdf_rect.x1:.2f} {pdf_rect.y1:.2f}] "
+        f"/P {page.xref} 0 R /AP << /N {appearance_xref} 0 R >> >>"
+    )
+    
+    _append_reference(doc, page.xref, "Annots", f"{widget_xref} 0 R")
+    _append_reference(doc, acroform_xref, "Fields", f"{widget_xref} 0 R")
+    # SignaturesExist | AppendOnly
+    doc.xref_set_key(acroform_xref, "SigFlags", "3")
+    return field_name
+
+def _get_acroform(doc: "fitz.Document") -> int:
+    """xref of the document's AcroForm dictionary, making it an indirect object if needed"""
+    catalog = doc.pdf_catalog()
+    value_type, value = doc.xref_get_key(catalog, "AcroForm")
+    if value_type == "xref":
+        return int(value.split()[0])
+    
+    acroform_xref = doc.get_new_xref()
+    doc.update_object(acroform_xref, value if value_type == "dict" else "<< /Fields [] >>")
+    doc.xref_set_key(catalog, "AcroForm", f"{acroform_xref} 0 R")
+    return acroform_xref
+
+def _append_reference(doc: "fitz.Document", xref: int, key: str, reference: str):
+    """Append an object reference to an array entry that may be direct, indirect or missing"""
+    value_type, value = doc.xref_get_key(xref, key)
+    if value_type == "xref":
+        array_xref = int(value.split()[0])
+        array = doc.xref_object(array_xref, compressed=True).strip()
+        doc.update_object(array_xref, f"{array[:-1]} {reference}]")
+    elif value_type == "array":
+        doc.xref_set_key(xref, key, f"{value.strip()[:-1]} {reference}]")
+    else:
+        doc.xref_set_key(xref, key, f"[{reference}]")
+
+def _embed_signature(path: str, signer: Dict[str, Any]):
+    """Patch the byte range and PKCS#7 signature into the saved file in place
+    
+    The placeholders are searched for from the end of the file, where the
+    incremental update put them, and the signed byte ranges are hashed in
+    blocks, so the file is never held in memory.
+    """
+    contents_placeholder = b"<" + b"0" * (SIGNATURE_CONTENTS_BYTES * 2) + b">"
+    with open(path, "r+b") as pdf_file:
+        size = os.fstat(pdf_file.fileno()).st_size
+        contents_start = _rfind(pdf_file, contents_placeholder, size)
+        byte_range_start = _rfind(pdf_file, BYTE_RANGE_PLACEHOLDER.encode(), contents_start) if contents_start >= 0 else -1
+        if contents_start < 0 or byte_range_start < 0:
+            raise RuntimeError("Signature placeholder not found in saved file")
+        contents_end = contents_start + len(contents_placeholder)
+        
+        byte_range = f"[0 {contents_start} {contents_end} {size - contents_end}]"
+        pdf_file.seek(byte_range_start)
+        pdf_file.write(byte_range.ljust(len(BYTE_RANGE_PLACEHOLDER)).encode())
+        
+        digest = hashlib.sha256()
+        for start, end in ((0, contents_start), (contents_end, size)):
+            pdf_file.seek(start)
+            remaining = end - start
+            while remaining:
+                block = pdf_file.read(min(SIGNING_READ_BLOCK, remaining))
+                digest.update(block)
+                remaining -= len(block)
+        
+        signature = _signed_data(digest.digest(), signer)
+        if len(signature) > SIGNATURE_CONTENTS_BYTES:
+            raise RuntimeError(f"Signature of {len(signature)} bytes exceeds the reserved space")
+        
+        pdf_file.seek(contents_start + 1)
+        pdf_file.write(signature.hex().upper().ljust(SIGNATURE_CONTENTS_BYTES * 2, "0").encode())
+
+def _rfind(pdf_file: Any, needle: bytes, end: int) -> int:
+    """Offset of the last occurrence of needle that ends before end, reading backwards in blocks"""
+    position = end
+    tail = b""
+    while position > 0:
+        start = max(0, position - SIGNING_READ_BLOCK)
+        pdf_file.seek(start)
+        # Keep enough of the previous block to find a needle across the boundary
+        window = pdf_file.read(position - start) + tail
+        found = window.rfind(needle)
+        if found >= 0:
+            return start + found
+        tail = window[:len(needle) - 1]
+        position = start
+    return -1
+
+def _signed_data(digest: bytes, signer: Dict[str, Any]) -> bytes:
+    """DER-encoded detached CMS SignedData (adbe.pkcs7.detached) for a SHA-256 content digest
+    
+    The signed attributes carry the digest, so only they are signed and the
+    content itself never has to be passed to the signer.
+    """
+    certificate = signer["certificate"]
+    signed_attributes = _der_set(
+        _der_sequence(_der_oid(_OID_CONTENT_TYPE), _der_set(_der_oid(_OID_DATA))),
+        _der_sequence(
+            _der_oid(_OID_SIGNING_TIME),
+            _der_set(_der(0x17, datetime.now(timezone.utc).strftime("%y%m%d%H%M%SZ").encode()))
+        ),
+        _der_sequence(_der_oid(_OID_MESSAGE_DIGEST), _der_set(_der(0x04, digest)))
+    )
+    key = signer["key"]
+    if isinstance(key, rsa.RSAPrivateKey):
+        signature = key.sign(signed_attributes, padding.PKCS1v15(), hashes.SHA256())
+        signature_algorithm = _der_sequence(_der_oid(_OID_RSA), b"\x05\x00")
+    else:
+        signature = key.sign(signed_attributes, ec.ECDSA(hashes.SHA256()))
+        signature_algorithm = _der_sequence(_der_oid(_OID_ECDSA_SHA256))
+    
+    digest_algorithm = _der_sequence(_der_oid(_OID_SHA256), b"\x05\x00")
+    signer_info = _der_sequence(
+        _der_integer(1),
+        _der_sequence(certificate.issuer.public_bytes(), _der_integer(certificate.serial_number)),
+        digest_algorithm,
+        # [0] IMPLICIT: the attributes as signed, with the context tag
+        b"\xa0" + signed_attributes[1:],
+        signature_algorithm,
+        _der(0x04, signature)
+    )
+    certificates = b"".join(
+        item.public_bytes(serialization.Encoding.DER) for item in [certificate, *signer["chain"]]
+    )
+    signed_data = _der_sequence(
+        _der_integer(1),
+        _der_set(digest_algorithm),
+        _der_sequence(_der_oid(_OID_DATA)),
+        _der(0xA0, certificates),
+        _der_set(signer_info)
+    )
+    return _der_sequence(_der_oid(_OID_SIGNED_DATA), _der(0xA0, signed_data))
+
+def _der(tag: int, content: bytes) -> bytes:
+    length = len(content)
+    if length < 0x80:
+        return bytes([tag, length]) + content
+    encoded_length = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(encoded_length)]) + encoded_length + content
+
+def _der_sequence(*items: bytes) -> bytes:
+    return _der(0x30, b"".join(items))
+
+def _der_set(*items: bytes) -> bytes:
+    # DER orders the members of a SET OF by their encoding
+    return _der(0x31, b"".join(sorted(items)))
+
+def _der_integer(value: int) -> bytes:
+    return _der(0x02, value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True))
+
+def _der_oid(dotted: str) -> bytes:
+    numbers = [int(part) for part in dotted.split(".")]
+    encoded = bytearray([numbers[0] * 40 + numbers[1]])
+    for number in numbers[2:]:
+        chunk = [number & 0x7F]
+        number >>= 7
+        while number:
+            chunk.append(0x80 | (number & 0x7F))
+            number >>= 7
+        encoded.extend(reversed(chunk))
+    return _der(0x06, bytes(encoded))
+
+def _text_string(text: str) -> str:
+    """PDF text string as UTF-16BE hex, safe for any characters"""
+    return "<FEFF" + text.encode("utf-16-be").hex().upper() + ">"
+
+def _escape_text(text: str) -> str:
+    """Literal string for a WinAnsi-encoded content stream"""
+    encoded = text.encode("cp1252", "replace").decode("latin-1")
+    return encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
@@ -0,0 +1,123 @@
+import logging
+from typing import Any, Dict, List, Tuple
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.text import MSO_AUTO_SIZE, PP_ALIGN
+from pptx.util import Emu, Pt
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "image" puts a render of each page on its slide, which looks exactly like
+# the PDF; "editable" rebuilds each page from text boxes, images and tables
+SLIDE_MODES = ["image", "editable"]
+
+# PowerPoint slides may be 1 to 56 inches along each side
+MIN_SLIDE_EMU = 914400
+MAX_SLIDE_EMU = 51206400
+EMU_PER_POINT = 12700
+
+# Text boxes are widened a little, since substitute fonts rarely have the
+# PDF font's exact widths and would otherwise wrap the last word
+TEXT_BOX_SLACK = 1.04
+
+# Table text size from the row height, within these bounds (points)
+MIN_TABLE_FONT_POINTS = 6
+MAX_TABLE_FONT_POINTS = 14
+
+# Blank layout of the default template
+_BLANK_LAYOUT = 6
+
+_ALIGNMENTS = {"left": PP_ALIGN.LEFT, "center": PP_ALIGN.CENTER, "right": PP_ALIGN.RIGHT}
+
+def slide_size(width: float, height: float) -> Tuple[int, int]:
+    """Slide size in EMU for a page size in points, scaled into PowerPoint's limits"""
+    width_emu, height_emu = width * EMU_PER_POINT, height * EMU_PER_POINT
+    scale = min(1, MAX_SLIDE_EMU / width_emu, MAX_SLIDE_EMU / height_emu)
+    scale = max(scale, MIN_SLIDE_EMU / width_emu, MIN_SLIDE_EMU / height_emu)
+    return round(width_emu * scale), round(height_emu * scale)
+
+def write_pptx(slides: List[Dict[str, Any]], output_path: str, size: Tuple[int, int]) -> Dict[str, int]:
+    """Worker: a presentation with one slide per page
+    
+    Each slide spec has the page's width and height in points and either an
+    "image" path (a page render) or the "elements" of an extracted page
+    layout. Pages whose aspect ratio differs from the slide's are scaled to
+    fit and centered.
+    """
+    presentation = Presentation()
+    presentation.slide_width, presentation.slide_height = size
+    layout = presentation.slide_layouts[_BLANK_LAYOUT]
+    
+    counts = {"text_boxes": 0, "images": 0, "tables": 0}
+    for spec in slides:
+        slide = presentation.slides.add_slide(layout)
+        scale = min(size[0] / spec["width"], size[1] / spec["height"])
+        offset = ((size[0] - spec["width"] * scale) / 2, (size[1] - spec["height"] * scale) / 2)
+        
+        def place(bbox: Tuple[float, ...]) -> Tuple[Emu, Emu, Emu, Emu]:
+            x0, y0, x1, y1 = bbox
+            return (
+                Emu(round(offset[0] + x0 * scale)), Emu(round(offset[1] + y0 * scale)),
+                Emu(max(round((x1 - x0) * scale), 1)), Emu(max(round((y1 - y0) * scale), 1))
+            )
+        
+        if "image" in spec:
+            slide.shapes.add_picture(spec["image"], *place((0, 0, spec["width"], spec["height"])))
+            counts["images"] += 1
+            continue
+        
+        points = scale / EMU_PER_POINT
+        for element in spec["elements"]:
+            if element["type"] == "paragraph":
+                _add_text_box(slide, element, place, points)
+                counts["text_boxes"] += 1
+            elif element["type"] == "image":
+                slide.shapes.add_picture(element["path"], *place(element["bbox"]))
+                counts["images"] += 1
+            else:
+                _add_table(slide, element, place, points)
+                counts["tables"] += 1
+    
+    presentation.save(output_path)
+    return counts
+
+def _add_text_box(slide: Any, element: Dict[str, Any], place: Any, points: float):
+    x0, y0, x1, y1 = element["bbox"]
+    left, top, width, height = place((x0, y0, x0 + (x1 - x0) * TEXT_BOX_SLACK, y1))
+    frame = slide.shapes.add_textbox(left, top, width, height).text_frame
+    frame.word_wrap = True
+    frame.auto_size = MSO_AUTO_SIZE.NONE
+    frame.margin_left = frame.margin_right = frame.margin_top = frame.margin_bottom = 0
+    
+    paragraph = frame.paragraphs[0]
+    paragraph.alignment = _ALIGNMENTS[element["align"]]
+    for run in element["runs"]:
+        text_run = paragraph.add_run()
+        text_run.text = run["text"]
+        font = text_run.font
+        font.name = run["font"]
+        font.size = Pt(round(run["size"] * points * 2) / 2 or 1)
+        if run["bold"]:
+            font.bold = True
+        if run["italic"]:
+            font.italic = True
+        if run["color"]:
+            font.color.rgb = RGBColor.from_string(f"{run['color']:06X}")
+
+def _add_table(slide: Any, element: Dict[str, Any], place: Any, points: float):
+    rows = element["rows"]
+    left, top, width, height = place(element["bbox"])
+    table = slide.shapes.add_table(len(rows), len(element["widths"]), left, top, width, height).table
+    
+    x0, y0, x1, y1 = element["bbox"]
+    font_size = Pt(min(max((y1 - y0) / len(rows) * 0.55 * points, MIN_TABLE_FONT_POINTS), MAX_TABLE_FONT_POINTS))
+    if all(element["widths"]):
+        total = sum(element["widths"])
+        for column, column_width in zip(table.columns, element["widths"]):
+            column.width = Emu(round(width * column_width / total))
+    for row, values in zip(table.rows, rows):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+            for paragraph in cell.text_frame.paragraphs:
+                paragraph.font.size = font_size
@@ -0,0 +1,251 @@
+import re
+import logging
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+import pdfplumber
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "lines" finds tables drawn with rules, "text" tables laid out by word
+# alignment alone (most bank statements); "auto" tries rules first and falls
+# back to alignment on pages without ruled tables
+TABLE_STRATEGIES = ["auto", "lines", "text"]
+
+LINE_TABLE_SETTINGS = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+TEXT_TABLE_SETTINGS = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+    "min_words_vertical": 3,
+    "min_words_horizontal": 1,
+    "text_x_tolerance": 2,
+    "snap_y_tolerance": 2
+}
+
+# Smallest tables kept. Alignment finds "tables" in plain prose, so its
+# results need more rows and columns to count
+MIN_TABLE_ROWS = 2
+MIN_TABLE_COLUMNS = 2
+MIN_TEXT_TABLE_ROWS = 3
+MIN_TEXT_TABLE_COLUMNS = 3
+
+# Words closer than this share of their height are separated by a word space,
+# not a column gap. A boundary crossed at a word space in this share of a
+# table's rows splits a column in two
+WORD_GAP_SHARE = 0.6
+SPLIT_COLUMN_SHARE = 0.5
+
+# Excel's row limit per worksheet; longer tables continue on a new sheet
+EXCEL_MAX_ROWS = 1_048_576
+MAX_COLUMN_WIDTH = 60
+
+# Numbers as printed in statements: thousands separators, a currency symbol,
+# a trailing minus or parentheses for negatives. Values with a leading zero
+# or more than 15 digits (account numbers, IDs) stay text
+_NUMBER = re.compile(r"^(?P<sign>[-+(])?[$€£¥]?\s?(?P<digits>\d{1,3}(,\d{3})+|\d+)(?P<fraction>\.\d+)?(?P<trailing>[-)])?$")
+
+def extract_page_tables(input_path: str, page_numbers: List[int], strategy: str) -> List[Dict[str, Any]]:
+    """Worker: the tables of each page, as rows of cell values
+    
+    Page objects are closed as soon as they are read, so a chunk never holds
+    more than one page's characters and lines.
+    """
+    pages = []
+    with pdfplumber.open(input_path, pages=[page_number + 1 for page_number in page_numbers]) as pdf:
+        for page in pdf.pages:
+            try:
+                pages.append({"page": page.page_number, "tables": _page_tables(page, strategy)})
+            finally:
+                page.close()
+    return pages
+
+def _page_tables(page: Any, strategy: str) -> List[List[List[Any]]]:
+    words = page.extract_words()
+    tables = []
+    if strategy in ("auto", "lines") and page.edges:
+        tables = _find_tables(page, words, LINE_TABLE_SETTINGS, MIN_TABLE_ROWS, MIN_TABLE_COLUMNS)
+    if strategy == "text" or (strategy == "auto" and not tables):
+        tables = _find_tables(page, words, TEXT_TABLE_SETTINGS, MIN_TEXT_TABLE_ROWS, MIN_TEXT_TABLE_COLUMNS)
+    return tables
+
+def _find_tables(
+    page: Any,
+    words: List[Dict[str, Any]],
+    settings: Dict[str, Any],
+    min_rows: int,
+    min_columns: int
+) -> List[List[List[Any]]]:
+    aligned = settings["vertical_strategy"] == "text"
+    tables = []
+    for table in page.find_tables(settings):
+        rows, tight = _table_rows(table, words)
+        if aligned:
+            rows = _fix_alignment(rows, tight)
+        rows = [row for row in rows if any(row)]
+        if not rows:
+            continue
+        
+        # Drop columns empty in every row, which alignment leaves between words
+        columns = [index for index in range(len(rows[0])) if any(row[index] for row in rows)]
+        rows = [[row[index] for index in columns] for row in rows]
+        if len(rows) >= min_rows and len(columns) >= min_columns:
+            tables.append([[_cell_value(text) for text in row] for row in rows])
+    return tables
+
+def _table_rows(table: Any, words: List[Dict[str, Any]]) -> Tuple[List[List[str]], List[Set[int]]]:
+    """Cell texts of a table from the page's words, and the tight column boundaries of each row
+    
+    Each word goes to the grid cell under its center, found by bisecting the
+    row tops and column lefts. pdfplumber's own Table.extract() scans every
+    character once per row, which dominates the run time on long tables.
+    Words of a merged cell land in the grid cell they cover; lines wrapped
+    within a cell are joined with spaces. A boundary is tight in a row when
+    words on either side of it are only a word space apart; boundary c lies
+    left of column c.
+    """
+    x0, top, x1, bottom = table.bbox
+    row_tops = [row.bbox[1] for row in table.rows]
+    column_lefts = sorted({cell[0] for row in table.rows for cell in row.cells if cell})
+    cells = [[[] for _ in column_lefts] for _ in row_tops]
+    placed = [[] for _ in row_tops]
+    for word in words:
+        x = (word["x0"] + word["x1"]) / 2
+        y = (word["top"] + word["bottom"]) / 2
+        if x0 <= x <= x1 and top <= y <= bottom:
+            row = bisect_right(row_tops, y) - 1
+            column = bisect_right(column_lefts, x) - 1
+            cells[row][column].append(word["text"])
+            placed[row].append((word["x0"], word["x1"], word["top"], word["bottom"], column))
+    
+    tight = []
+    for row_words in placed:
+        row_words.sort()
+        boundaries = set()
+        for left, right in zip(row_words, row_words[1:]):
+            height = max(left[3] - left[2], right[3] - right[2])
+            same_line = abs(left[2] - right[2]) < height / 2
+            if same_line and left[4] != right[4] and right[0] - left[1] < height * WORD_GAP_SHARE:
+                boundaries.update(range(left[4] + 1, right[4] + 1))
+        tight.append(boundaries)
+    return [[" ".join(cell) for cell in row] for row in cells], tight
+
+def _fix_alignment(rows: List[List[str]], tight: List[Set[int]]) -> List[List[str]]:
+    """Undo the two mistakes alignment makes around word-spaced text
+    
+    A boundary that is tight in most rows splits a column wherever its
+    words happen to line up ("Payment ref | 0038"); the columns are joined.
+    Rows still crossing a boundary at a word space are running text, such as
+    a statement's heading pulled into the table; they are trimmed from the
+    top and bottom of the table.
+    """
+    filled = sum(1 for row in rows if any(row)) or 1
+    counts = Counter(boundary for boundaries in tight for boundary in boundaries)
+    joined = {boundary for boundary, count in counts.items() if count >= max(2, filled * SPLIT_COLUMN_SHARE)}
+    if joined:
+        groups = [[0]]
+        for column in range(1, len(rows[0])):
+            if column in joined:
+                groups[-1].append(column)
+            else:
+                groups.append([column])
+        rows = [[" ".join(row[column] for column in group if row[column]) for group in groups] for row in rows]
+    
+    running = [bool(boundaries - joined) for boundaries in tight]
+    start, end = 0, len(rows)
+    while start < end and (running[start] or not any(rows[start])):
+        start += 1
+    while end > start and (running[end - 1] or not any(rows[end - 1])):
+        end -= 1
+    return rows[start:end]
+
+def _cell_value(text: str) -> Any:
+    """A number for numeric-looking text, the text otherwise"""
+    match = _NUMBER.match(text)
+    if not match:
+        return text
+    digits = match["digits"].replace(",", "")
+    if (len(digits) > 1 and digits.startswith("0")) or len(digits) > 15:
+        return text
+    sign, trailing = match["sign"], match["trailing"]
+    if (sign == "(") != (trailing == ")"):
+        return text
+    value = float(digits + match["fraction"]) if match["fraction"] else int(digits)
+    return -value if sign in ("-", "(") or trailing == "-" else value
+
+class TableWorkbookWriter:
+    """Streams extracted tables into a write-only workbook, one sheet per table
+    
+    Pages must be added in order. A table that opens a page and matches the
+    column count of the table that closed the previous page is taken as its
+    continuation: its rows go on the same sheet, without a repeated header.
+    Rows are flushed to disk as they are written, so memory does not grow
+    with the document.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.tables: List[Dict[str, Any]] = []
+        self._sheet = None
+        self._header: Optional[List[Any]] = None
+        self._last_page = 0
+        self._bold = Font(bold=True)
+    
+    def add_pages(self, pages: List[Dict[str, Any]]):
+        for page in pages:
+            for index, rows in enumerate(page["tables"]):
+                current = self.tables[-1] if self.tables else None
+                if (
+                    index == 0 and current and self._last_page == page["page"] - 1
+                    and len(rows[0]) == current["columns"]
+                    and current["rows"] + len(rows) <= EXCEL_MAX_ROWS
+                ):
+                    if rows[0] == self._header:
+                        rows = rows[1:]
+                    current["pages"][1] = page["page"]
+                else:
+                    current = self._new_sheet(rows, page["page"])
+                    self._sheet.append([self._header_cell(value) for value in rows[0]])
+                    rows = rows[1:]
+                    current["rows"] += 1
+                for row in rows:
+                    self._sheet.append(row)
+                current["rows"] += len(rows)
+            if page["tables"]:
+                self._last_page = page["page"]
+    
+    def close(self) -> Dict[str, Any]:
+        """Save the workbook and return what was written"""
+        self.workbook.save(self.path)
+        return {
+            "tables_found": len(self.tables),
+            "rows_written": sum(table["rows"] for table in self.tables),
+            "tables": self.tables
+        }
+    
+    def _new_sheet(self, rows: List[List[Any]], page_number: int) -> Dict[str, Any]:
+        table = {
+            "sheet": f"Table {len(self.tables) + 1}",
+            "pages": [page_number, page_number],
+            "columns": len(rows[0]),
+            "rows": 0
+        }
+        self.tables.append(table)
+        self._sheet = self.workbook.create_sheet(table["sheet"])
+        self._header = rows[0]
+        # Write-only sheets take their layout before the first row
+        self._sheet.freeze_panes = "A2"
+        for column in range(table["columns"]):
+            width = max(len(str(row[column])) for row in rows)
+            self._sheet.column_dimensions[get_column_letter(column + 1)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        return table
+    
+    def _header_cell(self, value: Any) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self._sheet, value)
+        cell.font = self._bold
+        return cell
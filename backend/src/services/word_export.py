@@ -0,0 +1,420 @@
+import os
+import re
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import fitz  # PyMuPDF
+from docx import Document
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt, RGBColor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Layout the native engine can't reproduce in a flowing Word document. A page
+# showing any of these is reported as complex:
+# - this many pairs of wide lines side by side at the same height (columns);
+#   narrower lines are labels and values, which flow fine
+COLUMN_LINE_PAIRS = 5
+COLUMN_MIN_LINE_SHARE = 0.25
+# - this share of its characters on rotated lines
+MAX_ROTATED_TEXT_SHARE = 0.1
+# - this many vector drawing commands (charts, diagrams, drawn forms)
+MAX_PAGE_DRAWINGS = 1000
+
+# Ruled grids smaller than this are usually boxed text rather than tables.
+# Table detection is the slowest step, so it is skipped on pages drawing
+# fewer lines and rectangles than the smallest table needs
+MIN_TABLE_ROWS = 2
+MIN_TABLE_COLUMNS = 2
+MIN_TABLE_RULES = 3
+
+# Images Word can display as they are; others are converted to PNG. Images
+# smaller than MIN_IMAGE_POINTS on both sides (rules, bullets) are dropped
+WORD_IMAGE_FORMATS = {"png", "jpeg", "jpg", "gif", "bmp", "tiff"}
+MIN_IMAGE_POINTS = 4
+
+# Page margins come from the text area, within these bounds (points)
+DEFAULT_MARGIN_POINTS = 72
+MIN_MARGIN_POINTS = 18
+MAX_MARGIN_POINTS = 108
+
+# Largest gap above a paragraph carried over as spacing (points)
+MAX_SPACE_BEFORE = 72
+
+_SUBSET_TAG = re.compile(r"^[A-Z]{6}\+")
+_POSTSCRIPT_SUFFIX = re.compile(r"(PSMT|PS|MT)$")
+_CAMEL_CASE = re.compile(r"(?<=[a-z])(?=[A-Z])")
+_LIST_MARKER = re.compile(r"^\s*([•▪●–—\-*]|\(?\d{1,3}[.)]|\(?[a-z][.)])\s")
+_SENTENCE_END = (".", "!", "?", ":")
+
+# PostScript font names and the family names Word knows them by
+_FONT_FAMILIES = {
+    "TimesNewRoman": "Times New Roman",
+    "Times": "Times New Roman",
+    "Helvetica": "Arial",
+    "CourierNew": "Courier New",
+    "Courier": "Courier New",
+    "ZapfDingbats": "Wingdings"
+}
+
+_ALIGNMENTS = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT
+}
+_TABLE_ALIGNMENTS = {
+    "left": WD_TABLE_ALIGNMENT.LEFT,
+    "center": WD_TABLE_ALIGNMENT.CENTER,
+    "right": WD_TABLE_ALIGNMENT.RIGHT
+}
+
+def extract_page_layouts(input_path: str, page_numbers: List[int], image_dir: str) -> List[Dict[str, Any]]:
+    """Worker: the paragraphs, tables and images of each page, in reading order
+    
+    Images are written to image_dir under a hash of their bytes, so a logo
+    repeated on every page is stored once and the layouts passed back from
+    the worker stay small.
+    """
+    with fitz.open(input_path) as doc:
+        return [_page_layout(doc[page_number], image_dir) for page_number in page_numbers]
+
+def write_docx(layouts: List[Dict[str, Any]], output_path: str) -> Dict[str, int]:
+    """Worker: assemble page layouts into a DOCX, one PDF page per Word page"""
+    document = Document()
+    default_font, default_size = _body_font(layouts)
+    normal = document.styles["Normal"]
+    normal.font.name = default_font
+    normal.font.size = Pt(default_size)
+    normal.paragraph_format.space_before = Pt(0)
+    normal.paragraph_format.space_after = Pt(0)
+    
+    counts = Counter()
+    section = document.sections[0]
+    geometry = None
+    for layout in layouts:
+        page_geometry = (layout["width"], layout["height"], layout["margins"])
+        if geometry is not None and page_geometry != geometry:
+            section = document.add_section()
+        if page_geometry != geometry:
+            _set_page_geometry(section, *page_geometry)
+        new_page = geometry is not None
+        geometry = page_geometry
+        
+        content_width = layout["width"] - layout["margins"][0] - layout["margins"][2]
+        for element in layout["elements"]:
+            if element["type"] == "table":
+                if new_page:
+                    document.add_paragraph().paragraph_format.page_break_before = True
+                _add_table(document, element)
+            else:
+                if element["type"] == "image":
+                    paragraph = _add_image(document, element, content_width)
+                else:
+                    paragraph = _add_paragraph(document, element, default_font, default_size)
+                paragraph.paragraph_format.page_break_before = new_page
+            new_page = False
+            counts[element["type"]] += 1
+    
+    document.save(output_path)
+    return {
+        "paragraphs": counts["paragraph"],
+        "tables": counts["table"],
+        "images": counts["image"]
+    }
+
+def _page_layout(page: "fitz.Page", image_dir: str) -> Dict[str, Any]:
+    """Elements of one page in display coordinates, and the reasons it is complex"""
+    rotation = page.rotation_matrix if page.rotation else None
+    turn = fitz.Matrix(rotation.a, rotation.b, rotation.c, rotation.d, 0, 0) if rotation else None
+    
+    def to_page(bbox) -> Tuple[float, float, float, float]:
+        rect = fitz.Rect(bbox) * rotation if rotation else fitz.Rect(bbox)
+        return (rect.x0, rect.y0, rect.x1, rect.y1)
+    
+    drawings = page.get_cdrawings()
+    rules = sum(1 for path in drawings for item in path["items"] if item[0] in ("l", "re"))
+    
+    elements = []
+    for table in page.find_tables().tables if rules >= MIN_TABLE_RULES else ():
+        if table.row_count < MIN_TABLE_ROWS or table.col_count < MIN_TABLE_COLUMNS:
+            continue
+        elements.append({
+            "type": "table",
+            "bbox": to_page(table.bbox),
+            "rows": [[cell or "" for cell in row] for row in table.extract()],
+            "widths": _column_widths(table)
+        })
+    table_boxes = [fitz.Rect(element["bbox"]) for element in elements]
+    
+    def in_table(bbox: Tuple[float, float, float, float]) -> bool:
+        center = fitz.Point((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        return any(center in box for box in table_boxes)
+    
+    text_lines = []
+    characters = rotated_characters = 0
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] == 1:
+            image = _page_image(block, to_page(block["bbox"]), image_dir)
+            if image and not in_table(image["bbox"]):
+                elements.append(image)
+            continue
+        
+        block_bbox = to_page(block["bbox"])
+        paragraph = previous = None
+        for line in block["lines"]:
+            text_length = sum(len(span["text"].strip()) for span in line["spans"])
+            characters += text_length
+            direction = fitz.Point(line["dir"]) * turn if turn else fitz.Point(line["dir"])
+            if abs(direction.y) > 0.01 or direction.x < 0:
+                rotated_characters += text_length
+                continue
+            bbox = to_page(line["bbox"])
+            if not text_length or in_table(bbox):
+                continue
+            
+            if paragraph is None or _starts_paragraph(previous, bbox, line, block_bbox):
+                paragraph = {"type": "paragraph", "bbox": bbox, "lines": [], "runs": []}
+                elements.append(paragraph)
+            else:
+                _join_line(paragraph["runs"], line)
+                paragraph["bbox"] = (
+                    min(paragraph["bbox"][0], bbox[0]), paragraph["bbox"][1],
+                    max(paragraph["bbox"][2], bbox[2]), bbox[3]
+                )
+            paragraph["lines"].append(bbox)
+            text_lines.append(bbox)
+            for span in line["spans"]:
+                _add_run(paragraph["runs"], span)
+            previous = (bbox, line)
+    
+    elements.sort(key=lambda element: (round(element["bbox"][1]), element["bbox"][0]))
+    margins = _text_margins(elements, page.rect)
+    _place_elements(elements, page.rect, margins)
+    
+    complex_reasons = []
+    if _side_by_side_pairs(text_lines, page.rect.width * COLUMN_MIN_LINE_SHARE) >= COLUMN_LINE_PAIRS:
+        complex_reasons.append("columns")
+    if characters and rotated_characters / characters > MAX_ROTATED_TEXT_SHARE:
+        complex_reasons.append("rotated_text")
+    if len(drawings) > MAX_PAGE_DRAWINGS:
+        complex_reasons.append("drawings")
+    
+    return {
+        "page": page.number + 1,
+        "width": page.rect.width,
+        "height": page.rect.height,
+        "margins": margins,
+        "elements": elements,
+        "complex": complex_reasons
+    }
+
+def _starts_paragraph(
+    previous: Tuple[Tuple[float, ...], Dict[str, Any]],
+    bbox: Tuple[float, ...],
+    line: Dict[str, Any],
+    block_bbox: Tuple[float, ...]
+) -> bool:
+    """Whether a line opens a new paragraph within its text block"""
+    previous_bbox, previous_line = previous
+    height = previous_bbox[3] - previous_bbox[1]
+    if bbox[1] - previous_bbox[3] > height * 0.5:
+        return True
+    first_text = line["spans"][0]["text"]
+    if _LIST_MARKER.match(first_text):
+        return True
+    # A short line ending a sentence closes its paragraph
+    block_x0, _, block_x1, _ = block_bbox
+    last_text = previous_line["spans"][-1]["text"].rstrip()
+    short = previous_bbox[2] < block_x1 - (block_x1 - block_x0) * 0.2
+    return short and last_text.endswith(_SENTENCE_END)
+
+def _join_line(runs: List[Dict[str, Any]], line: Dict[str, Any]):
+    """Join a wrapped line to its paragraph, undoing hyphenation"""
+    last = runs[-1]
+    first_text = line["spans"][0]["text"].lstrip()
+    if last["text"].endswith("-") and first_text[:1].islower():
+        last["text"] = last["text"][:-1]
+    elif not last["text"].endswith(" "):
+        last["text"] += " "
+
+def _add_run(runs: List[Dict[str, Any]], span: Dict[str, Any]):
+    """Append a span as a run, merging it into the previous run when styled alike"""
+    font_name = _SUBSET_TAG.sub("", span["font"])
+    family, _, style = font_name.replace(",", "-").partition("-")
+    run = {
+        "text": span["text"],
+        "font": _font_family(family),
+        "size": round(span["size"] * 2) / 2,
+        "bold": bool(span["flags"] & fitz.TEXT_FONT_BOLD) or "Bold" in style,
+        "italic": bool(span["flags"] & fitz.TEXT_FONT_ITALIC) or "Italic" in style or "Oblique" in style,
+        "superscript": bool(span["flags"] & fitz.TEXT_FONT_SUPERSCRIPT),
+        "color": span["color"] & 0xFFFFFF
+    }
+    if runs and all(runs[-1][key] == run[key] for key in run if key != "text"):
+        runs[-1]["text"] += run["text"]
+    elif run["text"].strip() or runs:
+        runs.append(run)
+
+def _font_family(name: str) -> str:
+    """Word family name for a PostScript font name ("TimesNewRomanPSMT" -> "Times New Roman")"""
+    name = _POSTSCRIPT_SUFFIX.sub("", name) or name
+    return _FONT_FAMILIES.get(name) or _CAMEL_CASE.sub(" ", name)
+
+def _page_image(block: Dict[str, Any], bbox: Tuple[float, ...], image_dir: str) -> Optional[Dict[str, Any]]:
+    """Image element for an image block, storing the image once per content hash"""
+    width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    if width < MIN_IMAGE_POINTS and height < MIN_IMAGE_POINTS:
+        return None
+    
+    data, extension = block["image"], block["ext"].lower()
+    if extension not in WORD_IMAGE_FORMATS:
+        try:
+            pixmap = fitz.Pixmap(data)
+            if pixmap.alpha or pixmap.n > 3:
+                pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+            data, extension = pixmap.tobytes("png"), "png"
+        except Exception as e:
+            logger.warning(f"Skipping unreadable {extension} image: {e}")
+            return None
+    
+    path = os.path.join(image_dir, f"{hashlib.sha1(data).hexdigest()}.{extension}")
+    if not os.path.exists(path):
+        with open(path, "wb") as image_file:
+            image_file.write(data)
+    return {"type": "image", "bbox": bbox, "path": path}
+
+def _column_widths(table: Any) -> List[Optional[float]]:
+    """Column widths from the first row with no merged cells, None when every row has some"""
+    for row in table.rows:
+        if len(row.cells) == table.col_count and all(row.cells):
+            return [cell[2] - cell[0] for cell in row.cells]
+    return [None] * table.col_count
+
+def _text_margins(elements: List[Dict[str, Any]], page_rect: "fitz.Rect") -> Tuple[float, float, float, float]:
+    """Left, top, right and bottom page margins around the page's content"""
+    if not elements:
+        return (DEFAULT_MARGIN_POINTS,) * 4
+    
+    def clamp(value: float) -> float:
+        return round(min(max(value, MIN_MARGIN_POINTS), MAX_MARGIN_POINTS))
+    
+    return (
+        clamp(min(element["bbox"][0] for element in elements)),
+        clamp(min(element["bbox"][1] for element in elements)),
+        clamp(page_rect.width - max(element["bbox"][2] for element in elements)),
+        clamp(page_rect.height - max(element["bbox"][3] for element in elements))
+    )
+
+def _place_elements(elements: List[Dict[str, Any]], page_rect: "fitz.Rect", margins: Tuple[float, ...]):
+    """Set each element's alignment, indents and spacing from its position"""
+    left, top, right = margins[0], margins[1], page_rect.width - margins[2]
+    previous_bottom = top
+    for element in elements:
+        x0, y0, x1, y1 = element["bbox"]
+        left_gap, right_gap = x0 - left, right - x1
+        lines = element.get("lines", [])
+        
+        element["align"] = "left"
+        element["indent"] = 0
+        element["first_line_indent"] = 0
+        if len(lines) <= 1 and left_gap > 36 and abs(left_gap - right_gap) < (right - left) * 0.05:
+            element["align"] = "center"
+        elif len(lines) <= 1 and right_gap < 4 and left_gap > 72:
+            element["align"] = "right"
+        else:
+            element["indent"] = round(max(left_gap, 0))
+            if len(lines) > 1:
+                element["first_line_indent"] = round(lines[0][0] - min(line[0] for line in lines[1:]))
+        
+        element["space_before"] = round(min(max(y0 - previous_bottom, 0), MAX_SPACE_BEFORE))
+        previous_bottom = max(previous_bottom, y1)
+        element.pop("lines", None)
+
+def _side_by_side_pairs(boxes: List[Tuple[float, ...]], min_width: float) -> int:
+    """Pairs of boxes at least min_width wide that overlap vertically but not horizontally"""
+    boxes = sorted((box for box in boxes if box[2] - box[0] >= min_width), key=lambda box: box[1])
+    pairs = 0
+    for index, a in enumerate(boxes):
+        for b in boxes[index + 1:]:
+            if b[1] >= a[3]:
+                break
+            overlap = min(a[3], b[3]) - max(a[1], b[1])
+            if overlap > min(a[3] - a[1], b[3] - b[1]) * 0.5 and (a[2] < b[0] or b[2] < a[0]):
+                pairs += 1
+                if pairs >= COLUMN_LINE_PAIRS:
+                    return pairs
+    return pairs
+
+def _body_font(layouts: List[Dict[str, Any]]) -> Tuple[str, float]:
+    """The font and size carrying most of the document's text"""
+    usage = Counter()
+    for layout in layouts:
+        for element in layout["elements"]:
+            for run in element.get("runs", ()):
+                usage[(run["font"], run["size"])] += len(run["text"])
+    if not usage:
+        return "Calibri", 11
+    return usage.most_common(1)[0][0]
+
+def _set_page_geometry(section: Any, width: float, height: float, margins: Tuple[float, ...]):
+    section.page_width = Pt(width)
+    section.page_height = Pt(height)
+    section.left_margin, section.top_margin, section.right_margin, section.bottom_margin = (
+        Pt(margin) for margin in margins
+    )
+    section.header_distance = section.footer_distance = Pt(min(margins[1], margins[3]) / 2)
+
+def _format_paragraph(paragraph: Any, element: Dict[str, Any]):
+    paragraph.alignment = _ALIGNMENTS[element["align"]]
+    paragraph_format = paragraph.paragraph_format
+    if element["indent"]:
+        paragraph_format.left_indent = Pt(element["indent"])
+    if element["first_line_indent"]:
+        paragraph_format.first_line_indent = Pt(element["first_line_indent"])
+    if element["space_before"]:
+        paragraph_format.space_before = Pt(element["space_before"])
+
+def _add_paragraph(document: Any, element: Dict[str, Any], default_font: str, default_size: float) -> Any:
+    paragraph = document.add_paragraph()
+    _format_paragraph(paragraph, element)
+    for run in element["runs"]:
+        word_run = paragraph.add_run(run["text"])
+        font = word_run.font
+        if run["font"] != default_font:
+            font.name = run["font"]
+        if run["size"] != default_size:
+            font.size = Pt(run["size"])
+        if run["bold"]:
+            font.bold = True
+        if run["italic"]:
+            font.italic = True
+        if run["superscript"]:
+            font.superscript = True
+        if run["color"]:
+            font.color.rgb = RGBColor.from_string(f"{run['color']:06X}")
+    return paragraph
+
+def _add_image(document: Any, element: Dict[str, Any], content_width: float) -> Any:
+    x0, y0, x1, y1 = element["bbox"]
+    scale = min(1, content_width / (x1 - x0)) if x1 > x0 else 1
+    paragraph = document.add_paragraph()
+    _format_paragraph(paragraph, element)
+    paragraph.add_run().add_picture(element["path"], width=Pt((x1 - x0) * scale), height=Pt((y1 - y0) * scale))
+    return paragraph
+
+def _add_table(document: Any, element: Dict[str, Any]):
+    rows = element["rows"]
+    table = document.add_table(rows=len(rows), cols=len(element["widths"]))
+    table.style = "Table Grid"
+    table.alignment = _TABLE_ALIGNMENTS[element["align"]]
+    widths = element["widths"]
+    if all(widths):
+        table.autofit = False
+    for row, values in zip(table.rows, rows):
+        for column, (cell, value) in enumerate(zip(row.cells, values)):
+            cell.text = value
+            if widths[column]:
+                cell.width = Pt(widths[column])
@@ -0,0 +1,105 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _run_initializers(initializers: tuple):
+    """Run the registered start-up hooks inside a freshly spawned worker"""
+    for initializer in initializers:
+        try:
+            initializer()
+        except Exception as e:
+            logger.error(f"Worker initializer {initializer.__name__} failed: {e}")
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+class WorkerPool:
+    """Shared process pool for CPU-bound work such as rasterizing and OCR"""
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("PDF_WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+        self._initializers: List[Callable[[], None]] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def add_initializer(self, initializer: Callable[[], None]):
+        """Register a module-level function to run once in every worker at start-up"""
+        if initializer in self._initializers:
+            return
+        if self._executor is not None:
+            logger.warning(f"Worker pool already started; {initializer.__name__} will only run in new workers")
+        self._initializers.append(initializer)
+    
+    def start(self) -> ProcessPoolExecutor:
+        """Start the pool if needed and return its executor"""
+        if self._executor is None:
+            # Spawned workers don't inherit locks or open documents from the
+            # server process, which fork would copy mid-request
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_run_initializers,
+                initargs=(tuple(self._initializers),)
+            )
+            logger.info(f"Worker pool started with {self.max_workers} processes")
+        return self._executor
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable function in a worker process"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.start(), fn, *args)
+    
+    async def map(self, fn: Callable[..., Any], arguments: Iterable[tuple]) -> List[Any]:
+        """Run one task per argument tuple across the pool, preserving order"""
+        return await asyncio.gather(*(self.run(fn, *args) for args in arguments))
+    
+    async def as_completed(
+        self,
+        fn: Callable[..., Any],
+        arguments: Iterable[tuple],
+        max_pending: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """Run one task per argument tuple, yielding (index, result) as each finishes
+        
+        At most max_pending tasks (twice the worker count by default) are
+        submitted at a time, so results never pile up faster than the caller
+        consumes them; memory stays flat however many tasks there are.
+        """
+        max_pending = max_pending or self.max_workers * 2
+        tasks = enumerate(arguments)
+        pending: Dict["asyncio.Future[Any]", int] = {}
+        try:
+            while True:
+                for index, args in tasks:
+                    pending[asyncio.ensure_future(self.run(fn, *args))] = index
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    async def warm_up(self):
+        """Start every worker now so initializers run before the first request"""
+        # Workers are spawned on demand, one per task that finds no idle worker
+        pids = await self.map(_worker_pid, [() for _ in range(self.max_workers)])
+        logger.info(f"Worker pool warmed up with {len(set(pids))} processes")
+    
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Worker pool stopped")
+
+# Global worker pool instance
+worker_pool = WorkerPool()
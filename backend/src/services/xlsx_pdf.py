@@ -0,0 +1,490 @@
+import re
+import colorsys
+import logging
+import zipfile
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from openpyxl import load_workbook
+from openpyxl.styles.colors import COLOR_INDEX
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A3, A4, LEGAL, LETTER, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import BaseDocTemplate, Frame, LongTable, NextPageTemplate, PageBreak, PageTemplate, Paragraph, Spacer, TableStyle
+
+from services.docx_pdf import base_font, is_win_ansi
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sheets larger than this go to LibreOffice, whose layout of long tables
+# scales better than reportlab's
+NATIVE_MAX_CELLS = 50_000
+
+# Excel's paper size codes; other sizes print on A4
+PAPER_SIZES = {1: LETTER, 5: LEGAL, 8: A3, 9: A4}
+
+# Column widths are in characters of the default font, rendered at 7 pixels
+# each plus 5 pixels of padding; rows without a set height are 15 points
+_CHARACTER_PIXELS = 7
+_COLUMN_PADDING_PIXELS = 5
+_DEFAULT_COLUMN_WIDTH = 8.43
+_DEFAULT_ROW_POINTS = 15
+_DEFAULT_FONT_SIZE = 11
+_CELL_PADDING = 2
+
+# Helvetica is about a tenth wider than Calibri, Excel's default font, so
+# cell text is drawn this much smaller to fit the columns it was sized for
+_FONT_SCALE = 0.9
+
+_BORDER_WIDTHS = {"hair": 0.25, "thin": 0.5, "dotted": 0.5, "dashed": 0.5, "medium": 1, "double": 1.5, "thick": 1.5}
+_ALIGNMENTS = {"left": "LEFT", "center": "CENTER", "centerContinuous": "CENTER", "right": "RIGHT"}
+_PARAGRAPH_ALIGNMENTS = {"LEFT": TA_LEFT, "CENTER": TA_CENTER, "RIGHT": TA_RIGHT}
+_VERTICAL_ALIGNMENTS = {"top": "TOP", "center": "MIDDLE", "bottom": "BOTTOM"}
+
+# Theme color slots in the order cell styles number them
+_THEME_SLOTS = ["lt1", "dk1", "lt2", "dk2", "accent1", "accent2", "accent3", "accent4", "accent5", "accent6", "hlink", "folHlink"]
+_DRAWING_NAMESPACE = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+# Number formats drawn natively: up to a positive and a negative section of
+# digits with optional grouping, decimals, percent, currency and parentheses
+_NUMBER_SECTION = re.compile(
+    r'^(?P<red>\[Red\])?(?P<open>\\?\()?(?P<prefix>"[^"]*"|\\.|[$€£¥])?(?P<grouping>#,##)?0'
+    r'(?P<decimals>\.0+)?(?P<percent>%)?(?P<suffix>\s?(?:"[^"]*"|\\.|[$€£¥]))?(?P<close>\\?\))?(?:_.)?$'
+)
+_DATE_TOKEN = re.compile(r'yyyy|yy|mmmm|mmm|mm|m|dddd|ddd|dd|d|hh|h|ss|s|AM/PM|"[^"]*"|\\.|.', re.IGNORECASE)
+_LOCALE_TAG = re.compile(r"\[\$([^-\]]*)-[0-9A-Fa-f]+\]")
+_UNCACHED_FORMULA = re.compile(rb"(?:</f>|<f\b[^>]*/>)\s*(?:<v\s*/>|<v>\s*</v>)?\s*</c>")
+
+def classify_xlsx(workbook: Any, input_path: str) -> List[str]:
+    """Reasons an XLSX needs LibreOffice; empty for workbooks the native renderer reproduces
+    
+    Looks for charts, images, conditional formatting, print areas, titles
+    and scaling other than fit to width, sheets too large or too wide for
+    the page, number formats it can't format, rotated text, text outside
+    the standard fonts' character set, and formulas without a cached value
+    (which need recalculating).
+    """
+    reasons = set()
+    if workbook.chartsheets:
+        reasons.add("charts")
+    for sheet in workbook.worksheets:
+        if sheet.sheet_state != "visible":
+            continue
+        if sheet._charts:
+            reasons.add("charts")
+        if sheet._images:
+            reasons.add("images")
+        if len(sheet.conditional_formatting):
+            reasons.add("conditional_formatting")
+        if sheet.print_area or sheet.print_title_rows or sheet.print_title_cols:
+            reasons.add("print_setup")
+        setup = sheet.page_setup
+        if _fits_to_page(sheet):
+            if setup.fitToWidth not in (None, 1) or setup.fitToHeight not in (None, 0, 1):
+                reasons.add("print_setup")
+        elif setup.scale not in (None, 100):
+            reasons.add("print_setup")
+        
+        if sheet.max_row * sheet.max_column > NATIVE_MAX_CELLS:
+            reasons.add("large_sheet")
+            continue
+        used = _used_range(sheet)
+        if used is None:
+            continue
+        if not _fits_to_page(sheet) and sum(_column_widths(sheet, used[1]).values()) > _printable_size(sheet)[0]:
+            reasons.add("wide_sheet")
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.value is None:
+                    continue
+                if isinstance(cell.value, str) and not is_win_ansi(cell.value):
+                    reasons.add("non_latin_text")
+                if cell.alignment.text_rotation:
+                    reasons.add("rotated_text")
+                try:
+                    format_value(cell.value, cell.number_format)
+                except ValueError:
+                    reasons.add("number_formats")
+    
+    with zipfile.ZipFile(input_path) as archive:
+        for name in archive.namelist():
+            if name.startswith("xl/worksheets/") and name.endswith(".xml") and _UNCACHED_FORMULA.search(archive.read(name)):
+                reasons.add("formulas")
+                break
+    return sorted(reasons)
+
+def render_xlsx(input_path: str, output_path: str, force: bool = False) -> Dict[str, Any]:
+    """Worker: render an XLSX to PDF with reportlab
+    
+    Each visible sheet with data starts on a new page, with its own paper
+    size, orientation and margins. The workbook is classified first; unless
+    force is set, a workbook with complex features is not rendered and only
+    the reasons are returned, so it can go to LibreOffice instead.
+    """
+    workbook = load_workbook(input_path, data_only=True)
+    reasons = classify_xlsx(workbook, input_path)
+    if reasons and not force:
+        return {"rendered": False, "reasons": reasons}
+    
+    theme = _theme_colors(workbook)
+    template = BaseDocTemplate(
+        output_path,
+        title=workbook.properties.title or "",
+        author=workbook.properties.creator or ""
+    )
+    page_templates, story = [], []
+    used_ranges = {sheet.title: _used_range(sheet) for sheet in workbook.worksheets if sheet.sheet_state == "visible"}
+    sheets = [sheet for sheet in workbook.worksheets if used_ranges.get(sheet.title)]
+    for index, sheet in enumerate(sheets):
+        size = _page_size(sheet)
+        margins = sheet.page_margins
+        width, height = _printable_size(sheet)
+        frame = Frame(
+            margins.left * 72, margins.bottom * 72, width, height,
+            leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0
+        )
+        page_templates.append(PageTemplate(id=f"sheet{index}", frames=[frame], pagesize=size))
+        if index:
+            story.extend([NextPageTemplate(f"sheet{index}"), PageBreak()])
+        story.append(_SheetRenderer(sheet, theme).table(used_ranges[sheet.title], width, height))
+    
+    if not page_templates:
+        page_templates.append(PageTemplate(id="empty", frames=[Frame(0, 0, *A4)], pagesize=A4))
+        story.append(Spacer(1, 1))
+    template.addPageTemplates(page_templates)
+    template.build(story)
+    return {"rendered": True, "reasons": reasons, "page_count": template.page, "sheets": len(sheets)}
+
+class _SheetRenderer:
+    """Lays a worksheet's used range out as a reportlab table"""
+    
+    def __init__(self, sheet: Any, theme: List[str]):
+        self.sheet = sheet
+        self.theme = theme
+        self._paragraph_styles: Dict[tuple, ParagraphStyle] = {}
+    
+    def table(self, used_range: Tuple[int, int], frame_width: float, frame_height: float) -> LongTable:
+        sheet = self.sheet
+        max_row, max_column = used_range
+        widths = _column_widths(sheet, max_column)
+        columns = [column for column in range(1, max_column + 1) if column in widths]
+        rows = [
+            row for row in range(1, max_row + 1)
+            if not (sheet.row_dimensions[row].hidden if row in sheet.row_dimensions else False)
+        ]
+        heights = [
+            sheet.row_dimensions[row].height if row in sheet.row_dimensions else None
+            for row in rows
+        ]
+        
+        # Fit to page shrinks everything alike, as Excel's print scaling does
+        scale = 1.0
+        if _fits_to_page(sheet):
+            natural_width = sum(widths[column] for column in columns)
+            scale = min(1.0, frame_width / natural_width) if natural_width else 1.0
+            if sheet.page_setup.fitToHeight == 1:
+                natural_height = sum(height or _DEFAULT_ROW_POINTS for height in heights)
+                scale = min(scale, frame_height / natural_height) if natural_height else scale
+        
+        row_index = {row: index for index, row in enumerate(rows)}
+        column_index = {column: index for index, column in enumerate(columns)}
+        data = [["" for _ in columns] for _ in rows]
+        commands = [
+            ("VALIGN", (0, 0), (-1, -1), "BOTTOM"),
+            ("LEFTPADDING", (0, 0), (-1, -1), _CELL_PADDING * scale),
+            ("RIGHTPADDING", (0, 0), (-1, -1), _CELL_PADDING * scale),
+            ("TOPPADDING", (0, 0), (-1, -1), _CELL_PADDING * scale / 2),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), _CELL_PADDING * scale / 2),
+            ("FONTNAME", (0, 0), (-1, -1), base_font(None, False, False)),
+            ("FONTSIZE", (0, 0), (-1, -1), _DEFAULT_FONT_SIZE * _FONT_SCALE * scale)
+        ]
+        if sheet.print_options.gridLines:
+            commands.append(("GRID", (0, 0), (-1, -1), 0.25, colors.grey))
+        
+        for sheet_row in sheet.iter_rows(min_row=1, max_row=max_row, max_col=max_column):
+            for cell in sheet_row:
+                if cell.row not in row_index or cell.column not in column_index:
+                    continue
+                position = (column_index[cell.column], row_index[cell.row])
+                data[position[1]][position[0]] = self._cell(cell, position, commands, widths[cell.column] * scale, scale)
+        
+        for merged in sheet.merged_cells.ranges:
+            start = (column_index.get(merged.min_col), row_index.get(merged.min_row))
+            end = (column_index.get(merged.max_col), row_index.get(merged.max_row))
+            if None not in start and None not in end:
+                commands.append(("SPAN", start, end))
+        
+        table = LongTable(
+            data,
+            colWidths=[widths[column] * scale for column in columns],
+            rowHeights=[height * scale if height else None for height in heights],
+            hAlign="LEFT"
+        )
+        table.setStyle(TableStyle(commands))
+        return table
+    
+    def _cell(self, cell: Any, position: Tuple[int, int], commands: List[tuple], width: float, scale: float) -> Any:
+        text, negative_red = ("", False) if cell.value is None else format_value(cell.value, cell.number_format)
+        font = cell.font
+        face = base_font(font.name, bool(font.b), bool(font.i))
+        size = (font.sz or _DEFAULT_FONT_SIZE) * _FONT_SCALE * scale
+        color = "#FF0000" if negative_red else self._color(font.color)
+        
+        # Like Excel, numbers and dates too wide for their column show as ###
+        available = width - 2 * _CELL_PADDING * scale
+        if isinstance(cell.value, (int, float, date, time)) and not isinstance(cell.value, bool):
+            if stringWidth(text, face, size) > available:
+                text = "#" * max(1, int(available // stringWidth("#", face, size)))
+        
+        if face != base_font(None, False, False):
+            commands.append(("FONTNAME", position, position, face))
+        if size != _DEFAULT_FONT_SIZE * _FONT_SCALE * scale:
+            commands.append(("FONTSIZE", position, position, size))
+        if color and color != "#000000":
+            commands.append(("TEXTCOLOR", position, position, colors.HexColor(color)))
+        
+        fill = cell.fill
+        if fill is not None and fill.fill_type == "solid":
+            background = self._color(fill.fgColor)
+            if background:
+                commands.append(("BACKGROUND", position, position, colors.HexColor(background)))
+        
+        for side, command in (("top", "LINEABOVE"), ("bottom", "LINEBELOW"), ("left", "LINEBEFORE"), ("right", "LINEAFTER")):
+            border = getattr(cell.border, side)
+            if border is not None and border.style:
+                line_color = self._color(border.color) or "#000000"
+                commands.append((command, position, position, _BORDER_WIDTHS.get(border.style, 0.5), colors.HexColor(line_color)))
+        
+        alignment = cell.alignment
+        horizontal = _ALIGNMENTS.get(alignment.horizontal)
+        if horizontal is None:
+            # General alignment: numbers and dates right, booleans centered, text left
+            if isinstance(cell.value, bool):
+                horizontal = "CENTER"
+            elif isinstance(cell.value, (int, float, date, time, timedelta)):
+                horizontal = "RIGHT"
+            else:
+                horizontal = "LEFT"
+        if horizontal != "LEFT":
+            commands.append(("ALIGN", position, position, horizontal))
+        vertical = _VERTICAL_ALIGNMENTS.get(alignment.vertical)
+        if vertical and vertical != "BOTTOM":
+            commands.append(("VALIGN", position, position, vertical))
+        
+        if alignment.wrap_text and text:
+            style = self._paragraph_style(face, size, color, horizontal)
+            return Paragraph(escape(text).replace("\n", "<br/>"), style)
+        return text
+    
+    def _paragraph_style(self, face: str, size: float, color: Optional[str], horizontal: str) -> ParagraphStyle:
+        key = (face, size, color, horizontal)
+        style = self._paragraph_styles.get(key)
+        if style is None:
+            style = ParagraphStyle(
+                f"cell{len(self._paragraph_styles)}",
+                fontName=face,
+                fontSize=size,
+                leading=size * 1.2,
+                textColor=colors.HexColor(color) if color else colors.black,
+                alignment=_PARAGRAPH_ALIGNMENTS[horizontal]
+            )
+            self._paragraph_styles[key] = style
+        return style
+    
+    def _color(self, color: Any) -> Optional[str]:
+        """A cell style color as #RRGGBB, resolving theme and indexed colors"""
+        if color is None:
+            return None
+        if color.type == "rgb" and isinstance(color.rgb, str):
+            return f"#{color.rgb[-6:]}"
+        if color.type == "indexed" and color.indexed is not None:
+            if color.indexed < len(COLOR_INDEX):
+                return f"#{COLOR_INDEX[color.indexed][-6:]}"
+            return "#000000" if color.indexed == 64 else None
+        if color.type == "theme" and color.theme is not None and color.theme < len(self.theme):
+            return _apply_tint(self.theme[color.theme], color.tint or 0)
+        return None
+
+def format_value(value: Any, number_format: str) -> Tuple[str, bool]:
+    """Cell text as Excel displays it, and whether it is shown in red
+    
+    Raises ValueError for number formats the native renderer doesn't
+    support.
+    """
+    if isinstance(value, bool):
+        return ("TRUE" if value else "FALSE"), False
+    if isinstance(value, (datetime, date, time)):
+        return _format_date(value, number_format), False
+    if isinstance(value, timedelta):
+        raise ValueError("Elapsed time formats are not supported")
+    if not isinstance(value, (int, float)):
+        return str(value), False
+    
+    number_format = _LOCALE_TAG.sub(r"\1", number_format or "General")
+    if number_format in ("General", "@"):
+        if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+            return str(int(value)), False
+        return f"{value:.10g}", False
+    
+    sections = number_format.split(";")
+    if len(sections) > 2:
+        raise ValueError(f"Number format {number_format!r} is not supported")
+    section = sections[1] if value < 0 and len(sections) == 2 else sections[0]
+    match = _NUMBER_SECTION.match(section)
+    if not match:
+        raise ValueError(f"Number format {number_format!r} is not supported")
+    
+    number = abs(value) if len(sections) == 2 and value < 0 else value
+    if match["percent"]:
+        number *= 100
+    decimals = len(match["decimals"]) - 1 if match["decimals"] else 0
+    text = f"{number:{',' if match['grouping'] else ''}.{decimals}f}"
+    prefix = (match["prefix"] or "").replace('"', "").replace("\\", "")
+    suffix = (match["suffix"] or "").replace('"', "").replace("\\", "")
+    if text.startswith("-"):
+        text = "-" + prefix + text[1:]
+    else:
+        text = prefix + text
+    text += ("%" if match["percent"] else "") + suffix
+    if match["open"] and match["close"]:
+        text = f"({text})"
+    return text, bool(match["red"])
+
+def _format_date(value: Any, number_format: str) -> str:
+    number_format = _LOCALE_TAG.sub(r"\1", number_format or "General")
+    # Format 14 is the locale's short date, which openpyxl reports as mm-dd-yy
+    if number_format == "mm-dd-yy":
+        number_format = "m/d/yyyy"
+    if number_format in ("General", "@"):
+        number_format = "yyyy-mm-dd h:mm" if isinstance(value, datetime) else "h:mm:ss" if isinstance(value, time) else "yyyy-mm-dd"
+    if "[" in number_format or ";" in number_format:
+        raise ValueError(f"Date format {number_format!r} is not supported")
+    if isinstance(value, time):
+        value = datetime.combine(date(1900, 1, 1), value)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    
+    tokens = _DATE_TOKEN.findall(number_format)
+    twelve_hour = any(token.upper() == "AM/PM" for token in tokens)
+    parts = []
+    for index, token in enumerate(tokens):
+        lower = token.lower()
+        # "m" after hours or before seconds is minutes, otherwise months
+        previous = next((item.lower() for item in reversed(tokens[:index]) if item.strip() and item[0].isalpha()), "")
+        following = next((item.lower() for item in tokens[index + 1:] if item.strip() and item[0].isalpha()), "")
+        minutes = lower in ("m", "mm") and (previous.startswith("h") or following.startswith("s"))
+        if lower == "yyyy":
+            parts.append(f"{value.year:04d}")
+        elif lower == "yy":
+            parts.append(f"{value.year % 100:02d}")
+        elif lower == "mmmm":
+            parts.append(value.strftime("%B"))
+        elif lower == "mmm":
+            parts.append(value.strftime("%b"))
+        elif lower in ("mm", "m"):
+            number = value.minute if minutes else value.month
+            parts.append(f"{number:02d}" if lower == "mm" else str(number))
+        elif lower == "dddd":
+            parts.append(value.strftime("%A"))
+        elif lower == "ddd":
+            parts.append(value.strftime("%a"))
+        elif lower in ("dd", "d"):
+            parts.append(f"{value.day:02d}" if lower == "dd" else str(value.day))
+        elif lower in ("hh", "h"):
+            hour = (value.hour % 12 or 12) if twelve_hour else value.hour
+            parts.append(f"{hour:02d}" if lower == "hh" else str(hour))
+        elif lower in ("ss", "s"):
+            parts.append(f"{value.second:02d}" if lower == "ss" else str(value.second))
+        elif lower == "am/pm":
+            parts.append("AM" if value.hour < 12 else "PM")
+        elif token.startswith('"'):
+            parts.append(token.strip('"'))
+        elif token.startswith("\\"):
+            parts.append(token[1:])
+        elif token.isalpha() or token in "#0?*_":
+            raise ValueError(f"Date format {number_format!r} is not supported")
+        else:
+            parts.append(token)
+    return "".join(parts)
+
+def _used_range(sheet: Any) -> Optional[Tuple[int, int]]:
+    """Last row and column holding a value, or None for an empty sheet"""
+    max_row = max_column = 0
+    for row in sheet.iter_rows():
+        for cell in row:
+            if cell.value is not None and cell.value != "":
+                max_row = max(max_row, cell.row)
+                max_column = max(max_column, cell.column)
+    return (max_row, max_column) if max_row else None
+
+def _column_widths(sheet: Any, max_column: int) -> Dict[int, float]:
+    """Width in points of every visible column up to max_column"""
+    default = sheet.sheet_format.defaultColWidth or _DEFAULT_COLUMN_WIDTH
+    widths = {column: default for column in range(1, max_column + 1)}
+    for key, dimension in sheet.column_dimensions.items():
+        first = dimension.min if dimension.min else _column_number(key)
+        last = dimension.max if dimension.max else first
+        for column in range(first, min(last, max_column) + 1):
+            if dimension.hidden:
+                widths.pop(column, None)
+            elif dimension.width:
+                widths[column] = dimension.width
+    return {column: (width * _CHARACTER_PIXELS + _COLUMN_PADDING_PIXELS) * 0.75 for column, width in widths.items()}
+
+def _column_number(letter: str) -> int:
+    number = 0
+    for character in letter:
+        number = number * 26 + ord(character.upper()) - ord("A") + 1
+    return number
+
+def _fits_to_page(sheet: Any) -> bool:
+    properties = sheet.sheet_properties.pageSetUpPr
+    return bool(properties is not None and properties.fitToPage)
+
+def _page_size(sheet: Any) -> Tuple[float, float]:
+    try:
+        size = PAPER_SIZES.get(int(sheet.page_setup.paperSize or 9), A4)
+    except (TypeError, ValueError):
+        size = A4
+    return landscape(size) if sheet.page_setup.orientation == "landscape" else size
+
+def _printable_size(sheet: Any) -> Tuple[float, float]:
+    width, height = _page_size(sheet)
+    margins = sheet.page_margins
+    return width - (margins.left + margins.right) * 72, height - (margins.top + margins.bottom) * 72
+
+def _theme_colors(workbook: Any) -> List[str]:
+    """Theme colors as #RRGGBB in cell style order (light 1, dark 1, light 2, dark 2, accents, links)"""
+    if not workbook.loaded_theme:
+        return []
+    try:
+        root = ElementTree.fromstring(workbook.loaded_theme)
+    except ElementTree.ParseError:
+        return []
+    scheme = root.find(f".//{_DRAWING_NAMESPACE}clrScheme")
+    if scheme is None:
+        return []
+    colors_by_slot = {}
+    for slot in scheme:
+        name = slot.tag.replace(_DRAWING_NAMESPACE, "")
+        value = slot.find(f"{_DRAWING_NAMESPACE}srgbClr")
+        system = slot.find(f"{_DRAWING_NAMESPACE}sysClr")
+        if value is not None:
+            colors_by_slot[name] = f"#{value.get('val')}"
+        elif system is not None:
+            colors_by_slot[name] = f"#{system.get('lastClr', '000000')}"
+    return [colors_by_slot.get(slot, "#000000") for slot in _THEME_SLOTS]
+
+def _apply_tint(color: str, tint: float) -> str:
+    """Lighten (positive tint) or darken (negative tint) a color in HLS, as Excel does"""
+    if not tint:
+        return color
+    red, green, blue = (int(color[index:index + 2], 16) / 255 for index in (1, 3, 5))
+    hue, lightness, saturation = colorsys.rgb_to_hls(red, green, blue)
+    lightness = lightness * (1 + tint) if tint < 0 else lightness * (1 - tint) + tint
+    red, green, blue = colorsys.hls_to_rgb(hue, lightness, saturation)
+    return "#" + "".join(f"{round(channel * 255):02X}" for channel in (red, green, blue))
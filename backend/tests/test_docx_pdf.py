@@ -0,0 +1,35 @@
+import docx
+import pytest
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from services.docx_pdf import classify_docx
+
+
+def _shaded_document(**attributes):
+    document = docx.Document()
+    paragraph = document.add_paragraph("Body text")
+    shading = OxmlElement("w:shd")
+    for name, value in attributes.items():
+        shading.set(qn(f"w:{name}"), value)
+    paragraph._p.get_or_add_pPr().append(shading)
+    return document
+
+
+@pytest.mark.parametrize("attributes", [
+    {},
+    {"val": "clear", "color": "auto", "fill": "auto"},
+    {"val": "clear", "color": "auto", "fill": "FFFFFF"},
+    {"val": "nil"}
+])
+def test_blank_shading_is_simple(attributes):
+    assert "shading" not in classify_docx(_shaded_document(**attributes))
+
+
+@pytest.mark.parametrize("attributes", [
+    {"val": "clear", "color": "auto", "fill": "D9E2F3"},
+    {"val": "clear", "color": "auto", "fill": "auto", "themeFill": "accent1"},
+    {"val": "pct25", "color": "auto", "fill": "auto"}
+])
+def test_coloured_shading_is_complex(attributes):
+    assert "shading" in classify_docx(_shaded_document(**attributes))
@@ -0,0 +1,23 @@
+import zipfile
+
+import pytest
+
+from services.file_storage import PartArchive
+
+
+@pytest.mark.parametrize("zip64_limit", [zipfile.ZIP64_LIMIT, 1000])
+def test_manifest_offsets_point_at_part_data(tmp_path, monkeypatch, zip64_limit):
+    # A small limit makes later entries ZIP64 without writing gigabytes
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", zip64_limit)
+    path = tmp_path / "parts.zip"
+    parts = {f"page_{number}.pdf": bytes([number]) * (700 * number) for number in range(1, 6)}
+    with PartArchive(str(path)) as archive:
+        for filename, data in parts.items():
+            archive.add(filename, data)
+
+    with open(path, "rb") as archive_file:
+        for entry in archive.manifest:
+            archive_file.seek(entry["offset"])
+            assert archive_file.read(entry["size"]) == parts[entry["filename"]]
+    with zipfile.ZipFile(path) as archive_zip:
+        assert {name: archive_zip.read(name) for name in archive_zip.namelist()} == parts
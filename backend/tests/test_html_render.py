@@ -0,0 +1,23 @@
+import sys
+
+import pytest
+
+from services.html_render import _connect_public, fetch_resource
+
+
+@pytest.mark.parametrize("host", [
+    "127.0.0.1", "localhost", "::1", "10.1.2.3", "192.168.0.10", "169.254.169.254", "100.64.0.1", "0.0.0.0",
+    "::ffff:127.0.0.1"
+])
+def test_internal_addresses_are_refused(host):
+    with pytest.raises(ValueError, match="not allowed"):
+        _connect_public((host, 80), 1)
+
+
+def test_local_files_are_refused():
+    with pytest.raises(ValueError, match="not allowed"):
+        fetch_resource("file:///etc/passwd")
+
+
+def test_weasyprint_is_not_imported_with_the_module():
+    assert "weasyprint" not in sys.modules
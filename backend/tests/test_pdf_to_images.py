@@ -0,0 +1,22 @@
+import asyncio
+
+import fitz
+import pytest
+from fastapi import HTTPException
+
+from services.pdf_utils import pdf_processor
+
+
+def test_reversed_page_range_is_rejected(tmp_path):
+    source = tmp_path / "pages.pdf"
+    with fitz.open() as doc:
+        for _ in range(6):
+            doc.new_page()
+        doc.save(source)
+
+    archive = tmp_path / "images.zip"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pdf_processor.pdf_to_images(str(source), str(archive), pages="5-2"))
+    assert error.value.status_code == 400
+    assert "Invalid page range 5-2" in error.value.detail
+    assert not archive.exists()
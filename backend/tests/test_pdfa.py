@@ -0,0 +1,63 @@
+import fitz
+
+from services.pdfa import convert_document_to_pdfa, validate_pdfa
+
+
+def _draw_transparent_page(doc):
+    # PyMuPDF writes opacity as an ExtGState inline in the page resources,
+    # without /Type
+    page = doc.new_page()
+    page.draw_rect(fitz.Rect(72, 72, 300, 200), color=(1, 0, 0), fill=(0, 0, 1), fill_opacity=0.5, stroke_opacity=0.7)
+    page.insert_text((72, 300), "Body text")
+    return page
+
+
+def _opacities(doc):
+    values = []
+    for xref in range(1, doc.xref_length()):
+        source = doc.xref_object(xref, compressed=True)
+        values += [token for token in ("/ca .5", "/CA .7") if token in source]
+    return values
+
+
+def test_inline_page_opacity_is_removed_for_pdfa_1(tmp_path):
+    source = tmp_path / "transparent.pdf"
+    with fitz.open() as doc:
+        _draw_transparent_page(doc)
+        doc.save(source)
+    assert not validate_pdfa(str(source), "1b")["checks"]["no_transparency"]
+
+    output = tmp_path / "pdfa.pdf"
+    stats = convert_document_to_pdfa(str(source), str(output), "1b")
+    assert stats["transparency_removed"] == 1
+    assert stats["validation"]["checks"]["no_transparency"]
+    with fitz.open(output) as doc:
+        assert _opacities(doc) == []
+
+
+def test_form_xobject_opacity_is_removed_for_pdfa_1(tmp_path):
+    source = tmp_path / "transparent_form.pdf"
+    with fitz.open() as drawing, fitz.open() as doc:
+        _draw_transparent_page(drawing)
+        doc.new_page().show_pdf_page(fitz.Rect(0, 0, 300, 420), drawing, 0)
+        doc.save(source)
+    assert not validate_pdfa(str(source), "1b")["checks"]["no_transparency"]
+
+    output = tmp_path / "pdfa.pdf"
+    stats = convert_document_to_pdfa(str(source), str(output), "1b")
+    assert stats["validation"]["checks"]["no_transparency"]
+    with fitz.open(output) as doc:
+        assert _opacities(doc) == []
+
+
+def test_transparency_is_kept_for_pdfa_2(tmp_path):
+    source = tmp_path / "transparent.pdf"
+    with fitz.open() as doc:
+        _draw_transparent_page(doc)
+        doc.save(source)
+
+    output = tmp_path / "pdfa.pdf"
+    stats = convert_document_to_pdfa(str(source), str(output), "2b")
+    assert stats["transparency_removed"] == 0
+    with fitz.open(output) as doc:
+        assert len(_opacities(doc)) == 2
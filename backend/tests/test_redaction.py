@@ -0,0 +1,107 @@
+import asyncio
+
+import fitz
+import pytest
+from fastapi import HTTPException
+
+import services.redaction
+from services.pdf_utils import pdf_processor, REDACT_PARALLEL_MIN_PAGES
+from services.worker_pool import worker_pool
+
+PAGE_COUNT = REDACT_PARALLEL_MIN_PAGES + 40
+
+
+@pytest.fixture
+def pool():
+    workers = worker_pool.max_workers
+    worker_pool.max_workers = 2
+    yield worker_pool
+    worker_pool.shutdown()
+    worker_pool.max_workers = workers
+
+
+def _build_document(path):
+    with fitz.open() as doc:
+        for number in range(PAGE_COUNT):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {number + 1}")
+            page.insert_text((72, 100), "Customer SSN 123-45-6789 on file")
+        # Links that point from one end of the document to the other, so
+        # they cross any split into page chunks
+        doc[PAGE_COUNT - 10].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 120, 200, 140), "page": 0})
+        doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 120, 200, 140), "page": PAGE_COUNT - 10})
+        widget = fitz.Widget()
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.field_name = "customer_name"
+        widget.rect = fitz.Rect(72, 200, 300, 220)
+        doc[1].add_widget(widget)
+        doc.set_toc([[1, "Start", 1], [1, "End", PAGE_COUNT - 10]])
+        doc.save(path)
+
+
+def _redact(input_path, output_path, patterns):
+    return asyncio.run(pdf_processor.redact_pdf(str(input_path), str(output_path), patterns=patterns))
+
+
+def test_chunked_redaction_keeps_document_structure(tmp_path, pool):
+    source = tmp_path / "source.pdf"
+    _build_document(source)
+
+    output = tmp_path / "redacted.pdf"
+    result = _redact(source, output, ["ssn"])
+    assert result["pattern_matches"] == {"ssn": PAGE_COUNT}
+    assert result["areas_redacted"] == 0
+    assert result["pages_redacted"] == PAGE_COUNT
+
+    with fitz.open(output) as doc:
+        assert doc.page_count == PAGE_COUNT
+        assert "123-45-6789" not in "".join(page.get_text() for page in doc)
+        assert "Customer SSN" in doc[PAGE_COUNT - 1].get_text()
+        assert [link["page"] for link in doc[PAGE_COUNT - 10].get_links()] == [0]
+        assert [link["page"] for link in doc[0].get_links()] == [PAGE_COUNT - 10]
+        assert [widget.field_name for widget in doc[1].widgets()] == ["customer_name"]
+        assert doc.get_toc() == [[1, "Start", 1], [1, "End", PAGE_COUNT - 10]]
+
+
+def test_output_does_not_depend_on_worker_count(tmp_path, pool):
+    source = tmp_path / "source.pdf"
+    _build_document(source)
+
+    chunked = tmp_path / "chunked.pdf"
+    _redact(source, chunked, ["ssn"])
+    pool.max_workers = 1
+    in_process = tmp_path / "in_process.pdf"
+    _redact(source, in_process, ["ssn"])
+
+    with fitz.open(chunked) as first, fitz.open(in_process) as second:
+        for page_a, page_b in zip(first, second):
+            assert page_a.get_text() == page_b.get_text()
+            assert page_a.get_links() == page_b.get_links()
+
+
+def test_backtracking_pattern_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(services.redaction, "REDACT_PATTERN_TIMEOUT", 0.2)
+    source = tmp_path / "source.pdf"
+    with fitz.open() as doc:
+        doc.new_page().insert_textbox(fitz.Rect(36, 36, 560, 800), "x" * 3000, fontsize=6)
+        doc.save(source)
+
+    with pytest.raises(HTTPException) as error:
+        _redact(source, tmp_path / "redacted.pdf", ["(x+x+)+y"])
+    assert error.value.status_code == 400
+    assert "took longer" in error.value.detail
+
+
+def test_pattern_matches_are_not_counted_as_areas(tmp_path):
+    source = tmp_path / "source.pdf"
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 100), "SSN 123-45-6789 and 987-65-4321")
+        doc.save(source)
+
+    areas = '[{"page": 1, "x": 72, "y": 300, "width": 100, "height": 20}]'
+    result = asyncio.run(pdf_processor.redact_pdf(
+        str(source), str(tmp_path / "redacted.pdf"), redaction_areas=areas, patterns=["ssn"]
+    ))
+    assert result["areas_redacted"] == 1
+    assert result["pattern_matches"] == {"ssn": 2}
@@ -0,0 +1,84 @@
+import datetime
+import re
+import shutil
+import subprocess
+
+import fitz
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+import services.signing
+from services.signing import sign_document
+
+
+@pytest.fixture(params=["rsa", "ec"])
+def signer(request, tmp_path, monkeypatch):
+    if request.param == "rsa":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(x509.NameOID.COMMON_NAME, "Test Signer")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_path = tmp_path / "key.pem"
+    certificate_path = tmp_path / "certificate.pem"
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    certificate_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    monkeypatch.setenv("SIGNING_KEY_PATH", str(key_path))
+    monkeypatch.setenv("SIGNING_CERT_PATH", str(certificate_path))
+    monkeypatch.setattr(services.signing, "_signer", None)
+    return certificate_path
+
+
+def _signed_parts(path):
+    data = path.read_bytes()
+    byte_range = [int(value) for value in re.search(rb"/ByteRange\s*\[([\d\s]+)\]", data).group(1).split()]
+    first_start, first_length, second_start, second_length = byte_range
+    signed = data[first_start:first_start + first_length] + data[second_start:second_start + second_length]
+    contents = bytes.fromhex(data[first_start + first_length:second_start].strip(b"<>").decode())
+    # The DER blob is padded with zeros to the reserved size
+    length_bytes = contents[1] & 0x7F if contents[1] & 0x80 else 0
+    length = int.from_bytes(contents[2:2 + length_bytes], "big") if length_bytes else contents[1]
+    return byte_range, len(data), signed, contents[:2 + length_bytes + length]
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl is needed to verify the signature")
+def test_signature_covers_the_byte_range(tmp_path, signer, monkeypatch):
+    # Small blocks so the placeholder search and hashing cross block boundaries
+    monkeypatch.setattr(services.signing, "SIGNING_READ_BLOCK", 4096)
+    source = tmp_path / "source.pdf"
+    with fitz.open() as doc:
+        for number in range(20):
+            doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+        doc.save(source)
+
+    output = tmp_path / "signed.pdf"
+    result = sign_document(str(source), str(output), "Approved", 0, (72, 600, 200, 60), "Review")
+    assert result["save_mode"] == "incremental"
+    assert output.read_bytes().startswith(source.read_bytes())
+
+    byte_range, size, signed, signature = _signed_parts(output)
+    assert byte_range[0] == 0 and byte_range[2] + byte_range[3] == size
+    content_path = tmp_path / "content.bin"
+    content_path.write_bytes(signed)
+    signature_path = tmp_path / "signature.der"
+    signature_path.write_bytes(signature)
+    verified = subprocess.run(
+        ["openssl", "cms", "-verify", "-binary", "-inform", "DER", "-in", str(signature_path),
+         "-content", str(content_path), "-CAfile", str(signer), "-purpose", "any", "-out", "/dev/null"],
+        capture_output=True
+    )
+    assert verified.returncode == 0, verified.stderr.decode()
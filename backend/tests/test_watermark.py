@@ -0,0 +1,62 @@
+import asyncio
+
+import fitz
+
+from services.pdf_utils import pdf_processor
+
+
+def _watermark(input_path, output_path, text):
+    return asyncio.run(pdf_processor.add_watermark(str(input_path), str(output_path), text))
+
+
+def _text_center(page, text):
+    boxes = [fitz.Rect(line["bbox"]) for block in page.get_text("dict")["blocks"] for line in block.get("lines", [])
+             if text in "".join(span["text"] for span in line["spans"])]
+    assert boxes, f"{text!r} not found on page {page.number + 1}"
+    box = boxes[0]
+    return (box.x0 + box.x1) / 2, (box.y0 + box.y1) / 2
+
+
+def test_mixed_page_sizes_sharing_resources(tmp_path):
+    source = tmp_path / "mixed.pdf"
+    with fitz.open() as doc:
+        for width, height in (fitz.paper_size("a4"), fitz.paper_size("letter-l"), (300, 900)):
+            page = doc.new_page(width=width, height=height)
+            page.insert_text((72, 72), "Body text")
+        # One indirect /Resources dictionary for every page
+        resources_type, resources = doc.xref_get_key(doc[0].xref, "Resources")
+        if resources_type == "xref":
+            resources = doc.xref_object(int(resources.split()[0]))
+        shared = doc.get_new_xref()
+        doc.update_object(shared, resources)
+        for page in doc:
+            doc.xref_set_key(page.xref, "Resources", f"{shared} 0 R")
+        doc.save(source)
+
+    output = tmp_path / "watermarked.pdf"
+    result = _watermark(source, output, "CONFIDENTIAL")
+    assert result["pages_watermarked"] == 3
+
+    with fitz.open(output) as doc:
+        for page in doc:
+            x, y = _text_center(page, "CONFIDENTIAL")
+            assert abs(x - page.rect.width / 2) < page.rect.width * 0.05
+            assert abs(y - page.rect.height / 2) < page.rect.height * 0.05
+
+
+def test_second_watermark_is_added(tmp_path):
+    source = tmp_path / "plain.pdf"
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "Body text")
+        doc.save(source)
+
+    first = tmp_path / "first.pdf"
+    second = tmp_path / "second.pdf"
+    _watermark(source, first, "DRAFT")
+    _watermark(first, second, "COPY")
+
+    with fitz.open(second) as doc:
+        text = doc[0].get_text()
+        assert "DRAFT" in text
+        assert "COPY" in text
+        assert "Body text" in text